@@ -0,0 +1,22 @@
+"""Preparación común de las pruebas: un Ensamblador8086 con un programa ya procesado"""
+from typing import Iterable, Optional
+
+from ensamblador import Ensamblador8086, LimitesAnalisis
+
+
+def ensamblado(lineas: Iterable[str], codificar: bool = True,
+               asm: Optional[Ensamblador8086] = None, **limites) -> Ensamblador8086:
+    """
+    Carga 'lineas' (con preprocesado), las analiza y, si 'codificar', las
+    codifica. Usa 'asm' si se da (ej. uno instrumentado) o uno nuevo; los
+    argumentos restantes van a LimitesAnalisis.
+    """
+    if asm is None:
+        asm = Ensamblador8086()
+    if limites:
+        asm.limites = LimitesAnalisis(**limites)
+    asm.cargar_lineas(list(lineas))
+    asm.analizar_sintaxis()
+    if codificar:
+        asm.generar_codificacion()
+    return asm
@@ -0,0 +1,73 @@
+"""
+Benchmark del enlazador: tiempo de enlace según la cantidad de módulos.
+
+Cada módulo exporta una rutina y una variable, y referencia las del módulo
+anterior, así todas las reubicaciones cruzan módulos. El tiempo por módulo
+debe mantenerse aproximadamente constante (escalamiento lineal).
+
+Uso:
+    python benchmarks/bench_enlazador.py [--modulos 100,250,500,1000] [--repeticiones N]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ensamblador import Ensamblador8086
+from enlazador import enlazar
+from objeto import ModuloObjeto
+
+
+def fuente_modulo(i: int) -> str:
+    anterior = f"EXTRN r{i - 1}:NEAR, v{i - 1}:WORD" if i else ""
+    referencias = f"    lea si, v{i - 1}\n    jc r{i - 1}\n" if i else ""
+    return f"""
+PUBLIC r{i}, v{i}
+{anterior}
+.data segment
+v{i} dw {i}
+ends
+.code segment
+r{i}:
+{referencias}    nop
+ends
+"""
+
+
+def ensamblar(texto: str) -> Ensamblador8086:
+    asm = Ensamblador8086()
+    asm.lineas_codigo = texto.strip('\n').split('\n')
+    asm.analizar_sintaxis()
+    asm.generar_codificacion()
+    return asm
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--modulos', default='100,250,500,1000',
+                        help='cantidades de módulos separadas por coma')
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+    cantidades = [int(n) for n in args.modulos.split(',')]
+
+    # Los objetos se serializan y se vuelven a leer como lo haría el enlazador desde disco
+    binarios = []
+    for i in range(max(cantidades)):
+        binarios.append(ModuloObjeto.desde_ensamblador(ensamblar(fuente_modulo(i)), f'm{i}').a_bytes())
+
+    print(f"{'Módulos':>8} {'Tiempo (ms)':>12} {'µs/módulo':>10} {'Bytes':>7}")
+    for cantidad in cantidades:
+        modulos = [ModuloObjeto.desde_bufer(b, f'm{i}') for i, b in enumerate(binarios[:cantidad])]
+        mejor = float('inf')
+        for _ in range(args.repeticiones):
+            inicio = time.perf_counter()
+            resultado = enlazar(modulos)
+            mejor = min(mejor, time.perf_counter() - inicio)
+        print(f"{cantidad:>8} {mejor * 1000:>12.2f} {mejor / cantidad * 1e6:>10.1f} {len(resultado.imagen):>7}")
+
+
+if __name__ == '__main__':
+    main()
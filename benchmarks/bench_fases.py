@@ -0,0 +1,124 @@
+"""
+Benchmark por fases del ensamblador sobre programas sintéticos.
+
+Para cada tamaño genera un programa válido (y, con --errores, uno con esa
+fracción de líneas incorrectas), lo escribe a disco y mide cargar_archivo,
+analizar_sintaxis, generar_codificacion y la exportación (.lst y .jsonl).
+Los resultados se escriben como JSON; cada fase se compara con su umbral en
+microsegundos por línea (benchmarks/umbrales.json) y el código de salida es 1
+si alguna lo excede.
+
+Uso:
+    python benchmarks/bench_fases.py [--tamanos 1000,10000,100000] [--errores 0.05]
+                                     [--salida resultados.json] [--umbrales umbrales.json]
+    python benchmarks/bench_fases.py --tamanos 1000000      # 1M líneas (varios minutos)
+"""
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from ensamblador import Ensamblador8086
+from escritores import exportar
+from generador import escribir_programa
+
+UMBRALES_PREDETERMINADOS = Path(__file__).resolve().parent / 'umbrales.json'
+
+
+def medir(ruta: Path, directorio: Path) -> dict:
+    """Segundos de cada fase para el programa en 'ruta'."""
+    fases = {}
+    asm = Ensamblador8086()
+
+    inicio = time.perf_counter()
+    if not asm.cargar_archivo(str(ruta)):
+        raise RuntimeError(f"No se pudo cargar {ruta}")
+    fases['cargar_archivo'] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    asm.analizar_sintaxis()
+    fases['analizar_sintaxis'] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    asm.generar_codificacion()
+    fases['generar_codificacion'] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    exportar(asm, str(directorio / 'salida.lst'))
+    exportar(asm, str(directorio / 'salida.jsonl'))
+    fases['exportar'] = time.perf_counter() - inicio
+
+    errores = sum(a['resultado'] == 'Incorrecta' for a in asm.lineas_analizadas)
+    return {'fases': fases, 'lineas_incorrectas': errores}
+
+
+def comparar(resultado: dict, umbrales: dict) -> list:
+    """Fases que exceden su umbral (µs por línea): [(fase, medido, umbral)]."""
+    excedidas = []
+    for fase, segundos in resultado['fases'].items():
+        umbral = umbrales.get(fase)
+        por_linea = segundos / resultado['lineas'] * 1e6
+        if umbral is not None and por_linea > umbral:
+            excedidas.append((fase, round(por_linea, 2), umbral))
+    return excedidas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tamanos', default='1000,10000,100000',
+                        help='cantidades de líneas separadas por coma')
+    parser.add_argument('--errores', type=float, default=0.0,
+                        help='también mide un programa con esta fracción de líneas incorrectas')
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--salida', help='archivo JSON de resultados (por omisión, salida estándar)')
+    parser.add_argument('--umbrales', default=str(UMBRALES_PREDETERMINADOS),
+                        help='JSON {fase: µs por línea}; vacío para no comparar')
+    args = parser.parse_args()
+
+    umbrales = json.loads(Path(args.umbrales).read_text(encoding='utf-8')) if args.umbrales else {}
+    variantes = [('valido', 0.0)] + ([('con_errores', args.errores)] if args.errores else [])
+
+    resultados = []
+    regresiones = []
+    with tempfile.TemporaryDirectory() as temporal:
+        directorio = Path(temporal)
+        for tamano in (int(t) for t in args.tamanos.split(',')):
+            for variante, errores in variantes:
+                ruta = directorio / f'programa_{tamano}_{variante}.asm'
+                lineas = escribir_programa(str(ruta), tamano, errores, semilla=args.semilla)
+                resultado = {'tamano': tamano, 'variante': variante, 'lineas': lineas, **medir(ruta, directorio)}
+                resultado['us_por_linea'] = {fase: round(s / lineas * 1e6, 2) for fase, s in resultado['fases'].items()}
+                excedidas = comparar(resultado, umbrales)
+                resultado['regresiones'] = [{'fase': f, 'us_por_linea': m, 'umbral': u} for f, m, u in excedidas]
+                regresiones += excedidas
+                resultados.append(resultado)
+                print(f"{tamano:>8} {variante:<12} " + ' '.join(
+                    f"{fase}={s:.3f}s" for fase, s in resultado['fases'].items()), file=sys.stderr)
+                ruta.unlink()
+
+    informe = {
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'umbrales': umbrales,
+        'resultados': resultados,
+        'regresion': bool(regresiones),
+    }
+    texto = json.dumps(informe, ensure_ascii=False, indent=2)
+    if args.salida:
+        Path(args.salida).write_text(texto + '\n', encoding='utf-8')
+    else:
+        print(texto)
+    for fase, medido, umbral in regresiones:
+        print(f"Regresión: {fase} {medido} µs/línea (umbral {umbral})", file=sys.stderr)
+    sys.exit(1 if regresiones else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark del intérprete 8086: instrucciones por segundo en CPython.
+
+Uso:
+    python benchmarks/bench_interprete.py [--instrucciones N]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ensamblador import Ensamblador8086
+from interprete8086 import Interprete8086
+
+# Ciclo de 65535 iteraciones: XOR deja ZF=1, así LOOPE solo termina cuando CX llega a 0
+PROGRAMA = """
+.code segment
+inicio:
+    xor cx, cx
+ciclo:
+    inc bx
+    nop
+    cmc
+    xor dx, dx
+    loope ciclo
+ends
+end inicio
+"""
+
+
+def ensamblar(texto: str) -> Ensamblador8086:
+    asm = Ensamblador8086()
+    asm.lineas_codigo = texto.strip('\n').split('\n')
+    asm.analizar_sintaxis()
+    asm.generar_codificacion()
+    return asm
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--instrucciones', type=int, default=5_000_000,
+                        help='total aproximado de instrucciones a ejecutar')
+    args = parser.parse_args()
+
+    asm = ensamblar(PROGRAMA)
+    cpu = Interprete8086()
+    ip_inicial = cpu.cargar_ensamblador(asm)
+
+    total = 0
+    inicio = time.perf_counter()
+    while total < args.instrucciones:
+        cpu.reiniciar(ip_inicial)
+        total += cpu.ejecutar(args.instrucciones - total)
+    transcurrido = time.perf_counter() - inicio
+
+    print(f"Instrucciones ejecutadas: {total}")
+    print(f"Tiempo: {transcurrido:.3f} s")
+    print(f"Instrucciones/s: {total / transcurrido:,.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Latencia del servidor LSP desde el tecleo hasta los diagnósticos publicados.
+
+Abre un programa sintético (benchmarks/generador.py) y envía didChange
+incrementales de un carácter en líneas al azar (escribir y borrar), midiendo
+cuánto tarda ServidorLSP en procesar cada cambio y serializar su
+publishDiagnostics. El código de salida es 1 si el p99 supera --limite ms.
+
+Uso:
+    python benchmarks/bench_lsp.py [--lineas 20000] [--tecleos 500] [--limite 50]
+"""
+
+import argparse
+import io
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from generador import generar_programa
+from lsp import ServidorLSP
+
+URI = 'file:///programa.asm'
+
+
+def percentil(valores, p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--lineas', type=int, default=20000)
+    parser.add_argument('--tecleos', type=int, default=500)
+    parser.add_argument('--errores', type=float, default=0.01, help='fracción de líneas incorrectas')
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--limite', type=float, default=50.0, help='p99 máximo en ms')
+    args = parser.parse_args()
+
+    rng = random.Random(args.semilla)
+    servidor = ServidorLSP(io.BytesIO(), io.BytesIO())
+    texto = '\n'.join(generar_programa(args.lineas, args.errores, semilla=args.semilla))
+    inicio = time.perf_counter()
+    servidor.manejar({'jsonrpc': '2.0', 'method': 'textDocument/didOpen',
+                      'params': {'textDocument': {'uri': URI, 'text': texto, 'version': 0}}})
+    apertura = time.perf_counter() - inicio
+    documento = servidor.documentos[URI]
+
+    latencias = []
+    validadas = []
+    for version in range(1, args.tecleos + 1):
+        linea = rng.randrange(len(documento.lineas))
+        columna = len(documento.lineas[linea])
+        if version % 2:
+            rango, nuevo = (linea, columna, linea, columna), rng.choice('x1 :')
+        else:
+            rango, nuevo = (linea, max(0, columna - 1), linea, columna), ''
+        cambio = {'range': {'start': {'line': rango[0], 'character': rango[1]},
+                            'end': {'line': rango[2], 'character': rango[3]}}, 'text': nuevo}
+        servidor.salida = io.BytesIO()
+        inicio = time.perf_counter()
+        servidor.manejar({'jsonrpc': '2.0', 'method': 'textDocument/didChange',
+                          'params': {'textDocument': {'uri': URI, 'version': version},
+                                     'contentChanges': [cambio]}})
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        validadas.append(documento.lineas_validadas)
+
+    p99 = percentil(latencias, 99)
+    print(f"Documento: {len(documento.lineas)} líneas, apertura {apertura * 1000:.0f} ms")
+    print(f"Tecleo -> diagnósticos ms: p50 {percentil(latencias, 50):.2f}  p90 {percentil(latencias, 90):.2f}  "
+          f"p99 {p99:.2f}  máx {max(latencias):.2f}")
+    print(f"Líneas revalidadas por tecleo: mediana {statistics.median(validadas):.0f}, máx {max(validadas)}")
+    sys.exit(1 if p99 > args.limite else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+"""
+Prueba de carga del servicio de ensamblado: latencia p50/p99 y solicitudes por segundo.
+
+Cada conexión (una por nivel de concurrencia, con keep-alive) envía sus
+solicitudes una tras otra; los programas salen de benchmarks/generador.py.
+Con --iniciar el script levanta el servicio en un subproceso y lo detiene al final.
+
+Uso:
+    python benchmarks/carga_servicio.py --iniciar [--procesos 4] [--solicitudes 2000] [--concurrencia 32]
+    python benchmarks/carga_servicio.py --puerto 8086 --tipo validar
+    python benchmarks/carga_servicio.py --iniciar --comparar-proceso   # contra un proceso por archivo
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from generador import generar_programa
+
+
+def percentil(valores, p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+async def conectar(args):
+    if args.unix:
+        return await asyncio.open_unix_connection(args.unix)
+    return await asyncio.open_connection(args.host, args.puerto)
+
+
+async def solicitar(lector, escritor, ruta: str, cuerpo: bytes) -> dict:
+    escritor.write(f"POST {ruta} HTTP/1.1\r\nHost: local\r\nContent-Type: application/json\r\n"
+                   f"Content-Length: {len(cuerpo)}\r\n\r\n".encode('latin-1') + cuerpo)
+    await escritor.drain()
+    estado = await lector.readline()
+    longitud = 0
+    while True:
+        cabecera = await lector.readline()
+        if cabecera in (b'\r\n', b''):
+            break
+        nombre, _, valor = cabecera.decode('latin-1').partition(':')
+        if nombre.lower() == 'content-length':
+            longitud = int(valor)
+    respuesta = json.loads(await lector.readexactly(longitud))
+    if b' 200 ' not in estado:
+        raise RuntimeError(f"{estado.decode().strip()}: {respuesta}")
+    return respuesta
+
+
+async def cliente(args, cuerpos, latencias):
+    lector, escritor = await conectar(args)
+    ruta = '/ensamblar' if args.tipo == 'ensamblar' else '/validar'
+    try:
+        for cuerpo in cuerpos:
+            inicio = time.perf_counter()
+            await solicitar(lector, escritor, ruta, cuerpo)
+            latencias.append(time.perf_counter() - inicio)
+    finally:
+        escritor.close()
+
+
+def preparar_cuerpos(args):
+    programas = [generar_programa(args.lineas, semilla=i) for i in range(args.variantes)]
+    cuerpos = []
+    for i in range(args.solicitudes):
+        programa = programas[i % len(programas)]
+        if args.tipo == 'ensamblar':
+            datos = {'texto': '\n'.join(programa)}
+        else:
+            codigo = [linea for linea in programa if linea.startswith('    ') and ':' not in linea]
+            datos = {'lineas': codigo[i % max(1, len(codigo) - 10):][:10], 'segmento': 'CODE'}
+        cuerpos.append(json.dumps(datos).encode('utf-8'))
+    return cuerpos
+
+
+async def esperar_servicio(args, limite: float = 30.0):
+    fin = time.monotonic() + limite
+    while True:
+        try:
+            _, escritor = await conectar(args)
+            escritor.close()
+            return
+        except OSError:
+            if time.monotonic() > fin:
+                raise
+            await asyncio.sleep(0.1)
+
+
+async def medir(args, cuerpos):
+    await esperar_servicio(args)
+    porciones = [cuerpos[i::args.concurrencia] for i in range(args.concurrencia)]
+    latencias = []
+    inicio = time.perf_counter()
+    await asyncio.gather(*(cliente(args, porcion, latencias) for porcion in porciones if porcion))
+    return latencias, time.perf_counter() - inicio
+
+
+def medir_un_proceso_por_archivo(args, repeticiones: int = 5) -> float:
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, 'programa.asm')
+        Path(ruta).write_text('\n'.join(generar_programa(args.lineas)) + '\n', encoding='utf-8')
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            subprocess.run([sys.executable, str(RAIZ / 'ensamblador.py'), ruta, '-q'], cwd=RAIZ,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=18086)
+    parser.add_argument('--unix', metavar='RUTA')
+    parser.add_argument('--iniciar', action='store_true', help='levanta el servicio en un subproceso')
+    parser.add_argument('--procesos', type=int, help='procesos del servicio iniciado con --iniciar')
+    parser.add_argument('--tipo', choices=('ensamblar', 'validar'), default='ensamblar')
+    parser.add_argument('--solicitudes', type=int, default=2000)
+    parser.add_argument('--concurrencia', type=int, default=32)
+    parser.add_argument('--lineas', type=int, default=200, help='líneas de cada programa')
+    parser.add_argument('--variantes', type=int, default=16, help='programas distintos')
+    parser.add_argument('--comparar-proceso', action='store_true',
+                        help='mide también un proceso de ensamblador.py por archivo')
+    args = parser.parse_args()
+
+    servidor = None
+    if args.iniciar:
+        comando = [sys.executable, str(RAIZ / 'servicio.py'), '--host', args.host, '--puerto', str(args.puerto)]
+        if args.unix:
+            comando += ['--unix', args.unix]
+        if args.procesos:
+            comando += ['--procesos', str(args.procesos)]
+        servidor = subprocess.Popen(comando, cwd=RAIZ)
+    try:
+        cuerpos = preparar_cuerpos(args)
+        latencias, total = asyncio.run(medir(args, cuerpos))
+    finally:
+        if servidor is not None:
+            servidor.terminate()
+            servidor.wait()
+
+    ms = [l * 1000 for l in latencias]
+    print(f"Solicitudes: {len(ms)} ({args.tipo}, {args.lineas} líneas, concurrencia {args.concurrencia})")
+    print(f"Rendimiento: {len(ms) / total:.1f} solicitudes/s")
+    print(f"Latencia ms: p50 {percentil(ms, 50):.2f}  p90 {percentil(ms, 90):.2f}  "
+          f"p99 {percentil(ms, 99):.2f}  máx {max(ms):.2f}")
+    if args.comparar_proceso:
+        print(f"Un proceso por archivo: {medir_un_proceso_por_archivo(args) * 1000:.1f} ms por archivo")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""
+Generador de programas sintéticos para los benchmarks.
+
+Los programas siguen la forma de ejemplo.asm (pila, datos y código con las
+instrucciones del conjunto permitido). Con errores > 0 una fracción de las
+líneas se reemplaza por los casos de ejemplo_errores.asm. Los saltos van
+siempre hacia una etiqueta anterior y cercana, así el programa es válido
+(sin saltos hacia adelante) y los desplazamientos caben en 8 bits.
+
+Uso:
+    python benchmarks/generador.py --lineas 10000 [--errores 0.05] [--semilla 1] -o programa.asm
+"""
+
+import argparse
+import random
+import sys
+from typing import Dict, List, Optional
+
+# Plantillas por categoría; {reg} / {reg8} / {var} / {etiqueta} se completan al generar
+PLANTILLAS = {
+    'sin_operandos': ['nop', 'cmc', 'aam', 'aad', 'popa', 'cmpsb'],
+    'un_operando': ['inc {reg}', 'mul {reg}', 'idiv {reg}', 'int 21h'],
+    'logica': ['and {reg8}, 0Fh', 'or {reg8}, 1', 'xor {reg}, {reg}', 'and {reg}, {reg}'],
+    'lea': ['lea {reg}, {var}'],
+    'salto': ['jnae {etiqueta}', 'jne {etiqueta}', 'jnle {etiqueta}', 'ja {etiqueta}',
+              'jc {etiqueta}', 'loope {etiqueta}'],
+}
+
+MEZCLA_PREDETERMINADA: Dict[str, float] = {
+    'sin_operandos': 0.25, 'un_operando': 0.25, 'logica': 0.25, 'lea': 0.10, 'salto': 0.15,
+}
+
+DATOS = ['{nombre} db "Hola Mundo"', '{nombre} db 25', '{nombre} dw 01000h',
+         '{nombre} dw 100 dup(0)', "{nombre} db 'A'", '{nombre} equ 255']
+
+ERRORES_DATOS = ['{nombre} abc xyz']
+ERRORES_CODIGO = ['mov ax, bx', 'add', 'push', 'sub ax, cx', 'hlt', 'invalidainst ax']
+
+REGISTROS_16 = ['ax', 'bx', 'cx', 'dx', 'si', 'di']
+REGISTROS_8 = ['al', 'bl', 'cl', 'dl']
+
+LINEAS_POR_ETIQUETA = 16
+FRACCION_DATOS = 0.05
+
+
+def generar_programa(lineas: int, errores: float = 0.0, mezcla: Optional[Dict[str, float]] = None,
+                     semilla: int = 0) -> List[str]:
+    """Programa de aproximadamente 'lineas' líneas. errores: fracción de líneas incorrectas."""
+    azar = random.Random(semilla)
+    mezcla = mezcla or MEZCLA_PREDETERMINADA
+    categorias = list(mezcla)
+    pesos = [mezcla[c] for c in categorias]
+
+    n_datos = max(1, int(lineas * FRACCION_DATOS))
+    n_codigo = max(1, lineas - n_datos - 10)
+
+    programa = ['; Programa generado para benchmarks', '',
+                '.stack segment', '    dw 256 dup(0)', 'ends', '', '.data segment']
+    variables = []
+    for i in range(n_datos):
+        nombre = f'var{i}'
+        if errores and azar.random() < errores:
+            programa.append('    ' + ERRORES_DATOS[0].format(nombre=nombre))
+            continue
+        plantilla = azar.choice(DATOS)
+        programa.append('    ' + plantilla.format(nombre=nombre))
+        if 'equ' not in plantilla:
+            variables.append(nombre)
+    programa += ['ends', '', '.code segment', '    assume cs:.code, ds:.data, ss:.stack']
+
+    etiqueta = None
+    for i in range(n_codigo):
+        if i % LINEAS_POR_ETIQUETA == 0:
+            etiqueta = f'et{i // LINEAS_POR_ETIQUETA}'
+            programa.append(f'{etiqueta}:')
+            continue
+        if errores and azar.random() < errores:
+            programa.append('    ' + azar.choice(ERRORES_CODIGO))
+            continue
+        categoria = azar.choices(categorias, pesos)[0]
+        if categoria == 'lea' and not variables:
+            categoria = 'sin_operandos'
+        plantilla = azar.choice(PLANTILLAS[categoria])
+        programa.append('    ' + plantilla.format(
+            reg=azar.choice(REGISTROS_16), reg8=azar.choice(REGISTROS_8),
+            var=azar.choice(variables) if variables else '', etiqueta=etiqueta))
+    programa += ['ends', 'end et0']
+    return programa
+
+
+def escribir_programa(ruta: str, lineas: int, errores: float = 0.0,
+                      mezcla: Optional[Dict[str, float]] = None, semilla: int = 0) -> int:
+    programa = generar_programa(lineas, errores, mezcla, semilla)
+    with open(ruta, 'w', encoding='utf-8') as f:
+        f.writelines(linea + '\n' for linea in programa)
+    return len(programa)
+
+
+def leer_mezcla(texto: str) -> Dict[str, float]:
+    """'salto=0.3,logica=0.2' -> pesos (las categorías no indicadas conservan el predeterminado)"""
+    mezcla = dict(MEZCLA_PREDETERMINADA)
+    for parte in filter(None, texto.split(',')):
+        categoria, _, peso = parte.partition('=')
+        if categoria not in PLANTILLAS:
+            raise ValueError(f"Categoría desconocida: '{categoria}' (válidas: {', '.join(PLANTILLAS)})")
+        mezcla[categoria] = float(peso)
+    return mezcla
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--lineas', type=int, default=1000)
+    parser.add_argument('--errores', type=float, default=0.0, help='fracción de líneas incorrectas')
+    parser.add_argument('--mezcla', default='', help="pesos por categoría, ej. 'salto=0.3,lea=0'")
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('-o', '--salida', help='archivo .asm (por omisión, salida estándar)')
+    args = parser.parse_args()
+
+    try:
+        mezcla = leer_mezcla(args.mezcla)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.salida:
+        total = escribir_programa(args.salida, args.lineas, args.errores, mezcla, args.semilla)
+        print(f"{args.salida}: {total} líneas")
+    else:
+        sys.stdout.writelines(linea + '\n' for linea in generar_programa(args.lineas, args.errores, mezcla, args.semilla))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,265 @@
+"""
+Desensamblador 8086 construido a partir de las tablas de opcodes del codificador.
+
+El primer byte de cada instrucción indexa un arreglo de 256 funciones de
+decodificación (_DESPACHO), por lo que una imagen de segmento completa se
+recorre en una sola pasada sin búsquedas por mnemónico.
+
+La verificación de ida y vuelta vuelve a codificar cada instrucción
+desensamblada con Ensamblador8086.codificar_instruccion y compara los bytes.
+
+Uso:
+    python desensamblador.py archivo1.asm [archivo2.asm ...]
+"""
+
+import sys
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+from ensamblador import (
+    Ensamblador8086, Simbolo,
+    CODIGOS_SIN_OPERANDOS, CODIGOS_SALTOS, CODIGOS_LOGICAS,
+    OPCODE_GRUPO_F6, EXTENSIONES_GRUPO_F6,
+    OPCODE_INC_REG16, OPCODE_INC_RM8, OPCODE_INT, OPCODE_LEA,
+)
+
+
+@dataclass
+class InstruccionDesensamblada:
+    direccion: int
+    codigo: bytes
+    texto: str
+    destino: Optional[int] = None  # Dirección destino en saltos
+
+
+REGISTROS_16 = ('AX', 'CX', 'DX', 'BX', 'SP', 'BP', 'SI', 'DI')
+REGISTROS_8 = ('AL', 'CL', 'DL', 'BL', 'AH', 'CH', 'DH', 'BH')
+_RM_TEXTO = ('BX+SI', 'BX+DI', 'BP+SI', 'BP+DI', 'SI', 'DI', 'BP', 'BX')
+
+# Resultado de un decodificador: (longitud, texto, destino de salto)
+Decodificado = Tuple[int, str, Optional[int]]
+
+
+def formato_hex(valor: int, digitos: int = 2) -> str:
+    """Constante hexadecimal con el formato que acepta el ensamblador (inicia con 0)."""
+    texto = f'{valor:0{digitos}X}'
+    if texto[0] != '0':
+        texto = '0' + texto
+    return texto + 'h'
+
+
+def nombre_etiqueta(direccion: int) -> str:
+    return f'L{direccion:04X}'
+
+
+def _texto_rm(datos: bytes, pos: int, w: int) -> Tuple[int, str, int]:
+    """Decodifica mod reg r/m en datos[pos]. Retorna (longitud, texto r/m, campo reg)."""
+    modrm = datos[pos]
+    mod, reg, rm = modrm >> 6, (modrm >> 3) & 7, modrm & 7
+    if mod == 3:
+        return 1, (REGISTROS_16 if w else REGISTROS_8)[rm], reg
+    if mod == 0 and rm == 6:
+        disp = datos[pos + 1] | (datos[pos + 2] << 8)
+        return 3, f'[{formato_hex(disp, 4)}]', reg
+    if mod == 1:
+        disp = datos[pos + 1]
+        disp = disp - 0x100 if disp & 0x80 else disp
+        longitud = 2
+    elif mod == 2:
+        disp = datos[pos + 1] | (datos[pos + 2] << 8)
+        longitud = 3
+    else:
+        disp, longitud = 0, 1
+    if disp:
+        signo = '-' if disp < 0 else '+'
+        return longitud, f'[{_RM_TEXTO[rm]}{signo}{abs(disp)}]', reg
+    return longitud, f'[{_RM_TEXTO[rm]}]', reg
+
+
+# =========================================================================
+# DECODIFICADORES POR FAMILIA DE OPCODE
+# =========================================================================
+
+def _dec_fijo(mnemonico: str, longitud: int) -> Callable[[bytes, int, int], Decodificado]:
+    def decodificar(datos, pos, direccion):
+        return longitud, mnemonico, None
+    return decodificar
+
+
+def _dec_salto(mnemonico: str) -> Callable[[bytes, int, int], Decodificado]:
+    def decodificar(datos, pos, direccion):
+        desp = datos[pos + 1]
+        desp = desp - 0x100 if desp & 0x80 else desp
+        destino = (direccion + 2 + desp) & 0xFFFF
+        return 2, f'{mnemonico} {nombre_etiqueta(destino)}', destino
+    return decodificar
+
+
+def _dec_int(datos, pos, direccion):
+    return 2, f'INT {formato_hex(datos[pos + 1])}', None
+
+
+def _dec_inc_reg16(datos, pos, direccion):
+    return 1, f'INC {REGISTROS_16[datos[pos] & 7]}', None
+
+
+def _dec_inc_rm8(datos, pos, direccion):
+    lon, rm, reg = _texto_rm(datos, pos + 1, 0)
+    if reg != 0:
+        return _dec_desconocido(datos, pos, direccion)
+    operando = rm if rm in REGISTROS_8 else f'BYTE PTR {rm}'
+    return 1 + lon, f'INC {operando}', None
+
+
+def _dec_grupo_f6(datos, pos, direccion):
+    w = datos[pos] & 1
+    lon, rm, reg = _texto_rm(datos, pos + 1, w)
+    mnemonico = _GRUPO_F6_POR_EXTENSION.get(reg)
+    if mnemonico is None:
+        return _dec_desconocido(datos, pos, direccion)
+    if rm.startswith('['):
+        rm = f"{'WORD' if w else 'BYTE'} PTR {rm}"
+    return 1 + lon, f'{mnemonico} {rm}', None
+
+
+def _dec_logica(mnemonico: str) -> Callable[[bytes, int, int], Decodificado]:
+    def decodificar(datos, pos, direccion):
+        op = datos[pos]
+        w, d = op & 1, op & 2
+        lon, rm, reg = _texto_rm(datos, pos + 1, w)
+        reg_texto = (REGISTROS_16 if w else REGISTROS_8)[reg]
+        if d:
+            return 1 + lon, f'{mnemonico} {reg_texto}, {rm}', None
+        return 1 + lon, f'{mnemonico} {rm}, {reg_texto}', None
+    return decodificar
+
+
+def _dec_lea(datos, pos, direccion):
+    lon, rm, reg = _texto_rm(datos, pos + 1, 1)
+    if not rm.startswith('['):
+        return _dec_desconocido(datos, pos, direccion)
+    return 1 + lon, f'LEA {REGISTROS_16[reg]}, {rm}', None
+
+
+def _dec_desconocido(datos, pos, direccion):
+    return 1, f'DB {formato_hex(datos[pos])}', None
+
+
+def _construir_despacho() -> List[Callable[[bytes, int, int], Decodificado]]:
+    despacho = [_dec_desconocido] * 256
+
+    for mnemonico, codigo in CODIGOS_SIN_OPERANDOS.items():
+        bytes_instr = bytes.fromhex(codigo)
+        despacho[bytes_instr[0]] = _dec_fijo(mnemonico, len(bytes_instr))
+
+    # Varios mnemónicos comparten opcode (JC = JNAE): se conserva el primero de la tabla
+    for mnemonico, opcode in CODIGOS_SALTOS.items():
+        if despacho[opcode] is _dec_desconocido:
+            despacho[opcode] = _dec_salto(mnemonico)
+
+    for mnemonico, opcode in CODIGOS_LOGICAS.items():
+        base = opcode & 0xFC
+        for variante in range(4):  # d y w
+            despacho[base + variante] = _dec_logica(mnemonico)
+
+    for reg in range(8):
+        despacho[OPCODE_INC_REG16 + reg] = _dec_inc_reg16
+    despacho[OPCODE_INC_RM8] = _dec_inc_rm8
+    despacho[OPCODE_GRUPO_F6] = despacho[OPCODE_GRUPO_F6 + 1] = _dec_grupo_f6
+    despacho[OPCODE_INT] = _dec_int
+    despacho[OPCODE_LEA] = _dec_lea
+    return despacho
+
+
+_GRUPO_F6_POR_EXTENSION = {ext: mnemonico for mnemonico, ext in EXTENSIONES_GRUPO_F6.items()}
+_DESPACHO = _construir_despacho()
+
+
+# =========================================================================
+# API
+# =========================================================================
+
+def desensamblar(datos: bytes, origen: int = 0) -> List[InstruccionDesensamblada]:
+    """Desensambla una imagen de segmento completa en una sola pasada."""
+    datos = bytes(datos)
+    despacho = _DESPACHO
+    resultado = []
+    pos = 0
+    total = len(datos)
+    while pos < total:
+        try:
+            longitud, texto, destino = despacho[datos[pos]](datos, pos, origen + pos)
+        except IndexError:
+            # Instrucción truncada al final de la imagen
+            longitud, texto, destino = _dec_desconocido(datos, pos, origen + pos)
+        if pos + longitud > total:
+            longitud, texto, destino = _dec_desconocido(datos, pos, origen + pos)
+        resultado.append(InstruccionDesensamblada(origen + pos, datos[pos:pos + longitud], texto, destino))
+        pos += longitud
+    return resultado
+
+
+def a_texto(instrucciones: List[InstruccionDesensamblada]) -> List[str]:
+    """Genera líneas de código fuente, con etiquetas L<dir> en los destinos de salto."""
+    destinos = {i.destino for i in instrucciones if i.destino is not None}
+    lineas = []
+    for instr in instrucciones:
+        if instr.direccion in destinos:
+            lineas.append(f'{nombre_etiqueta(instr.direccion)}:')
+        lineas.append(f'    {instr.texto}')
+    return lineas
+
+
+def verificar_ida_vuelta(datos: bytes, origen: int = 0,
+                         ensamblador: Optional[Ensamblador8086] = None) -> List[Tuple[int, str, bytes, bytes]]:
+    """
+    Desensambla, vuelve a codificar cada instrucción y compara los bytes.
+    Retorna las diferencias como (dirección, texto, bytes originales, bytes recodificados).
+    Si se pasa un ensamblador, su tabla de símbolos se reemplaza por las etiquetas L<dir>.
+    """
+    asm = ensamblador or Ensamblador8086()
+    instrucciones = desensamblar(datos, origen)
+
+    asm.tabla_simbolos = {}
+    for instr in instrucciones:
+        if instr.destino is not None:
+            nombre = nombre_etiqueta(instr.destino)
+            asm.tabla_simbolos[nombre] = Simbolo(nombre, 'Etiqueta', '', '', f'{instr.destino:04X}')
+
+    diferencias = []
+    for instr in instrucciones:
+        if instr.texto.startswith('DB '):
+            recodificado = instr.codigo
+        else:
+            tokens = asm.tokenizar_linea(instr.texto, 0)
+            recodificado = bytes.fromhex(asm.codificar_instruccion(tokens, instr.direccion))
+        if recodificado != instr.codigo:
+            diferencias.append((instr.direccion, instr.texto, instr.codigo, recodificado))
+    return diferencias
+
+
+def main(rutas: List[str]) -> int:
+    asm = Ensamblador8086()
+    fallos = 0
+    for ruta in rutas:
+        if not asm.cargar_archivo(ruta):
+            print(f"{ruta}: no se pudo cargar")
+            fallos += 1
+            continue
+        asm.analizar_sintaxis()
+        asm.generar_codificacion()
+        origen, imagen = asm.imagen_segmento('CODE')
+        diferencias = verificar_ida_vuelta(imagen, origen, asm)
+        if diferencias:
+            fallos += 1
+            print(f"{ruta}: {len(diferencias)} diferencias")
+            for direccion, texto, original, recodificado in diferencias:
+                print(f"  {direccion:04X}  {texto:<25} {original.hex(' ').upper():<12} -> "
+                      f"{recodificado.hex(' ').upper()}")
+        else:
+            print(f"{ruta}: OK ({len(imagen)} bytes)")
+    return 1 if fallos else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,315 @@
+"""
+Diagnósticos del ensamblador: código numérico, severidad y argumentos.
+
+Los validadores siguen retornando (resultado, mensaje), pero el mensaje es un
+Diagnostico que guarda el código y sus argumentos y formatea el texto solo
+cuando se muestra (str(), f-string). Dos diagnósticos son iguales si tienen el
+mismo código y argumentos; para comparar con un texto se usa str(diagnostico).
+Los diagnósticos sin argumentos son instancias compartidas. Los que llevan
+argumentos (INSTRUCCION_VALIDA, VARIABLE, ETIQUETA_DEFINIDA, ...) crean un
+objeto pequeño por línea, pero ninguna cadena hasta que se muestran.
+
+Rangos de códigos:
+    1xx  segmentos, directivas, ORG, PUBLIC/EXTRN, PROC/ENDP
+    2xx  segmento de pila
+    3xx  segmento de datos
+    4xx  segmento de código
+    9xx  preprocesador, optimizador y control del análisis
+Dentro de cada rango, xx00-xx49 son notas y xx50-xx99 errores (salvo las
+ADVERTENCIAS listadas abajo).
+"""
+
+from enum import Enum, IntEnum
+from typing import Dict, Iterable, Tuple
+
+
+class Severidad(Enum):
+    NOTA = 0
+    ADVERTENCIA = 1
+    ERROR = 2
+    FATAL = 3
+
+
+class Codigo(IntEnum):
+    LINEA_VACIA = 100
+    INICIO_PILA = 101
+    INICIO_DATOS = 102
+    INICIO_CODIGO = 103
+    FIN_SEGMENTO = 104
+    FIN_PROGRAMA = 105
+    DIRECTIVA_MODELO = 106
+    DIRECTIVA_PILA = 107
+    ORG_VALIDO = 108
+    PUBLICOS_DECLARADOS = 109
+    EXTERNOS_DECLARADOS = 110
+    PROC_DEFINIDO = 111
+    ENDP_VALIDO = 112
+    PSEUDOINSTRUCCION_VALIDA = 113
+    SIN_TOKENS = 150
+    SEGMENTO_INVALIDO = 151
+    FUERA_DE_SEGMENTO = 152
+    ORG_SIN_DIRECCION = 153
+    ORG_EXPRESION = 154
+    ORG_FUERA_DE_RANGO = 155
+    ENLACE_SIN_SIMBOLOS = 156
+    NOMBRE_SIMBOLO_INVALIDO = 157
+    PUBLIC_CON_TIPO = 158
+    EXTRN_SIN_TIPO = 159
+    SIMBOLO_DUPLICADO = 160
+    NOMBRE_PROC_INVALIDO = 161
+    PROC_DISTANCIA = 162
+    ENDP_CON_OPERANDOS = 163
+    ENDP_SIN_PROC = 164
+    PROC_SIN_ENDP = 165
+    PUBLICO_NO_DEFINIDO = 166
+    LINEA_DEMASIADO_LARGA = 170
+    DEMASIADOS_TOKENS = 171
+
+    PILA_DUP = 201
+    PILA_RESERVA = 202
+    PILA_INCOMPLETA = 250
+    PILA_INSTRUCCION = 251
+    PILA_DIRECTIVA_DATOS = 252
+    PILA_DIRECTIVA_INVALIDA = 253
+    PILA_DUP_SIN_CANTIDAD = 254
+    PILA_FORMATO = 255
+
+    CONSTANTE = 301
+    CONSTANTE_HEX = 302
+    CONSTANTE_CARACTER = 303
+    CONSTANTE_EXPRESION = 304
+    ARREGLO_DUP = 305
+    CADENA = 306
+    VARIABLE_SIN_INICIALIZAR = 307
+    VARIABLE = 308
+    VARIABLE_HEX = 309
+    VARIABLE_BIN = 310
+    VARIABLE_CARACTER = 311
+    TABLA = 312
+    VARIABLE_DIRECCION = 313
+    DATOS_INCOMPLETOS = 350
+    DATOS_INSTRUCCION = 351
+    DATOS_ETIQUETA = 352
+    NOMBRE_NUMERICO = 353
+    ELEMENTO_NO_IDENTIFICADO = 354
+    DATOS_SIN_VALOR = 355
+    NOMBRE_VARIABLE_INVALIDO = 356
+    NOMBRE_VARIABLE_INICIO = 357
+    NOMBRE_VARIABLE_LARGO = 358
+    DIRECTIVA_INVALIDA = 359
+    EQU_INVALIDO = 360
+    DUP_SIN_CANTIDAD = 361
+    DUP_SIN_PARENTESIS = 362
+    DUP_INVALIDO = 363
+    CADENA_SIN_CERRAR = 364
+    HEX_SIN_CERO = 365
+    ELEMENTO_LISTA_INVALIDO = 366
+    TEXTO_SIN_COMILLAS = 367
+    TEXTO_SIN_COMILLAS_POSIBLE = 368
+    VALOR_INVALIDO = 369
+
+    ETIQUETA_DEFINIDA = 401
+    INSTRUCCION_VALIDA = 402
+    ETIQUETA_E_INSTRUCCION = 403
+    CODIGO_DATOS = 450
+    CODIGO_DATOS_NOMBRE = 451
+    CODIGO_DIRECTIVA_DATOS = 452
+    INSTRUCCION_INVALIDA = 453
+    SIMBOLO_NO_DECLARADO = 454
+    ETIQUETA_NO_DEFINIDA = 455
+    SOBRAN_OPERANDOS = 456
+    FALTA_OPERANDO = 457
+    FALTAN_OPERANDOS = 458
+    LEA_DESTINO = 459
+    TAMANOS_DISTINTOS = 460
+    INT_FUERA_DE_RANGO = 461
+    OPERANDOS_NO_CODIFICABLES = 462
+
+    PREPROCESADOR = 900
+    ELIMINADA_POR_OPTIMIZACION = 901
+    PREPROCESADOR_ERROR = 950
+    LINEA_LENTA = 910
+    DEMASIADOS_ERRORES = 990
+
+
+PLANTILLAS: Dict[Codigo, str] = {
+    Codigo.LINEA_VACIA: "Línea vacía",
+    Codigo.INICIO_PILA: "Inicio de segmento de pila",
+    Codigo.INICIO_DATOS: "Inicio de segmento de datos",
+    Codigo.INICIO_CODIGO: "Inicio de segmento de código",
+    Codigo.FIN_SEGMENTO: "Fin de segmento",
+    Codigo.FIN_PROGRAMA: "Fin de programa",
+    Codigo.DIRECTIVA_MODELO: "Directiva de modelo",
+    Codigo.DIRECTIVA_PILA: "Directiva de pila",
+    Codigo.ORG_VALIDO: "Pseudoinstrucción ORG válida ({0:04X}h)",
+    Codigo.PUBLICOS_DECLARADOS: "Símbolos públicos declarados",
+    Codigo.EXTERNOS_DECLARADOS: "Símbolos externos declarados",
+    Codigo.PROC_DEFINIDO: "Procedimiento '{0}' definido",
+    Codigo.ENDP_VALIDO: "Fin del procedimiento '{0}'",
+    Codigo.PSEUDOINSTRUCCION_VALIDA: "Pseudoinstrucción {0} válida",
+    Codigo.SIN_TOKENS: "Línea vacía",
+    Codigo.SEGMENTO_INVALIDO: "Declaración de segmento inválida",
+    Codigo.FUERA_DE_SEGMENTO: "Línea fuera de segmento",
+    Codigo.ORG_SIN_DIRECCION: "ORG requiere una dirección",
+    Codigo.ORG_EXPRESION: "ORG: {0}",
+    Codigo.ORG_FUERA_DE_RANGO: "ORG: dirección fuera del rango de 16 bits",
+    Codigo.ENLACE_SIN_SIMBOLOS: "{0} requiere al menos un símbolo",
+    Codigo.NOMBRE_SIMBOLO_INVALIDO: "Nombre de símbolo inválido: '{0}'",
+    Codigo.PUBLIC_CON_TIPO: "PUBLIC no lleva tipo",
+    Codigo.EXTRN_SIN_TIPO: "EXTRN requiere nombre:tipo ({0})",
+    Codigo.SIMBOLO_DUPLICADO: "Símbolo '{0}' ya definido",
+    Codigo.NOMBRE_PROC_INVALIDO: "Nombre de procedimiento inválido: '{0}'",
+    Codigo.PROC_DISTANCIA: "PROC solo admite NEAR o FAR",
+    Codigo.ENDP_CON_OPERANDOS: "ENDP no requiere operandos",
+    Codigo.ENDP_SIN_PROC: "ENDP de '{0}' sin PROC correspondiente",
+    Codigo.PROC_SIN_ENDP: "PROC sin ENDP",
+    Codigo.PUBLICO_NO_DEFINIDO: "Símbolo público '{0}' no definido",
+    Codigo.LINEA_DEMASIADO_LARGA: "Línea demasiado larga ({0} caracteres; máximo {1})",
+    Codigo.DEMASIADOS_TOKENS: "Demasiados elementos en la línea ({0}; máximo {1})",
+
+    Codigo.PILA_DUP: "Reserva de espacio en pila con DUP",
+    Codigo.PILA_RESERVA: "Reserva de espacio en pila",
+    Codigo.PILA_INCOMPLETA: "Definición de pila incompleta",
+    Codigo.PILA_INSTRUCCION: "Instrucción '{0}' no permitida en segmento de pila",
+    Codigo.PILA_DIRECTIVA_DATOS: "'{0}' no permitido en segmento de pila.",
+    Codigo.PILA_DIRECTIVA_INVALIDA: "'{0}' no válido en segmento de pila.",
+    Codigo.PILA_DUP_SIN_CANTIDAD: "DUP requiere cantidad antes: DW cantidad DUP(?)",
+    Codigo.PILA_FORMATO: "Formato inválido en pila: {0}.",
+
+    Codigo.CONSTANTE: "Constante {0} definida",
+    Codigo.CONSTANTE_HEX: "Constante hexadecimal {0} definida",
+    Codigo.CONSTANTE_CARACTER: "Constante de caracter {0} definida",
+    Codigo.CONSTANTE_EXPRESION: "Expresión constante {0} definida",
+    Codigo.ARREGLO_DUP: "Array/Buffer {0} definido con DUP",
+    Codigo.CADENA: "Cadena {0} definida",
+    Codigo.VARIABLE_SIN_INICIALIZAR: "Variable {0} sin inicializar",
+    Codigo.VARIABLE: "Variable {0} inicializada",
+    Codigo.VARIABLE_HEX: "Variable {0} inicializada (hex)",
+    Codigo.VARIABLE_BIN: "Variable {0} inicializada (bin)",
+    Codigo.VARIABLE_CARACTER: "Variable {0} inicializada (char)",
+    Codigo.TABLA: "Tabla {0} definida",
+    Codigo.VARIABLE_DIRECCION: "Variable {0} inicializada con una dirección",
+    Codigo.DATOS_INCOMPLETOS: "Definición de datos incompleta",
+    Codigo.DATOS_INSTRUCCION: "Instrucción '{0}' no permitida en segmento de datos",
+    Codigo.DATOS_ETIQUETA: "Etiquetas de código no permitidas en segmento de datos",
+    Codigo.NOMBRE_NUMERICO: "Nombre de variable no puede empezar con número: '{0}'",
+    Codigo.ELEMENTO_NO_IDENTIFICADO: "Elemento no identificado: '{0}'",
+    Codigo.DATOS_SIN_VALOR: "Definición de datos incompleta (requiere: nombre directiva valor)",
+    Codigo.NOMBRE_VARIABLE_INVALIDO: "Nombre de variable inválido: '{0}'",
+    Codigo.NOMBRE_VARIABLE_INICIO: "Nombre de variable inválido: '{0}' (debe empezar con letra o _)",
+    Codigo.NOMBRE_VARIABLE_LARGO: "Nombre de variable muy largo (máx 31 caracteres)",
+    Codigo.DIRECTIVA_INVALIDA: "Directiva inválida: '{0}'.",
+    Codigo.EQU_INVALIDO: "Valor inválido para EQU: {0}",
+    Codigo.DUP_SIN_CANTIDAD: "DUP requiere un número antes: cantidad DUP(valor)",
+    Codigo.DUP_SIN_PARENTESIS: "DUP requiere paréntesis: cantidad DUP(valor)",
+    Codigo.DUP_INVALIDO: "Sintaxis DUP inválida: {0}",
+    Codigo.CADENA_SIN_CERRAR: "Cadena de texto sin cerrar (faltan comillas)",
+    Codigo.HEX_SIN_CERO: "Hexadecimal inválido: '{0}' (debe empezar con 0)",
+    Codigo.ELEMENTO_LISTA_INVALIDO: "Elemento inválido en lista: '{0}'",
+    Codigo.TEXTO_SIN_COMILLAS: "Texto sin comillas.",
+    Codigo.TEXTO_SIN_COMILLAS_POSIBLE: "¿Texto sin comillas?",
+    Codigo.VALOR_INVALIDO: "Valor inválido para {0}: '{1}'",
+
+    Codigo.ETIQUETA_DEFINIDA: "Etiqueta '{0}' definida",
+    Codigo.INSTRUCCION_VALIDA: "Instrucción {0} válida",
+    Codigo.ETIQUETA_E_INSTRUCCION: "{0} + {1}",
+    Codigo.CODIGO_DATOS: "Declaración de datos no permitida en segmento de código.",
+    Codigo.CODIGO_DATOS_NOMBRE: "Declaración de datos no permitida en segmento de código",
+    Codigo.CODIGO_DIRECTIVA_DATOS: "'{0}' no permitido en segmento de código.",
+    Codigo.INSTRUCCION_INVALIDA: "'{0}' no es una instrucción válida",
+    Codigo.SIMBOLO_NO_DECLARADO: "Símbolo '{0}' no declarado en segmento de datos",
+    Codigo.ETIQUETA_NO_DEFINIDA: "Etiqueta '{0}' no definida previamente",
+    Codigo.SOBRAN_OPERANDOS: "{0} no requiere operandos",
+    Codigo.FALTA_OPERANDO: "{0} requiere 1 operando",
+    Codigo.FALTAN_OPERANDOS: "{0} requiere 2 operandos",
+    Codigo.LEA_DESTINO: "LEA requiere registro de 16 bits como destino",
+    Codigo.TAMANOS_DISTINTOS: "Operandos de diferente tamaño",
+    Codigo.INT_FUERA_DE_RANGO: "INT: número de interrupción fuera de rango (0 a 0FFh): '{0}'",
+    Codigo.OPERANDOS_NO_CODIFICABLES: "{0}: combinación de operandos que el codificador no soporta",
+
+    Codigo.PREPROCESADOR: "{0}",
+    Codigo.ELIMINADA_POR_OPTIMIZACION: "Eliminada por optimización ({0})",
+    Codigo.PREPROCESADOR_ERROR: "{0}",
+    Codigo.LINEA_LENTA: "Línea analizada en {0:.1f} ms (umbral {1:.1f} ms)",
+    Codigo.DEMASIADOS_ERRORES: "Demasiados errores ({0}); análisis detenido",
+}
+
+
+ADVERTENCIAS = frozenset({Codigo.LINEA_LENTA})
+
+
+def severidad_de(codigo: Codigo) -> Severidad:
+    if codigo == Codigo.DEMASIADOS_ERRORES:
+        return Severidad.FATAL
+    if codigo in ADVERTENCIAS:
+        return Severidad.ADVERTENCIA
+    return Severidad.NOTA if codigo % 100 < 50 else Severidad.ERROR
+
+
+class Diagnostico:
+    """Código y argumentos de un mensaje; el texto se arma solo al mostrarlo."""
+
+    __slots__ = ('codigo', 'argumentos')
+
+    def __init__(self, codigo: Codigo, *argumentos):
+        self.codigo = codigo
+        self.argumentos = argumentos
+
+    @property
+    def severidad(self) -> Severidad:
+        return severidad_de(self.codigo)
+
+    @property
+    def es_error(self) -> bool:
+        return self.severidad.value >= Severidad.ERROR.value
+
+    @property
+    def texto(self) -> str:
+        return PLANTILLAS[self.codigo].format(*self.argumentos)
+
+    def __str__(self) -> str:
+        return self.texto
+
+    def __format__(self, especificacion: str) -> str:
+        return format(self.texto, especificacion)
+
+    def __eq__(self, otro) -> bool:
+        if isinstance(otro, Diagnostico):
+            return self.codigo == otro.codigo and self.argumentos == otro.argumentos
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash((self.codigo, self.argumentos))
+
+    def __contains__(self, fragmento: str) -> bool:
+        return fragmento in self.texto
+
+    def __repr__(self) -> str:
+        argumentos = ''.join(f', {a!r}' for a in self.argumentos)
+        return f"Diagnostico({self.codigo.name}{argumentos})"
+
+
+_SIN_ARGUMENTOS = {codigo: Diagnostico(codigo) for codigo in Codigo}
+
+
+def diagnostico(codigo: Codigo, *argumentos) -> Diagnostico:
+    """Diagnóstico con el código dado. Sin argumentos retorna la instancia compartida."""
+    return Diagnostico(codigo, *argumentos) if argumentos else _SIN_ARGUMENTOS[codigo]
+
+
+def como_diagnostico(resultado: str, mensaje) -> Diagnostico:
+    """Envuelve los mensajes de texto (preprocesador) para que todos los análisis tengan código."""
+    if isinstance(mensaje, Diagnostico):
+        return mensaje
+    codigo = Codigo.PREPROCESADOR_ERROR if resultado == 'Incorrecta' else Codigo.PREPROCESADOR
+    return Diagnostico(codigo, mensaje)
+
+
+def filtrar(lineas_analizadas: Iterable[dict], severidad_minima: Severidad = Severidad.ERROR,
+            codigos: Iterable[int] = ()) -> Iterable[Tuple[int, Diagnostico]]:
+    """(número de línea, diagnóstico) con severidad >= severidad_minima y, si se dan, con esos códigos."""
+    codigos = frozenset(codigos)
+    for analisis in lineas_analizadas:
+        diag = como_diagnostico(analisis['resultado'], analisis['mensaje'])
+        if diag.severidad.value >= severidad_minima.value and (not codigos or diag.codigo in codigos):
+            yield analisis['numero'], diag
@@ -0,0 +1,210 @@
+"""
+Enlazador de módulos objeto (.obj) a una imagen .COM o MZ .EXE.
+
+Los segmentos de todos los módulos se agrupan por clase en el orden
+CODE, DATA, STACK (cada clase alineada a párrafo) dentro de un solo grupo,
+así CS, DS y SS pueden apuntar al mismo segmento y los offsets de 16 bits
+de las reubicaciones bastan. En .COM el grupo inicia en 100h; en .EXE en 0.
+
+Los símbolos públicos se resuelven con un único índice hash nombre -> dirección;
+los símbolos locales de cada módulo se resuelven por índice (sin búsquedas).
+Las reubicaciones de todos los módulos se aplican en una sola pasada sobre un
+memoryview de la imagen.
+
+Uso:
+    python enlazador.py -o programa.com a.obj b.obj ...
+    python enlazador.py --exe -o programa.exe --entrada inicio a.obj b.obj ...
+"""
+
+import struct
+import sys
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from objeto import ModuloObjeto
+
+ORDEN_SEGMENTOS = ('CODE', 'DATA', 'STACK')
+ORIGEN_COM = 0x100
+TAMANO_MAXIMO_COM = 0xFF00
+PILA_MINIMA = 0x100
+
+_CABECERA_MZ = struct.Struct('<2sHHHHHHHHHHHHH')
+_PARRAFOS_CABECERA_MZ = 2
+
+
+class ErrorEnlace(Exception):
+    """Símbolo indefinido o duplicado, salto fuera de rango o imagen demasiado grande."""
+
+
+@dataclass
+class ResultadoEnlace:
+    imagen: bytearray                       # Contenido del grupo (sin cabecera MZ)
+    origen: int                             # Dirección del primer byte de la imagen
+    entrada: int                            # IP inicial
+    simbolos: Dict[str, int]                # Públicos -> dirección final
+    segmentos: Dict[str, Tuple[int, int]]   # Clase -> (dirección, tamaño)
+    reubicaciones: int = 0
+
+    def como_com(self) -> bytes:
+        if self.origen != ORIGEN_COM:
+            raise ErrorEnlace("La imagen no se enlazó para .COM")
+        if self.entrada != ORIGEN_COM:
+            raise ErrorEnlace("En .COM la entrada debe estar al inicio del código (100h)")
+        return bytes(self.imagen)
+
+    def como_exe(self) -> bytes:
+        """Imagen MZ con CS = SS = inicio del grupo y sin reubicaciones de segmento."""
+        tamano = len(self.imagen)
+        pila, tam_pila = self.segmentos.get('STACK', (0, 0))
+        memoria_minima = 0
+        if tam_pila:
+            sp = pila + tam_pila
+        else:
+            sp = tamano + PILA_MINIMA
+            memoria_minima = PILA_MINIMA // 16
+        total = tamano + _PARRAFOS_CABECERA_MZ * 16
+        cabecera = _CABECERA_MZ.pack(
+            b'MZ', total % 512, (total + 511) // 512, 0, _PARRAFOS_CABECERA_MZ,
+            memoria_minima, 0xFFFF, 0, sp & 0xFFFF, 0, self.entrada, 0, _CABECERA_MZ.size, 0)
+        return cabecera.ljust(_PARRAFOS_CABECERA_MZ * 16, b'\x00') + bytes(self.imagen)
+
+
+def _alinear(valor: int, alineacion: int) -> int:
+    return (valor + alineacion - 1) & -alineacion
+
+
+def enlazar(modulos: Sequence[ModuloObjeto], formato: str = 'com',
+            entrada: Optional[str] = None) -> ResultadoEnlace:
+    """
+    Combina los módulos. formato: 'com' (origen 100h) o 'exe' (origen 0).
+    entrada: símbolo público del IP inicial (por omisión, el inicio del código).
+    """
+    if formato not in ('com', 'exe'):
+        raise ValueError(f"Formato desconocido: '{formato}'")
+    origen = ORIGEN_COM if formato == 'com' else 0
+
+    # === Colocación: cada clase es la concatenación de sus partes por módulo ===
+    colocacion: List[Dict[str, int]] = [{} for _ in modulos]   # módulo -> clase -> dirección
+    segmentos: Dict[str, Tuple[int, int]] = {}
+    direccion = origen
+    for clase in ORDEN_SEGMENTOS:
+        direccion = _alinear(direccion, 16) if direccion != origen else direccion
+        inicio = direccion
+        for i, modulo in enumerate(modulos):
+            segmento = modulo.segmentos.get(clase)
+            colocacion[i][clase] = direccion
+            if segmento is not None:
+                direccion += len(segmento.datos)
+        segmentos[clase] = (inicio, direccion - inicio)
+    tamano = direccion - origen
+    if formato == 'com' and tamano > TAMANO_MAXIMO_COM:
+        raise ErrorEnlace(f"La imagen ocupa {tamano} bytes; un .COM admite {TAMANO_MAXIMO_COM}")
+    if tamano > 0x10000:
+        raise ErrorEnlace(f"La imagen ocupa {tamano} bytes; no cabe en un segmento de 64K")
+
+    # === Direcciones finales de todos los símbolos e índice de públicos ===
+    direcciones: List[List[Optional[int]]] = []
+    publicos: Dict[str, int] = {}
+    definido_en: Dict[str, str] = {}
+    for i, modulo in enumerate(modulos):
+        finales: List[Optional[int]] = []
+        for simbolo in modulo.simbolos:
+            if simbolo.externo:
+                finales.append(None)
+                continue
+            if simbolo.segmento is None:
+                valor = simbolo.valor
+            else:
+                valor = colocacion[i][simbolo.segmento] + simbolo.valor - modulo.segmentos[simbolo.segmento].origen
+            finales.append(valor)
+            if simbolo.publico:
+                if simbolo.nombre in publicos:
+                    raise ErrorEnlace(f"Símbolo público '{simbolo.nombre}' definido en "
+                                      f"{definido_en[simbolo.nombre]} y en {modulo.nombre}")
+                publicos[simbolo.nombre] = valor
+                definido_en[simbolo.nombre] = modulo.nombre or f'módulo {i}'
+        direcciones.append(finales)
+
+    # === Imagen: copia de los bytes de cada parte ===
+    imagen = bytearray(tamano)
+    for i, modulo in enumerate(modulos):
+        for clase, segmento in modulo.segmentos.items():
+            if len(segmento.datos):
+                inicio = colocacion[i][clase] - origen
+                imagen[inicio:inicio + len(segmento.datos)] = segmento.datos
+
+    # === Reubicaciones: se calculan todas y se aplican en una pasada ===
+    abs16: List[Tuple[int, int]] = []
+    rel8: List[Tuple[int, int]] = []
+    for i, modulo in enumerate(modulos):
+        finales = direcciones[i]
+        for fixup in modulo.fixups:
+            destino = finales[fixup.simbolo]
+            if destino is None:
+                nombre = modulo.simbolos[fixup.simbolo].nombre
+                destino = publicos.get(nombre)
+                if destino is None:
+                    raise ErrorEnlace(f"Símbolo externo '{nombre}' no definido (referenciado en {modulo.nombre})")
+            posicion = colocacion[i][fixup.segmento] + fixup.offset
+            if fixup.tipo == 'ABS16':
+                abs16.append((posicion - origen, (destino + fixup.sumando) & 0xFFFF))
+            else:
+                desplazamiento = destino + fixup.sumando - (posicion + 1)
+                if not -128 <= desplazamiento <= 127:
+                    raise ErrorEnlace(f"Salto a '{modulo.simbolos[fixup.simbolo].nombre}' fuera de rango "
+                                      f"({desplazamiento}) en {modulo.nombre}")
+                rel8.append((posicion - origen, desplazamiento & 0xFF))
+
+    vista = memoryview(imagen)
+    empaquetar = struct.pack_into
+    for posicion, valor in abs16:
+        empaquetar('<H', vista, posicion, valor)
+    for posicion, valor in rel8:
+        vista[posicion] = valor
+    vista.release()
+
+    if entrada is None:
+        ip = segmentos['CODE'][0]
+    elif entrada in publicos:
+        ip = publicos[entrada]
+    else:
+        raise ErrorEnlace(f"Símbolo de entrada '{entrada}' no es público")
+
+    return ResultadoEnlace(imagen, origen, ip, publicos, segmentos, len(abs16) + len(rel8))
+
+
+def enlazar_archivos(rutas: Sequence[str], salida: str, formato: str = 'com',
+                     entrada: Optional[str] = None) -> ResultadoEnlace:
+    modulos = [ModuloObjeto.leer(ruta) for ruta in rutas]
+    try:
+        resultado = enlazar(modulos, formato, entrada)
+    finally:
+        for modulo in modulos:
+            modulo.cerrar()
+    with open(salida, 'wb') as f:
+        f.write(resultado.como_com() if formato == 'com' else resultado.como_exe())
+    return resultado
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Enlazador de módulos objeto 8086")
+    parser.add_argument('objetos', nargs='+', help="Archivos .obj")
+    parser.add_argument('-o', '--salida', required=True)
+    parser.add_argument('--exe', action='store_true', help="Genera MZ .EXE en lugar de .COM")
+    parser.add_argument('--entrada', help="Símbolo público donde inicia la ejecución")
+    args = parser.parse_args(argv)
+
+    try:
+        resultado = enlazar_archivos(args.objetos, args.salida, 'exe' if args.exe else 'com', args.entrada)
+    except (ErrorEnlace, ValueError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(f"{args.salida}: {len(resultado.imagen)} bytes, {len(args.objetos)} módulos, "
+          f"{resultado.reubicaciones} reubicaciones")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,11 +5,22 @@
 
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
+import copy
+import io
+import itertools
+import queue
 import re
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
-from dataclasses import dataclass
-from typing import List, Tuple, Optional
+from dataclasses import dataclass, field
+from typing import BinaryIO, Callable, Dict, Iterable, List, Mapping, Tuple, Optional, Union
 from enum import Enum
+from types import MappingProxyType
+
+from diagnosticos import Codigo, Diagnostico, como_diagnostico, diagnostico
+from expresiones import ErrorExpresion, analizar_expresion, evaluar, es_expresion
 
 
 class TipoToken(Enum):
@@ -23,7 +34,7 @@ class TipoToken(Enum):
     CONSTANTE_CARACTER = "Constante Caracter"
     NO_IDENTIFICADO = "Elemento no identificado"
 
-@dataclass
+@dataclass(frozen=True)
 class Token:
     valor: str
     tipo: TipoToken
@@ -37,71 +48,508 @@ class Simbolo:
     valor: str
     tamanio: str
     direccion: str = ""
+    valor_numerico: Optional[int] = None  # Valor de EQU ya resuelto (caché)
+    ambito: str = ""                      # Procedimiento donde es local ('' = global)
 
+    @property
+    def nombre_calificado(self) -> str:
+        return f"{self.ambito}::{self.nombre}" if self.ambito else self.nombre
 
-class Ensamblador8086:
-    def __init__(self):
-        # INSTRUCCIONES VÁLIDAS PERMITIDAS (solo las especificadas)
-        # Sin operandos: CMC, CMPSB, NOP, POPA, AAD, AAM
-        # Con 1 operando: MUL, INC, IDIV, INT
-        # Con 2 operandos: AND, LEA, OR, XOR
-        # Saltos: JNAE, JNE, JNLE, LOOPE, JA, JC
-        self.instrucciones = {
-            # Instrucciones sin operandos
-            'CMC', 'CMPSB', 'NOP', 'POPA', 'AAD', 'AAM',
-            # Instrucciones con 1 operando
-            'MUL', 'INC', 'IDIV', 'INT',
-            # Instrucciones con 2 operandos
-            'AND', 'LEA', 'OR', 'XOR',
-            # Saltos condicionales permitidos
-            'JNAE', 'JNE', 'JNLE', 'LOOPE', 'JA', 'JC'
-        }
 
-        self.pseudoinstrucciones = {
-            'SEGMENT', 'ENDS', 'END', 'DB', 'DW', 'DD', 'DQ', 'DT',
-            'EQU', 'DUP', 'BYTE', 'PTR', 'WORD', 'DWORD', 'MACRO', 'ENDM', 
-            'PROC', 'ENDP', 'ASSUME', 'ORG', 'OFFSET', 'MODEL', 'STACK',
-            'SMALL', 'MEDIUM', 'LARGE', 'COMPACT', 'HUGE', 'FLAT'
-        }
+# Versiones de las tablas de símbolos: únicas entre todas las tablas del proceso
+_VERSIONES_TABLA = itertools.count(1)
 
-        # Registros 8086 (8-bit, 16-bit y segmento)
-        self.registros_8bit = {'AL', 'AH', 'BL', 'BH', 'CL', 'CH', 'DL', 'DH'}
-        self.registros_16bit = {'AX', 'BX', 'CX', 'DX', 'SI', 'DI', 'BP', 'SP'}
-        self.registros_segmento = {'CS', 'DS', 'ES', 'SS'}
-        self.registros = self.registros_8bit | self.registros_16bit | self.registros_segmento | {'IP', 'FLAGS'}
-
-        # Codificación de registros según el PDF
-        self.reg_codigo = {
-            'AL': '000', 'CL': '001', 'DL': '010', 'BL': '011',
-            'AH': '100', 'CH': '101', 'DH': '110', 'BH': '111',
-            'AX': '000', 'CX': '001', 'DX': '010', 'BX': '011',
-            'SP': '100', 'BP': '101', 'SI': '110', 'DI': '111'
-        }
-        
-        self.regs2_codigo = {'ES': '00', 'CS': '01', 'SS': '10', 'DS': '11'}
 
-        # Instrucciones que NO requieren operandos
-        self.instrucciones_sin_operandos = {
-            'CMC', 'CMPSB', 'NOP', 'POPA', 'AAD', 'AAM'
-        }
-        
-        # Instrucciones que requieren 1 operando
-        self.instrucciones_1_operando = {
-            'MUL', 'INC', 'IDIV', 'INT',
-            # Saltos permitidos
-            'JNAE', 'JNE', 'JNLE', 'LOOPE', 'JA', 'JC'
-        }
-        
-        # Instrucciones que requieren 2 operandos
-        self.instrucciones_2_operandos = {
-            'AND', 'LEA', 'OR', 'XOR'
-        }
+class TablaSimbolos(dict):
+    """
+    Tabla de símbolos de un ámbito (global o de un procedimiento).
+    Es un dict nombre -> Simbolo que mantiene un índice en minúsculas, de modo
+    que la búsqueda sin distinguir mayúsculas es O(1). 'padre' enlaza con el
+    ámbito que lo contiene para la búsqueda en cadena. 'version' cambia con
+    cada alta o baja (la usan las cachés que dependen de los símbolos).
+    """
+
+    def __init__(self, simbolos=None, nombre: str = "", padre: Optional['TablaSimbolos'] = None):
+        super().__init__()
+        self.nombre = nombre
+        self.padre = padre
+        self._indice: Dict[str, Simbolo] = {}
+        self.version = next(_VERSIONES_TABLA)
+        if simbolos:
+            self.update(simbolos)
+
+    def __setitem__(self, clave: str, simbolo: Simbolo):
+        super().__setitem__(clave, simbolo)
+        self._indice[clave.lower()] = simbolo
+        self.version = next(_VERSIONES_TABLA)
+
+    def __delitem__(self, clave: str):
+        super().__delitem__(clave)
+        self._indice.pop(clave.lower(), None)
+        self.version = next(_VERSIONES_TABLA)
+        for otra, simbolo in self.items():
+            if otra.lower() == clave.lower():
+                self._indice[otra.lower()] = simbolo
+
+    def update(self, *args, **kwargs):
+        for clave, simbolo in dict(*args, **kwargs).items():
+            self[clave] = simbolo
+
+    def setdefault(self, clave: str, simbolo: Simbolo = None) -> Simbolo:
+        if clave not in self:
+            self[clave] = simbolo
+        return self[clave]
+
+    def pop(self, clave: str, *defecto):
+        if clave in self:
+            simbolo = self[clave]
+            del self[clave]
+            return simbolo
+        return super().pop(clave, *defecto)
+
+    def clear(self):
+        super().clear()
+        self._indice.clear()
+        self.version = next(_VERSIONES_TABLA)
+
+    def local(self, nombre: str) -> Optional[Simbolo]:
+        """Símbolo definido en este ámbito (exacto o sin distinguir mayúsculas)"""
+        simbolo = self.get(nombre)
+        return simbolo if simbolo is not None else self._indice.get(nombre.lower())
+
+    def buscar(self, nombre: str) -> Optional[Simbolo]:
+        """Busca en este ámbito y luego en los que lo contienen"""
+        ambito = self
+        while ambito is not None:
+            simbolo = ambito.local(nombre)
+            if simbolo is not None:
+                return simbolo
+            ambito = ambito.padre
+        return None
+
+
+@dataclass(frozen=True)
+class BloqueDup:
+    """Registro run-length de 'cantidad DUP(valor)': el patrón se repite al escribirse"""
+    cantidad: int
+    patron: bytes
+
+    @property
+    def tamano(self) -> int:
+        return self.cantidad * len(self.patron)
+
+
+TAMANOS_DIRECTIVA = {'DB': 1, 'DW': 2, 'DD': 4, 'DQ': 8, 'DT': 10}
+
+
+def tamano_datos(registros: Iterable[Union[bytes, BloqueDup]]) -> int:
+    return sum(r.tamano if isinstance(r, BloqueDup) else len(r) for r in registros)
+
+
+def escribir_datos(archivo: BinaryIO, registros: Iterable[Union[bytes, BloqueDup]],
+                   tam_bloque: int = 1 << 16) -> int:
+    """
+    Escribe los registros en un archivo binario. Cada BloqueDup se escribe
+    repitiendo un búfer de hasta tam_bloque bytes, así la memoria usada no
+    depende de la cantidad de repeticiones. Retorna los bytes escritos.
+    """
+    total = 0
+    for reg in registros:
+        if not isinstance(reg, BloqueDup):
+            archivo.write(reg)
+            total += len(reg)
+            continue
+        if not reg.patron or not reg.cantidad:
+            continue
+        por_bufer = max(1, tam_bloque // len(reg.patron))
+        bufer = reg.patron * min(por_bufer, reg.cantidad)
+        completos, resto = divmod(reg.cantidad, por_bufer)
+        for _ in range(completos):
+            archivo.write(bufer)
+        if resto:
+            archivo.write(bufer[:resto * len(reg.patron)])
+        total += reg.tamano
+    return total
+
+
+def materializar_datos(registros: Iterable[Union[bytes, BloqueDup]]) -> bytes:
+    return b''.join(r.patron * r.cantidad if isinstance(r, BloqueDup) else r for r in registros)
+
+
+# =========================================================================
+# DISPOSICIÓN DE SEGMENTOS
+# =========================================================================
+
+SEGMENTOS = ('STACK', 'DATA', 'CODE')
+TAMANO_CACHE_VALIDACION = 4096
+INTERVALO_PROGRESO = 1000      # Líneas entre llamadas a Ensamblador8086.progreso
+BASE_SEGMENTO_PREDETERMINADA = 0x0250
+
+# Símbolos cuyo valor es una dirección (requieren reubicación al enlazar)
+TIPOS_CON_DIRECCION = frozenset({'Etiqueta', 'Variable', 'Procedimiento', 'Externo'})
+
+# EXTRN nombre:tipo -> tamaño con el que se trata el símbolo
+TIPOS_EXTERNOS = {'BYTE': 'DB', 'WORD': 'DW', 'DWORD': 'DD', 'NEAR': '', 'FAR': '', 'ABS': ''}
+LISTA_TIPOS_EXTERNOS = ', '.join(TIPOS_EXTERNOS)
+
+
+# Literales numéricos completos; cualquier otro texto (símbolos como DOSH o TAB,
+# expresiones como C-02465h) se evalúa como expresión. Un hexadecimal sin el 0
+# inicial (INT 21h) se acepta como operando aunque el tokenizador lo marque.
+PATRON_LITERAL_DEC = re.compile(r'^\d+D?$')
+PATRON_LITERAL_HEX = re.compile(r'^\d[0-9A-F]*H$')
+PATRON_LITERAL_BIN = re.compile(r'^[01]+B$')
+
+
+def valor_literal(texto: str) -> Optional[int]:
+    """Valor de un literal decimal, hexadecimal (H) o binario (B); None si 'texto' no es un literal"""
+    texto = texto.strip().upper()
+    if PATRON_LITERAL_DEC.match(texto):
+        return int(texto.rstrip('D'))
+    if PATRON_LITERAL_HEX.match(texto):
+        return int(texto[:-1], 16)
+    if PATRON_LITERAL_BIN.match(texto):
+        return int(texto[:-1], 2)
+    return None
+
+
+def leer_direccion(texto: str) -> int:
+    """Dirección escrita como 0100h, 100h, 0x100 o decimal (línea de comandos y API)"""
+    texto = texto.strip()
+    if texto.upper().endswith('H'):
+        return int(texto[:-1], 16)
+    return int(texto, 0)
+
+
+@dataclass
+class DisposicionSegmentos:
+    """
+    Direcciones base de los segmentos y contador de posición de cada uno.
+    Las dos pasadas de generar_codificacion usan la misma instancia
+    (reiniciar() al comenzar cada pasada). ORG mueve el contador del segmento
+    abierto a una dirección absoluta.
+    """
+    bases: Dict[str, int] = field(
+        default_factory=lambda: dict.fromkeys(SEGMENTOS, BASE_SEGMENTO_PREDETERMINADA))
+
+    def __post_init__(self):
+        self.reiniciar()
+
+    @classmethod
+    def desde_texto(cls, asignaciones: Iterable[str]) -> 'DisposicionSegmentos':
+        """Construye la disposición a partir de textos 'SEGMENTO=dirección' (ej. 'CODE=100h')"""
+        disposicion = cls()
+        for asignacion in asignaciones:
+            nombre, _, direccion = asignacion.partition('=')
+            nombre = nombre.strip().upper().lstrip('.')
+            if nombre not in SEGMENTOS or not direccion:
+                raise ValueError(f"Base de segmento inválida: '{asignacion}'")
+            disposicion.bases[nombre] = leer_direccion(direccion)
+        disposicion.reiniciar()
+        return disposicion
+
+    def reiniciar(self):
+        self.contadores = dict(self.bases)
+        self.segmento: Optional[str] = None
+        self.direccion = min(self.bases.values())
+
+    def abrir(self, segmento: str):
+        self.segmento = segmento
+        self.direccion = self.contadores[segmento]
+
+    def cerrar(self):
+        # La dirección se conserva: ENDS/END muestran dónde terminó el segmento
+        self.segmento = None
+
+    def avanzar(self, tamano: int):
+        self.direccion += tamano
+        if self.segmento:
+            self.contadores[self.segmento] = self.direccion
+
+    def org(self, direccion: int):
+        self.direccion = direccion
+        if self.segmento:
+            self.contadores[self.segmento] = direccion
+
+
+@dataclass
+class LimitesAnalisis:
+    """
+    Límites para entradas patológicas (archivos corruptos, fuzzing). Una línea
+    más larga que max_longitud_linea no se tokeniza (se rechaza sin pasar por
+    las expresiones regulares); una con más de max_tokens_linea elementos no se
+    valida. Tras max_errores líneas incorrectas el análisis se detiene.
+    umbral_lento (segundos) activa la guarda de tiempo: las líneas cuyo
+    tokenizado más validación lo exceden quedan en Ensamblador8086.advertencias.
+    None desactiva cada límite; todos vienen desactivados (se activan desde la
+    línea de comandos o la API).
+    """
+    max_longitud_linea: Optional[int] = None
+    max_tokens_linea: Optional[int] = None
+    max_errores: Optional[int] = None
+    umbral_lento: Optional[float] = None
+
+
+@dataclass
+class EstadoAnalisis:
+    """Lo que analizar_sintaxis arrastra de una línea a la siguiente (además de los símbolos)"""
+    segmento: Optional[str] = None
+    procedimientos_abiertos: Dict[str, dict] = field(default_factory=dict)   # ámbito -> análisis de su PROC
+    lineas_publicas: Dict[str, dict] = field(default_factory=dict)           # nombre -> análisis de su PUBLIC
+
+
+class AnalisisCancelado(Exception):
+    """Lanzada desde Ensamblador8086.progreso para interrumpir la fase en curso"""
+
+
+class ErrorCodificacion(Exception):
+    """Una línea válida cuyo operando, ya resuelto, no cabe en la codificación"""
+
+    def __init__(self, mensaje: Diagnostico):
+        super().__init__(str(mensaje))
+        self.mensaje = mensaje
+
+
+# =========================================================================
+# TABLAS DE OPCODES (compartidas por el codificador y el desensamblador)
+# =========================================================================
+
+# Instrucciones sin operandos: mnemónico -> bytes en hexadecimal
+CODIGOS_SIN_OPERANDOS = {
+    'CMC': 'F5',      # 11110101
+    'CMPSB': 'A6',    # 10100110
+    'NOP': '90',      # 10010000
+    'POPA': '61',     # 01100001
+    'AAD': 'D5 0A',   # 11010101 00001010
+    'AAM': 'D4 0A',   # 11010100 00001010
+}
+
+# Saltos cortos: mnemónico -> opcode (seguido de desplazamiento de 8 bits)
+CODIGOS_SALTOS = {
+    'JNAE': 0x72,   # 01110010
+    'JC': 0x72,     # 01110010 (alias de JNAE)
+    'JNE': 0x75,    # 01110101
+    'JNLE': 0x7F,   # 01111111
+    'JA': 0x77,     # 01110111
+    'LOOPE': 0xE1,  # 11100001
+}
+
+# AND/OR/XOR reg, reg con d=1: opcode con w=0 (con w=1 es opcode + 1)
+CODIGOS_LOGICAS = {
+    'AND': 0x22,    # 001000dw
+    'OR': 0x0A,     # 000010dw
+    'XOR': 0x32,    # 001100dw
+}
+
+# AND/OR/XOR AL, inm8 con w=0 (AX, inm16 con w=1 es opcode + 1)
+CODIGOS_LOGICAS_ACUMULADOR = {
+    'AND': 0x24,    # 0010010w
+    'OR': 0x0C,     # 0000110w
+    'XOR': 0x34,    # 0011010w
+}
+
+# AND/OR/XOR reg, inm: 1000000w mod ext r/m + inmediato (80 ib / 81 iw)
+OPCODE_GRUPO_80 = 0x80
+EXTENSIONES_GRUPO_80 = {'AND': 0b100, 'OR': 0b001, 'XOR': 0b110}
+
+# MUL/IDIV: 1111011w mod ext r/m (ext va en el campo reg)
+OPCODE_GRUPO_F6 = 0xF6
+EXTENSIONES_GRUPO_F6 = {'MUL': 0b100, 'IDIV': 0b111}
+
+OPCODE_INC_REG16 = 0x40   # 01000reg
+OPCODE_INC_RM8 = 0xFE     # 11111110 mod 000 r/m
+OPCODE_INT = 0xCD         # 11001101
+OPCODE_LEA = 0x8D         # 10001101
+
+
+# =========================================================================
+# INSTRUCCIONES Y REGISTROS (inmutables: las comparten todas las instancias e hilos)
+# =========================================================================
+
+# INSTRUCCIONES VÁLIDAS PERMITIDAS (solo las especificadas)
+# Sin operandos: CMC, CMPSB, NOP, POPA, AAD, AAM
+# Con 1 operando: MUL, INC, IDIV, INT
+# Con 2 operandos: AND, LEA, OR, XOR
+# Saltos: JNAE, JNE, JNLE, LOOPE, JA, JC
+INSTRUCCIONES = frozenset({
+    # Instrucciones sin operandos
+    'CMC', 'CMPSB', 'NOP', 'POPA', 'AAD', 'AAM',
+    # Instrucciones con 1 operando
+    'MUL', 'INC', 'IDIV', 'INT',
+    # Instrucciones con 2 operandos
+    'AND', 'LEA', 'OR', 'XOR',
+    # Saltos condicionales permitidos
+    'JNAE', 'JNE', 'JNLE', 'LOOPE', 'JA', 'JC'
+})
+
+PSEUDOINSTRUCCIONES = frozenset({
+    'SEGMENT', 'ENDS', 'END', 'DB', 'DW', 'DD', 'DQ', 'DT',
+    'EQU', 'DUP', 'BYTE', 'PTR', 'WORD', 'DWORD', 'MACRO', 'ENDM',
+    'PROC', 'ENDP', 'ASSUME', 'ORG', 'OFFSET', 'MODEL', 'STACK', 'PUBLIC', 'EXTRN',
+    'SMALL', 'MEDIUM', 'LARGE', 'COMPACT', 'HUGE', 'FLAT'
+})
+
+# Registros 8086 (8-bit, 16-bit y segmento)
+REGISTROS_8BIT = frozenset({'AL', 'AH', 'BL', 'BH', 'CL', 'CH', 'DL', 'DH'})
+REGISTROS_16BIT = frozenset({'AX', 'BX', 'CX', 'DX', 'SI', 'DI', 'BP', 'SP'})
+REGISTROS_SEGMENTO = frozenset({'CS', 'DS', 'ES', 'SS'})
+REGISTROS = REGISTROS_8BIT | REGISTROS_16BIT | REGISTROS_SEGMENTO | {'IP', 'FLAGS'}
+
+# Codificación de registros según el PDF
+REG_CODIGO = MappingProxyType({
+    'AL': '000', 'CL': '001', 'DL': '010', 'BL': '011',
+    'AH': '100', 'CH': '101', 'DH': '110', 'BH': '111',
+    'AX': '000', 'CX': '001', 'DX': '010', 'BX': '011',
+    'SP': '100', 'BP': '101', 'SI': '110', 'DI': '111'
+})
+
+REGS2_CODIGO = MappingProxyType({'ES': '00', 'CS': '01', 'SS': '10', 'DS': '11'})
+
+# Instrucciones que NO requieren operandos
+INSTRUCCIONES_SIN_OPERANDOS = frozenset({'CMC', 'CMPSB', 'NOP', 'POPA', 'AAD', 'AAM'})
+
+# Instrucciones que requieren 1 operando
+INSTRUCCIONES_1_OPERANDO = frozenset({
+    'MUL', 'INC', 'IDIV', 'INT',
+    # Saltos permitidos
+    'JNAE', 'JNE', 'JNLE', 'LOOPE', 'JA', 'JC'
+})
+
+# Instrucciones que requieren 2 operandos
+INSTRUCCIONES_2_OPERANDOS = frozenset({'AND', 'LEA', 'OR', 'XOR'})
+
+
+class Ensamblador8086:
+    def __init__(self):
+        # Tablas de instrucciones y registros: compartidas, de solo lectura (ver arriba)
+        self.instrucciones = INSTRUCCIONES
+        self.pseudoinstrucciones = PSEUDOINSTRUCCIONES
+        self.registros_8bit = REGISTROS_8BIT
+        self.registros_16bit = REGISTROS_16BIT
+        self.registros_segmento = REGISTROS_SEGMENTO
+        self.registros = REGISTROS
+        self.reg_codigo = REG_CODIGO
+        self.regs2_codigo = REGS2_CODIGO
+        self.instrucciones_sin_operandos = INSTRUCCIONES_SIN_OPERANDOS
+        self.instrucciones_1_operando = INSTRUCCIONES_1_OPERANDO
+        self.instrucciones_2_operandos = INSTRUCCIONES_2_OPERANDOS
 
         self.tokens: List[Token] = []
-        self.tabla_simbolos = {}
+        self.tabla_simbolos = {}            # Ámbito global (ver la propiedad tabla_simbolos)
         self.lineas_codigo: List[str] = []
         self.lineas_analizadas: List[dict] = []
         self.lineas_codificadas: List[dict] = []
+        self._resolviendo = set()
+
+        # Preprocesamiento: líneas originales y correspondencia con lineas_codigo
+        self.lineas_fuente: List[str] = []
+        self.origen_lineas: List[int] = []
+        self.tokens_preprocesados = {}
+        self.procesador_macros = None
+        self.procesador_includes = None
+        self.directorio_base: Optional[Path] = None    # Base de las rutas de INCLUDE
+        self.definiciones: Dict[str, int] = {}          # Símbolos para IF/IFDEF
+        self.procesador_condicionales = None
+        self.resultados_preprocesados: Dict[int, Tuple[str, Tuple[str, str]]] = {}
+        self._lineas_preprocesadas = None
+        self._cache_tokens: Dict[int, Tuple[str, List[Token]]] = {}
+
+        # Direcciones base de los segmentos (configurable; ej. CODE=100h para .COM)
+        self.disposicion = DisposicionSegmentos()
+
+        # Enlace: símbolos exportados (minúsculas -> nombre) y referencias a reubicar
+        # de la última instrucción/dato codificado: (posición, tipo, símbolo, sumando)
+        self.publicos: Dict[str, str] = {}
+        self.fixups_linea: List[Tuple[int, str, str, int]] = []
+        # Análisis que la codificación marcó Incorrecta (ErrorCodificacion) y su resultado previo
+        self._rechazadas_al_codificar: List[Tuple[dict, str, Diagnostico]] = []
+
+        # Límites de trabajo por línea y por archivo; advertencias de la guarda de tiempo
+        self.limites = LimitesAnalisis()
+        self.errores = 0
+        self.advertencias: List[Tuple[int, Diagnostico]] = []
+        self._tiempos_tokenizado: Dict[int, float] = {}
+
+        # progreso(fase, líneas hechas, total): cada INTERVALO_PROGRESO líneas y al terminar
+        # cargar_lineas, analizar_sintaxis y generar_codificacion. Si lanza, la fase se interrumpe.
+        self.progreso: Optional[Callable[[str, int, int], None]] = None
+
+        # validar_texto: (texto, segmento, versión de símbolos) -> resultado, en orden LRU
+        self._cache_validacion: 'OrderedDict[tuple, Tuple[str, Diagnostico]]' = OrderedDict()
+        self.aciertos_validacion = 0
+
+    # =========================================================================
+    # ÁMBITOS DE SÍMBOLOS (PROC/ENDP)
+    # =========================================================================
+
+    @property
+    def tabla_simbolos(self) -> TablaSimbolos:
+        """Ámbito global. Las etiquetas de cada procedimiento están en self.ambitos"""
+        return self._tabla_simbolos
+
+    @tabla_simbolos.setter
+    def tabla_simbolos(self, simbolos):
+        if not isinstance(simbolos, TablaSimbolos):
+            simbolos = TablaSimbolos(simbolos)
+        self._tabla_simbolos = simbolos
+        self.ambitos: Dict[str, TablaSimbolos] = {}     # nombre de procedimiento (minúsculas) -> ámbito
+        self.ambito_actual: TablaSimbolos = simbolos
+
+    @property
+    def version_simbolos(self) -> Tuple[int, ...]:
+        """Versiones del ámbito actual y de los que lo contienen: cambia con cualquier símbolo visible"""
+        versiones = []
+        ambito = self.ambito_actual
+        while ambito is not None:
+            versiones.append(ambito.version)
+            ambito = ambito.padre
+        return tuple(versiones)
+
+    def ambito(self, nombre: str) -> TablaSimbolos:
+        """Tabla de símbolos de un procedimiento ('' = ámbito global)"""
+        return self.ambitos.get(nombre.lower(), self._tabla_simbolos) if nombre else self._tabla_simbolos
+
+    def actualizar_ambito(self, tokens: List[Token]):
+        """Abre el ámbito de 'nombre PROC' o lo cierra en 'nombre ENDP' (líneas ya validadas)"""
+        if len(tokens) < 2:
+            return
+        nombre = tokens[0].valor
+        directiva = tokens[1].valor.upper()
+        if directiva == 'PROC':
+            # El nombre del procedimiento siempre es global
+            self._tabla_simbolos[nombre] = Simbolo(nombre, 'Procedimiento', '', '')
+            ambito = TablaSimbolos(nombre=nombre, padre=self.ambito_actual)
+            self.ambitos[nombre.lower()] = ambito
+            self.ambito_actual = ambito
+        elif directiva == 'ENDP' and self.ambito_actual.padre is not None:
+            self.ambito_actual = self.ambito_actual.padre
+
+    def marcar_procedimiento(self, tokens: List[Token], direccion: int):
+        """Asigna la dirección de un procedimiento en PROC y su tamaño en ENDP"""
+        if len(tokens) < 2 or tokens[1].valor.upper() not in ('PROC', 'ENDP'):
+            return
+        simbolo = self._tabla_simbolos.local(tokens[0].valor)
+        if simbolo is None or simbolo.tipo != 'Procedimiento':
+            return
+        if tokens[1].valor.upper() == 'PROC':
+            simbolo.direccion = f'{direccion:04X}'
+        elif simbolo.direccion:
+            simbolo.tamanio = str(direccion - int(simbolo.direccion, 16))
+
+    def simbolos_listado(self) -> List[Simbolo]:
+        """Símbolos globales; tras cada procedimiento, sus etiquetas locales"""
+        listado = []
+        for simbolo in self._tabla_simbolos.values():
+            listado.append(simbolo)
+            if simbolo.tipo == 'Procedimiento':
+                listado.extend(self.ambito(simbolo.nombre).values())
+        return listado
+
+    def olvidar_valores_equ(self):
+        """Descarta los valores EQU memorizados (pueden depender de direcciones que cambian)"""
+        for tabla in (self._tabla_simbolos, *self.ambitos.values()):
+            for simbolo in tabla.values():
+                simbolo.valor_numerico = None
 
     def limpiar_comentarios(self, linea: str) -> str:
         pos = linea.find(';')
@@ -450,21 +898,147 @@ class Ensamblador8086:
             if not path.exists():
                 return False
             with open(path, 'r', encoding='utf-8', errors='ignore') as f:
-                self.lineas_codigo = [ln.rstrip('\n') for ln in f]
-            self.tokens = []
-            for num, linea in enumerate(self.lineas_codigo, 1):
-                self.tokens.extend(self.tokenizar_linea(linea, num))
+                lineas = [ln.rstrip('\n') for ln in f]
+            self.directorio_base = path.parent
+            self.cargar_lineas(lineas)
             return True
+        except AnalisisCancelado:
+            raise
         except Exception as e:
             print(f"Error: {e}")
             return False
 
+    def cargar_lineas(self, lineas: List[str]):
+        """Carga código fuente ya leído: lo preprocesa (IF, INCLUDE, macros) y lo tokeniza"""
+        self.lineas_fuente = lineas
+        self.preprocesar()
+        self.tokens = []
+        progreso = self.progreso
+        total = len(self.lineas_codigo)
+        for i, linea in enumerate(self.lineas_codigo):
+            if progreso is not None and not i % INTERVALO_PROGRESO:
+                progreso('cargar_lineas', i, total)
+            if self.resultado_preprocesado(i) is None:
+                self.tokens.extend(self.tokens_de_linea(i, linea))
+        if progreso is not None:
+            progreso('cargar_lineas', total, total)
+
+    def cargar_texto(self, texto: str):
+        """Carga código fuente dado como un solo texto (INCLUDE relativo a directorio_base)"""
+        self.cargar_lineas(texto.splitlines())
+
+    def copia_para_analizar(self) -> 'Ensamblador8086':
+        """
+        Copia que comparte el código ya cargado y tokenizado. Analizarla y codificarla
+        no toca el análisis, los símbolos ni la codificación de esta instancia.
+        """
+        copia = copy.copy(self)
+        copia.disposicion = DisposicionSegmentos(dict(self.disposicion.bases))
+        copia._resolviendo = set()
+        copia._cache_tokens = dict(self._cache_tokens)
+        copia._tiempos_tokenizado = dict(self._tiempos_tokenizado)
+        copia._cache_validacion = OrderedDict()
+        copia.progreso = None
+        return copia
+
+    def definir(self, nombre: str, valor: int = 1):
+        """Define un símbolo para IF/IFDEF (como /D en la línea de comandos). Aplica en la siguiente carga."""
+        self.definiciones[nombre.upper()] = valor
+
+    def preprocesar(self):
+        """
+        Ejecuta las etapas previas a la tokenización sobre lineas_fuente y deja
+        el resultado en lineas_codigo. origen_lineas guarda, para cada línea
+        resultante, su número de línea en el archivo fuente.
+        """
+        from preprocesador import (
+            LineaFuente, ProcesadorCondicionales, ProcesadorIncludes, ProcesadorMacros,
+        )
+
+        lineas = [LineaFuente(texto, num) for num, texto in enumerate(self.lineas_fuente, 1)]
+        progreso = self.progreso
+        # Condicionales e INCLUDE en un solo recorrido en orden: los archivos de
+        # bloques inactivos no se leen y un IF ve los EQU de las cabeceras previas
+        self.procesador_condicionales = ProcesadorCondicionales(self.definiciones)
+        self.procesador_includes = ProcesadorIncludes(self, self.directorio_base)
+        lineas = self.procesador_condicionales.procesar(lineas, progreso, self.procesador_includes)
+        self.procesador_macros = ProcesadorMacros(self)
+        lineas = self.procesador_macros.procesar(lineas, progreso=progreso)
+
+        self.lineas_codigo = [linea.texto for linea in lineas]
+        self.origen_lineas = [linea.origen for linea in lineas]
+        self._lineas_preprocesadas = self.lineas_codigo
+        self.tokens_preprocesados = {i: (linea.texto, linea.tokens)
+                                     for i, linea in enumerate(lineas) if linea.tokens is not None}
+        self.resultados_preprocesados = {i: (linea.texto, linea.resultado)
+                                         for i, linea in enumerate(lineas) if linea.resultado is not None}
+        self._cache_tokens = {}
+
+    def tokens_de_linea(self, indice: int, linea: str) -> List[Token]:
+        """
+        Tokens de lineas_codigo[indice]. Reutiliza los del preprocesador o los de
+        una pasada anterior mientras el texto de la línea no cambie, así el análisis
+        y las dos pasadas de codificación tokenizan cada línea una sola vez.
+        """
+        texto = self.lineas_codigo[indice]
+        previo = self.tokens_preprocesados.get(indice)
+        if previo is not None and previo[0] == texto:
+            return previo[1]
+        previo = self._cache_tokens.get(indice)
+        if previo is not None and previo[0] == texto:
+            return previo[1]
+        maximo = self.limites.max_longitud_linea
+        if maximo is not None and len(linea) > maximo and len(self.limpiar_comentarios(linea).strip()) > maximo:
+            # Sin tokenizar: analizar_sintaxis la rechaza por su longitud
+            tokens = [Token(linea, TipoToken.NO_IDENTIFICADO, indice + 1, 0)]
+        elif self.limites.umbral_lento is not None:
+            inicio = time.perf_counter()
+            tokens = self.tokenizar_linea(linea, indice + 1)
+            self._tiempos_tokenizado[indice] = time.perf_counter() - inicio
+        else:
+            tokens = self.tokenizar_linea(linea, indice + 1)
+        self._cache_tokens[indice] = (texto, tokens)
+        return tokens
+
+    def limite_excedido(self, linea: str, tokens: List[Token]) -> Optional[Diagnostico]:
+        """Diagnóstico si la línea excede los límites de longitud o de tokens; None si no"""
+        limites = self.limites
+        if limites.max_longitud_linea is not None and len(linea) > limites.max_longitud_linea:
+            return diagnostico(Codigo.LINEA_DEMASIADO_LARGA, len(linea), limites.max_longitud_linea)
+        if limites.max_tokens_linea is not None and len(tokens) > limites.max_tokens_linea:
+            return diagnostico(Codigo.DEMASIADOS_TOKENS, len(tokens), limites.max_tokens_linea)
+        return None
+
+    def resultado_preprocesado(self, indice: int) -> Optional[Tuple[str, str]]:
+        """(resultado, mensaje) de lineas_codigo[indice] si el preprocesador ya la resolvió
+        (directivas condicionales y líneas omitidas); None si la línea se debe analizar"""
+        previo = self.resultados_preprocesados.get(indice)
+        if previo is not None and previo[0] == self.lineas_codigo[indice]:
+            return previo[1]
+        return None
+
+    def origen_linea(self, numero: int) -> int:
+        """Número de línea en el archivo fuente de la línea 'numero' (1-based) de lineas_codigo"""
+        if self._lineas_preprocesadas is self.lineas_codigo and 0 < numero <= len(self.origen_lineas):
+            return self.origen_lineas[numero - 1]
+        return numero
+
     def analizar_sintaxis(self):
         self.lineas_analizadas = []
+        self._rechazadas_al_codificar = []
         self.tabla_simbolos = {}
-        segmento = None
+        self.publicos = {}
+        self.errores = 0
+        self.advertencias = []
+        estado = EstadoAnalisis()
+        max_errores = self.limites.max_errores
+        umbral = self.limites.umbral_lento
+        progreso = self.progreso
+        total = len(self.lineas_codigo)
 
         for i, linea_raw in enumerate(self.lineas_codigo):
+            if progreso is not None and not i % INTERVALO_PROGRESO:
+                progreso('analizar_sintaxis', i, total)
             linea = linea_raw.strip()
             if not linea or linea.startswith(';'):
                 continue
@@ -473,45 +1047,131 @@ class Ensamblador8086:
             if not linea_limpia:
                 continue
 
-            tokens_linea = self.tokenizar_linea(linea_limpia, i + 1)
-            if not tokens_linea:
+            if max_errores is not None and self.errores >= max_errores:
+                self.lineas_analizadas.append({
+                    'numero': i + 1,
+                    'origen': self.origen_linea(i + 1),
+                    'linea': linea_limpia,
+                    'resultado': 'Incorrecta',
+                    'mensaje': diagnostico(Codigo.DEMASIADOS_ERRORES, self.errores)
+                })
+                break
+
+            preprocesado = self.resultado_preprocesado(i)
+            if preprocesado is not None:
+                self.lineas_analizadas.append({
+                    'numero': i + 1,
+                    'origen': self.origen_linea(i + 1),
+                    'linea': linea_limpia,
+                    'resultado': preprocesado[0],
+                    'mensaje': como_diagnostico(*preprocesado)
+                })
+                self.errores += preprocesado[0] == 'Incorrecta'
+                continue
+
+            if umbral is not None:
+                inicio = time.perf_counter()
+            analisis = self.analizar_linea(i, linea_limpia, estado)
+            if analisis is None:
                 continue
+            if umbral is not None:
+                transcurrido = time.perf_counter() - inicio + self._tiempos_tokenizado.pop(i, 0.0)
+                if transcurrido > umbral:
+                    self.advertencias.append(
+                        (i + 1, diagnostico(Codigo.LINEA_LENTA, transcurrido * 1000, umbral * 1000)))
+            self.lineas_analizadas.append(analisis)
+            self.errores += analisis['resultado'] == 'Incorrecta'
+
+        if progreso is not None:
+            progreso('analizar_sintaxis', total, total)
+        self.cerrar_analisis(estado)
+
+    def analizar_linea(self, i: int, linea_limpia: str, estado: 'EstadoAnalisis',
+                       validacion: Optional[Tuple[str, Diagnostico]] = None) -> Optional[dict]:
+        """
+        Analiza lineas_codigo[i] (ya sin comentarios) con el estado que dejaron
+        las líneas anteriores y lo actualiza: segmento, símbolos, ámbito y
+        PUBLIC/EXTRN. validacion: (resultado, mensaje) ya conocido de la línea
+        (no se vuelve a validar). None si la línea no tiene tokens.
+        """
+        tokens_linea = self.tokens_de_linea(i, linea_limpia)
+        if not tokens_linea:
+            return None
+
+        primer = tokens_linea[0].valor.upper()
+
+        if '.STACK SEGMENT' in linea_limpia.upper():
+            estado.segmento = 'STACK'
+        elif '.DATA SEGMENT' in linea_limpia.upper():
+            estado.segmento = 'DATA'
+        elif '.CODE SEGMENT' in linea_limpia.upper():
+            estado.segmento = 'CODE'
+        elif primer == 'ENDS':
+            estado.segmento = None
+        segmento = estado.segmento
+
+        # Primero validar la línea (salvo que exceda los límites)
+        ambito = self.ambito_actual
+        if validacion is not None:
+            resultado, mensaje = validacion
+        else:
+            excedido = self.limite_excedido(linea_limpia, tokens_linea)
+            if excedido is not None:
+                resultado, mensaje = "Incorrecta", excedido
+            else:
+                resultado, mensaje = self.validar_linea(tokens_linea, segmento)
+
+        # Solo agregar etiquetas a la tabla si la línea es correcta (en el ámbito actual)
+        if tokens_linea[0].tipo == TipoToken.SIMBOLO and tokens_linea[0].valor.endswith(':'):
+            if resultado == "Correcta":
+                nombre = tokens_linea[0].valor.replace(':', '')
+                ambito[nombre] = Simbolo(nombre, 'Etiqueta', '', '', ambito=ambito.nombre)
+
+        # Solo agregar variables/constantes a la tabla si la línea es correcta
+        if segmento == 'DATA' and len(tokens_linea) >= 3 and tokens_linea[0].tipo == TipoToken.SIMBOLO:
+            if resultado == "Correcta":
+                self.agregar_simbolo(tokens_linea)
+
+        analisis = {
+            'numero': i + 1,
+            'origen': self.origen_linea(i + 1),
+            'linea': linea_limpia,
+            'resultado': resultado,
+            'mensaje': mensaje,
+            'ambito': ambito.nombre
+        }
 
-            primer = tokens_linea[0].valor.upper()
-
-            if '.STACK SEGMENT' in linea_limpia.upper():
-                segmento = 'STACK'
-            elif '.DATA SEGMENT' in linea_limpia.upper():
-                segmento = 'DATA'
-            elif '.CODE SEGMENT' in linea_limpia.upper():
-                segmento = 'CODE'
-            elif primer == 'ENDS':
-                segmento = None
-
-            # Primero validar la línea
-            resultado, mensaje = self.validar_linea(tokens_linea, segmento)
-
-            # Solo agregar etiquetas a la tabla si la línea es correcta
-            if tokens_linea[0].tipo == TipoToken.SIMBOLO and tokens_linea[0].valor.endswith(':'):
-                if resultado == "Correcta":
-                    nombre = tokens_linea[0].valor.replace(':', '')
-                    self.tabla_simbolos[nombre] = Simbolo(nombre, 'Etiqueta', '', '')
-
-            # Solo agregar variables/constantes a la tabla si la línea es correcta
-            if segmento == 'DATA' and len(tokens_linea) >= 3 and tokens_linea[0].tipo == TipoToken.SIMBOLO:
-                if resultado == "Correcta":
-                    self.agregar_simbolo(tokens_linea)
-
-            self.lineas_analizadas.append({
-                'numero': i + 1,
-                'linea': linea_limpia,
-                'resultado': resultado,
-                'mensaje': mensaje
-            })
-
-    def validar_linea(self, tokens: List[Token], segmento: Optional[str]) -> Tuple[str, str]:
+        if resultado == "Correcta" and primer in ('PUBLIC', 'EXTRN'):
+            self.registrar_enlace(tokens_linea)
+            if primer == 'PUBLIC':
+                for nombre in self.publicos:
+                    estado.lineas_publicas.setdefault(nombre, analisis)
+
+        if resultado == "Correcta" and segmento == 'CODE' and len(tokens_linea) >= 2:
+            directiva = tokens_linea[1].valor.upper()
+            if directiva in ('PROC', 'ENDP'):
+                self.actualizar_ambito(tokens_linea)
+                if directiva == 'PROC':
+                    estado.procedimientos_abiertos[self.ambito_actual.nombre.lower()] = analisis
+                else:
+                    estado.procedimientos_abiertos.pop(tokens_linea[0].valor.lower(), None)
+        return analisis
+
+    def cerrar_analisis(self, estado: 'EstadoAnalisis'):
+        """Errores que solo se conocen al final: PROC sin ENDP y PUBLIC de símbolos no definidos"""
+        for analisis in estado.procedimientos_abiertos.values():
+            analisis['resultado'] = "Incorrecta"
+            analisis['mensaje'] = diagnostico(Codigo.PROC_SIN_ENDP)
+        for nombre, analisis in estado.lineas_publicas.items():
+            simbolo = self.tabla_simbolos.local(nombre)
+            if simbolo is None or simbolo.tipo == 'Externo':
+                analisis['resultado'] = "Incorrecta"
+                analisis['mensaje'] = diagnostico(Codigo.PUBLICO_NO_DEFINIDO, self.publicos[nombre])
+        self.ambito_actual = self.tabla_simbolos
+
+    def validar_linea(self, tokens: List[Token], segmento: Optional[str]) -> Tuple[str, Diagnostico]:
         if not tokens:
-            return "Incorrecta", "Línea vacía"
+            return "Incorrecta", diagnostico(Codigo.SIN_TOKENS)
 
         linea_texto = ' '.join([t.valor for t in tokens])
         linea_upper = linea_texto.upper()
@@ -521,26 +1181,30 @@ class Ensamblador8086:
         if re.search(r'\.\w+\s+SEGMENT', linea_upper):
             # Verificar que sea EXACTAMENTE uno de los válidos
             if re.match(r'^\.STACK\s+SEGMENT$', linea_upper):
-                return "Correcta", "Inicio de segmento de pila"
+                return "Correcta", diagnostico(Codigo.INICIO_PILA)
             elif re.match(r'^\.DATA\s+SEGMENT$', linea_upper):
-                return "Correcta", "Inicio de segmento de datos"
+                return "Correcta", diagnostico(Codigo.INICIO_DATOS)
             elif re.match(r'^\.CODE\s+SEGMENT$', linea_upper):
-                return "Correcta", "Inicio de segmento de código"
+                return "Correcta", diagnostico(Codigo.INICIO_CODIGO)
             else:
                 # Declaración de segmento incorrecta (ej: .stacks segment, .datas segment)
-                return "Incorrecta", f"Declaración de segmento inválida"
+                return "Incorrecta", diagnostico(Codigo.SEGMENTO_INVALIDO)
         
         if tokens[0].valor.upper() == 'ENDS':
-            return "Correcta", "Fin de segmento"
+            return "Correcta", diagnostico(Codigo.FIN_SEGMENTO)
         if tokens[0].valor.upper() == 'END':
-            return "Correcta", "Fin de programa"
+            return "Correcta", diagnostico(Codigo.FIN_PROGRAMA)
 
         # Directivas de modelo (.model small, etc.)
         if tokens[0].valor.upper() == '.MODEL' or tokens[0].valor.lower() == '.model':
-            return "Correcta", "Directiva de modelo"
+            return "Correcta", diagnostico(Codigo.DIRECTIVA_MODELO)
         if tokens[0].valor.upper() == '.STACK' and len(tokens) == 2:
             # .STACK 256 (forma alternativa sin SEGMENT)
-            return "Correcta", "Directiva de pila"
+            return "Correcta", diagnostico(Codigo.DIRECTIVA_PILA)
+        if segmento is not None and self.es_org(tokens):
+            return self.validar_org(tokens)
+        if tokens[0].valor.upper() in ('PUBLIC', 'EXTRN'):
+            return self.validar_enlace(tokens)
 
         if segmento == 'STACK':
             return self.validar_segmento_pila(tokens)
@@ -549,15 +1213,54 @@ class Ensamblador8086:
         elif segmento == 'CODE':
             return self.validar_segmento_codigo(tokens)
 
-        return "Incorrecta", "Línea fuera de segmento"
+        return "Incorrecta", diagnostico(Codigo.FUERA_DE_SEGMENTO)
 
-    def validar_segmento_pila(self, tokens: List[Token]) -> Tuple[str, str]:
+    def tokenizar(self, linea: str, num_linea: int = 1) -> List[Token]:
+        """Tokens de una línea de texto suelta (alias de tokenizar_linea)"""
+        return self.tokenizar_linea(linea, num_linea)
+
+    def validar_texto(self, linea: str, segmento: Optional[str] = 'CODE') -> Tuple[str, Diagnostico]:
+        """
+        Tokeniza y valida una línea suelta como si estuviera en 'segmento'
+        ('STACK', 'DATA', 'CODE' o None), con los símbolos del ámbito actual.
+        Los resultados se guardan en una caché LRU por (texto, segmento,
+        versión de los símbolos, límites de longitud y de tokens): validar de
+        nuevo la misma línea, como hace un editor en cada tecla, no vuelve a
+        tokenizar mientras los símbolos y los límites no cambien.
+        """
+        segmento = segmento.upper() if segmento else None
+        limites = self.limites
+        clave = (linea, segmento, self.version_simbolos, limites.max_longitud_linea, limites.max_tokens_linea)
+        cache = self._cache_validacion
+        previo = cache.get(clave)
+        if previo is not None:
+            cache.move_to_end(clave)
+            self.aciertos_validacion += 1
+            return previo
+
+        texto = self.limpiar_comentarios(linea).strip()
+        maximo = limites.max_longitud_linea
+        if not texto:
+            resultado = ("Correcta", diagnostico(Codigo.LINEA_VACIA))
+        elif maximo is not None and len(texto) > maximo:
+            resultado = ("Incorrecta", diagnostico(Codigo.LINEA_DEMASIADO_LARGA, len(texto), maximo))
+        else:
+            tokens = self.tokenizar_linea(texto, 1)
+            excedido = self.limite_excedido(texto, tokens)
+            resultado = ("Incorrecta", excedido) if excedido is not None else self.validar_linea(tokens, segmento)
+
+        cache[clave] = resultado
+        if len(cache) > TAMANO_CACHE_VALIDACION:
+            cache.popitem(last=False)
+        return resultado
+
+    def validar_segmento_pila(self, tokens: List[Token]) -> Tuple[str, Diagnostico]:
         """
         Valida declaraciones en el segmento de pila.
         Solo se permite declarar espacio para la pila usando DW con DUP.
         """
         if len(tokens) < 2:
-            return "Incorrecta", "Definición de pila incompleta"
+            return "Incorrecta", diagnostico(Codigo.PILA_INCOMPLETA)
         
         directiva = tokens[0].valor.upper()
         
@@ -565,30 +1268,38 @@ class Ensamblador8086:
         if directiva != 'DW':
             # Verificar si es una instrucción (no permitida en .stack)
             if directiva in self.instrucciones:
-                return "Incorrecta", f"Instrucción '{directiva}' no permitida en segmento de pila"
+                return "Incorrecta", diagnostico(Codigo.PILA_INSTRUCCION, directiva)
             # Verificar si es una declaración de datos (debería estar en .data)
             if directiva in ['DB', 'DD', 'DQ', 'DT', 'EQU']:
-                return "Incorrecta", f"'{directiva}' no permitido en segmento de pila."
-            return "Incorrecta", f"'{directiva}' no válido en segmento de pila."
+                return "Incorrecta", diagnostico(Codigo.PILA_DIRECTIVA_DATOS, directiva)
+            return "Incorrecta", diagnostico(Codigo.PILA_DIRECTIVA_INVALIDA, directiva)
         
         # DW cantidad DUP(?) o DW cantidad
         valor_str = ' '.join([t.valor for t in tokens[1:]])
         
         # Validar formato: número DUP(valor) - preferido
         if re.match(r'^\d+\s+DUP\s*\([^)]+\)$', valor_str, re.IGNORECASE):
-            return "Correcta", "Reserva de espacio en pila con DUP"
+            return "Correcta", diagnostico(Codigo.PILA_DUP)
         
         # Validar formato: solo número (menos común pero válido)
         if re.match(r'^\d+$', valor_str):
-            return "Correcta", "Reserva de espacio en pila"
+            return "Correcta", diagnostico(Codigo.PILA_RESERVA)
         
         # DUP sin número antes
         if re.match(r'^DUP\s*\([^)]+\)$', valor_str, re.IGNORECASE):
-            return "Incorrecta", "DUP requiere cantidad antes: DW cantidad DUP(?)"
+            return "Incorrecta", diagnostico(Codigo.PILA_DUP_SIN_CANTIDAD)
         
-        return "Incorrecta", f"Formato inválido en pila: {valor_str}."
+        return "Incorrecta", diagnostico(Codigo.PILA_FORMATO, valor_str)
 
-    def validar_segmento_datos(self, tokens: List[Token]) -> Tuple[str, str]:
+    def texto_valor(self, valor_tokens: List[Token]) -> str:
+        """Reconstruye el valor de una declaración - si son múltiples valores numéricos, unirlos con coma"""
+        if len(valor_tokens) > 1 and all(t.tipo in [TipoToken.CONSTANTE_DECIMAL, TipoToken.CONSTANTE_HEXADECIMAL, 
+                                                      TipoToken.CONSTANTE_BINARIA] or t.valor == '?' 
+                                          for t in valor_tokens):
+            return ', '.join([t.valor for t in valor_tokens])
+        return ' '.join([t.valor for t in valor_tokens])
+
+    def validar_segmento_datos(self, tokens: List[Token]) -> Tuple[str, Diagnostico]:
         """
         Valida declaraciones en el segmento de datos según el PDF:
         Solo se permiten: variables, constantes, cadenas, arreglos/buffers, tablas
@@ -598,40 +1309,44 @@ class Ensamblador8086:
         - nombre EQU valor
         """
         if len(tokens) < 2:
-            return "Incorrecta", "Definición de datos incompleta"
+            return "Incorrecta", diagnostico(Codigo.DATOS_INCOMPLETOS)
         
         # Verificar si es una instrucción (no permitida en .data)
         primer_token = tokens[0].valor.upper()
         if primer_token in self.instrucciones:
-            return "Incorrecta", f"Instrucción '{primer_token}' no permitida en segmento de datos"
+            return "Incorrecta", diagnostico(Codigo.DATOS_INSTRUCCION, primer_token)
         
         # Verificar si es una etiqueta de código (no permitida en .data)
         if tokens[0].tipo == TipoToken.SIMBOLO and tokens[0].valor.endswith(':'):
-            return "Incorrecta", "Etiquetas de código no permitidas en segmento de datos"
+            return "Incorrecta", diagnostico(Codigo.DATOS_ETIQUETA)
         
         # Verificar si el primer token es un número (error: el nombre debe empezar con letra)
         if tokens[0].tipo in [TipoToken.CONSTANTE_DECIMAL, TipoToken.CONSTANTE_HEXADECIMAL, TipoToken.CONSTANTE_BINARIA]:
-            return "Incorrecta", f"Nombre de variable no puede empezar con número: '{tokens[0].valor}'"
+            return "Incorrecta", diagnostico(Codigo.NOMBRE_NUMERICO, tokens[0].valor)
         
+        # EQU acepta expresiones constantes (ej. 'constante*2+1') aunque sus partes no sean tokens válidos
+        es_equ_expresion = (len(tokens) >= 3 and tokens[1].valor.upper() == 'EQU'
+                             and es_expresion(' '.join(t.valor for t in tokens[2:])))
+
         # Verificar si algún token es no identificado
         for tok in tokens:
-            if tok.tipo == TipoToken.NO_IDENTIFICADO:
-                return "Incorrecta", f"Elemento no identificado: '{tok.valor}'"
+            if tok.tipo == TipoToken.NO_IDENTIFICADO and not es_equ_expresion:
+                return "Incorrecta", diagnostico(Codigo.ELEMENTO_NO_IDENTIFICADO, tok.valor)
         
         if len(tokens) < 3:
-            return "Incorrecta", "Definición de datos incompleta (requiere: nombre directiva valor)"
+            return "Incorrecta", diagnostico(Codigo.DATOS_SIN_VALOR)
         
         # El primer token debe ser un símbolo válido (nombre de variable)
         if tokens[0].tipo != TipoToken.SIMBOLO:
-            return "Incorrecta", f"Nombre de variable inválido: '{tokens[0].valor}'"
+            return "Incorrecta", diagnostico(Codigo.NOMBRE_VARIABLE_INVALIDO, tokens[0].valor)
         
         nombre = tokens[0].valor
         # Verificar que el nombre empiece con letra o guion bajo
         if not re.match(r'^[A-Za-z_][A-Za-z0-9_]*$', nombre):
-            return "Incorrecta", f"Nombre de variable inválido: '{nombre}' (debe empezar con letra o _)"
+            return "Incorrecta", diagnostico(Codigo.NOMBRE_VARIABLE_INICIO, nombre)
         
         if len(nombre) > 31:
-            return "Incorrecta", f"Nombre de variable muy largo (máx 31 caracteres)"
+            return "Incorrecta", diagnostico(Codigo.NOMBRE_VARIABLE_LARGO)
         
         # El segundo token debe ser una directiva de datos
         directiva = tokens[1].valor.upper()
@@ -639,79 +1354,75 @@ class Ensamblador8086:
         if directiva not in directivas_validas:
             # Verificar si es una instrucción
             if directiva in self.instrucciones:
-                return "Incorrecta", f"Instrucción '{directiva}' no permitida en segmento de datos"
-            return "Incorrecta", f"Directiva inválida: '{tokens[1].valor}'."
+                return "Incorrecta", diagnostico(Codigo.DATOS_INSTRUCCION, directiva)
+            return "Incorrecta", diagnostico(Codigo.DIRECTIVA_INVALIDA, tokens[1].valor)
         
         # Validar el valor/expresión
         valor_tokens = tokens[2:]
         
-        # Reconstruir valor_str - si son múltiples valores numéricos, unirlos con coma
-        if len(valor_tokens) > 1 and all(t.tipo in [TipoToken.CONSTANTE_DECIMAL, TipoToken.CONSTANTE_HEXADECIMAL, 
-                                                      TipoToken.CONSTANTE_BINARIA] or t.valor == '?' 
-                                          for t in valor_tokens):
-            valor_str = ', '.join([t.valor for t in valor_tokens])
-        else:
-            valor_str = ' '.join([t.valor for t in valor_tokens])
+        valor_str = self.texto_valor(valor_tokens)
         
         # === Validar EQU ===
         if directiva == 'EQU':
             # EQU puede tener constantes numéricas o expresiones
             if re.match(r'^\d+[DHBdhb]?$', valor_str):  # Decimal, hex, binario
-                return "Correcta", f"Constante {nombre} definida"
+                return "Correcta", diagnostico(Codigo.CONSTANTE, nombre)
             if re.match(r'^0[0-9A-Fa-f]+[Hh]$', valor_str):
-                return "Correcta", f"Constante hexadecimal {nombre} definida"
+                return "Correcta", diagnostico(Codigo.CONSTANTE_HEX, nombre)
             if re.match(r"^'[^']*'$", valor_str) or re.match(r'^"[^"]*"$', valor_str):
-                return "Correcta", f"Constante de caracter {nombre} definida"
-            return "Incorrecta", f"Valor inválido para EQU: {valor_str}"
+                return "Correcta", diagnostico(Codigo.CONSTANTE_CARACTER, nombre)
+            if es_equ_expresion:
+                return "Correcta", diagnostico(Codigo.CONSTANTE_EXPRESION, nombre)
+            return "Incorrecta", diagnostico(Codigo.EQU_INVALIDO, valor_str)
         
         # === Validar DUP ===
         if 'DUP' in valor_str.upper():
             # Formato correcto: número DUP(valor)
             if re.match(r'^\d+\s+DUP\s*\([^)]+\)$', valor_str, re.IGNORECASE):
-                return "Correcta", f"Array/Buffer {nombre} definido con DUP"
+                return "Correcta", diagnostico(Codigo.ARREGLO_DUP, nombre)
             # Errores comunes
             if not re.search(r'\d+\s+DUP', valor_str, re.IGNORECASE):
-                return "Incorrecta", "DUP requiere un número antes: cantidad DUP(valor)"
+                return "Incorrecta", diagnostico(Codigo.DUP_SIN_CANTIDAD)
             if '(' not in valor_str or ')' not in valor_str:
-                return "Incorrecta", "DUP requiere paréntesis: cantidad DUP(valor)"
-            return "Incorrecta", f"Sintaxis DUP inválida: {valor_str}"
+                return "Incorrecta", diagnostico(Codigo.DUP_SIN_PARENTESIS)
+            return "Incorrecta", diagnostico(Codigo.DUP_INVALIDO, valor_str)
         
         # === Validar strings ===
         if re.search(r'["\']', valor_str):
             # Verificar strings cerrados
             if (valor_str.count('"') % 2 != 0) or (valor_str.count("'") % 2 != 0):
-                return "Incorrecta", "Cadena de texto sin cerrar (faltan comillas)"
+                return "Incorrecta", diagnostico(Codigo.CADENA_SIN_CERRAR)
             # String válido (puede terminar con , 0 para null-terminated)
             if re.match(r'^["\'][^"\']*["\'](\s*,\s*0)?$', valor_str):
-                return "Correcta", f"Cadena {nombre} definida"
+                return "Correcta", diagnostico(Codigo.CADENA, nombre)
             # Lista de caracteres o strings
             if re.match(r'^["\'][^"\']*["\'](\s*,\s*["\'][^"\']*["\'])*(\s*,\s*0)?$', valor_str):
-                return "Correcta", f"Cadena {nombre} definida"
-            return "Correcta", f"Cadena {nombre} definida"
+                return "Correcta", diagnostico(Codigo.CADENA, nombre)
+            return "Correcta", diagnostico(Codigo.CADENA, nombre)
         
         # === Validar valor numérico ===
         if valor_str.strip() == '?':
-            return "Correcta", f"Variable {nombre} sin inicializar"
+            return "Correcta", diagnostico(Codigo.VARIABLE_SIN_INICIALIZAR, nombre)
         
         # Constante decimal
         if re.match(r'^\d+[Dd]?$', valor_str):
-            return "Correcta", f"Variable {nombre} inicializada"
+            return "Correcta", diagnostico(Codigo.VARIABLE, nombre)
         
         # Constante hexadecimal - DEBE empezar con 0
         if re.match(r'^0[0-9A-Fa-f]*[Hh]$', valor_str):
-            return "Correcta", f"Variable {nombre} inicializada (hex)"
+            return "Correcta", diagnostico(Codigo.VARIABLE_HEX, nombre)
         
         # Hexadecimal inválido (no empieza con 0)
         if re.match(r'^[1-9][0-9A-Fa-f]*[Hh]$', valor_str):
-            return "Incorrecta", f"Hexadecimal inválido: '{valor_str}' (debe empezar con 0)"
+            return "Incorrecta", diagnostico(Codigo.HEX_SIN_CERO, valor_str)
         
         # Constante binaria
         if re.match(r'^[01]+[Bb]$', valor_str):
-            return "Correcta", f"Variable {nombre} inicializada (bin)"
+            return "Correcta", diagnostico(Codigo.VARIABLE_BIN, nombre)
         
         # Caracter individual
         if re.match(r"^'[^']'$", valor_str):
-            return "Correcta", f"Variable {nombre} inicializada (char)"
+            return "Correcta", diagnostico(Codigo.VARIABLE_CARACTER, nombre)
         
         # Lista de valores separados por coma (tabla de datos)
         if ',' in valor_str:
@@ -734,9 +1445,13 @@ class Ensamblador8086:
                 if re.match(r'^[01]+[Bb]$', parte):
                     continue
                 # Si llegamos aquí, hay un elemento inválido
-                return "Incorrecta", f"Elemento inválido en lista: '{parte}'"
-            return "Correcta", f"Tabla {nombre} definida"
+                return "Incorrecta", diagnostico(Codigo.ELEMENTO_LISTA_INVALIDO, parte)
+            return "Correcta", diagnostico(Codigo.TABLA, nombre)
         
+        # Dirección de una variable, etiqueta o símbolo externo (se reubica al enlazar)
+        if directiva == 'DW' and self.referencia_reubicable(valor_str) is not None:
+            return "Correcta", diagnostico(Codigo.VARIABLE_DIRECCION, nombre)
+
         # === Detectar texto sin comillas (error común) ===
         if len(valor_tokens) > 1:
             todas_palabras = all(
@@ -744,17 +1459,91 @@ class Ensamblador8086:
                 for t in valor_tokens
             )
             if todas_palabras:
-                return "Incorrecta", f"Texto sin comillas."
+                return "Incorrecta", diagnostico(Codigo.TEXTO_SIN_COMILLAS)
         
         if len(valor_tokens) == 1 and valor_tokens[0].tipo == TipoToken.SIMBOLO:
             val = valor_tokens[0].valor
             if not val.upper() in self.registros and not val.upper() in self.pseudoinstrucciones:
                 if len(val) > 1 and val.isalpha():
-                    return "Incorrecta", f"¿Texto sin comillas?"
+                    return "Incorrecta", diagnostico(Codigo.TEXTO_SIN_COMILLAS_POSIBLE)
         
-        return "Incorrecta", f"Valor inválido para {directiva}: '{valor_str}'"
+        return "Incorrecta", diagnostico(Codigo.VALOR_INVALIDO, directiva, valor_str)
+
+    def es_org(self, tokens: List[Token]) -> bool:
+        return bool(tokens) and tokens[0].valor.upper() == 'ORG'
+
+    def valor_org(self, tokens: List[Token]) -> int:
+        return self.evaluar_expresion(' '.join(t.valor for t in tokens[1:]))
+
+    def validar_org(self, tokens: List[Token]) -> Tuple[str, Diagnostico]:
+        """ORG expresión: la dirección debe ser una constante de 16 bits conocida en este punto"""
+        if len(tokens) < 2:
+            return "Incorrecta", diagnostico(Codigo.ORG_SIN_DIRECCION)
+        try:
+            direccion = self.valor_org(tokens)
+        except ErrorExpresion as e:
+            return "Incorrecta", diagnostico(Codigo.ORG_EXPRESION, e)
+        if not 0 <= direccion <= 0xFFFF:
+            return "Incorrecta", diagnostico(Codigo.ORG_FUERA_DE_RANGO)
+        return "Correcta", diagnostico(Codigo.ORG_VALIDO, direccion)
+
+    def validar_enlace(self, tokens: List[Token]) -> Tuple[str, Diagnostico]:
+        """PUBLIC nombre[, ...] y EXTRN nombre:tipo[, ...] (válidas dentro o fuera de segmentos)"""
+        directiva = tokens[0].valor.upper()
+        nombres = [t.valor for t in tokens[1:] if t.valor != ',']
+        if not nombres:
+            return "Incorrecta", diagnostico(Codigo.ENLACE_SIN_SIMBOLOS, directiva)
+
+        for texto in nombres:
+            nombre, _, tipo = texto.partition(':')
+            if not re.match(r'^[A-Za-z_@][A-Za-z0-9_]*$', nombre):
+                return "Incorrecta", diagnostico(Codigo.NOMBRE_SIMBOLO_INVALIDO, nombre)
+            if directiva == 'PUBLIC':
+                if tipo:
+                    return "Incorrecta", diagnostico(Codigo.PUBLIC_CON_TIPO)
+                continue
+            if tipo.upper() not in TIPOS_EXTERNOS:
+                return "Incorrecta", diagnostico(Codigo.EXTRN_SIN_TIPO, LISTA_TIPOS_EXTERNOS)
+            if self.tabla_simbolos.local(nombre) is not None:
+                return "Incorrecta", diagnostico(Codigo.SIMBOLO_DUPLICADO, nombre)
 
-    def validar_segmento_codigo(self, tokens: List[Token]) -> Tuple[str, str]:
+        if directiva == 'PUBLIC':
+            return "Correcta", diagnostico(Codigo.PUBLICOS_DECLARADOS)
+        return "Correcta", diagnostico(Codigo.EXTERNOS_DECLARADOS)
+
+    def registrar_enlace(self, tokens: List[Token]):
+        """Agrega a la tabla global los símbolos de un EXTRN y recuerda los de un PUBLIC (líneas ya validadas)"""
+        directiva = tokens[0].valor.upper()
+        for token in tokens[1:]:
+            if token.valor == ',':
+                continue
+            nombre, _, tipo = token.valor.partition(':')
+            if directiva == 'PUBLIC':
+                self.publicos[nombre.lower()] = nombre
+            else:
+                self.tabla_simbolos[nombre] = Simbolo(nombre, 'Externo', '', TIPOS_EXTERNOS[tipo.upper()])
+
+    def validar_procedimiento(self, tokens: List[Token]) -> Tuple[str, Diagnostico]:
+        """Valida 'nombre PROC [NEAR|FAR]' y 'nombre ENDP' (debe cerrar el procedimiento abierto)"""
+        nombre = tokens[0].valor
+        directiva = tokens[1].valor.upper()
+        if tokens[0].tipo != TipoToken.SIMBOLO:
+            return "Incorrecta", diagnostico(Codigo.NOMBRE_PROC_INVALIDO, nombre)
+
+        if directiva == 'PROC':
+            if len(tokens) > 3 or (len(tokens) == 3 and tokens[2].valor.upper() not in ('NEAR', 'FAR')):
+                return "Incorrecta", diagnostico(Codigo.PROC_DISTANCIA)
+            if nombre.lower() in self.ambitos or self.buscar_simbolo(nombre) is not None:
+                return "Incorrecta", diagnostico(Codigo.SIMBOLO_DUPLICADO, nombre)
+            return "Correcta", diagnostico(Codigo.PROC_DEFINIDO, nombre)
+
+        if len(tokens) != 2:
+            return "Incorrecta", diagnostico(Codigo.ENDP_CON_OPERANDOS)
+        if self.ambito_actual.nombre.lower() != nombre.lower():
+            return "Incorrecta", diagnostico(Codigo.ENDP_SIN_PROC, nombre)
+        return "Correcta", diagnostico(Codigo.ENDP_VALIDO, nombre)
+
+    def validar_segmento_codigo(self, tokens: List[Token]) -> Tuple[str, Diagnostico]:
         """
         Valida instrucciones en el segmento de código según los PDFs:
         - Instrucciones sin operandos: NOP, RET, etc.
@@ -766,48 +1555,52 @@ class Ensamblador8086:
         - Las etiquetas deben estar definidas PREVIAMENTE (no saltos hacia adelante)
         """
         if not tokens:
-            return "Correcta", "Línea vacía"
+            return "Correcta", diagnostico(Codigo.LINEA_VACIA)
 
         tokens_val = tokens
-        msg_etiq = ""
+        msg_etiq = None
 
         # Verificar si hay etiqueta al inicio
         if tokens[0].tipo == TipoToken.SIMBOLO and tokens[0].valor.endswith(':'):
-            msg_etiq = f"Etiqueta '{tokens[0].valor[:-1]}' definida"
+            msg_etiq = diagnostico(Codigo.ETIQUETA_DEFINIDA, tokens[0].valor[:-1])
             if len(tokens) == 1:
                 return "Correcta", msg_etiq
             tokens_val = tokens[1:]
 
         if not tokens_val:
-            return "Correcta", msg_etiq if msg_etiq else "Línea vacía"
+            return "Correcta", msg_etiq or diagnostico(Codigo.LINEA_VACIA)
 
         primer_token = tokens_val[0]
         instr = primer_token.valor.upper()
 
+        # === Procedimientos: nombre PROC [NEAR|FAR] / nombre ENDP ===
+        if not msg_etiq and len(tokens_val) >= 2 and tokens_val[1].valor.upper() in ('PROC', 'ENDP'):
+            return self.validar_procedimiento(tokens_val)
+
         # === Verificar que NO sea una declaración de datos (no permitido en .code) ===
         directivas_datos = ['DB', 'DW', 'DD', 'DQ', 'DT', 'EQU']
         if len(tokens_val) >= 2:
             segundo_token = tokens_val[1].valor.upper()
             if segundo_token in directivas_datos:
-                return "Incorrecta", f"Declaración de datos no permitida en segmento de código."
+                return "Incorrecta", diagnostico(Codigo.CODIGO_DATOS)
         
         # Si el primer token es una directiva de datos
         if instr in directivas_datos:
-            return "Incorrecta", f"'{instr}' no permitido en segmento de código."
+            return "Incorrecta", diagnostico(Codigo.CODIGO_DIRECTIVA_DATOS, instr)
 
         # === Pseudoinstrucciones permitidas en código ===
         # ASSUME, PROC, ENDP, ORG son válidos en .code
         if instr in ['ASSUME', 'PROC', 'ENDP', 'ORG']:
-            msg = f"Pseudoinstrucción {instr} válida"
-            return "Correcta", f"{msg_etiq} + {msg}" if msg_etiq else msg
+            msg = diagnostico(Codigo.PSEUDOINSTRUCCION_VALIDA, instr)
+            return "Correcta", diagnostico(Codigo.ETIQUETA_E_INSTRUCCION, msg_etiq, msg) if msg_etiq else msg
 
         # === Validar que sea una instrucción ===
         if instr not in self.instrucciones:
             # Verificar si parece una declaración de datos mal ubicada
             if primer_token.tipo == TipoToken.SIMBOLO:
                 if len(tokens_val) >= 2 and tokens_val[1].valor.upper() in directivas_datos:
-                    return "Incorrecta", "Declaración de datos no permitida en segmento de código"
-            return "Incorrecta", f"'{primer_token.valor}' no es una instrucción válida"
+                    return "Incorrecta", diagnostico(Codigo.CODIGO_DATOS_NOMBRE)
+            return "Incorrecta", diagnostico(Codigo.INSTRUCCION_INVALIDA, primer_token.valor)
 
         # Obtener operandos (excluyendo comas)
         operandos = [t for t in tokens_val[1:] if t.valor != ',']
@@ -844,49 +1637,51 @@ class Ensamblador8086:
                         # Podría ser un desplazamiento numérico
                         if not re.match(r'^\d+[HhDdBb]?$', parte) and not re.match(r'^[0-9][0-9A-Fa-f]*[Hh]$', parte):
                             # Es un símbolo, verificar si está declarado
-                            if parte.lower() not in [s.lower() for s in self.tabla_simbolos.keys()]:
-                                return "Incorrecta", f"Símbolo '{parte}' no declarado en segmento de datos"
+                            if self.buscar_simbolo(parte) is None:
+                                return "Incorrecta", diagnostico(Codigo.SIMBOLO_NO_DECLARADO, parte)
                 continue
             
             # Si es un símbolo (posible variable o etiqueta)
             if op.tipo == TipoToken.SIMBOLO:
-                # Verificar si está en la tabla de símbolos
-                simbolo_encontrado = False
-                for nombre_simbolo in self.tabla_simbolos.keys():
-                    if nombre_simbolo.lower() == op_val.lower():
-                        simbolo_encontrado = True
-                        break
-                
-                if not simbolo_encontrado:
+                # Verificar si está en la tabla de símbolos (ámbito actual y globales)
+                if self.buscar_simbolo(op_val) is None:
                     # Para SALTOS: la etiqueta DEBE estar definida previamente
                     if instr in ['JNAE', 'JNE', 'JNLE', 'LOOPE', 'JA', 'JC']:
-                        return "Incorrecta", f"Etiqueta '{op_val}' no definida previamente"
+                        return "Incorrecta", diagnostico(Codigo.ETIQUETA_NO_DEFINIDA, op_val)
                     
-                    return "Incorrecta", f"Símbolo '{op_val}' no declarado en segmento de datos"
+                    return "Incorrecta", diagnostico(Codigo.SIMBOLO_NO_DECLARADO, op_val)
 
         # === Instrucciones sin operandos ===
         if instr in self.instrucciones_sin_operandos:
             if num_operandos > 0:
-                return "Incorrecta", f"{instr} no requiere operandos"
-            msg = f"Instrucción {instr} válida"
-            return "Correcta", f"{msg_etiq} + {msg}" if msg_etiq else msg
+                return "Incorrecta", diagnostico(Codigo.SOBRAN_OPERANDOS, instr)
+            msg = diagnostico(Codigo.INSTRUCCION_VALIDA, instr)
+            return "Correcta", diagnostico(Codigo.ETIQUETA_E_INSTRUCCION, msg_etiq, msg) if msg_etiq else msg
 
         # === Instrucciones con 1 operando ===
         if instr in self.instrucciones_1_operando:
             if num_operandos < 1:
-                return "Incorrecta", f"{instr} requiere 1 operando"
+                return "Incorrecta", diagnostico(Codigo.FALTA_OPERANDO, instr)
             if num_operandos > 1:
                 # Permitir BYTE PTR [x] como un solo operando
                 operando_completo = ' '.join([t.valor for t in operandos])
                 if not re.match(r'^(BYTE|WORD)\s+PTR\s+', operando_completo, re.IGNORECASE):
                     pass  # Ser más permisivo
-            msg = f"Instrucción {instr} válida"
-            return "Correcta", f"{msg_etiq} + {msg}" if msg_etiq else msg
+            if instr == 'INT':
+                # Un EQU que aún depende de direcciones se revisa al codificar
+                try:
+                    numero = self.evaluar_expresion(operandos[0].valor)
+                except ErrorExpresion:
+                    numero = None
+                if numero is not None and not 0 <= numero <= 0xFF:
+                    return "Incorrecta", diagnostico(Codigo.INT_FUERA_DE_RANGO, operandos[0].valor)
+            msg = diagnostico(Codigo.INSTRUCCION_VALIDA, instr)
+            return "Correcta", diagnostico(Codigo.ETIQUETA_E_INSTRUCCION, msg_etiq, msg) if msg_etiq else msg
 
         # === Instrucciones con 2 operandos ===
         if instr in self.instrucciones_2_operandos:
             if num_operandos < 2:
-                return "Incorrecta", f"{instr} requiere 2 operandos"
+                return "Incorrecta", diagnostico(Codigo.FALTAN_OPERANDOS, instr)
             
             # Validaciones específicas por instrucción
             op1 = operandos[0].valor.upper()
@@ -895,7 +1690,7 @@ class Ensamblador8086:
             # LEA solo acepta registro como destino
             if instr == 'LEA':
                 if op1 not in self.registros_16bit:
-                    return "Incorrecta", "LEA requiere registro de 16 bits como destino"
+                    return "Incorrecta", diagnostico(Codigo.LEA_DESTINO)
             
             # === VALIDACIÓN DE TAMAÑO DE OPERANDOS ===
             # Para AND, OR, XOR los operandos deben ser del mismo tamaño
@@ -905,14 +1700,14 @@ class Ensamblador8086:
                 
                 # Si ambos tamaños son conocidos y diferentes, es error
                 if tam_op1 != 0 and tam_op2 != 0 and tam_op1 != tam_op2:
-                    return "Incorrecta", f"Operandos de diferente tamaño"
+                    return "Incorrecta", diagnostico(Codigo.TAMANOS_DISTINTOS)
             
-            msg = f"Instrucción {instr} válida"
-            return "Correcta", f"{msg_etiq} + {msg}" if msg_etiq else msg
+            msg = diagnostico(Codigo.INSTRUCCION_VALIDA, instr)
+            return "Correcta", diagnostico(Codigo.ETIQUETA_E_INSTRUCCION, msg_etiq, msg) if msg_etiq else msg
 
         # === Instrucción válida por defecto ===
-        msg = f"Instrucción {instr} válida"
-        return "Correcta", f"{msg_etiq} + {msg}" if msg_etiq else msg
+        msg = diagnostico(Codigo.INSTRUCCION_VALIDA, instr)
+        return "Correcta", diagnostico(Codigo.ETIQUETA_E_INSTRUCCION, msg_etiq, msg) if msg_etiq else msg
     
     def obtener_tamano_operando(self, operando: str) -> int:
         """
@@ -936,7 +1731,10 @@ class Ensamblador8086:
         # Constante numérica - determinar por valor
         valor = 0
         try:
-            if op.endswith('H'):
+            simbolo = self.buscar_simbolo(operando.strip())
+            if simbolo is not None and simbolo.tipo == 'Constante':
+                valor = self.resolver_simbolo(simbolo.nombre)
+            elif op.endswith('H'):
                 valor = int(op[:-1], 16)
             elif op.endswith('B'):
                 valor = int(op[:-1], 2)
@@ -991,9 +1789,9 @@ class Ensamblador8086:
         if len(tokens) < 3:
             return 0
         directiva = tokens[1].valor.upper()
-        valor_str = ' '.join([t.valor for t in tokens[2:]])
+        valor_str = self.texto_valor(tokens[2:])
         
-        tam_base = {'DB': 1, 'DW': 2, 'DD': 4, 'DQ': 8, 'DT': 10}.get(directiva, 0)
+        tam_base = TAMANOS_DIRECTIVA.get(directiva, 0)
         
         # Verificar DUP
         dup_match = re.match(r'^(\d+)\s+DUP\s*\([^)]+\)$', valor_str, re.IGNORECASE)
@@ -1025,6 +1823,12 @@ class Ensamblador8086:
         instr = tokens[idx].valor.upper()
         operandos = tokens[idx + 1:] if idx + 1 < len(tokens) else []
         
+        # Pseudoinstrucciones de código: no ocupan bytes
+        if instr in {'ASSUME', 'PROC', 'ENDP', 'ORG'}:
+            return 0
+        if operandos and operandos[0].valor.upper() in {'PROC', 'ENDP'}:
+            return 0
+        
         # Instrucciones de 1 byte
         if instr in self.instrucciones_sin_operandos:
             if instr in {'AAD', 'AAM'}:
@@ -1056,7 +1860,14 @@ class Ensamblador8086:
         
         if instr in {'AND', 'OR', 'XOR'}:
             tiene_mem = any('[' in t.valor for t in operandos)
-            return 4 if tiene_mem else 2
+            if tiene_mem:
+                return 4
+            if len(operandos) >= 2 and operandos[1].valor.upper() not in self.reg_codigo:
+                # Inmediato: AL/AX usan la forma corta; el tamaño no depende del valor
+                op1 = operandos[0].valor.upper()
+                w = 1 if op1 in self.registros_16bit else 0
+                return (2 if op1 in ('AL', 'AX') else 3) + w
+            return 2
         
         if instr == 'LEA':
             return 4
@@ -1081,6 +1892,7 @@ class Ensamblador8086:
         Con 2 operandos: AND, LEA, OR, XOR
         Saltos: JNAE, JNE, JNLE, LOOPE, JA, JC
         """
+        self.fixups_linea = []
         if not tokens:
             return ""
         
@@ -1101,67 +1913,44 @@ class Ensamblador8086:
         # INSTRUCCIONES SIN OPERANDOS PERMITIDAS
         # CMC, CMPSB, NOP, POPA, AAD, AAM
         # =====================================================================
-        codigos_sin_op = {
-            'CMC': 'F5',      # 11110101
-            'CMPSB': 'A6',    # 10100110
-            'NOP': '90',      # 10010000
-            'POPA': '61',     # 01100001
-            'AAD': 'D5 0A',   # 11010101 00001010
-            'AAM': 'D4 0A',   # 11010100 00001010
-        }
-        if instr in codigos_sin_op:
-            return codigos_sin_op[instr]
+        if instr in CODIGOS_SIN_OPERANDOS:
+            return CODIGOS_SIN_OPERANDOS[instr]
         
         # =====================================================================
         # INT Inm.byte - Codificación: 11001101 + byte inmediato
         # =====================================================================
         if instr == 'INT' and operandos:
-            val = self.obtener_valor_numerico(operandos[0].valor)
-            return f'CD {val:02X}'
+            val = valor_literal(operandos[0].valor)
+            if val is None:
+                try:
+                    val = self.evaluar_expresion(operandos[0].valor)
+                except ErrorExpresion:
+                    raise ErrorCodificacion(diagnostico(Codigo.VALOR_INVALIDO, 'INT', operandos[0].valor))
+            if not 0 <= val <= 0xFF:
+                raise ErrorCodificacion(diagnostico(Codigo.INT_FUERA_DE_RANGO, operandos[0].valor))
+            return f'{OPCODE_INT:02X} {val:02X}'
         
         # =====================================================================
         # SALTOS PERMITIDOS: JNAE, JNE, JNLE, LOOPE, JA, JC
         # Con cálculo de desplazamiento
         # =====================================================================
-        
-        # LOOPE tiene código E1
-        if instr == 'LOOPE':
+        if instr in CODIGOS_SALTOS:
+            opcode = CODIGOS_SALTOS[instr]
             if operandos:
-                etiqueta = operandos[0].valor
-                if etiqueta in self.tabla_simbolos:
-                    dir_etiqueta = self.tabla_simbolos[etiqueta].direccion
+                simbolo = self.buscar_simbolo(operandos[0].valor)
+                if simbolo is not None and simbolo.tipo == 'Externo':
+                    # Desplazamiento desconocido hasta enlazar
+                    self.fixups_linea.append((1, 'REL8', simbolo.nombre_calificado, 0))
+                elif simbolo is not None:
+                    dir_etiqueta = simbolo.direccion
                     if dir_etiqueta:
                         dir_etiq_int = int(dir_etiqueta, 16)
                         dir_siguiente = direccion_actual + 2
                         desplazamiento = dir_etiq_int - dir_siguiente
                         if desplazamiento < 0:
                             desplazamiento = desplazamiento & 0xFF
-                        return f'E1 {desplazamiento:02X}'
-            return 'E1 00'
-        
-        # Otros saltos permitidos
-        saltos_permitidos = {
-            'JNAE': '72',  # 01110010
-            'JC': '72',    # 01110010 (alias de JNAE)
-            'JNE': '75',   # 01110101
-            'JNLE': '7F',  # 01111111
-            'JA': '77',    # 01110111
-        }
-        
-        if instr in saltos_permitidos:
-            opcode = saltos_permitidos[instr]
-            if operandos:
-                etiqueta = operandos[0].valor
-                if etiqueta in self.tabla_simbolos:
-                    dir_etiqueta = self.tabla_simbolos[etiqueta].direccion
-                    if dir_etiqueta:
-                        dir_etiq_int = int(dir_etiqueta, 16)
-                        dir_siguiente = direccion_actual + 2
-                        desplazamiento = dir_etiq_int - dir_siguiente
-                        if desplazamiento < 0:
-                            desplazamiento = desplazamiento & 0xFF
-                        return f'{opcode} {desplazamiento:02X}'
-            return f'{opcode} 00'
+                        return f'{opcode:02X} {desplazamiento:02X}'
+            return f'{opcode:02X} 00'
         
         # =====================================================================
         # INC Reg - 01000reg (16 bits) o FE /0 (8 bits)
@@ -1169,66 +1958,46 @@ class Ensamblador8086:
         if instr == 'INC' and operandos:
             op = operandos[0].valor.upper()
             if op in self.registros_16bit:
-                codigo = 0x40 + int(self.reg_codigo[op], 2)
+                codigo = OPCODE_INC_REG16 + int(self.reg_codigo[op], 2)
                 return f'{codigo:02X}'
             if op in self.registros_8bit:
                 mod_rm = 0xC0 | int(self.reg_codigo[op], 2)
-                return f'FE {mod_rm:02X}'
+                return f'{OPCODE_INC_RM8:02X} {mod_rm:02X}'
         
         # =====================================================================
         # MUL Reg/Mem - 1111011w mod 100 r/m
-        # =====================================================================
-        if instr == 'MUL' and operandos:
-            op = operandos[0].valor.upper()
-            if op in self.reg_codigo:
-                w = 1 if op in self.registros_16bit else 0
-                opcode = 0xF7 if w else 0xF6
-                mod_rm = 0xC0 | (0x04 << 3) | int(self.reg_codigo[op], 2)
-                return f'{opcode:02X} {mod_rm:02X}'
-        
-        # =====================================================================
         # IDIV Reg/Mem - 1111011w mod 111 r/m
         # =====================================================================
-        if instr == 'IDIV' and operandos:
+        if instr in EXTENSIONES_GRUPO_F6 and operandos:
             op = operandos[0].valor.upper()
             if op in self.reg_codigo:
                 w = 1 if op in self.registros_16bit else 0
-                opcode = 0xF7 if w else 0xF6
-                mod_rm = 0xC0 | (0x07 << 3) | int(self.reg_codigo[op], 2)
+                opcode = OPCODE_GRUPO_F6 + w
+                mod_rm = 0xC0 | (EXTENSIONES_GRUPO_F6[instr] << 3) | int(self.reg_codigo[op], 2)
                 return f'{opcode:02X} {mod_rm:02X}'
         
         # =====================================================================
         # AND Reg, Reg - 001000dw mod reg r/m
-        # =====================================================================
-        if instr == 'AND' and len(operandos) >= 2:
-            op1, op2 = operandos[0].valor.upper(), operandos[1].valor.upper()
-            if op1 in self.reg_codigo and op2 in self.reg_codigo:
-                w = 1 if op1 in self.registros_16bit else 0
-                opcode = 0x23 if w else 0x22  # d=1
-                mod_rm = 0xC0 | (int(self.reg_codigo[op1], 2) << 3) | int(self.reg_codigo[op2], 2)
-                return f'{opcode:02X} {mod_rm:02X}'
-        
-        # =====================================================================
-        # OR Reg, Reg - 000010dw mod reg r/m
-        # =====================================================================
-        if instr == 'OR' and len(operandos) >= 2:
-            op1, op2 = operandos[0].valor.upper(), operandos[1].valor.upper()
-            if op1 in self.reg_codigo and op2 in self.reg_codigo:
-                w = 1 if op1 in self.registros_16bit else 0
-                opcode = 0x0B if w else 0x0A  # d=1
-                mod_rm = 0xC0 | (int(self.reg_codigo[op1], 2) << 3) | int(self.reg_codigo[op2], 2)
-                return f'{opcode:02X} {mod_rm:02X}'
-        
-        # =====================================================================
+        # OR Reg, Reg  - 000010dw mod reg r/m
         # XOR Reg, Reg - 001100dw mod reg r/m
         # =====================================================================
-        if instr == 'XOR' and len(operandos) >= 2:
+        if instr in CODIGOS_LOGICAS and len(operandos) >= 2:
             op1, op2 = operandos[0].valor.upper(), operandos[1].valor.upper()
             if op1 in self.reg_codigo and op2 in self.reg_codigo:
                 w = 1 if op1 in self.registros_16bit else 0
-                opcode = 0x33 if w else 0x32  # d=1
+                opcode = CODIGOS_LOGICAS[instr] + w  # d=1
                 mod_rm = 0xC0 | (int(self.reg_codigo[op1], 2) << 3) | int(self.reg_codigo[op2], 2)
                 return f'{opcode:02X} {mod_rm:02X}'
+            # AND/OR/XOR Reg, Inm - 0010010w inm (AL/AX) o 1000000w mod ext r/m inm
+            if op1 in self.reg_codigo and '[' not in op2:
+                w = 1 if op1 in self.registros_16bit else 0
+                if op1 in ('AL', 'AX'):
+                    prefijo = [CODIGOS_LOGICAS_ACUMULADOR[instr] + w]
+                else:
+                    mod_rm = 0xC0 | (EXTENSIONES_GRUPO_80[instr] << 3) | int(self.reg_codigo[op1], 2)
+                    prefijo = [OPCODE_GRUPO_80 + w, mod_rm]
+                valor = self.valor_inmediato(instr, operandos[1].valor, w + 1, len(prefijo))
+                return ' '.join(f'{b:02X}' for b in prefijo + list(valor.to_bytes(w + 1, 'little')))
         
         # =====================================================================
         # LEA Reg, Mem - 10001101 mod reg r/m
@@ -1237,57 +2006,193 @@ class Ensamblador8086:
             op1 = operandos[0].valor.upper()
             if op1 in self.registros_16bit:
                 mod_rm = (int(self.reg_codigo[op1], 2) << 3) | 0x06  # Dirección directa
-                return f'8D {mod_rm:02X} 00 00'
-        
-        return ""
-        
+                direccion = self.direccion_operando(operandos[1].valor, 2)
+                return f'{OPCODE_LEA:02X} {mod_rm:02X} {direccion & 0xFF:02X} {direccion >> 8:02X}'
+
+        # Forma de operandos que el codificador no produce: no se reporta Correcta sin bytes
+        raise ErrorCodificacion(diagnostico(Codigo.OPERANDOS_NO_CODIFICABLES, instr))
+
+    def valor_inmediato(self, instr: str, operando: str, tam: int, posicion: int) -> int:
+        """
+        Valor de un operando inmediato de 'tam' bytes (sin signo, listo para little endian).
+        Una dirección reubicable de 16 bits registra su reubicación en 'posicion'.
+        """
+        valor = valor_literal(operando)
+        if valor is None:
+            try:
+                valor = self.evaluar_expresion(operando)
+            except ErrorExpresion:
+                raise ErrorCodificacion(diagnostico(Codigo.VALOR_INVALIDO, instr, operando))
+            referencia = self.referencia_reubicable(operando) if tam == 2 else None
+            if referencia is not None:
+                self.fixups_linea.append((posicion, 'ABS16', referencia[0], referencia[1]))
+        limite = 1 << (8 * tam)
+        if not -(limite >> 1) <= valor < limite:
+            raise ErrorCodificacion(diagnostico(Codigo.VALOR_INVALIDO, instr, operando))
+        return valor & (limite - 1)
+
+    def direccion_operando(self, operando: str, posicion: int) -> int:
+        """
+        Dirección directa de un operando de memoria ('var', '[var+2]', '[0250h]').
+        Si depende de un símbolo, registra la reubicación en 'posicion' de la instrucción.
+        Los operandos con registros base/índice no tienen dirección directa (retorna 0).
+        """
+        texto = operando.strip()
+        if texto.startswith('[') and texto.endswith(']'):
+            texto = texto[1:-1]
+        referencia = self.referencia_reubicable(texto)
+        if referencia is not None:
+            self.fixups_linea.append((posicion, 'ABS16', referencia[0], referencia[1]))
+        try:
+            return self.evaluar_expresion(texto) & 0xFFFF
+        except ErrorExpresion:
+            return 0
+
+    def referencia_reubicable(self, texto: str) -> Optional[Tuple[str, int]]:
+        """
+        Si la expresión es 'símbolo', 'OFFSET símbolo' o alguno de ellos ± constante,
+        y el símbolo es una dirección, retorna (nombre calificado, sumando).
+        """
+        try:
+            nodo = analizar_expresion(texto.strip())
+        except ErrorExpresion:
+            return None
+        sumando = 0
+        if nodo[0] == 'bin' and nodo[1] in '+-' and nodo[3][0] == 'num':
+            sumando = nodo[3][1] if nodo[1] == '+' else -nodo[3][1]
+            nodo = nodo[2]
+        elif nodo[0] == 'bin' and nodo[1] == '+' and nodo[2][0] == 'num':
+            sumando = nodo[2][1]
+            nodo = nodo[3]
+        if nodo[0] not in ('sim', 'offset'):
+            return None
+        simbolo = self.buscar_simbolo(nodo[1])
+        if simbolo is None or simbolo.tipo not in TIPOS_CON_DIRECCION:
+            return None
+        return simbolo.nombre_calificado, sumando
+
     def obtener_valor_numerico(self, valor_str: str) -> int:
-        valor = valor_str.strip().upper()
-        # Quitar sufijo D de decimal
-        if valor.endswith('D'):
-            valor = valor[:-1]
-        if valor.endswith('H'):
-            return int(valor[:-1], 16)
-        if valor.endswith('B'):
-            return int(valor[:-1], 2)
+        """Valor de un literal o de una expresión constante; 0 si no se puede evaluar"""
+        valor = valor_literal(valor_str)
+        if valor is not None:
+            return valor
         try:
-            return int(valor)
-        except:
+            return self.evaluar_expresion(valor_str)
+        except ErrorExpresion:
             return 0
 
-    def generar_bytes_dato(self, tokens: List[Token]) -> str:
+    # =========================================================================
+    # EXPRESIONES CONSTANTES Y RESOLUCIÓN DE EQU
+    # =========================================================================
+
+    def buscar_simbolo(self, nombre: str) -> Optional[Simbolo]:
+        """Busca en el ámbito actual y luego en los que lo contienen (O(1) por ámbito)"""
+        return self.ambito_actual.buscar(nombre)
+
+    def evaluar_expresion(self, texto: str) -> int:
+        """Evalúa una expresión constante (ej. 'constante*2+1', 'OFFSET mensaje')"""
+        return evaluar(texto, self.resolver_simbolo, self.offset_simbolo)
+
+    def resolver_simbolo(self, nombre: str) -> int:
+        """
+        Valor numérico de un símbolo usado en una expresión.
+        Una constante EQU se evalúa una sola vez y el resultado queda en
+        Simbolo.valor_numerico; variables y etiquetas valen su dirección.
+        """
+        simbolo = self.buscar_simbolo(nombre)
+        if simbolo is None:
+            raise ErrorExpresion(f"Símbolo '{nombre}' no definido")
+        if simbolo.valor_numerico is not None:
+            return simbolo.valor_numerico
+        if simbolo.tipo != 'Constante':
+            return self.offset_simbolo(nombre)
+
+        clave = simbolo.nombre.lower()
+        if clave in self._resolviendo:
+            raise ErrorExpresion(f"Referencia circular en EQU '{simbolo.nombre}'")
+        self._resolviendo.add(clave)
+        try:
+            valor = simbolo.valor.strip()
+            if re.match(r"^'[^']'$", valor) or re.match(r'^"[^"]"$', valor):
+                resultado = ord(valor[1])
+            else:
+                resultado = self.evaluar_expresion(valor)
+        finally:
+            self._resolviendo.discard(clave)
+        simbolo.valor_numerico = resultado
+        return resultado
+
+    def offset_simbolo(self, nombre: str) -> int:
+        simbolo = self.buscar_simbolo(nombre)
+        if simbolo is None:
+            raise ErrorExpresion(f"Símbolo '{nombre}' no definido")
+        if not simbolo.direccion:
+            raise ErrorExpresion(f"Símbolo '{nombre}' sin dirección asignada")
+        return int(simbolo.direccion, 16)
+
+    def generar_datos(self, tokens: List[Token]) -> List[Union[bytes, BloqueDup]]:
+        """
+        Genera los bytes de una declaración de datos como registros:
+        bytes literales o BloqueDup (cantidad, patrón) para 'n DUP(valor)'.
+        Los bloques DUP nunca se materializan aquí, sin importar su tamaño.
+        """
+        self.fixups_linea = []
         if len(tokens) < 3:
-            return ''
+            return []
         
         directiva = tokens[1].valor.upper()
-        valor_str = ' '.join([t.valor for t in tokens[2:]])
+        tam_base = TAMANOS_DIRECTIVA.get(directiva, 0)
+        if not tam_base:
+            return []
+        valor_str = self.texto_valor(tokens[2:])
         
         string_match = re.search(r'["\']([^"\']*)["\']', valor_str)
         if string_match:
-            return ' '.join([f'{ord(c):02X}' for c in string_match.group(1)])
+            return [bytes(ord(c) & 0xFF for c in string_match.group(1))]
         
         dup_match = re.match(r'^(\d+)\s+DUP\s*\(([^)]+)\)$', valor_str, re.IGNORECASE)
         if dup_match:
             cant = int(dup_match.group(1))
-            val = dup_match.group(2).strip()
-            byte_val = '00' if val == '?' else f'{self.obtener_valor_numerico(val):02X}'
-            return ' '.join([byte_val] * min(cant, 8)) + (' ...' if cant > 8 else '')
+            patron = self.bytes_valor(dup_match.group(2), tam_base)
+            return [BloqueDup(cant, patron)] if cant else []
         
         if 'DUP' in valor_str.upper():
-            return ''
-        
-        if directiva == 'DB':
-            if valor_str.strip() == '?':
-                return '00'
-            return f'{self.obtener_valor_numerico(valor_str) & 0xFF:02X}'
-        
-        if directiva == 'DW':
-            if valor_str.strip() == '?':
-                return '00 00'
-            num = self.obtener_valor_numerico(valor_str)
-            return f'{num & 0xFF:02X} {(num >> 8) & 0xFF:02X}'
+            return []
         
-        return ''
+        partes = [p for p in valor_str.split(',') if p.strip()] if ',' in valor_str else [valor_str]
+        bloque = bytearray()
+        for parte in partes:
+            # Solo las palabras pueden contener una dirección reubicable
+            if tam_base == 2:
+                referencia = self.referencia_reubicable(parte)
+                if referencia is not None:
+                    self.fixups_linea.append((len(bloque), 'ABS16', referencia[0], referencia[1]))
+            bloque += self.bytes_valor(parte, tam_base)
+        return [bytes(bloque)]
+
+    def bytes_valor(self, valor_str: str, tam: int) -> bytes:
+        """
+        Un valor numérico o '?' en little endian con el tamaño de la directiva.
+        Un símbolo (dw tab) vale su dirección según la tabla de símbolos; la
+        reubicación de esa dirección la registra generar_datos.
+        """
+        if valor_str.strip() == '?':
+            return bytes(tam)
+        num = self.obtener_valor_numerico(valor_str) & ((1 << (8 * tam)) - 1)
+        return num.to_bytes(tam, 'little')
+
+    def resumen_datos(self, registros: List[Union[bytes, BloqueDup]]) -> str:
+        """Texto para listados: los bloques DUP se muestran como 'n DUP(patrón)'"""
+        partes = []
+        for reg in registros:
+            if isinstance(reg, BloqueDup):
+                partes.append(f"{reg.cantidad} DUP({reg.patron.hex(' ').upper()})")
+            elif reg:
+                partes.append(reg.hex(' ').upper())
+        return ' '.join(partes)
+
+    def generar_bytes_dato(self, tokens: List[Token]) -> str:
+        return self.resumen_datos(self.generar_datos(tokens))
 
     def generar_codificacion(self):
         """
@@ -1299,9 +2204,12 @@ class Ensamblador8086:
         Para los saltos JNAE, JNE, JNLE, LOOPE, JA, JC calcula el desplazamiento real.
         """
         self.lineas_codificadas = []
-        segmento = None
-        contadores = {'STACK': 0x0250, 'DATA': 0x0250, 'CODE': 0x0250}
-        contador = 0x0250
+        disposicion = self.disposicion
+
+        # Una reubicación puede volver válido un operando rechazado en la codificación anterior
+        for analisis, resultado, mensaje in self._rechazadas_al_codificar:
+            analisis['resultado'], analisis['mensaje'] = resultado, mensaje
+        self._rechazadas_al_codificar = []
         
         # Crear un diccionario para buscar resultados del análisis por número de línea
         resultados_analisis = {}
@@ -1311,221 +2219,510 @@ class Ensamblador8086:
         # =====================================================================
         # PRIMERA PASADA: Asignar direcciones a todas las etiquetas
         # =====================================================================
-        segmento_tmp = None
-        contador_tmp = 0x0250
-        contadores_tmp = {'STACK': 0x0250, 'DATA': 0x0250, 'CODE': 0x0250}
+        segmento = None
+        disposicion.reiniciar()
+        self.olvidar_valores_equ()
+        progreso = self.progreso
+        total = len(self.lineas_codigo)
         
         for i, linea_raw in enumerate(self.lineas_codigo):
-            num_linea = i + 1
+            if progreso is not None and not i % INTERVALO_PROGRESO:
+                progreso('generar_codificacion', i, 2 * total)
             linea = linea_raw.strip()
             linea_limpia = self.limpiar_comentarios(linea).strip()
             
             if not linea_limpia or linea.startswith(';'):
                 continue
-            
-            tokens_linea = self.tokenizar_linea(linea_limpia, num_linea)
-            linea_upper = linea_limpia.upper()
-            
-            # Detectar segmentos
-            if re.match(r'^\.STACK\s+SEGMENT$', linea_upper):
-                segmento_tmp = 'STACK'
-                contador_tmp = contadores_tmp['STACK']
-                continue
-            if re.match(r'^\.DATA\s+SEGMENT$', linea_upper):
-                segmento_tmp = 'DATA'
-                contador_tmp = contadores_tmp['DATA']
+            if self.resultado_preprocesado(i) is not None:
                 continue
-            if re.match(r'^\.CODE\s+SEGMENT$', linea_upper):
-                segmento_tmp = 'CODE'
-                contador_tmp = contadores_tmp['CODE']
-                continue
-            
-            if tokens_linea and tokens_linea[0].valor.upper() == 'ENDS':
-                segmento_tmp = None
-                continue
-            if tokens_linea and tokens_linea[0].valor.upper() == 'END':
-                continue
-            
-            # Asignar dirección a etiquetas en CODE
-            if segmento_tmp == 'CODE':
-                if tokens_linea and tokens_linea[0].tipo == TipoToken.SIMBOLO and tokens_linea[0].valor.endswith(':'):
-                    nombre = tokens_linea[0].valor.replace(':', '')
-                    if nombre in self.tabla_simbolos:
-                        self.tabla_simbolos[nombre].direccion = f'{contador_tmp:04X}'
-                
-                # Calcular tamaño para avanzar contador
-                analisis = resultados_analisis.get(num_linea, None)
-                es_correcta = analisis['resultado'] == 'Correcta' if analisis else False
-                if es_correcta:
-                    tamano = self.calcular_tamano_instruccion(tokens_linea)
-                    contador_tmp += tamano
-                    contadores_tmp['CODE'] = contador_tmp
-            
-            elif segmento_tmp == 'DATA':
-                analisis = resultados_analisis.get(num_linea, None)
-                es_correcta = analisis['resultado'] == 'Correcta' if analisis else False
-                if es_correcta and len(tokens_linea) >= 3 and tokens_linea[0].tipo == TipoToken.SIMBOLO:
-                    nombre = tokens_linea[0].valor.rstrip(':')
-                    if nombre in self.tabla_simbolos:
-                        self.tabla_simbolos[nombre].direccion = f'{contador_tmp:04X}'
-                    tamano = self.calcular_tamano_dato(tokens_linea)
-                    contador_tmp += tamano
-                    contadores_tmp['DATA'] = contador_tmp
-            
-            elif segmento_tmp == 'STACK':
-                analisis = resultados_analisis.get(num_linea, None)
-                es_correcta = analisis['resultado'] == 'Correcta' if analisis else False
-                if es_correcta and tokens_linea and tokens_linea[0].valor.upper() == 'DW':
-                    tokens_tmp = [Token('STACK', TipoToken.SIMBOLO, i, 0)] + tokens_linea
-                    tamano = self.calcular_tamano_dato(tokens_tmp)
-                    contador_tmp += tamano
-                    contadores_tmp['STACK'] = contador_tmp
+            segmento = self.ubicar_linea(i, linea_limpia, resultados_analisis.get(i + 1), segmento)
 
         # =====================================================================
         # SEGUNDA PASADA: Generar código máquina con desplazamientos calculados
-        # La dirección se renueva a 0250 en la primera instrucción DESPUÉS del inicio de segmento
+        # La línea de inicio de segmento muestra dónde terminó el anterior; las
+        # siguientes parten de la base del segmento (o de donde quedó si se reabre)
         # =====================================================================
         segmento = None
-        contador = 0x0250
-        contadores = {'STACK': 0x0250, 'DATA': 0x0250, 'CODE': 0x0250}
-        # Flag para saber si es la primera línea después del inicio de segmento
-        es_primera_linea_segmento = False
-        direccion_anterior_ends = 0x0250
+        disposicion.reiniciar()
+        # Un EQU con OFFSET evaluado en la primera pasada pudo ver direcciones aún sin asignar
+        self.olvidar_valores_equ()
 
         for i, linea_raw in enumerate(self.lineas_codigo):
-            num_linea = i + 1
+            if progreso is not None and not i % INTERVALO_PROGRESO:
+                progreso('generar_codificacion', total + i, 2 * total)
             linea = linea_raw.strip()
             linea_limpia = self.limpiar_comentarios(linea).strip()
 
-            # OMITIR líneas vacías y comentarios
+            # OMITIR líneas vacías, comentarios, directivas condicionales y bloques inactivos
             if not linea_limpia or linea.startswith(';'):
                 continue
-
-            tokens_linea = self.tokenizar_linea(linea_limpia, num_linea)
-            
-            # Obtener resultado del análisis sintáctico
-            analisis = resultados_analisis.get(num_linea, None)
-            es_correcta = analisis['resultado'] == 'Correcta' if analisis else False
-
-            linea_upper = linea_limpia.upper()
-            
-            # Detectar inicio de segmentos - mostrar dirección actual (donde terminó el anterior)
-            if re.match(r'^\.STACK\s+SEGMENT$', linea_upper):
-                segmento = 'STACK'
-                es_primera_linea_segmento = True
-                self.lineas_codificadas.append({
-                    'numero': num_linea, 'direccion': f'{contador:04X}',
-                    'linea': linea_limpia, 'codigo_maquina': 'Correcta' if es_correcta else 'Incorrecta',
-                    'tamano': 0, 'segmento': segmento
-                })
-                continue
-            
-            if re.match(r'^\.DATA\s+SEGMENT$', linea_upper):
-                segmento = 'DATA'
-                es_primera_linea_segmento = True
-                self.lineas_codificadas.append({
-                    'numero': num_linea, 'direccion': f'{contador:04X}',
-                    'linea': linea_limpia, 'codigo_maquina': 'Correcta' if es_correcta else 'Incorrecta',
-                    'tamano': 0, 'segmento': segmento
-                })
-                continue
-            
-            if re.match(r'^\.CODE\s+SEGMENT$', linea_upper):
-                segmento = 'CODE'
-                es_primera_linea_segmento = True
-                self.lineas_codificadas.append({
-                    'numero': num_linea, 'direccion': f'{contador:04X}',
-                    'linea': linea_limpia, 'codigo_maquina': 'Correcta' if es_correcta else 'Incorrecta',
-                    'tamano': 0, 'segmento': segmento
-                })
-                continue
-            
-            # Detectar declaraciones de segmento INCORRECTAS
-            if re.match(r'^\.\w+\s+SEGMENT$', linea_upper) and not re.match(r'^\.(?:STACK|DATA|CODE)\s+SEGMENT$', linea_upper):
-                self.lineas_codificadas.append({
-                    'numero': num_linea, 'direccion': f'{contador:04X}',
-                    'linea': linea_limpia, 'codigo_maquina': 'Incorrecta',
-                    'tamano': 0, 'segmento': segmento
-                })
+            if self.resultado_preprocesado(i) is not None:
                 continue
+            codificada, segmento = self.codificar_linea(i, linea_limpia, resultados_analisis.get(i + 1), segmento)
+            self.lineas_codificadas.append(codificada)
 
-            # ENDS y END
-            if tokens_linea and tokens_linea[0].valor.upper() == 'ENDS':
-                self.lineas_codificadas.append({
-                    'numero': num_linea, 'direccion': f'{contador:04X}',
-                    'linea': linea_limpia, 'codigo_maquina': 'Correcta' if es_correcta else 'Incorrecta',
-                    'tamano': 0, 'segmento': segmento
-                })
-                segmento = None
-                continue
+        if progreso is not None:
+            progreso('generar_codificacion', 2 * total, 2 * total)
+        self.ambito_actual = self.tabla_simbolos
 
-            if tokens_linea and tokens_linea[0].valor.upper() == 'END':
-                self.lineas_codificadas.append({
-                    'numero': num_linea, 'direccion': f'{contador:04X}',
-                    'linea': linea_limpia, 'codigo_maquina': 'Correcta' if es_correcta else 'Incorrecta',
-                    'tamano': 0, 'segmento': segmento
-                })
-                continue
+    def ubicar_linea(self, i: int, linea_limpia: str, analisis: Optional[dict],
+                     segmento: Optional[str]) -> Optional[str]:
+        """
+        Primera pasada sobre lineas_codigo[i]: asigna su dirección a la etiqueta,
+        variable o procedimiento que define y avanza el contador. Retorna el
+        segmento en que queda el ensamblado.
+        """
+        tokens_linea = self.tokens_de_linea(i, linea_limpia)
+        linea_upper = linea_limpia.upper()
+        self.ambito_actual = self.ambito(analisis.get('ambito', '') if analisis else '')
+        disposicion = self.disposicion
+
+        # Detectar segmentos
+        if re.match(r'^\.STACK\s+SEGMENT$', linea_upper):
+            disposicion.abrir('STACK')
+            return 'STACK'
+        if re.match(r'^\.DATA\s+SEGMENT$', linea_upper):
+            disposicion.abrir('DATA')
+            return 'DATA'
+        if re.match(r'^\.CODE\s+SEGMENT$', linea_upper):
+            disposicion.abrir('CODE')
+            return 'CODE'
+
+        if tokens_linea and tokens_linea[0].valor.upper() == 'ENDS':
+            disposicion.cerrar()
+            return None
+        if tokens_linea and tokens_linea[0].valor.upper() == 'END':
+            return segmento
+        if segmento and self.es_org(tokens_linea):
+            if analisis and analisis['resultado'] == 'Correcta':
+                disposicion.org(self.valor_org(tokens_linea))
+            return segmento
+        contador = disposicion.direccion
+
+        # Asignar dirección a etiquetas en CODE
+        if segmento == 'CODE':
+            if tokens_linea and tokens_linea[0].tipo == TipoToken.SIMBOLO and tokens_linea[0].valor.endswith(':'):
+                nombre = tokens_linea[0].valor.replace(':', '')
+                simbolo = self.ambito_actual.get(nombre)
+                if simbolo is not None:
+                    simbolo.direccion = f'{contador:04X}'
+
+            # Calcular tamaño para avanzar contador
+            es_correcta = analisis['resultado'] == 'Correcta' if analisis else False
+            if es_correcta:
+                self.marcar_procedimiento(tokens_linea, contador)
+                tamano = self.calcular_tamano_instruccion(tokens_linea)
+                disposicion.avanzar(tamano)
 
-            # Si es la primera línea después del inicio de segmento, renovar a 0250
-            if es_primera_linea_segmento:
-                contador = 0x0250
-                es_primera_linea_segmento = False
-
-            tamano = 0
-            codigo = ''
-            direccion = f'{contador:04X}'
-
-            if segmento == 'STACK':
-                if es_correcta:
-                    codigo = 'Correcta'
-                    if tokens_linea and tokens_linea[0].valor.upper() == 'DW':
-                        tokens_tmp = [Token('STACK', TipoToken.SIMBOLO, i, 0)] + tokens_linea
-                        tamano = self.calcular_tamano_dato(tokens_tmp)
-                else:
-                    codigo = 'Incorrecta'
-                    tamano = 0
+        elif segmento == 'DATA':
+            es_correcta = analisis['resultado'] == 'Correcta' if analisis else False
+            if es_correcta and len(tokens_linea) >= 3 and tokens_linea[0].tipo == TipoToken.SIMBOLO:
+                nombre = tokens_linea[0].valor.rstrip(':')
+                if nombre in self.tabla_simbolos:
+                    self.tabla_simbolos[nombre].direccion = f'{contador:04X}'
+                tamano = self.calcular_tamano_dato(tokens_linea)
+                disposicion.avanzar(tamano)
+
+        elif segmento == 'STACK':
+            es_correcta = analisis['resultado'] == 'Correcta' if analisis else False
+            if es_correcta and tokens_linea and tokens_linea[0].valor.upper() == 'DW':
+                tokens_tmp = [Token('STACK', TipoToken.SIMBOLO, i, 0)] + tokens_linea
+                tamano = self.calcular_tamano_dato(tokens_tmp)
+                disposicion.avanzar(tamano)
+        return segmento
+
+    def codificar_linea(self, i: int, linea_limpia: str, analisis: Optional[dict],
+                        segmento: Optional[str]) -> Tuple[dict, Optional[str]]:
+        """
+        Segunda pasada sobre lineas_codigo[i]: código máquina (o datos) en la
+        dirección actual, que luego avanza. Retorna (línea codificada, segmento
+        en que queda el ensamblado).
+        """
+        num_linea = i + 1
+        disposicion = self.disposicion
+        tokens_linea = self.tokens_de_linea(i, linea_limpia)
+        es_correcta = analisis['resultado'] == 'Correcta' if analisis else False
+        self.ambito_actual = self.ambito(analisis.get('ambito', '') if analisis else '')
+
+        linea_upper = linea_limpia.upper()
+
+        # Detectar inicio de segmentos - mostrar dirección actual (donde terminó el anterior)
+        if re.match(r'^\.STACK\s+SEGMENT$', linea_upper):
+            segmento = 'STACK'
+            codificada = {
+                'numero': num_linea, 'direccion': f'{disposicion.direccion:04X}',
+                'linea': linea_limpia, 'codigo_maquina': 'Correcta' if es_correcta else 'Incorrecta',
+                'tamano': 0, 'segmento': segmento
+            }
+            disposicion.abrir(segmento)
+            return codificada, segmento
+
+        if re.match(r'^\.DATA\s+SEGMENT$', linea_upper):
+            segmento = 'DATA'
+            codificada = {
+                'numero': num_linea, 'direccion': f'{disposicion.direccion:04X}',
+                'linea': linea_limpia, 'codigo_maquina': 'Correcta' if es_correcta else 'Incorrecta',
+                'tamano': 0, 'segmento': segmento
+            }
+            disposicion.abrir(segmento)
+            return codificada, segmento
+
+        if re.match(r'^\.CODE\s+SEGMENT$', linea_upper):
+            segmento = 'CODE'
+            codificada = {
+                'numero': num_linea, 'direccion': f'{disposicion.direccion:04X}',
+                'linea': linea_limpia, 'codigo_maquina': 'Correcta' if es_correcta else 'Incorrecta',
+                'tamano': 0, 'segmento': segmento
+            }
+            disposicion.abrir(segmento)
+            return codificada, segmento
+
+        # Detectar declaraciones de segmento INCORRECTAS
+        if re.match(r'^\.\w+\s+SEGMENT$', linea_upper) and not re.match(r'^\.(?:STACK|DATA|CODE)\s+SEGMENT$', linea_upper):
+            codificada = {
+                'numero': num_linea, 'direccion': f'{disposicion.direccion:04X}',
+                'linea': linea_limpia, 'codigo_maquina': 'Incorrecta',
+                'tamano': 0, 'segmento': segmento
+            }
+            return codificada, segmento
+
+        # ENDS y END
+        if tokens_linea and tokens_linea[0].valor.upper() == 'ENDS':
+            codificada = {
+                'numero': num_linea, 'direccion': f'{disposicion.direccion:04X}',
+                'linea': linea_limpia, 'codigo_maquina': 'Correcta' if es_correcta else 'Incorrecta',
+                'tamano': 0, 'segmento': segmento
+            }
+            disposicion.cerrar()
+            return codificada, None
+
+        if tokens_linea and tokens_linea[0].valor.upper() == 'END':
+            codificada = {
+                'numero': num_linea, 'direccion': f'{disposicion.direccion:04X}',
+                'linea': linea_limpia, 'codigo_maquina': 'Correcta' if es_correcta else 'Incorrecta',
+                'tamano': 0, 'segmento': segmento
+            }
+            return codificada, segmento
+
+        # ORG: mueve el contador del segmento actual
+        if segmento and self.es_org(tokens_linea):
+            if es_correcta:
+                disposicion.org(self.valor_org(tokens_linea))
+            codificada = {
+                'numero': num_linea, 'direccion': f'{disposicion.direccion:04X}',
+                'linea': linea_limpia, 'codigo_maquina': 'Correcta' if es_correcta else 'Incorrecta',
+                'tamano': 0, 'segmento': segmento
+            }
+            return codificada, segmento
+
+        contador = disposicion.direccion
+        tamano = 0
+        codigo = ''
+        datos = []
+        fixups = []
+        direccion = f'{contador:04X}'
 
-            elif segmento == 'DATA':
-                if es_correcta:
-                    codigo = 'Correcta'
-                    if len(tokens_linea) >= 3 and tokens_linea[0].tipo == TipoToken.SIMBOLO:
-                        tamano = self.calcular_tamano_dato(tokens_linea)
-                else:
-                    codigo = 'Incorrecta'
-                    tamano = 0
+        if segmento == 'STACK':
+            if es_correcta:
+                codigo = 'Correcta'
+                if tokens_linea and tokens_linea[0].valor.upper() == 'DW':
+                    tokens_tmp = [Token('STACK', TipoToken.SIMBOLO, i, 0)] + tokens_linea
+                    tamano = self.calcular_tamano_dato(tokens_tmp)
+                    datos = self.generar_datos(tokens_tmp)
+                    fixups = self.fixups_linea
+            else:
+                codigo = 'Incorrecta'
+                tamano = 0
 
-            elif segmento == 'CODE':
-                if es_correcta:
-                    # Codificar instrucciones pasando la dirección actual
+        elif segmento == 'DATA':
+            if es_correcta:
+                codigo = 'Correcta'
+                if len(tokens_linea) >= 3 and tokens_linea[0].tipo == TipoToken.SIMBOLO:
+                    tamano = self.calcular_tamano_dato(tokens_linea)
+                    datos = self.generar_datos(tokens_linea)
+                    fixups = self.fixups_linea
+                    if datos:
+                        codigo = f'Correcta | {self.resumen_datos(datos)}'
+            else:
+                codigo = 'Incorrecta'
+                tamano = 0
+
+        elif segmento == 'CODE':
+            if es_correcta:
+                # Codificar instrucciones pasando la dirección actual
+                tamano = self.calcular_tamano_instruccion(tokens_linea)
+                try:
                     codigo_maq = self.codificar_instruccion(tokens_linea, contador)
-                    if codigo_maq:
-                        codigo = f'Correcta | {codigo_maq}'
-                    else:
-                        codigo = 'Correcta'
-                    tamano = self.calcular_tamano_instruccion(tokens_linea)
-                else:
+                except ErrorCodificacion as e:
+                    # El tamaño se conserva para no mover las direcciones ya asignadas
+                    codigo_maq = None
                     codigo = 'Incorrecta'
-                    tamano = 0
-            
+                    if analisis is not None:
+                        self._rechazadas_al_codificar.append((analisis, analisis['resultado'], analisis['mensaje']))
+                        analisis['resultado'] = 'Incorrecta'
+                        analisis['mensaje'] = e.mensaje
+                else:
+                    codigo = f'Correcta | {codigo_maq}' if codigo_maq else 'Correcta'
+                fixups = self.fixups_linea
             else:
-                codigo = 'Incorrecta' if not es_correcta else 'Correcta'
+                codigo = 'Incorrecta'
+                tamano = 0
+
+        else:
+            codigo = 'Incorrecta' if not es_correcta else 'Correcta'
 
-            self.lineas_codificadas.append({
-                'numero': num_linea, 'direccion': direccion, 'linea': linea_limpia,
-                'codigo_maquina': codigo, 'tamano': tamano, 'segmento': segmento
-            })
+        codificada = {
+            'numero': num_linea, 'direccion': direccion, 'linea': linea_limpia,
+            'codigo_maquina': codigo, 'tamano': tamano, 'segmento': segmento,
+            'datos': datos, 'fixups': fixups
+        }
+
+        disposicion.avanzar(tamano)
+        return codificada, segmento
 
-            contador += tamano
-            if segmento:
-                contadores[segmento] = contador
+    def reubicar(self, **bases: int):
+        """
+        Cambia la base de uno o más segmentos (ej. reubicar(CODE=0x100)) y regenera
+        la codificación a partir del análisis ya hecho, sin volver a tokenizar.
+        Los saltos son relativos; las direcciones fijadas con ORG son absolutas.
+        """
+        for nombre, direccion in bases.items():
+            nombre = nombre.upper()
+            if nombre not in SEGMENTOS:
+                raise ValueError(f"Segmento desconocido: '{nombre}'")
+            self.disposicion.bases[nombre] = direccion
+        self.generar_codificacion()
+
+    def _datos_linea(self, lc: dict, segmento: str) -> List[Union[bytes, BloqueDup]]:
+        """Registros de datos de una línea codificada, recortados a su tamaño"""
+        if segmento == 'CODE':
+            datos = []
+            if '|' in lc['codigo_maquina']:
+                datos = [bytes.fromhex(lc['codigo_maquina'].split('|', 1)[1])]
+        else:
+            datos = lc.get('datos', [])
+        if tamano_datos(datos) > lc['tamano']:
+            datos = [materializar_datos(datos)[:lc['tamano']]]
+        return datos
+
+    def escribir_segmento(self, archivo: BinaryIO, segmento: str) -> Tuple[int, int]:
+        """
+        Escribe la imagen binaria de un segmento en un archivo, en orden de dirección.
+        Los bloques DUP se escriben con escribir_datos sin materializarse.
+        Los huecos de CODE (líneas correctas sin codificación disponible) se rellenan
+        con NOP (90h); los de DATA/STACK con 00h. Si un ORG retrocede, la imagen se
+        arma por dirección a partir de la más baja y lo escrito después prevalece.
+        Retorna (origen, bytes escritos).
+        """
+        relleno = b'\x90' if segmento == 'CODE' else b'\x00'
+        lineas = [lc for lc in self.lineas_codificadas
+                  if lc['segmento'] == segmento and lc['tamano'] > 0]
+        if not lineas:
+            return 0, 0
+
+        direcciones = [int(lc['direccion'], 16) for lc in lineas]
+        fin = direcciones[0]
+        for lc, direccion in zip(lineas, direcciones):
+            if direccion < fin:
+                return self._escribir_segmento_por_direccion(archivo, segmento, lineas,
+                                                             direcciones, relleno)
+            fin = direccion + lc['tamano']
+
+        origen = direcciones[0]
+        escritos = 0
+        for lc, direccion in zip(lineas, direcciones):
+            hueco = direccion - origen - escritos
+            if hueco > 0:
+                archivo.write(relleno * hueco)
+                escritos += hueco
+            n = escribir_datos(archivo, self._datos_linea(lc, segmento))
+            if n < lc['tamano']:
+                archivo.write(relleno * (lc['tamano'] - n))
+            escritos += lc['tamano']
+
+        return origen, escritos
+
+    def _escribir_segmento_por_direccion(self, archivo: BinaryIO, segmento: str,
+                                         lineas: List[dict], direcciones: List[int],
+                                         relleno: bytes) -> Tuple[int, int]:
+        """Imagen con ORG hacia atrás o solapado: se materializa en un bytearray"""
+        origen = min(direcciones)
+        fin = max(d + lc['tamano'] for lc, d in zip(lineas, direcciones))
+        imagen = bytearray(relleno * (fin - origen))
+        for lc, direccion in zip(lineas, direcciones):
+            datos = materializar_datos(self._datos_linea(lc, segmento))
+            datos += relleno * (lc['tamano'] - len(datos))
+            inicio = direccion - origen
+            imagen[inicio:inicio + lc['tamano']] = datos
+        archivo.write(imagen)
+        return origen, len(imagen)
+
+    def imagen_segmento(self, segmento: str) -> Tuple[int, bytearray]:
+        """Imagen binaria de un segmento en memoria. Retorna (dirección de origen, bytes)."""
+        bufer = io.BytesIO()
+        origen, _ = self.escribir_segmento(bufer, segmento)
+        return origen, bytearray(bufer.getvalue())
+
+
+# =========================================================================
+# API SIN ESTADO
+# =========================================================================
+
+@dataclass(frozen=True)
+class SimboloResultado:
+    """Copia inmutable de un Simbolo al terminar ensamblar()"""
+    nombre: str
+    tipo: str
+    valor: str
+    tamanio: str
+    direccion: str = ""
+    ambito: str = ""
+
+    @property
+    def nombre_calificado(self) -> str:
+        return f"{self.ambito}::{self.nombre}" if self.ambito else self.nombre
+
+
+@dataclass(frozen=True)
+class ResultadoEnsamblado:
+    """
+    Resultado inmutable de ensamblar(): todo lo que contiene es inmutable (los
+    tokens de un INCLUDE en caché se comparten, pero Token es inmutable), así
+    que puede pasarse entre hilos. Las líneas analizadas y codificadas tienen
+    las mismas claves que Ensamblador8086.lineas_analizadas/codificadas.
+    """
+    tokens: Tuple[Token, ...]
+    lineas_analizadas: Tuple[Mapping[str, object], ...]
+    lineas_codificadas: Tuple[Mapping[str, object], ...]
+    simbolos: Tuple[SimboloResultado, ...]          # En el orden de simbolos_listado()
+    segmentos: Mapping[str, Tuple[int, bytes]]      # Segmento -> (origen, imagen)
+    errores: int
+    advertencias: Tuple[Tuple[int, Diagnostico], ...] = ()
+
+    @property
+    def correcto(self) -> bool:
+        return self.errores == 0
+
+    @property
+    def codigo(self) -> bytes:
+        return self.segmentos.get('CODE', (0, b''))[1]
+
+
+def _congelar_linea(linea: dict) -> Mapping[str, object]:
+    linea = dict(linea)
+    if 'datos' in linea:
+        linea['datos'] = tuple(linea['datos'] or ())
+    if 'fixups' in linea:
+        linea['fixups'] = tuple(linea['fixups'] or ())
+    return MappingProxyType(linea)
+
+
+def ensamblar(texto: str, bases: Optional[Mapping[str, int]] = None,
+              definiciones: Optional[Mapping[str, int]] = None,
+              limites: Optional[LimitesAnalisis] = None,
+              directorio: Optional[str] = None) -> ResultadoEnsamblado:
+    """
+    Ensambla 'texto' sin estado compartido: cada llamada usa su propio
+    Ensamblador8086 (barato de crear: las tablas de instrucciones y registros
+    son de módulo), por lo que varias llamadas pueden correr en paralelo en
+    hilos distintos. bases: segmento -> dirección (ej. {'CODE': 0x100}).
+    """
+    asm = Ensamblador8086()
+    if bases:
+        asm.disposicion = DisposicionSegmentos({**asm.disposicion.bases, **{k.upper(): v for k, v in bases.items()}})
+    for nombre, valor in (definiciones or {}).items():
+        asm.definir(nombre, valor)
+    if limites is not None:
+        asm.limites = limites
+    if directorio is not None:
+        asm.directorio_base = Path(directorio)
+    asm.cargar_texto(texto)
+    asm.analizar_sintaxis()
+    asm.generar_codificacion()
+
+    segmentos = {}
+    for segmento in SEGMENTOS:
+        if any(lc['segmento'] == segmento and lc['tamano'] > 0 for lc in asm.lineas_codificadas):
+            origen, imagen = asm.imagen_segmento(segmento)
+            segmentos[segmento] = (origen, bytes(imagen))
+    return ResultadoEnsamblado(
+        tokens=tuple(asm.tokens),
+        lineas_analizadas=tuple(MappingProxyType(dict(a)) for a in asm.lineas_analizadas),
+        lineas_codificadas=tuple(_congelar_linea(lc) for lc in asm.lineas_codificadas),
+        simbolos=tuple(SimboloResultado(s.nombre, s.tipo, s.valor, s.tamanio, s.direccion, s.ambito)
+                       for s in asm.simbolos_listado()),
+        segmentos=MappingProxyType(segmentos),
+        errores=sum(a['resultado'] == 'Incorrecta' for a in asm.lineas_analizadas),
+        advertencias=tuple(asm.advertencias),
+    )
 
 
 # =========================================================================
 # INTERFAZ GRÁFICA
 # =========================================================================
 
+class TrabajoSegundoPlano:
+    """
+    Ejecuta funcion() (que carga o analiza con 'ensamblador') en un hilo aparte.
+    El hilo no toca Tk: deja en 'cola' los mensajes ('progreso', fase, hechas,
+    total, fragmento) y al final uno de ('fin', resultado), ('cancelado', None)
+    o ('error', excepción). El fragmento trae lo producido desde el mensaje
+    anterior: 'desde' y 'lineas' (tramo de lineas_codigo), 'tokens' y
+    'incorrectas' (números de línea con análisis Incorrecta).
+    """
+
+    def __init__(self, ensamblador: 'Ensamblador8086', funcion: Callable[[], object]):
+        self.ensamblador = ensamblador
+        self.funcion = funcion
+        self.cola: 'queue.Queue[tuple]' = queue.Queue()
+        self._cancelar = threading.Event()
+        self._hilo = threading.Thread(target=self._ejecutar, daemon=True)
+        self._lineas = self._tokens = self._analizadas = 0
+
+    def iniciar(self):
+        self._hilo.start()
+
+    def cancelar(self):
+        """La fase en curso se interrumpe en el siguiente aviso de progreso"""
+        self._cancelar.set()
+
+    @property
+    def activo(self) -> bool:
+        return self._hilo.is_alive()
+
+    def _progreso(self, fase: str, hechas: int, total: int):
+        if self._cancelar.is_set():
+            raise AnalisisCancelado(fase)
+        asm = self.ensamblador
+        fragmento = {'desde': self._lineas, 'lineas': [], 'tokens': [], 'incorrectas': []}
+        if fase == 'cargar_lineas':
+            fragmento['lineas'] = asm.lineas_codigo[self._lineas:hechas]
+            fragmento['tokens'] = asm.tokens[self._tokens:]
+            self._lineas = max(self._lineas, hechas)
+            self._tokens += len(fragmento['tokens'])
+        elif fase == 'analizar_sintaxis':
+            nuevas = asm.lineas_analizadas[self._analizadas:]
+            fragmento['incorrectas'] = [a['numero'] for a in nuevas if a['resultado'] == 'Incorrecta']
+            self._analizadas += len(nuevas)
+        self.cola.put(('progreso', fase, hechas, total, fragmento))
+
+    def _ejecutar(self):
+        self.ensamblador.progreso = self._progreso
+        try:
+            if self._cancelar.is_set():
+                raise AnalisisCancelado('inicio')
+            self.cola.put(('fin', self.funcion()))
+        except AnalisisCancelado:
+            self.cola.put(('cancelado', None))
+        except Exception as e:
+            self.cola.put(('error', e))
+        finally:
+            self.ensamblador.progreso = None
+
+
 class VentanaPrincipal:
+    INTERVALO_COLA = 50         # ms entre revisiones de la cola del trabajo en curso
+
     def __init__(self, root, ensamblador):
         self.root = root
         self.root.title("Ensamblador 8086 - Análisis Sintáctico Mejorado")
@@ -1537,6 +2734,8 @@ class VentanaPrincipal:
         self.ventana_codificacion = None
         self.pagina_actual = 0
         self.elementos_por_pagina = 25
+        self.trabajo: Optional[TrabajoSegundoPlano] = None
+        self.tokens_mostrados: List[Token] = []     # Lista que pagina el panel de tokens
 
         self.crear_interfaz()
 
@@ -1547,14 +2746,26 @@ class VentanaPrincipal:
         # Botones
         btn_frame = ttk.Frame(frame)
         btn_frame.pack(fill=tk.X, pady=6)
-        ttk.Button(btn_frame, text="Cargar Archivo", command=self.cargar_archivo).pack(side=tk.LEFT, padx=4)
-        ttk.Button(btn_frame, text="Analizar", command=self.analizar).pack(side=tk.LEFT, padx=4)
+        self.btn_cargar = ttk.Button(btn_frame, text="Cargar Archivo", command=self.cargar_archivo)
+        self.btn_cargar.pack(side=tk.LEFT, padx=4)
+        self.btn_analizar = ttk.Button(btn_frame, text="Analizar", command=self.analizar)
+        self.btn_analizar.pack(side=tk.LEFT, padx=4)
         ttk.Button(btn_frame, text="Ventana Análisis", command=self.mostrar_analisis).pack(side=tk.LEFT, padx=4)
         ttk.Button(btn_frame, text="Ventana Codificación", command=self.mostrar_codificacion).pack(side=tk.LEFT, padx=4)
+        self.btn_cancelar = ttk.Button(btn_frame, text="Cancelar", command=self.cancelar, state=tk.DISABLED)
+        self.btn_cancelar.pack(side=tk.LEFT, padx=4)
 
         self.label_archivo = ttk.Label(frame, text="Ningún archivo cargado")
         self.label_archivo.pack(anchor=tk.W)
 
+        # Progreso del trabajo en segundo plano
+        prog_frame = ttk.Frame(frame)
+        prog_frame.pack(fill=tk.X, pady=2)
+        self.barra_progreso = ttk.Progressbar(prog_frame, maximum=1000, length=300)
+        self.barra_progreso.pack(side=tk.LEFT, padx=4)
+        self.label_estado = ttk.Label(prog_frame, text="")
+        self.label_estado.pack(side=tk.LEFT, padx=6)
+
         # Paneles
         paned = ttk.PanedWindow(frame, orient=tk.HORIZONTAL)
         paned.pack(fill=tk.BOTH, expand=True, pady=6)
@@ -1563,6 +2774,7 @@ class VentanaPrincipal:
         frame_codigo = ttk.LabelFrame(paned, text="Código Fuente", padding=5)
         paned.add(frame_codigo, weight=1)
         self.texto_codigo = tk.Text(frame_codigo, wrap=tk.NONE, font=('Courier', 10))
+        self.texto_codigo.tag_configure('incorrecta', background='#ffd6d6')
         self.texto_codigo.pack(fill=tk.BOTH, expand=True)
 
         # Tokens
@@ -1580,38 +2792,168 @@ class VentanaPrincipal:
         ttk.Button(pag_frame, text="Siguiente →", command=self.pag_siguiente).pack(side=tk.LEFT, padx=2)
 
     def cargar_archivo(self):
+        if self.trabajo is not None:
+            return
         ruta = filedialog.askopenfilename(filetypes=[("ASM", "*.asm"), ("Todos", "*.*")])
         if not ruta:
             return
-        if self.ensamblador.cargar_archivo(ruta):
-            self.label_archivo.config(text=f"Archivo: {Path(ruta).name}")
+        # Se carga en una instancia nueva: si se cancela, queda el archivo anterior
+        nuevo = self._nuevo_ensamblador()
+        self.texto_codigo.delete(1.0, tk.END)
+        self.tokens_mostrados = []
+        self.mostrar_tokens()
+        self._iniciar(TrabajoSegundoPlano(nuevo, lambda: nuevo.cargar_archivo(ruta)), 'cargar', Path(ruta).name)
+
+    def _nuevo_ensamblador(self) -> 'Ensamblador8086':
+        nuevo = type(self.ensamblador)()
+        nuevo.limites = self.ensamblador.limites
+        nuevo.disposicion = self.ensamblador.disposicion
+        nuevo.definiciones = dict(self.ensamblador.definiciones)
+        return nuevo
+
+    def analizar(self):
+        if self.trabajo is not None:
+            return
+        if not self.ensamblador.lineas_codigo:
+            messagebox.showwarning("Advertencia", "Primero cargue un archivo")
+            return
+        # Se analiza una copia y se reemplaza al terminar: mientras tanto las ventanas
+        # de análisis y codificación (y exportar) siguen viendo el análisis anterior
+        asm = self.ensamblador.copia_para_analizar()
+        self.texto_codigo.tag_remove('incorrecta', 1.0, tk.END)
+
+        def analizar_y_codificar():
+            asm.analizar_sintaxis()
+            asm.generar_codificacion()
+
+        self._iniciar(TrabajoSegundoPlano(asm, analizar_y_codificar), 'analizar')
+
+    # === Trabajo en segundo plano ===
+
+    def _iniciar(self, trabajo: TrabajoSegundoPlano, tipo: str, nombre: str = ''):
+        self.trabajo = trabajo
+        self.tipo_trabajo = tipo
+        self.nombre_trabajo = nombre
+        self.btn_cargar.config(state=tk.DISABLED)
+        self.btn_analizar.config(state=tk.DISABLED)
+        self.btn_cancelar.config(state=tk.NORMAL)
+        self.barra_progreso['value'] = 0
+        self.label_estado.config(text="Cargando..." if tipo == 'cargar' else "Analizando...")
+        trabajo.iniciar()
+        self.root.after(self.INTERVALO_COLA, self.atender_cola)
+
+    def atender_cola(self):
+        trabajo = self.trabajo
+        if trabajo is None:
+            return
+        while True:
+            try:
+                mensaje = trabajo.cola.get_nowait()
+            except queue.Empty:
+                break
+            if mensaje[0] == 'progreso':
+                self._mostrar_progreso(*mensaje[1:])
+            else:
+                self._terminar(*mensaje)
+                return
+        self.root.after(self.INTERVALO_COLA, self.atender_cola)
+
+    def _mostrar_progreso(self, fase: str, hechas: int, total: int, fragmento: dict):
+        self.barra_progreso['value'] = 1000 * hechas // max(total, 1)
+        self.label_estado.config(text=f"{fase}: {hechas}/{total}")
+        if fragmento['lineas']:
+            desde = fragmento['desde']
+            self.texto_codigo.insert(tk.END, ''.join(
+                f"{i:04d} | {ln}\n" for i, ln in enumerate(fragmento['lineas'], desde + 1)))
+        if fragmento['tokens']:
+            self.tokens_mostrados.extend(fragmento['tokens'])
+            self.actualizar_tokens()
+        for numero in fragmento['incorrectas']:
+            self.texto_codigo.tag_add('incorrecta', f"{numero}.0", f"{numero}.end")
+
+    def _terminar(self, estado: str, resultado):
+        trabajo, self.trabajo = self.trabajo, None
+        self.btn_cargar.config(state=tk.NORMAL)
+        self.btn_analizar.config(state=tk.NORMAL)
+        self.btn_cancelar.config(state=tk.DISABLED)
+        cargar = self.tipo_trabajo == 'cargar'
+
+        if estado == 'fin' and (resultado or not cargar):
+            self.ensamblador = trabajo.ensamblador
+            for ventana in (self.ventana_analisis, self.ventana_codificacion):
+                if ventana is not None and ventana.winfo_exists():
+                    ventana.ensamblador = self.ensamblador
+                    ventana.actualizar()
+        if estado == 'fin' and cargar and resultado:
+            self.label_archivo.config(text=f"Archivo: {self.nombre_trabajo}")
             self.mostrar_codigo()
             self.mostrar_tokens()
+            self.label_estado.config(text=f"{len(self.ensamblador.lineas_codigo)} líneas cargadas")
             messagebox.showinfo("Listo", "Archivo cargado")
+            return
+        if estado == 'fin' and not cargar:
+            self.marcar_incorrectas()
+            self.barra_progreso['value'] = 1000
+            self.label_estado.config(text=f"Análisis completado: {self.ensamblador.errores} errores")
+            messagebox.showinfo("Listo", "Análisis completado")
+            return
+
+        # Cancelado o fallido: queda el archivo y el análisis anteriores
+        self.barra_progreso['value'] = 0
+        if cargar:
+            self.mostrar_codigo()
+            self.mostrar_tokens()
+        else:
+            self.marcar_incorrectas()
+        if estado == 'cancelado':
+            self.label_estado.config(text="Cancelado")
+        elif estado == 'error':
+            self.label_estado.config(text="Error")
+            messagebox.showerror("Error", f"Falló el análisis: {resultado}")
         else:
+            self.label_estado.config(text="")
             messagebox.showerror("Error", "No se pudo cargar")
 
+    def cancelar(self):
+        if self.trabajo is not None:
+            self.trabajo.cancelar()
+            self.label_estado.config(text="Cancelando...")
+
+    def marcar_incorrectas(self):
+        self.texto_codigo.tag_remove('incorrecta', 1.0, tk.END)
+        for analisis in self.ensamblador.lineas_analizadas:
+            if analisis['resultado'] == 'Incorrecta':
+                numero = analisis['numero']
+                self.texto_codigo.tag_add('incorrecta', f"{numero}.0", f"{numero}.end")
+
+    # === Paneles ===
+
     def mostrar_codigo(self):
         self.texto_codigo.delete(1.0, tk.END)
-        for i, ln in enumerate(self.ensamblador.lineas_codigo, 1):
-            self.texto_codigo.insert(tk.END, f"{i:04d} | {ln}\n")
+        self.texto_codigo.insert(tk.END, ''.join(
+            f"{i:04d} | {ln}\n" for i, ln in enumerate(self.ensamblador.lineas_codigo, 1)))
+        if self.ensamblador.lineas_analizadas:
+            self.marcar_incorrectas()
 
     def mostrar_tokens(self):
         self.pagina_actual = 0
+        if self.trabajo is None:
+            self.tokens_mostrados = self.ensamblador.tokens
         self.actualizar_tokens()
 
     def actualizar_tokens(self):
+        tokens = self.tokens_mostrados
         self.texto_tokens.delete(1.0, tk.END)
         inicio = self.pagina_actual * self.elementos_por_pagina
-        fin = min(inicio + self.elementos_por_pagina, len(self.ensamblador.tokens))
+        fin = min(inicio + self.elementos_por_pagina, len(tokens))
 
         self.texto_tokens.insert(tk.END, f"{'#':<5} {'Token':<30} {'Tipo':<30}\n")
         self.texto_tokens.insert(tk.END, "=" * 70 + "\n")
         for i in range(inicio, fin):
-            t = self.ensamblador.tokens[i]
+            t = tokens[i]
             self.texto_tokens.insert(tk.END, f"{i+1:<5} {t.valor:<30} {t.tipo.value:<30}\n")
 
-        total = max(1, (len(self.ensamblador.tokens) + self.elementos_por_pagina - 1) // self.elementos_por_pagina)
+        total = max(1, (len(tokens) + self.elementos_por_pagina - 1) // self.elementos_por_pagina)
         self.label_pag.config(text=f"Página {self.pagina_actual + 1} de {total}")
 
     def pag_anterior(self):
@@ -1620,19 +2962,11 @@ class VentanaPrincipal:
             self.actualizar_tokens()
 
     def pag_siguiente(self):
-        total = max(1, (len(self.ensamblador.tokens) + self.elementos_por_pagina - 1) // self.elementos_por_pagina)
+        total = max(1, (len(self.tokens_mostrados) + self.elementos_por_pagina - 1) // self.elementos_por_pagina)
         if self.pagina_actual < total - 1:
             self.pagina_actual += 1
             self.actualizar_tokens()
 
-    def analizar(self):
-        if not self.ensamblador.lineas_codigo:
-            messagebox.showwarning("Advertencia", "Primero cargue un archivo")
-            return
-        self.ensamblador.analizar_sintaxis()
-        self.ensamblador.generar_codificacion()
-        messagebox.showinfo("Listo", "Análisis completado")
-
     def mostrar_analisis(self):
         if not self.ventana_analisis or not self.ventana_analisis.winfo_exists():
             self.ventana_analisis = VentanaAnalisis(self.ensamblador)
@@ -1652,38 +2986,14 @@ class VentanaPrincipal:
             messagebox.showwarning("Advertencia", "No hay datos")
             return
         
-        ruta = filedialog.asksaveasfilename(defaultextension=".txt", filetypes=[("TXT", "*.txt")])
+        ruta = filedialog.asksaveasfilename(defaultextension=".txt", filetypes=[
+            ("TXT", "*.txt"), ("Listado", "*.lst"), ("Intel HEX", "*.hex"), ("CSV", "*.csv"), ("JSON Lines", "*.jsonl")])
         if not ruta:
             return
         
+        from escritores import exportar
         try:
-            with open(ruta, 'w', encoding='utf-8') as f:
-                f.write("=" * 100 + "\n")
-                f.write("ENSAMBLADOR 8086 - RESULTADOS\n")
-                f.write("=" * 100 + "\n\n")
-
-                f.write("TOKENS\n" + "-" * 80 + "\n")
-                for i, t in enumerate(self.ensamblador.tokens, 1):
-                    f.write(f"{i:4}. {t.valor:<25} -> {t.tipo.value}\n")
-
-                if self.ensamblador.lineas_analizadas:
-                    f.write("\n" + "=" * 80 + "\nANÁLISIS SINTÁCTICO\n" + "-" * 80 + "\n")
-                    for a in self.ensamblador.lineas_analizadas:
-                        f.write(f"Línea {a['numero']}: {a['resultado']}\n  {a['linea']}\n  -> {a['mensaje']}\n\n")
-
-                if self.ensamblador.tabla_simbolos:
-                    f.write("\n" + "=" * 80 + "\nTABLA DE SÍMBOLOS\n" + "-" * 80 + "\n")
-                    f.write(f"{'Símbolo':<20} {'Tipo':<12} {'Valor':<20} {'Tam':<8} {'Dir':<10}\n")
-                    for s in self.ensamblador.tabla_simbolos.values():
-                        dir_str = s.direccion if s.direccion else '----'
-                        f.write(f"{s.nombre:<20} {s.tipo:<12} {s.valor:<20} {s.tamanio:<8} {dir_str:<10}\n")
-
-                if self.ensamblador.lineas_codificadas:
-                    f.write("\n" + "=" * 80 + "\nCÓDIGO CON DIRECCIONES\n" + "-" * 80 + "\n")
-                    f.write(f"{'Dir':<8} {'Código Fuente':<50} {'Estado/Código':<25}\n")
-                    for lc in self.ensamblador.lineas_codificadas:
-                        f.write(f"{lc['direccion']:<8} {lc['linea']:<50} {lc['codigo_maquina']:<25}\n")
-
+            exportar(self.ensamblador, ruta)
             messagebox.showinfo("Listo", "Exportado correctamente")
         except Exception as e:
             messagebox.showerror("Error", f"No se pudo exportar: {e}")
@@ -1808,10 +3118,10 @@ class VentanaAnalisis(tk.Toplevel):
         if self.ensamblador.tabla_simbolos:
             self.texto_simbolos.insert(tk.END, f"{'Símbolo':<20} {'Tipo':<15} {'Valor':<25} {'Tamaño':<10} {'Dirección':<10}\n")
             self.texto_simbolos.insert(tk.END, "=" * 90 + "\n")
-            for s in self.ensamblador.tabla_simbolos.values():
+            for s in self.ensamblador.simbolos_listado():
                 dir_str = s.direccion if s.direccion else '----'
                 valor_str = s.valor[:22] + '...' if len(s.valor) > 25 else s.valor
-                self.texto_simbolos.insert(tk.END, f"{s.nombre:<20} {s.tipo:<15} {valor_str:<25} {s.tamanio:<10} {dir_str:<10}\n")
+                self.texto_simbolos.insert(tk.END, f"{s.nombre_calificado:<20} {s.tipo:<15} {valor_str:<25} {s.tamanio:<10} {dir_str:<10}\n")
         else:
             self.texto_simbolos.insert(tk.END, "Realice el análisis primero.\n")
 
@@ -1931,16 +3241,172 @@ class VentanaCodificacion(tk.Toplevel):
         if self.ensamblador.tabla_simbolos:
             self.texto_simbolos.insert(tk.END, f"{'Símbolo':<20} {'Tipo':<15} {'Valor':<25} {'Tamaño':<10} {'Dirección':<10}\n")
             self.texto_simbolos.insert(tk.END, "=" * 90 + "\n")
-            for s in self.ensamblador.tabla_simbolos.values():
+            for s in self.ensamblador.simbolos_listado():
                 dir_str = s.direccion if s.direccion else '----'
                 valor_str = s.valor[:22] + '...' if len(s.valor) > 25 else s.valor
-                self.texto_simbolos.insert(tk.END, f"{s.nombre:<20} {s.tipo:<15} {valor_str:<25} {s.tamanio:<10} {dir_str:<10}\n")
+                self.texto_simbolos.insert(tk.END, f"{s.nombre_calificado:<20} {s.tipo:<15} {valor_str:<25} {s.tamanio:<10} {dir_str:<10}\n")
         else:
             self.texto_simbolos.insert(tk.END, "Realice el análisis primero.\n")
 
 
-if __name__ == "__main__":
-    root = tk.Tk()
+# =========================================================================
+# LÍNEA DE COMANDOS
+# =========================================================================
+
+def _ensamblador_desde_args(args) -> 'Ensamblador8086':
+    """Ensamblador con los límites, bases y definiciones de la línea de comandos (ValueError si no son válidos)"""
     ensamblador = Ensamblador8086()
-    app = VentanaPrincipal(root, ensamblador)
-    root.mainloop()
\ No newline at end of file
+    ensamblador.limites = LimitesAnalisis(
+        max_longitud_linea=args.max_longitud, max_tokens_linea=args.max_tokens,
+        max_errores=args.max_errores, umbral_lento=args.umbral_lento / 1000 if args.umbral_lento else None)
+    bases = (['CODE=100h'] if args.com else []) + args.base
+    ensamblador.disposicion = DisposicionSegmentos.desde_texto(bases)
+    for definicion in args.definiciones:
+        nombre, _, valor = definicion.partition('=')
+        ensamblador.definir(nombre, leer_direccion(valor) if valor else 1)
+    return ensamblador
+
+
+def _escribir_salidas(args, ensamblador: 'Ensamblador8086'):
+    """Binario, objeto y exportaciones pedidos con -o, --obj, --hex, --lst, --csv y --jsonl"""
+    if args.salida:
+        with open(args.salida, 'wb') as f:
+            ensamblador.escribir_segmento(f, 'CODE')
+    if args.obj:
+        from objeto import escribir_objeto
+        escribir_objeto(ensamblador, args.obj)
+    for formato in ('hex', 'lst', 'csv', 'jsonl'):
+        ruta = getattr(args, formato)
+        if ruta:
+            from escritores import exportar
+            exportar(ensamblador, ruta, '.' + formato)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Sin archivo abre la interfaz gráfica. Con archivo ensambla en modo texto:
+        python ensamblador.py programa.asm --base CODE=100h -D DEPURAR -o programa.bin
+    Con --watch reensambla los archivos (o los .asm de los directorios) al guardarlos:
+        python ensamblador.py --watch src/ programa.asm
+    """
+    import argparse
+    import contextlib
+    import sys
+
+    parser = argparse.ArgumentParser(description="Ensamblador 8086")
+    parser.add_argument('archivo', nargs='*', help="Código fuente .asm (sin archivo: interfaz gráfica)")
+    parser.add_argument('--base', action='append', default=[], metavar='SEG=DIR',
+                        help="Dirección base de un segmento, ej. CODE=100h (repetible)")
+    parser.add_argument('--com', action='store_true', help="Atajo para --base CODE=100h")
+    parser.add_argument('-D', dest='definiciones', action='append', default=[], metavar='SIM[=VAL]',
+                        help="Define un símbolo para IF/IFDEF")
+    parser.add_argument('-o', '--salida', help="Escribe la imagen binaria del segmento de código")
+    parser.add_argument('--obj', metavar='RUTA', help="Escribe el módulo objeto (.obj) para el enlazador")
+    parser.add_argument('--hex', metavar='RUTA', help="Escribe el segmento de código en Intel HEX")
+    parser.add_argument('--lst', metavar='RUTA', help="Escribe el listado (.lst)")
+    parser.add_argument('--csv', metavar='RUTA', help="Escribe el análisis sintáctico en CSV")
+    parser.add_argument('--jsonl', metavar='RUTA', help="Escribe el análisis sintáctico en JSON Lines")
+    parser.add_argument('-q', '--silencioso', action='store_true', help="No imprime el listado en la consola")
+    parser.add_argument('--max-errores', type=int, metavar='N', help="Detiene el análisis tras N líneas incorrectas")
+    parser.add_argument('--max-longitud', type=int, metavar='N',
+                        help="Rechaza sin tokenizar las líneas de más de N caracteres")
+    parser.add_argument('--max-tokens', type=int, metavar='N',
+                        help="Rechaza sin validar las líneas de más de N elementos")
+    parser.add_argument('--umbral-lento', type=float, metavar='MS',
+                        help="Advierte de las líneas cuyo análisis tarda más de MS milisegundos")
+    parser.add_argument('--perfil', action='store_true',
+                        help="Imprime tiempo y llamadas por fase y función auxiliar")
+    parser.add_argument('--traza', metavar='RUTA', help="Escribe una traza en formato Chrome (chrome://tracing)")
+    parser.add_argument('--perfil-memoria', '--mem-profile', action='store_true',
+                        help="Imprime la memoria por fase (tracemalloc) y la de cada estructura")
+    parser.add_argument('--watch', action='store_true',
+                        help="Vigila los archivos y sus INCLUDE y reensambla al guardar (archivos o directorios)")
+    parser.add_argument('--sondeo', action='store_true',
+                        help="Con --watch, revisa con stat periódico aunque haya inotify")
+    args = parser.parse_args(argv)
+
+    if not args.archivo:
+        if args.watch:
+            parser.error("--watch necesita archivos o directorios")
+        root = tk.Tk()
+        VentanaPrincipal(root, Ensamblador8086())
+        root.mainloop()
+        return 0
+    salidas = [args.salida, args.obj, args.hex, args.lst, args.csv, args.jsonl]
+    if len(args.archivo) > 1 and (not args.watch or any(salidas)):
+        parser.error("solo se ensambla un archivo a la vez (varios archivos: --watch sin archivos de salida)")
+
+    try:
+        ensamblador = _ensamblador_desde_args(args)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.watch:
+        from vigilancia import vigilar
+
+        def construir(ruta: str) -> Optional[Ensamblador8086]:
+            ensamblador = _ensamblador_desde_args(args)
+            if not ensamblador.cargar_archivo(ruta):
+                return None
+            ensamblador.analizar_sintaxis()
+            ensamblador.generar_codificacion()
+            _escribir_salidas(args, ensamblador)
+            return ensamblador
+
+        return vigilar(args.archivo, construir, sondeo=args.sondeo)
+    archivo = args.archivo[0]
+
+    if args.perfil or args.traza or args.perfil_memoria:
+        # preprocesar() importa el preprocesador en su primera llamada: se importa
+        # antes de medir para no atribuir la importación a cargar_archivo
+        import preprocesador  # noqa: F401
+    perfil = None
+    if args.perfil or args.traza:
+        from instrumentacion import Instrumentacion
+        perfil = Instrumentacion(ensamblador, traza=bool(args.traza))
+        perfil.activar()
+    memoria = None
+    if args.perfil_memoria:
+        from instrumentacion import PerfilMemoria
+        memoria = PerfilMemoria(ensamblador)
+        memoria.iniciar()
+
+    def fase(nombre: str):
+        return memoria.fase(nombre) if memoria is not None else contextlib.nullcontext()
+
+    # La instrumentación reemplaza 're' en todo el módulo: se restaura aunque la carga falle
+    try:
+        with fase('cargar_archivo'):
+            cargado = ensamblador.cargar_archivo(archivo)
+        if not cargado:
+            print(f"No se pudo cargar '{archivo}'", file=sys.stderr)
+            return 1
+        with fase('analizar_sintaxis'):
+            ensamblador.analizar_sintaxis()
+        with fase('generar_codificacion'):
+            ensamblador.generar_codificacion()
+    finally:
+        if memoria is not None:
+            memoria.detener()
+        if perfil is not None:
+            perfil.desactivar()
+    if memoria is not None:
+        print(memoria.resumen(), file=sys.stderr)
+    if perfil is not None:
+        if args.perfil:
+            print(perfil.resumen(), file=sys.stderr)
+        if args.traza:
+            perfil.escribir_traza(args.traza)
+    for numero, advertencia in ensamblador.advertencias:
+        print(f"Advertencia: línea {numero}: {advertencia}", file=sys.stderr)
+
+    if not args.silencioso:
+        for lc in ensamblador.lineas_codificadas:
+            print(f"{lc['direccion']:<6} {lc['linea']:<40} {lc['codigo_maquina']}")
+    _escribir_salidas(args, ensamblador)
+
+    return 1 if any(a['resultado'] == 'Incorrecta' for a in ensamblador.lineas_analizadas) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
\ No newline at end of file
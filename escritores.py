@@ -0,0 +1,255 @@
+"""
+Escritores de salida en streaming: Intel HEX, listado .LST estilo MASM,
+CSV / JSON Lines del análisis sintáctico y el reporte de texto de la interfaz.
+
+Todos escriben a través de EscritorLotes, que acumula líneas ya formateadas y
+las vuelca con writelines() cada TAMANO_LOTE líneas: una llamada de E/S por
+lote en lugar de una por línea y memoria acotada por el tamaño del lote, no
+por el del programa. Los archivos se abren con un búfer grande (abrir_salida).
+"""
+
+import csv
+import json
+import os
+from typing import Iterable, List, Optional, TextIO
+
+from diagnosticos import como_diagnostico
+from ensamblador import Ensamblador8086
+
+TAMANO_LOTE = 4096
+TAMANO_BUFER = 1 << 20
+BYTES_POR_REGISTRO_HEX = 16
+BYTES_POR_LINEA_LST = 6
+COLUMNAS_ANALISIS = ('numero', 'origen', 'resultado', 'codigo', 'severidad', 'mensaje', 'linea', 'ambito')
+
+
+def abrir_salida(ruta: str) -> TextIO:
+    return open(ruta, 'w', encoding='utf-8', newline='', buffering=TAMANO_BUFER)
+
+
+class EscritorLotes:
+    """Acumula texto y lo vuelca al archivo en lotes. También sirve de destino para csv.writer."""
+
+    def __init__(self, archivo: TextIO, lote: int = TAMANO_LOTE):
+        self.archivo = archivo
+        self.lote = lote
+        self.pendientes: List[str] = []
+        self.lineas = 0
+
+    def write(self, texto: str):
+        self.pendientes.append(texto)
+        if len(self.pendientes) >= self.lote:
+            self.vaciar()
+
+    def escribir(self, lineas: Iterable[str]):
+        for linea in lineas:
+            self.write(linea)
+
+    def vaciar(self):
+        if self.pendientes:
+            self.archivo.writelines(self.pendientes)
+            self.lineas += len(self.pendientes)
+            self.pendientes.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.vaciar()
+
+
+# =========================================================================
+# INTEL HEX
+# =========================================================================
+
+def registro_hex(direccion: int, tipo: int, datos: bytes = b'') -> str:
+    cuerpo = bytes((len(datos), direccion >> 8 & 0xFF, direccion & 0xFF, tipo)) + datos
+    return f":{cuerpo.hex().upper()}{-sum(cuerpo) & 0xFF:02X}\n"
+
+
+class _SalidaHex:
+    """Archivo binario falso: convierte lo que recibe en registros de datos Intel HEX."""
+
+    def __init__(self, escritor: EscritorLotes, direccion: int, por_registro: int):
+        self.escritor = escritor
+        self.direccion = direccion
+        self.por_registro = por_registro
+        self.pendiente = bytearray()
+        self.superior = 0
+
+    def write(self, datos: bytes):
+        self.pendiente += datos
+        if len(self.pendiente) >= self.por_registro:
+            completos = len(self.pendiente) - len(self.pendiente) % self.por_registro
+            vista = memoryview(self.pendiente)
+            for inicio in range(0, completos, self.por_registro):
+                self.emitir(bytes(vista[inicio:inicio + self.por_registro]))
+            vista.release()
+            del self.pendiente[:completos]
+
+    def emitir(self, datos: bytes):
+        # Más allá de 64K: registro 04 (dirección lineal extendida); ningún registro cruza el límite
+        while datos:
+            if self.direccion >> 16 != self.superior:
+                self.superior = self.direccion >> 16
+                self.escritor.write(registro_hex(0, 0x04, self.superior.to_bytes(2, 'big')))
+            cabe = 0x10000 - (self.direccion & 0xFFFF)
+            self.escritor.write(registro_hex(self.direccion & 0xFFFF, 0x00, datos[:cabe]))
+            self.direccion += len(datos[:cabe])
+            datos = datos[cabe:]
+
+    def cerrar(self):
+        if self.pendiente:
+            self.emitir(bytes(self.pendiente))
+            self.pendiente.clear()
+
+
+def escribir_hex(ensamblador: Ensamblador8086, archivo: TextIO, segmento: str = 'CODE',
+                 por_registro: int = BYTES_POR_REGISTRO_HEX) -> int:
+    """Escribe la imagen de un segmento en Intel HEX (registros 00, 04 y 01). Retorna los bytes escritos."""
+    origen = 0
+    for lc in ensamblador.lineas_codificadas:
+        if lc['segmento'] == segmento and lc['tamano'] > 0:
+            origen = int(lc['direccion'], 16)
+            break
+    with EscritorLotes(archivo) as escritor:
+        salida = _SalidaHex(escritor, origen, por_registro)
+        _, escritos = ensamblador.escribir_segmento(salida, segmento)
+        salida.cerrar()
+        escritor.write(registro_hex(0, 0x01))
+    return escritos
+
+
+# =========================================================================
+# LISTADO .LST
+# =========================================================================
+
+def _bytes_listado(lc: dict) -> List[str]:
+    """Bytes de una línea codificada como palabras hex; los DUP como 'nnnn[pp]'."""
+    if lc['segmento'] == 'CODE':
+        _, _, codigo = lc['codigo_maquina'].partition('|')
+        return codigo.split()
+    palabras = []
+    for reg in lc.get('datos') or ():
+        if isinstance(reg, (bytes, bytearray)):
+            palabras.extend(f"{b:02X}" for b in reg)
+        else:
+            palabras.append(f"{reg.cantidad:04X}[{reg.patron.hex().upper()}]")
+    return palabras
+
+
+def lineas_listado(ensamblador: Ensamblador8086) -> Iterable[str]:
+    """Genera el listado línea por línea: dirección, bytes y fuente; errores debajo de su línea."""
+    errores = {a['numero']: a['mensaje'] for a in ensamblador.lineas_analizadas
+               if a['resultado'] == 'Incorrecta'}
+    ancho = BYTES_POR_LINEA_LST * 3
+    yield "Ensamblador 8086 - Listado\n\n"
+
+    for lc in ensamblador.lineas_codificadas:
+        palabras = _bytes_listado(lc)
+        primeras = ' '.join(palabras[:BYTES_POR_LINEA_LST])
+        direccion = lc['direccion'] if lc['tamano'] or palabras else '    '
+        yield f"{lc['numero']:6}  {direccion}  {primeras:<{ancho}}  {lc['linea']}\n"
+        for inicio in range(BYTES_POR_LINEA_LST, len(palabras), BYTES_POR_LINEA_LST):
+            yield f"{'':6}  {'':4}  {' '.join(palabras[inicio:inicio + BYTES_POR_LINEA_LST])}\n"
+        if lc['numero'] in errores:
+            yield f"{'':6}  **Error** {errores[lc['numero']]}\n"
+
+    yield f"\nSímbolos:\n\n{'Nombre':<24} {'Tipo':<14} {'Dir':<6} Valor\n"
+    for s in ensamblador.simbolos_listado():
+        yield f"{s.nombre_calificado:<24} {s.tipo:<14} {s.direccion or '----':<6} {s.valor}\n"
+
+    total = len(errores)
+    yield f"\n{total} error{'es' if total != 1 else ''}\n"
+
+
+def escribir_lst(ensamblador: Ensamblador8086, archivo: TextIO) -> int:
+    with EscritorLotes(archivo) as escritor:
+        escritor.escribir(lineas_listado(ensamblador))
+    return escritor.lineas
+
+
+# =========================================================================
+# ANÁLISIS SINTÁCTICO: CSV Y JSON LINES
+# =========================================================================
+
+def fila_analisis(analisis: dict) -> dict:
+    """Columnas de una línea analizada; el mensaje se formatea aquí, al exportar."""
+    diag = como_diagnostico(analisis['resultado'], analisis['mensaje'])
+    derivadas = {'codigo': int(diag.codigo), 'severidad': diag.severidad.name.lower(), 'mensaje': diag.texto}
+    return {columna: derivadas[columna] if columna in derivadas else analisis[columna]
+            for columna in COLUMNAS_ANALISIS if columna in derivadas or columna in analisis}
+
+
+def escribir_csv(ensamblador: Ensamblador8086, archivo: TextIO) -> int:
+    with EscritorLotes(archivo) as escritor:
+        salida = csv.writer(escritor)
+        salida.writerow(COLUMNAS_ANALISIS)
+        for a in ensamblador.lineas_analizadas:
+            fila = fila_analisis(a)
+            salida.writerow([fila.get(columna, '') for columna in COLUMNAS_ANALISIS])
+    return len(ensamblador.lineas_analizadas)
+
+
+def escribir_jsonl(ensamblador: Ensamblador8086, archivo: TextIO) -> int:
+    codificar = json.JSONEncoder(ensure_ascii=False).encode
+    with EscritorLotes(archivo) as escritor:
+        for a in ensamblador.lineas_analizadas:
+            escritor.write(codificar(fila_analisis(a)) + '\n')
+    return len(ensamblador.lineas_analizadas)
+
+
+# =========================================================================
+# REPORTE DE TEXTO (TOKENS, ANÁLISIS, SÍMBOLOS Y CÓDIGO)
+# =========================================================================
+
+def lineas_reporte(ensamblador: Ensamblador8086) -> Iterable[str]:
+    yield "=" * 100 + "\n"
+    yield "ENSAMBLADOR 8086 - RESULTADOS\n"
+    yield "=" * 100 + "\n\n"
+
+    yield "TOKENS\n" + "-" * 80 + "\n"
+    for i, t in enumerate(ensamblador.tokens, 1):
+        yield f"{i:4}. {t.valor:<25} -> {t.tipo.value}\n"
+
+    if ensamblador.lineas_analizadas:
+        yield "\n" + "=" * 80 + "\nANÁLISIS SINTÁCTICO\n" + "-" * 80 + "\n"
+        for a in ensamblador.lineas_analizadas:
+            yield f"Línea {a['numero']}: {a['resultado']}\n  {a['linea']}\n  -> {a['mensaje']}\n\n"
+
+    if ensamblador.tabla_simbolos:
+        yield "\n" + "=" * 80 + "\nTABLA DE SÍMBOLOS\n" + "-" * 80 + "\n"
+        yield f"{'Símbolo':<20} {'Tipo':<12} {'Valor':<20} {'Tam':<8} {'Dir':<10}\n"
+        for s in ensamblador.simbolos_listado():
+            dir_str = s.direccion if s.direccion else '----'
+            yield f"{s.nombre_calificado:<20} {s.tipo:<12} {s.valor:<20} {s.tamanio:<8} {dir_str:<10}\n"
+
+    if ensamblador.lineas_codificadas:
+        yield "\n" + "=" * 80 + "\nCÓDIGO CON DIRECCIONES\n" + "-" * 80 + "\n"
+        yield f"{'Dir':<8} {'Código Fuente':<50} {'Estado/Código':<25}\n"
+        for lc in ensamblador.lineas_codificadas:
+            yield f"{lc['direccion']:<8} {lc['linea']:<50} {lc['codigo_maquina']:<25}\n"
+
+
+def escribir_reporte(ensamblador: Ensamblador8086, archivo: TextIO) -> int:
+    with EscritorLotes(archivo) as escritor:
+        escritor.escribir(lineas_reporte(ensamblador))
+    return escritor.lineas
+
+
+ESCRITORES = {
+    '.txt': escribir_reporte,
+    '.hex': escribir_hex,
+    '.lst': escribir_lst,
+    '.csv': escribir_csv,
+    '.jsonl': escribir_jsonl,
+}
+
+
+def exportar(ensamblador: Ensamblador8086, ruta: str, formato: Optional[str] = None) -> int:
+    """Escribe 'ruta' con el escritor de su extensión (o de 'formato', ej. '.lst')."""
+    formato = (formato or os.path.splitext(ruta)[1]).lower()
+    if formato not in ESCRITORES:
+        raise ValueError(f"Formato de exportación desconocido: '{formato}'")
+    with abrir_salida(ruta) as archivo:
+        return ESCRITORES[formato](ensamblador, archivo)
@@ -0,0 +1,169 @@
+"""
+Evaluador de expresiones constantes para EQU, operandos inmediatos y OFFSET.
+
+Gramática (precedencia de menor a mayor):
+    expr    := termino (('+' | '-') termino)*
+    termino := factor (('*' | '/' | MOD) factor)*
+    factor  := ('+' | '-') factor | '(' expr ')' | OFFSET nombre | numero | caracter | nombre
+
+Los números usan los mismos formatos que el tokenizador: decimal (sufijo D
+opcional), hexadecimal que inicia con 0 y termina en H, binario con sufijo B.
+El texto se analiza una sola vez (caché por texto) y el árbol resultante se
+evalúa con funciones que resuelven los símbolos.
+"""
+
+import re
+from functools import lru_cache
+from typing import Callable, List, Tuple
+
+
+class ErrorExpresion(ValueError):
+    """Expresión mal formada, símbolo no resoluble o referencia circular."""
+
+
+_PATRON_ELEMENTO = re.compile(r"""
+    \s*(?:
+        (?P<bin>[01]+[Bb])(?![0-9A-Za-z_])
+      | (?P<hex>0[0-9A-Fa-f]*[Hh])(?![0-9A-Za-z_])
+      | (?P<dec>\d+[Dd]?)(?![0-9A-Za-z_])
+      | (?P<car>'[^']'|"[^"]")
+      | (?P<nombre>[A-Za-z_@.][A-Za-z0-9_]*)
+      | (?P<op>[-+*/()])
+    )""", re.VERBOSE)
+
+# El análisis y la evaluación son recursivos: se limita el tamaño para que una
+# entrada patológica falle con ErrorExpresion y no agote la pila de Python
+MAX_ELEMENTOS = 256
+
+# Nodos del árbol: ('num', valor) ('sim', nombre) ('offset', nombre)
+#                  ('neg', nodo) ('bin', operador, izq, der)
+Nodo = Tuple
+
+
+def _separar(texto: str) -> List[Tuple[str, str]]:
+    elementos = []
+    pos = 0
+    texto = texto.rstrip()
+    while pos < len(texto):
+        m = _PATRON_ELEMENTO.match(texto, pos)
+        if not m or m.end() == pos:
+            raise ErrorExpresion(f"Elemento inválido en expresión: '{texto[pos:].strip()}'")
+        tipo = m.lastgroup
+        valor = m.group(tipo)
+        if tipo == 'nombre' and valor.upper() in ('OFFSET', 'MOD'):
+            tipo = valor.upper()
+        elementos.append((tipo, valor))
+        pos = m.end()
+    return elementos
+
+
+class _Analizador:
+    def __init__(self, elementos: List[Tuple[str, str]]):
+        self.elementos = elementos
+        self.pos = 0
+
+    def actual(self) -> Tuple[str, str]:
+        return self.elementos[self.pos] if self.pos < len(self.elementos) else ('fin', '')
+
+    def consumir(self) -> Tuple[str, str]:
+        elem = self.actual()
+        self.pos += 1
+        return elem
+
+    def expr(self) -> Nodo:
+        nodo = self.termino()
+        while self.actual() in (('op', '+'), ('op', '-')):
+            op = self.consumir()[1]
+            nodo = ('bin', op, nodo, self.termino())
+        return nodo
+
+    def termino(self) -> Nodo:
+        nodo = self.factor()
+        while self.actual() in (('op', '*'), ('op', '/')) or self.actual()[0] == 'MOD':
+            tipo, valor = self.consumir()
+            nodo = ('bin', 'MOD' if tipo == 'MOD' else valor, nodo, self.factor())
+        return nodo
+
+    def factor(self) -> Nodo:
+        tipo, valor = self.consumir()
+        if tipo == 'op' and valor in '+-':
+            nodo = self.factor()
+            return ('neg', nodo) if valor == '-' else nodo
+        if tipo == 'op' and valor == '(':
+            nodo = self.expr()
+            if self.consumir() != ('op', ')'):
+                raise ErrorExpresion("Falta ')' en expresión")
+            return nodo
+        if tipo == 'OFFSET':
+            tipo_nombre, nombre = self.consumir()
+            if tipo_nombre != 'nombre':
+                raise ErrorExpresion("OFFSET requiere un nombre de variable o etiqueta")
+            return ('offset', nombre)
+        if tipo == 'bin':
+            return ('num', int(valor[:-1], 2))
+        if tipo == 'hex':
+            return ('num', int(valor[:-1], 16))
+        if tipo == 'dec':
+            return ('num', int(valor.rstrip('Dd')))
+        if tipo == 'car':
+            return ('num', ord(valor[1]))
+        if tipo == 'nombre':
+            return ('sim', valor)
+        if tipo == 'fin':
+            raise ErrorExpresion("Expresión incompleta")
+        raise ErrorExpresion(f"Elemento inesperado en expresión: '{valor}'")
+
+
+@lru_cache(maxsize=4096)
+def analizar_expresion(texto: str) -> Nodo:
+    """Analiza el texto y retorna el árbol de la expresión (resultado en caché)."""
+    elementos = _separar(texto)
+    if len(elementos) > MAX_ELEMENTOS:
+        raise ErrorExpresion(f"Expresión demasiado larga ({len(elementos)} elementos; máximo {MAX_ELEMENTOS})")
+    analizador = _Analizador(elementos)
+    nodo = analizador.expr()
+    if analizador.pos != len(analizador.elementos):
+        raise ErrorExpresion(f"Elemento inesperado en expresión: '{analizador.actual()[1]}'")
+    return nodo
+
+
+def es_expresion(texto: str) -> bool:
+    try:
+        analizar_expresion(texto)
+        return True
+    except ErrorExpresion:
+        return False
+
+
+def evaluar_nodo(nodo: Nodo, resolver: Callable[[str], int], offset: Callable[[str], int]) -> int:
+    tipo = nodo[0]
+    if tipo == 'num':
+        return nodo[1]
+    if tipo == 'sim':
+        return resolver(nodo[1])
+    if tipo == 'offset':
+        return offset(nodo[1])
+    if tipo == 'neg':
+        return -evaluar_nodo(nodo[1], resolver, offset)
+
+    _, op, izq, der = nodo
+    a = evaluar_nodo(izq, resolver, offset)
+    b = evaluar_nodo(der, resolver, offset)
+    if op == '+':
+        return a + b
+    if op == '-':
+        return a - b
+    if op == '*':
+        return a * b
+    if b == 0:
+        raise ErrorExpresion("División entre cero en expresión")
+    # MASM trunca hacia cero
+    cociente = abs(a) // abs(b)
+    if (a < 0) != (b < 0):
+        cociente = -cociente
+    return cociente if op == '/' else a - cociente * b
+
+
+def evaluar(texto: str, resolver: Callable[[str], int], offset: Callable[[str], int]) -> int:
+    return evaluar_nodo(analizar_expresion(texto), resolver, offset)
+
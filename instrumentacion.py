@@ -0,0 +1,383 @@
+"""
+Instrumentación opcional del ensamblador: tiempo y llamadas por fase y por
+función auxiliar, invocaciones de expresiones regulares y aciertos de cachés.
+
+La medición se activa por instancia y solo mientras dura el bloque:
+
+    with Instrumentacion(asm, traza=True) as perfil:
+        asm.cargar_archivo(ruta)
+        asm.analizar_sintaxis()
+        asm.generar_codificacion()
+    print(perfil.resumen())
+    perfil.escribir_traza('traza.json')     # chrome://tracing o Perfetto
+
+Al activarse, cada método medido se reemplaza en el __dict__ de la instancia
+por una envoltura (las llamadas internas self.metodo(...) pasan por ella) y el
+módulo 're' del ensamblador por un contador. Al desactivarse se eliminan las
+envolturas y se restaura 're', así que sin instrumentación el costo es nulo:
+el ensamblador no consulta ninguna bandera.
+
+El contador de 're' es global al módulo, no a la instancia: mientras está
+activo cuenta también las expresiones de otras instancias y de otros hilos
+(lo hace bajo un candado). Conviene desactivar en un bloque finally o usar
+'with', para no dejar 're' reemplazado si el trabajo medido falla.
+
+PerfilMemoria toma instantáneas de tracemalloc entre fases (memoria retenida,
+pico y líneas que más asignaron en cada fase) y mide los bytes alcanzables
+desde las estructuras principales del ensamblador.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from enum import Enum
+from types import FunctionType, ModuleType
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from expresiones import analizar_expresion
+
+FASES = ('cargar_archivo', 'preprocesar', 'analizar_sintaxis', 'generar_codificacion')
+AUXILIARES = (
+    'tokens_de_linea', 'tokenizar_linea', 'identificar_tipo_token',
+    'validar_linea', 'validar_segmento_pila', 'validar_segmento_datos', 'validar_segmento_codigo',
+    'calcular_tamano_instruccion', 'codificar_instruccion', 'generar_datos', 'evaluar_expresion',
+)
+FUNCIONES_RE = ('match', 'fullmatch', 'search', 'finditer', 'findall', 'sub', 'split', 'compile')
+PATRONES_EN_RESUMEN = 5
+
+ESTRUCTURAS = ('tokens', 'lineas_codigo', 'lineas_analizadas', 'lineas_codificadas', 'tabla_simbolos')
+SITIOS_EN_RESUMEN = 3
+
+
+@dataclass
+class Medida:
+    nombre: str
+    categoria: str
+    llamadas: int = 0
+    total_ns: int = 0       # Incluye el tiempo de las funciones medidas que llama
+    propio_ns: int = 0      # Excluye ese tiempo
+
+
+class _ReContado:
+    """
+    Sustituto del módulo 're' que cuenta las invocaciones por función y por patrón.
+    Lo usa todo el módulo instrumentado, desde cualquier hilo: los contadores se
+    actualizan bajo un candado.
+    """
+
+    def __init__(self, modulo, funciones: Counter, patrones: Counter):
+        self._modulo = modulo
+        candado = threading.Lock()
+        for nombre in FUNCIONES_RE:
+            setattr(self, nombre, self._contar(nombre, getattr(modulo, nombre), funciones, patrones, candado))
+
+    @staticmethod
+    def _contar(nombre, funcion, funciones: Counter, patrones: Counter, candado: threading.Lock):
+        def contada(patron, *args, **kwargs):
+            with candado:
+                funciones[nombre] += 1
+                patrones[getattr(patron, 'pattern', patron)] += 1
+            return funcion(patron, *args, **kwargs)
+        return contada
+
+    def __getattr__(self, nombre):
+        return getattr(self._modulo, nombre)
+
+
+class Instrumentacion:
+    def __init__(self, ensamblador, traza: bool = False,
+                 fases: Tuple[str, ...] = FASES, auxiliares: Tuple[str, ...] = AUXILIARES):
+        self.ensamblador = ensamblador
+        self.traza = traza
+        self.metodos = {nombre: 'fase' for nombre in fases}
+        self.metodos.update((nombre, 'auxiliar') for nombre in auxiliares)
+        self.medidas: Dict[str, Medida] = {}
+        self.regex_funciones: Counter = Counter()
+        self.regex_patrones: Counter = Counter()
+        self.aciertos_tokens = 0
+        self.eventos: List[Tuple[str, str, int, int]] = []     # (nombre, categoría, inicio, duración) en ns
+        self._pila: List[int] = []
+        self._modulo = None
+        self._re_previo = None
+        self._inicio_ns = 0
+        self._expresiones_previas = None
+        self._expresiones_finales = None
+        self.activa = False
+
+    # =========================================================================
+    # ACTIVACIÓN
+    # =========================================================================
+
+    def activar(self):
+        if self.activa:
+            return
+        asm = self.ensamblador
+        for nombre, categoria in self.metodos.items():
+            metodo = getattr(asm, nombre)
+            if nombre == 'tokens_de_linea':
+                metodo = self._contar_aciertos(metodo)
+            asm.__dict__[nombre] = self._envolver(nombre, categoria, metodo)
+
+        # El módulo real de la clase (puede ser __main__ si se ejecuta ensamblador.py)
+        # Reemplaza 're' para todo el módulo; se guarda el anterior por si otra
+        # instrumentación ya lo había reemplazado
+        self._modulo = sys.modules[type(asm).__module__]
+        self._re_previo = self._modulo.re
+        self._modulo.re = _ReContado(self._re_previo, self.regex_funciones, self.regex_patrones)
+        self._expresiones_previas = analizar_expresion.cache_info()
+        self._expresiones_finales = None
+        self._inicio_ns = time.perf_counter_ns()
+        self.activa = True
+
+    def desactivar(self):
+        if not self.activa:
+            return
+        for nombre in self.metodos:
+            self.ensamblador.__dict__.pop(nombre, None)
+        self._modulo.re = self._re_previo
+        self._expresiones_finales = analizar_expresion.cache_info()
+        self.activa = False
+
+    def __enter__(self) -> 'Instrumentacion':
+        self.activar()
+        return self
+
+    def __exit__(self, *exc):
+        self.desactivar()
+
+    def _envolver(self, nombre: str, categoria: str, funcion):
+        medida = self.medidas.setdefault(nombre, Medida(nombre, categoria))
+        pila = self._pila
+        eventos = self.eventos if self.traza else None
+        reloj = time.perf_counter_ns
+
+        def envuelta(*args, **kwargs):
+            pila.append(0)
+            inicio = reloj()
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                duracion = reloj() - inicio
+                hijos = pila.pop()
+                if pila:
+                    pila[-1] += duracion
+                medida.llamadas += 1
+                medida.total_ns += duracion
+                medida.propio_ns += duracion - hijos
+                if eventos is not None:
+                    eventos.append((nombre, categoria, inicio, duracion))
+        return envuelta
+
+    def _contar_aciertos(self, funcion):
+        """tokens_de_linea acierta cuando resuelve la línea sin llamar a tokenizar_linea"""
+        def contada(*args, **kwargs):
+            tokenizar = self.medidas.get('tokenizar_linea')
+            previas = tokenizar.llamadas if tokenizar else 0
+            resultado = funcion(*args, **kwargs)
+            if (tokenizar.llamadas if tokenizar else 0) == previas:
+                self.aciertos_tokens += 1
+            return resultado
+        return contada
+
+    # =========================================================================
+    # RESULTADOS
+    # =========================================================================
+
+    def caches(self) -> Dict[str, Tuple[int, int]]:
+        """Caché -> (aciertos, fallos) acumulados mientras la instrumentación estuvo activa"""
+        resultado = {}
+        consultas = self.medidas.get('tokens_de_linea')
+        if consultas is not None:
+            resultado['tokens'] = (self.aciertos_tokens, consultas.llamadas - self.aciertos_tokens)
+        if self._expresiones_previas is not None:
+            actual, previa = self._expresiones_finales or analizar_expresion.cache_info(), self._expresiones_previas
+            resultado['expresiones'] = (actual.hits - previa.hits, actual.misses - previa.misses)
+        macros = self.ensamblador.procesador_macros
+        if macros is not None:
+            resultado['macros'] = (macros.aciertos_cache, len(macros._cache))
+        return resultado
+
+    def como_dict(self) -> dict:
+        return {
+            'funciones': {m.nombre: {'categoria': m.categoria, 'llamadas': m.llamadas,
+                                     'total_ms': m.total_ns / 1e6, 'propio_ms': m.propio_ns / 1e6}
+                          for m in self.medidas.values() if m.llamadas},
+            'regex': dict(self.regex_funciones),
+            'regex_patrones': dict(self.regex_patrones.most_common()),
+            'caches': {nombre: {'aciertos': a, 'fallos': f} for nombre, (a, f) in self.caches().items()},
+        }
+
+    def resumen(self) -> str:
+        lineas = [f"{'Función':<28} {'Tipo':<9} {'Llamadas':>10} {'Total ms':>10} {'Propio ms':>10} {'µs/llamada':>11}"]
+        orden = sorted((m for m in self.medidas.values() if m.llamadas),
+                       key=lambda m: (m.categoria != 'fase', -m.propio_ns))
+        for m in orden:
+            lineas.append(f"{m.nombre:<28} {m.categoria:<9} {m.llamadas:>10} {m.total_ns / 1e6:>10.2f} "
+                          f"{m.propio_ns / 1e6:>10.2f} {m.total_ns / m.llamadas / 1e3:>11.2f}")
+
+        total_re = sum(self.regex_funciones.values())
+        detalle = ', '.join(f"{nombre} {n}" for nombre, n in self.regex_funciones.most_common())
+        lineas.append("")
+        lineas.append(f"Expresiones regulares: {total_re} invocaciones"
+                      f"{f' ({detalle})' if detalle else ''}, {len(self.regex_patrones)} patrones distintos")
+        for patron, n in self.regex_patrones.most_common(PATRONES_EN_RESUMEN):
+            lineas.append(f"  {n:>10}  {patron}")
+
+        lineas.append("")
+        for nombre, (aciertos, fallos) in self.caches().items():
+            consultas = aciertos + fallos
+            tasa = f"{aciertos / consultas:.1%}" if consultas else "-"
+            lineas.append(f"Caché de {nombre}: {aciertos} aciertos, {fallos} fallos ({tasa})")
+        return '\n'.join(lineas)
+
+    def traza_chrome(self) -> dict:
+        """Eventos completos ('X') en el formato Trace Event de Chrome; tiempos en µs"""
+        pid, tid = os.getpid(), threading.get_ident()
+        eventos = [{'name': nombre, 'cat': categoria, 'ph': 'X', 'pid': pid, 'tid': tid,
+                    'ts': (inicio - self._inicio_ns) / 1e3, 'dur': duracion / 1e3}
+                   for nombre, categoria, inicio, duracion in self.eventos]
+        return {'traceEvents': eventos, 'displayTimeUnit': 'ms', 'otherData': self.como_dict()}
+
+    def escribir_traza(self, ruta: str):
+        if not self.traza:
+            raise ValueError("La instrumentación no registró eventos (use traza=True)")
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(self.traza_chrome(), f, ensure_ascii=False)
+
+
+def perfilar(ensamblador, ruta: str, traza: bool = False) -> Optional[Instrumentacion]:
+    """Carga, analiza y codifica 'ruta' con la instrumentación activa; None si no se pudo cargar"""
+    with Instrumentacion(ensamblador, traza) as perfil:
+        if not ensamblador.cargar_archivo(ruta):
+            return None
+        ensamblador.analizar_sintaxis()
+        ensamblador.generar_codificacion()
+    return perfil
+
+
+# =========================================================================
+# MEMORIA
+# =========================================================================
+
+# Objetos compartidos por todo el programa: no se atribuyen a ninguna estructura
+_COMPARTIDOS = (type, ModuleType, FunctionType, Enum)
+
+
+def tamano_profundo(objeto) -> int:
+    """Bytes de 'objeto' y de todo lo alcanzable desde él (cada objeto se cuenta una vez)"""
+    vistos = set()
+    pendientes = [objeto]
+    total = 0
+    while pendientes:
+        actual = pendientes.pop()
+        if id(actual) in vistos or actual is None or isinstance(actual, _COMPARTIDOS):
+            continue
+        vistos.add(id(actual))
+        total += sys.getsizeof(actual)
+        if isinstance(actual, dict):
+            pendientes.extend(actual.keys())
+            pendientes.extend(actual.values())
+        elif isinstance(actual, (list, tuple, set, frozenset)):
+            pendientes.extend(actual)
+        elif isinstance(actual, (str, bytes, bytearray, int, float)):
+            continue
+        if hasattr(actual, '__dict__'):
+            pendientes.append(actual.__dict__)
+        for atributo in getattr(type(actual), '__slots__', ()):
+            pendientes.append(getattr(actual, atributo, None))
+    return total
+
+
+@dataclass
+class MedidaFase:
+    fase: str
+    retenido: int           # Variación de la memoria asignada al terminar la fase
+    pico: int               # Máximo asignado durante la fase
+    sitios: List[Tuple[str, int]] = field(default_factory=list)     # (archivo:línea, bytes)
+
+
+class PerfilMemoria:
+    """
+    Memoria por fase con tracemalloc:
+
+        memoria = PerfilMemoria(asm)
+        with memoria:
+            with memoria.fase('analizar_sintaxis'):
+                asm.analizar_sintaxis()
+        print(memoria.resumen())
+    """
+
+    def __init__(self, ensamblador, marcos: int = 1, sitios: int = SITIOS_EN_RESUMEN):
+        """sitios: líneas que más asignaron a reportar por fase (0 evita las instantáneas, que son costosas)"""
+        self.ensamblador = ensamblador
+        self.marcos = marcos
+        self.sitios = sitios
+        self.fases: List[MedidaFase] = []
+        self.estructuras: Dict[str, int] = {}
+        self._iniciado = False
+
+    def iniciar(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.marcos)
+            self._iniciado = True
+
+    def detener(self):
+        self.estructuras = self.medir_estructuras()
+        if self._iniciado:
+            tracemalloc.stop()
+            self._iniciado = False
+
+    def __enter__(self) -> 'PerfilMemoria':
+        self.iniciar()
+        return self
+
+    def __exit__(self, *exc):
+        self.detener()
+
+    @contextmanager
+    def fase(self, nombre: str) -> Iterator[None]:
+        antes = tracemalloc.take_snapshot() if self.sitios else None
+        inicial, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            actual, pico = tracemalloc.get_traced_memory()
+            sitios = []
+            if antes is not None:
+                diferencias = tracemalloc.take_snapshot().compare_to(antes, 'lineno')
+                sitios = [(f"{d.traceback[0].filename}:{d.traceback[0].lineno}", d.size_diff)
+                          for d in diferencias[:self.sitios] if d.size_diff > 0]
+            self.fases.append(MedidaFase(nombre, actual - inicial, pico - inicial, sitios))
+
+    def medir_estructuras(self) -> Dict[str, int]:
+        asm = self.ensamblador
+        medidas = {nombre: tamano_profundo(getattr(asm, nombre)) for nombre in ESTRUCTURAS}
+        # Los ámbitos de procedimiento cuelgan del global por 'padre'; se cuentan con la tabla
+        medidas['tabla_simbolos'] = tamano_profundo((asm.tabla_simbolos, getattr(asm, 'ambitos', {})))
+        return medidas
+
+    def como_dict(self) -> dict:
+        return {
+            'fases': {m.fase: {'retenido': m.retenido, 'pico': m.pico, 'sitios': dict(m.sitios)}
+                      for m in self.fases},
+            'estructuras': self.estructuras or self.medir_estructuras(),
+        }
+
+    def resumen(self) -> str:
+        lineas = [f"{'Fase':<24} {'Retenido KiB':>13} {'Pico KiB':>10}"]
+        for m in self.fases:
+            lineas.append(f"{m.fase:<24} {m.retenido / 1024:>13.1f} {m.pico / 1024:>10.1f}")
+            for sitio, bytes_ in m.sitios:
+                lineas.append(f"    {bytes_ / 1024:>10.1f} KiB  {sitio}")
+        lineas.append("")
+        lineas.append(f"{'Estructura':<24} {'KiB':>13}")
+        for nombre, bytes_ in (self.estructuras or self.medir_estructuras()).items():
+            lineas.append(f"{nombre:<24} {bytes_ / 1024:>13.1f}")
+        return '\n'.join(lineas)
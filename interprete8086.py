@@ -0,0 +1,627 @@
+"""
+Intérprete 8086 para ejecutar la salida del ensamblador sin un emulador externo.
+
+Soporta exactamente el conjunto de instrucciones que codifica Ensamblador8086:
+CMC, CMPSB, NOP, POPA, AAD, AAM, MUL, INC, IDIV, INT, AND, LEA, OR, XOR
+y los saltos JNAE/JC, JNE, JNLE, JA y LOOPE.
+
+Cada instrucción se decodifica una sola vez: el decodificador genera una
+función (closure) que ejecuta la instrucción y retorna el siguiente IP, y se
+guarda en una caché indexada por IP. El ciclo principal solo busca en la
+caché y llama a la función, sin volver a leer los bytes. Una escritura en
+memoria solo descarta las entradas cuyos bytes caen en el código cargado.
+"""
+
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class ErrorEjecucion(Exception):
+    """Error al ejecutar código: opcode no soportado, división entre cero, etc."""
+
+
+# Índices de las banderas dentro de Interprete8086.banderas
+CF, ZF, SF, OF, PF, AF = range(6)
+
+# Índices de los registros de segmento (mismo orden que regs2_codigo)
+ES, CS, SS, DS = range(4)
+
+# Nombres de registros por código reg (ver Ensamblador8086.reg_codigo)
+REGISTROS_16 = ('AX', 'CX', 'DX', 'BX', 'SP', 'BP', 'SI', 'DI')
+REGISTROS_8 = ('AL', 'CL', 'DL', 'BL', 'AH', 'CH', 'DH', 'BH')
+
+# PF = 1 si el byte bajo del resultado tiene un número par de bits en 1
+PARIDAD = tuple(1 - (bin(i).count('1') & 1) for i in range(256))
+
+# Longitud máxima de una instrucción 8086 sin prefijos (opcode, ModR/M, desp16, inm16)
+MAX_LONGITUD_INSTRUCCION = 6
+
+# Registros base/índice por campo r/m (None = sin registro)
+_RM_BASE = ((3, 6), (3, 7), (5, 6), (5, 7), (6, None), (7, None), (5, None), (3, None))
+
+
+def _leer8(r: List[int], c: int) -> int:
+    return r[c] & 0xFF if c < 4 else r[c - 4] >> 8
+
+
+def _escribir8(r: List[int], c: int, v: int):
+    if c < 4:
+        r[c] = (r[c] & 0xFF00) | v
+    else:
+        r[c - 4] = (r[c - 4] & 0x00FF) | (v << 8)
+
+
+class Interprete8086:
+    def __init__(self, tam_memoria: int = 0x100000):
+        self.memoria = bytearray(tam_memoria)
+        self.regs: List[int] = [0] * 8
+        self.sregs: List[int] = [0] * 4
+        self.banderas: List[int] = [0] * 6
+        self.ip = 0
+        self.detenido = False
+        self.codigo_salida: Optional[int] = None
+        self.salida: List[str] = []
+        self.instrucciones_ejecutadas = 0
+
+        self._cache: Dict[int, Callable[[], int]] = {}
+        self._origen_codigo = 0
+        self._fin_codigo = 0
+
+    # =====================================================================
+    # CARGA DEL PROGRAMA
+    # =====================================================================
+
+    def cargar(self, codigo: bytes, origen: int = 0, datos: bytes = b'', origen_datos: int = 0,
+               cs: int = 0x1000, ds: int = 0x2000, ss: int = 0x3000):
+        """Copia código y datos a memoria e inicializa registros. Invalida la caché."""
+        self.sregs[:] = [ds, cs, ss, ds]
+        base_cs = cs << 4
+        base_ds = ds << 4
+        self.memoria[base_cs + origen:base_cs + origen + len(codigo)] = codigo
+        self.memoria[base_ds + origen_datos:base_ds + origen_datos + len(datos)] = datos
+        self._origen_codigo = origen
+        self._fin_codigo = origen + len(codigo)
+        self._cache.clear()
+        self.reiniciar(origen)
+
+    def _invalidar(self, p: int, n: int):
+        """Descarta las instrucciones decodificadas que incluyen los bytes físicos p..p+n-1"""
+        desplazamiento = p - (self.sregs[CS] << 4)
+        cache = self._cache
+        for ip in range(desplazamiento - MAX_LONGITUD_INSTRUCCION + 1, desplazamiento + n):
+            cache.pop(ip, None)
+
+    def cargar_ensamblador(self, ensamblador) -> int:
+        """
+        Carga el resultado de generar_codificacion() de un Ensamblador8086.
+        El IP inicial es la etiqueta indicada en 'END etiqueta' o el origen del código.
+        """
+        origen, codigo = ensamblador.imagen_segmento('CODE')
+        origen_datos, datos = ensamblador.imagen_segmento('DATA')
+        self.cargar(bytes(codigo), origen, bytes(datos), origen_datos)
+
+        for lc in ensamblador.lineas_codificadas:
+            partes = lc['linea'].split()
+            if len(partes) == 2 and partes[0].upper() == 'END':
+                simbolo = ensamblador.tabla_simbolos.get(partes[1])
+                if simbolo and simbolo.direccion:
+                    self.ip = int(simbolo.direccion, 16)
+        return self.ip
+
+    def reiniciar(self, ip: int):
+        """Reinicia registros y banderas conservando memoria y caché de decodificación."""
+        self.regs[:] = [0] * 8
+        self.regs[4] = 0xFFFE
+        self.banderas[:] = [0] * 6
+        self.ip = ip
+        self.detenido = False
+        self.codigo_salida = None
+        self.salida = []
+        self.instrucciones_ejecutadas = 0
+
+    # =====================================================================
+    # CICLO DE EJECUCIÓN
+    # =====================================================================
+
+    def ejecutar(self, max_instrucciones: int = 10_000_000) -> int:
+        """
+        Ejecuta hasta detenerse (INT 20h, INT 21h/4Ch o fin del código) o hasta
+        max_instrucciones. Retorna el número de instrucciones ejecutadas.
+        """
+        cache_get = self._cache.get
+        cache = self._cache
+        decodificar = self._decodificar
+        ip = self.ip
+        n = 0
+        try:
+            while ip >= 0 and n < max_instrucciones:
+                instr = cache_get(ip)
+                if instr is None:
+                    instr = cache[ip] = decodificar(ip)
+                ip = instr()
+                n += 1
+        finally:
+            if ip >= 0:
+                self.ip = ip
+            self.instrucciones_ejecutadas += n
+        return n
+
+    def paso(self) -> int:
+        """Ejecuta una sola instrucción."""
+        return self.ejecutar(1)
+
+    def registro(self, nombre: str) -> int:
+        nombre = nombre.upper()
+        if nombre in REGISTROS_16:
+            return self.regs[REGISTROS_16.index(nombre)]
+        return _leer8(self.regs, REGISTROS_8.index(nombre))
+
+    def _detener(self) -> int:
+        self.detenido = True
+        return -1
+
+    # =====================================================================
+    # DECODIFICACIÓN
+    # =====================================================================
+
+    def _decodificar(self, ip: int) -> Callable[[], int]:
+        if ip < self._origen_codigo or ip >= self._fin_codigo:
+            return self._detener
+
+        mem = self.memoria
+        base = self.sregs[CS] << 4
+        op = mem[base + ip]
+
+        if op == 0x90:
+            return self._dec_nop(ip)
+        if op == 0xF5:
+            return self._dec_cmc(ip)
+        if op == 0xA6:
+            return self._dec_cmpsb(ip)
+        if op == 0x61:
+            return self._dec_popa(ip)
+        if op in (0xD4, 0xD5):
+            return self._dec_aam_aad(ip, op, mem[base + ip + 1])
+        if op == 0xCD:
+            return self._dec_int(ip, mem[base + ip + 1])
+        if 0x40 <= op <= 0x47:
+            return self._dec_inc16(ip, op & 7)
+        if op in _SALTOS:
+            return self._dec_salto(ip, op, mem[base + ip + 1])
+        if op in _LOGICAS:
+            return self._dec_logica(ip, op, base)
+        if op in _LOGICAS_ACUMULADOR or op in (0x80, 0x81):
+            return self._dec_logica_inmediato(ip, op, base)
+        if op in (0xF6, 0xF7, 0xFE):
+            return self._dec_grupo(ip, op, base)
+        if op == 0x8D:
+            return self._dec_lea(ip, base)
+
+        raise ErrorEjecucion(f"Opcode no soportado {op:02X} en {ip:04X}")
+
+    def _modrm(self, pos: int) -> Tuple[int, int, int, Optional[Callable[[], int]], int, int]:
+        """
+        Decodifica el byte mod reg r/m en la dirección física pos.
+        Retorna (mod, reg, rm, función EA, segmento por defecto, longitud).
+        """
+        mem = self.memoria
+        modrm = mem[pos]
+        mod, reg, rm = modrm >> 6, (modrm >> 3) & 7, modrm & 7
+        if mod == 3:
+            return mod, reg, rm, None, DS, 1
+
+        r = self.regs
+        longitud = 1
+        if mod == 0 and rm == 6:
+            disp = mem[pos + 1] | (mem[pos + 2] << 8)
+            return mod, reg, rm, (lambda: disp), DS, 3
+        if mod == 1:
+            disp = mem[pos + 1]
+            disp = disp - 0x100 if disp & 0x80 else disp
+            longitud = 2
+        elif mod == 2:
+            disp = mem[pos + 1] | (mem[pos + 2] << 8)
+            longitud = 3
+        else:
+            disp = 0
+
+        b, i = _RM_BASE[rm]
+        seg = SS if b == 5 else DS
+        if i is None:
+            ea = lambda: (r[b] + disp) & 0xFFFF
+        else:
+            ea = lambda: (r[b] + r[i] + disp) & 0xFFFF
+        return mod, reg, rm, ea, seg, longitud
+
+    def _operando(self, rm: int, ea, seg: int, w: int):
+        """Retorna funciones (leer, escribir) para el operando r/m."""
+        r = self.regs
+        mem = self.memoria
+        s = self.sregs
+        if ea is None:
+            if w:
+                def leer():
+                    return r[rm]
+
+                def escribir(v):
+                    r[rm] = v
+            else:
+                def leer():
+                    return _leer8(r, rm)
+
+                def escribir(v):
+                    _escribir8(r, rm, v)
+            return leer, escribir
+
+        # Bytes físicos del código ya cargado (cargar() vacía la caché, así que no cambian
+        # mientras esta función siga en ella); una instrucción puede empezar hasta fin - 1
+        ini_codigo = (s[CS] << 4) + self._origen_codigo
+        fin_codigo = (s[CS] << 4) + self._fin_codigo + MAX_LONGITUD_INSTRUCCION - 1
+        invalidar = self._invalidar
+
+        if w:
+            def leer():
+                p = ((s[seg] << 4) + ea()) & 0xFFFFF
+                return mem[p] | (mem[p + 1] << 8)
+
+            def escribir(v):
+                p = ((s[seg] << 4) + ea()) & 0xFFFFF
+                mem[p] = v & 0xFF
+                mem[p + 1] = v >> 8
+                if ini_codigo <= p + 1 and p < fin_codigo:
+                    invalidar(p, 2)
+        else:
+            def leer():
+                return mem[((s[seg] << 4) + ea()) & 0xFFFFF]
+
+            def escribir(v):
+                p = ((s[seg] << 4) + ea()) & 0xFFFFF
+                mem[p] = v
+                if ini_codigo <= p < fin_codigo:
+                    invalidar(p, 1)
+        return leer, escribir
+
+    # =====================================================================
+    # INSTRUCCIONES SIN OPERANDOS
+    # =====================================================================
+
+    def _dec_nop(self, ip):
+        sig = (ip + 1) & 0xFFFF
+
+        def nop():
+            return sig
+        return nop
+
+    def _dec_cmc(self, ip):
+        sig = (ip + 1) & 0xFFFF
+        fl = self.banderas
+
+        def cmc():
+            fl[CF] ^= 1
+            return sig
+        return cmc
+
+    def _dec_cmpsb(self, ip):
+        sig = (ip + 1) & 0xFFFF
+        r, s, fl, mem = self.regs, self.sregs, self.banderas, self.memoria
+
+        def cmpsb():
+            si, di = r[6], r[7]
+            a = mem[((s[DS] << 4) + si) & 0xFFFFF]
+            b = mem[((s[ES] << 4) + di) & 0xFFFFF]
+            res = a - b
+            res8 = res & 0xFF
+            fl[CF] = res < 0
+            fl[ZF] = res8 == 0
+            fl[SF] = res8 >> 7
+            fl[OF] = ((a ^ b) & (a ^ res8) & 0x80) != 0
+            fl[PF] = PARIDAD[res8]
+            fl[AF] = ((a ^ b ^ res8) & 0x10) != 0
+            r[6] = (si + 1) & 0xFFFF
+            r[7] = (di + 1) & 0xFFFF
+            return sig
+        return cmpsb
+
+    def _dec_popa(self, ip):
+        sig = (ip + 1) & 0xFFFF
+        r, s, mem = self.regs, self.sregs, self.memoria
+
+        def popa():
+            base = s[SS] << 4
+            sp = r[4]
+            for reg in (7, 6, 5, None, 3, 2, 1, 0):
+                if reg is not None:
+                    p = (base + sp) & 0xFFFFF
+                    r[reg] = mem[p] | (mem[p + 1] << 8)
+                sp = (sp + 2) & 0xFFFF
+            r[4] = sp
+            return sig
+        return popa
+
+    def _dec_aam_aad(self, ip, op, base_num):
+        sig = (ip + 2) & 0xFFFF
+        r, fl = self.regs, self.banderas
+
+        if op == 0xD4:
+            if base_num == 0:
+                raise ErrorEjecucion(f"AAM con base 0 en {ip:04X}")
+
+            def aam():
+                al = r[0] & 0xFF
+                ah, al = divmod(al, base_num)
+                r[0] = (ah << 8) | al
+                fl[ZF] = al == 0
+                fl[SF] = al >> 7
+                fl[PF] = PARIDAD[al]
+                return sig
+            return aam
+
+        def aad():
+            ax = r[0]
+            al = ((ax & 0xFF) + (ax >> 8) * base_num) & 0xFF
+            r[0] = al
+            fl[ZF] = al == 0
+            fl[SF] = al >> 7
+            fl[PF] = PARIDAD[al]
+            return sig
+        return aad
+
+    # =====================================================================
+    # INT (solo INT 20h e INT 21h simulados)
+    # =====================================================================
+
+    def _dec_int(self, ip, num):
+        sig = (ip + 2) & 0xFFFF
+        if num == 0x20:
+            return self._detener
+        if num != 0x21:
+            def int_no_soportada():
+                raise ErrorEjecucion(f"INT {num:02X}h no soportada en {ip:04X}")
+            return int_no_soportada
+
+        r, s, mem = self.regs, self.sregs, self.memoria
+
+        def int21():
+            ah = r[0] >> 8
+            if ah == 0x4C:
+                self.codigo_salida = r[0] & 0xFF
+                self.detenido = True
+                return -1
+            if ah == 0x02:
+                self.salida.append(chr(r[2] & 0xFF))
+            elif ah == 0x09:
+                p = (s[DS] << 4) + r[2]
+                fin = mem.find(b'$', p)
+                if fin == -1:
+                    raise ErrorEjecucion(f"Cadena sin '$' para INT 21h/09h en {ip:04X}")
+                self.salida.append(mem[p:fin].decode('latin-1'))
+            elif ah == 0x01:
+                r[0] = r[0] & 0xFF00
+            return sig
+        return int21
+
+    # =====================================================================
+    # INC, MUL, IDIV
+    # =====================================================================
+
+    def _dec_inc16(self, ip, reg):
+        sig = (ip + 1) & 0xFFFF
+        r, fl = self.regs, self.banderas
+
+        def inc16():
+            res = (r[reg] + 1) & 0xFFFF
+            r[reg] = res
+            fl[ZF] = res == 0
+            fl[SF] = res >> 15
+            fl[OF] = res == 0x8000
+            fl[PF] = PARIDAD[res & 0xFF]
+            fl[AF] = (res & 0x0F) == 0
+            return sig
+        return inc16
+
+    def _dec_grupo(self, ip, op, base):
+        mod, reg, rm, ea, seg, lon = self._modrm(base + ip + 1)
+        sig = (ip + 1 + lon) & 0xFFFF
+        w = op & 1
+        r, fl = self.regs, self.banderas
+        leer, escribir = self._operando(rm, ea, seg, w)
+
+        if op == 0xFE and reg == 0:
+            def inc8():
+                res = (leer() + 1) & 0xFF
+                escribir(res)
+                fl[ZF] = res == 0
+                fl[SF] = res >> 7
+                fl[OF] = res == 0x80
+                fl[PF] = PARIDAD[res]
+                fl[AF] = (res & 0x0F) == 0
+                return sig
+            return inc8
+
+        if op != 0xFE and reg == 4:
+            if w:
+                def mul16():
+                    res = r[0] * leer()
+                    r[0] = res & 0xFFFF
+                    r[2] = res >> 16
+                    fl[CF] = fl[OF] = r[2] != 0
+                    return sig
+                return mul16
+
+            def mul8():
+                res = (r[0] & 0xFF) * leer()
+                r[0] = res
+                fl[CF] = fl[OF] = (res >> 8) != 0
+                return sig
+            return mul8
+
+        if op != 0xFE and reg == 7:
+            if w:
+                def idiv16():
+                    divisor = leer()
+                    if divisor == 0:
+                        raise ErrorEjecucion(f"División entre cero en {ip:04X}")
+                    divisor = divisor - 0x10000 if divisor & 0x8000 else divisor
+                    dividendo = (r[2] << 16) | r[0]
+                    dividendo = dividendo - 0x100000000 if dividendo & 0x80000000 else dividendo
+                    cociente = abs(dividendo) // abs(divisor)
+                    if (dividendo < 0) != (divisor < 0):
+                        cociente = -cociente
+                    if not -0x8000 <= cociente <= 0x7FFF:
+                        raise ErrorEjecucion(f"Desbordamiento en IDIV en {ip:04X}")
+                    r[0] = cociente & 0xFFFF
+                    r[2] = (dividendo - cociente * divisor) & 0xFFFF
+                    return sig
+                return idiv16
+
+            def idiv8():
+                divisor = leer()
+                if divisor == 0:
+                    raise ErrorEjecucion(f"División entre cero en {ip:04X}")
+                divisor = divisor - 0x100 if divisor & 0x80 else divisor
+                dividendo = r[0] - 0x10000 if r[0] & 0x8000 else r[0]
+                cociente = abs(dividendo) // abs(divisor)
+                if (dividendo < 0) != (divisor < 0):
+                    cociente = -cociente
+                if not -0x80 <= cociente <= 0x7F:
+                    raise ErrorEjecucion(f"Desbordamiento en IDIV en {ip:04X}")
+                resto = dividendo - cociente * divisor
+                r[0] = ((resto & 0xFF) << 8) | (cociente & 0xFF)
+                return sig
+            return idiv8
+
+        raise ErrorEjecucion(f"Instrucción {op:02X} /{reg} no soportada en {ip:04X}")
+
+    # =====================================================================
+    # AND, OR, XOR (formas reg, r/m y r/m, reg)
+    # =====================================================================
+
+    def _dec_logica(self, ip, op, base):
+        mod, reg, rm, ea, seg, lon = self._modrm(base + ip + 1)
+        sig = (ip + 1 + lon) & 0xFFFF
+        w = op & 1
+        d = op & 2
+        oper = _LOGICAS[op]
+        r, fl = self.regs, self.banderas
+        bit_signo = 15 if w else 7
+
+        # Forma más común (reg, reg de 16 bits): sin indirección por funciones
+        if ea is None and w:
+            dst, src = (reg, rm) if d else (rm, reg)
+
+            def logica_reg16():
+                res = oper(r[dst], r[src])
+                r[dst] = res
+                fl[CF] = fl[OF] = 0
+                fl[ZF] = res == 0
+                fl[SF] = res >> 15
+                fl[PF] = PARIDAD[res & 0xFF]
+                return sig
+            return logica_reg16
+
+        leer_rm, escribir_rm = self._operando(rm, ea, seg, w)
+        leer_reg, escribir_reg = self._operando(reg, None, seg, w)
+        if d:
+            leer_dst, escribir_dst, leer_src = leer_reg, escribir_reg, leer_rm
+        else:
+            leer_dst, escribir_dst, leer_src = leer_rm, escribir_rm, leer_reg
+
+        def logica():
+            res = oper(leer_dst(), leer_src())
+            escribir_dst(res)
+            fl[CF] = fl[OF] = 0
+            fl[ZF] = res == 0
+            fl[SF] = res >> bit_signo
+            fl[PF] = PARIDAD[res & 0xFF]
+            return sig
+        return logica
+
+    def _dec_logica_inmediato(self, ip, op, base):
+        mem = self.memoria
+        w = op & 1
+        if op in _LOGICAS_ACUMULADOR:
+            oper = _LOGICAS_ACUMULADOR[op]
+            rm, ea, seg, lon = 0, None, DS, 0
+        else:
+            mod, ext, rm, ea, seg, lon = self._modrm(base + ip + 1)
+            if ext not in _EXTENSIONES_80:
+                raise ErrorEjecucion(f"Opcode no soportado {op:02X} /{ext} en {ip:04X}")
+            oper = _EXTENSIONES_80[ext]
+        pos = base + ip + 1 + lon
+        inmediato = mem[pos] | (mem[pos + 1] << 8 if w else 0)
+        sig = (ip + 2 + lon + w) & 0xFFFF
+        leer, escribir = self._operando(rm, ea, seg, w)
+        fl = self.banderas
+        bit_signo = 15 if w else 7
+
+        def logica_inmediato():
+            res = oper(leer(), inmediato)
+            escribir(res)
+            fl[CF] = fl[OF] = 0
+            fl[ZF] = res == 0
+            fl[SF] = res >> bit_signo
+            fl[PF] = PARIDAD[res & 0xFF]
+            return sig
+        return logica_inmediato
+
+    def _dec_lea(self, ip, base):
+        mod, reg, rm, ea, seg, lon = self._modrm(base + ip + 1)
+        if ea is None:
+            raise ErrorEjecucion(f"LEA requiere operando de memoria en {ip:04X}")
+        sig = (ip + 1 + lon) & 0xFFFF
+        r = self.regs
+
+        def lea():
+            r[reg] = ea()
+            return sig
+        return lea
+
+    # =====================================================================
+    # SALTOS
+    # =====================================================================
+
+    def _dec_salto(self, ip, op, desp):
+        sig = (ip + 2) & 0xFFFF
+        destino = (sig + (desp - 0x100 if desp & 0x80 else desp)) & 0xFFFF
+        r, fl = self.regs, self.banderas
+
+        if op == 0x72:
+            def jc():
+                return destino if fl[CF] else sig
+            return jc
+        if op == 0x75:
+            def jne():
+                return sig if fl[ZF] else destino
+            return jne
+        if op == 0x77:
+            def ja():
+                return sig if fl[CF] or fl[ZF] else destino
+            return ja
+        if op == 0x7F:
+            def jnle():
+                return destino if not fl[ZF] and bool(fl[SF]) == bool(fl[OF]) else sig
+            return jnle
+
+        def loope():
+            cx = (r[1] - 1) & 0xFFFF
+            r[1] = cx
+            return destino if cx and fl[ZF] else sig
+        return loope
+
+
+_SALTOS = {0x72, 0x75, 0x77, 0x7F, 0xE1}
+
+_LOGICAS = {
+    0x20: int.__and__, 0x21: int.__and__, 0x22: int.__and__, 0x23: int.__and__,
+    0x08: int.__or__, 0x09: int.__or__, 0x0A: int.__or__, 0x0B: int.__or__,
+    0x30: int.__xor__, 0x31: int.__xor__, 0x32: int.__xor__, 0x33: int.__xor__,
+}
+
+# AND/OR/XOR AL/AX, inmediato
+_LOGICAS_ACUMULADOR = {
+    0x24: int.__and__, 0x25: int.__and__,
+    0x0C: int.__or__, 0x0D: int.__or__,
+    0x34: int.__xor__, 0x35: int.__xor__,
+}
+
+# 80/81 /ext: AND (/4), OR (/1), XOR (/6) r/m, inmediato
+_EXTENSIONES_80 = {4: int.__and__, 1: int.__or__, 6: int.__xor__}
@@ -0,0 +1,672 @@
+"""
+Servidor del Language Server Protocol (LSP) para archivos .asm del 8086.
+
+Se comunica por la entrada/salida estándar (JSON-RPC con cabecera
+Content-Length) y ofrece:
+    - sincronización incremental del texto (textDocument/didChange con rangos)
+    - diagnósticos (textDocument/publishDiagnostics) con los resultados de validar_linea
+    - hover y go-to-definition respaldados por la tabla de símbolos
+
+Análisis incremental: cada línea del documento guarda su resultado y, cada
+INTERVALO_PUNTOS líneas, un punto de control con el estado del análisis
+(segmento, tablas de símbolos, ámbito, PUBLIC/EXTRN). Al editar las líneas
+[a, b) el análisis se reanuda desde el último punto anterior a 'a': las
+líneas previas a la edición y las posteriores que no mencionan ningún
+símbolo cuyo estado cambió reutilizan su resultado (solo se actualiza la
+tabla de símbolos, sin volver a validar), y se detiene en cuanto el estado
+coincide con el de un punto de control anterior a la edición. Los tokens se
+guardan por texto de línea, así que insertar líneas no obliga a volver a
+tokenizar las siguientes.
+
+El documento se analiza tal cual (sin expandir INCLUDE ni macros).
+
+Uso (configurar en el editor como servidor de lenguaje para *.asm):
+    python lsp.py
+"""
+
+import json
+import re
+import sys
+from dataclasses import dataclass, replace
+from typing import BinaryIO, Callable, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from diagnosticos import Codigo, Diagnostico, Severidad, como_diagnostico, diagnostico
+from ensamblador import (
+    INSTRUCCIONES, PSEUDOINSTRUCCIONES, REGISTROS,
+    Ensamblador8086, EstadoAnalisis, Simbolo, TablaSimbolos, TipoToken, Token,
+)
+
+INTERVALO_PUNTOS = 256
+FUENTE = 'ensamblador8086'
+
+SEVERIDAD_LSP = {Severidad.FATAL: 1, Severidad.ERROR: 1, Severidad.ADVERTENCIA: 2, Severidad.NOTA: 3}
+DIRECTIVAS_DEFINICION = frozenset({'DB', 'DW', 'DD', 'DQ', 'DT', 'EQU', 'PROC'})
+# Líneas que cambian el estado más allá de la tabla de símbolos (segmento, ámbito, enlace)
+PALABRAS_ESTRUCTURALES = frozenset({'segment', 'ends', 'end', 'proc', 'endp', 'public', 'extrn'})
+# No pueden ser símbolos: no cuentan como nombres mencionados por una línea
+PALABRAS_RESERVADAS = frozenset(p.lower() for p in INSTRUCCIONES | PSEUDOINSTRUCCIONES | REGISTROS)
+
+_PATRON_NOMBRE = re.compile(r'[A-Za-z_@.][A-Za-z0-9_]*')
+
+# Códigos de error de JSON-RPC
+METODO_NO_ENCONTRADO = -32601
+ERROR_INTERNO = -32603
+
+# MessageType de window/logMessage
+MENSAJE_ERROR = 1
+
+
+class _EnsambladorDocumento(Ensamblador8086):
+    """Ensamblador cuyos tokens se guardan por texto de línea (no por índice)"""
+
+    def __init__(self):
+        super().__init__()
+        self.tokens_por_texto: Dict[str, List[Token]] = {}
+
+    def tokens_de_linea(self, indice: int, linea: str) -> List[Token]:
+        tokens = self.tokens_por_texto.get(linea)
+        if tokens is None:
+            maximo = self.limites.max_longitud_linea
+            if maximo is not None and len(linea) > maximo:
+                tokens = [Token(linea, TipoToken.NO_IDENTIFICADO, indice + 1, 0)]
+            else:
+                tokens = self.tokenizar_linea(linea, indice + 1)
+            self.tokens_por_texto[linea] = tokens
+        return tokens
+
+
+# =========================================================================
+# PUNTOS DE CONTROL DEL ANÁLISIS
+# =========================================================================
+
+def _congelar(tabla: TablaSimbolos) -> Dict[str, tuple]:
+    return {clave: (s.tipo, s.valor, s.tamanio, s.ambito) for clave, s in tabla.items()}
+
+
+def _desplazar(indice: int, inicio: int, fin: int, delta: int) -> int:
+    if indice >= fin:
+        return indice + delta
+    return -1 if indice >= inicio else indice
+
+
+@dataclass
+class PuntoControl:
+    """Estado del análisis antes de procesar la línea 'linea'"""
+    linea: int
+    segmento: Optional[str]
+    ambito: str                                              # ámbito actual (minúsculas; '' = global)
+    tablas: Dict[str, Tuple[str, Optional[str], Dict[str, tuple]]]   # ámbito -> (nombre, padre, símbolos)
+    publicos: Dict[str, str]
+    abiertos: Dict[str, int]                                 # ámbito -> línea de su PROC
+    publicas: Dict[str, int]                                 # nombre -> línea de su PUBLIC
+    nombres_tramo: FrozenSet[str] = frozenset()              # nombres que mencionan las líneas hasta el próximo punto
+
+    def _estructura(self):
+        return self.segmento, self.ambito, self.publicos, self.abiertos, self.publicas, self.tablas.keys()
+
+    def mismo_estado(self, otro: 'PuntoControl') -> bool:
+        return self._estructura() == otro._estructura() and self.tablas == otro.tablas
+
+    def nombres_distintos(self, otro: 'PuntoControl') -> Optional[Set[str]]:
+        """Símbolos (minúsculas) cuyo estado difiere; None si difiere algo más que los símbolos"""
+        if self._estructura() != otro._estructura():
+            return None
+        nombres = set()
+        for clave, (_, _, simbolos) in self.tablas.items():
+            otros = otro.tablas[clave][2]
+            for nombre in simbolos.keys() | otros.keys():
+                if simbolos.get(nombre) != otros.get(nombre):
+                    nombres.add(nombre.lower())
+        return nombres
+
+    def diferencias(self, otro: 'PuntoControl') -> Dict[str, Dict[str, Optional[tuple]]]:
+        """Por ámbito, los símbolos de este punto que difieren de 'otro' (None = no existe aquí)"""
+        diferencias = {}
+        for clave, (_, _, simbolos) in self.tablas.items():
+            otros = otro.tablas[clave][2]
+            distintos = {nombre: simbolos.get(nombre) for nombre in simbolos.keys() | otros.keys()
+                         if simbolos.get(nombre) != otros.get(nombre)}
+            if distintos:
+                diferencias[clave] = distintos
+        return diferencias
+
+    def parcheado(self, diferencias: Dict[str, Dict[str, Optional[tuple]]]) -> 'PuntoControl':
+        """El mismo punto con los símbolos de 'diferencias' reemplazados"""
+        tablas = dict(self.tablas)
+        for clave, distintos in diferencias.items():
+            nombre, padre, simbolos = tablas[clave]
+            simbolos = dict(simbolos)
+            for simbolo, datos in distintos.items():
+                if datos is None:
+                    simbolos.pop(simbolo, None)
+                else:
+                    simbolos[simbolo] = datos
+            tablas[clave] = (nombre, padre, simbolos)
+        return replace(self, tablas=tablas)
+
+    def desplazado(self, inicio: int, fin: int, delta: int) -> 'PuntoControl':
+        """El mismo punto tras reemplazar las líneas [inicio, fin) por fin - inicio + delta líneas"""
+        return PuntoControl(
+            _desplazar(self.linea, inicio, fin, delta), self.segmento, self.ambito, self.tablas, self.publicos,
+            {k: _desplazar(i, inicio, fin, delta) for k, i in self.abiertos.items()},
+            {k: _desplazar(i, inicio, fin, delta) for k, i in self.publicas.items()}, self.nombres_tramo)
+
+
+# =========================================================================
+# DOCUMENTO
+# =========================================================================
+
+@dataclass
+class _InfoLinea:
+    limpia: str                 # Sin comentarios ni espacios en los extremos
+    nombres: FrozenSet[str]     # Identificadores que menciona (minúsculas)
+    estructural: bool
+
+
+class Documento:
+    def __init__(self, uri: str, texto: str, version: int = 0):
+        self.uri = uri
+        self.version = version
+        self.asm = _EnsambladorDocumento()
+        self.lineas: List[str] = []
+        self.resultados: List[Optional[Tuple[str, Diagnostico]]] = []
+        self.puntos: List[PuntoControl] = []
+        self.final: Optional[PuntoControl] = None
+        self.lineas_validadas = 0          # Validadas en el último reanálisis (las demás se reutilizaron)
+        self._info: Dict[str, _InfoLinea] = {}
+        self._publicados: Dict[tuple, dict] = {}    # ver _diagnostico
+        self._definiciones: Optional[Dict[str, List[int]]] = None
+        self.reemplazar(texto)
+
+    # === Texto ===
+
+    def reemplazar(self, texto: str):
+        self.lineas[:] = texto.split('\n')
+        self.asm.lineas_codigo = self.lineas
+        self.resultados = [None] * len(self.lineas)
+        self.puntos = []
+        self._reanalizar(0, len(self.lineas), None, [], None)
+
+    def aplicar_cambio(self, cambio: dict):
+        """Aplica un TextDocumentContentChangeEvent (con 'range' o texto completo) y reanaliza"""
+        if 'range' not in cambio:
+            self.reemplazar(cambio['text'])
+            return
+        l0, c0 = self._ubicar(cambio['range']['start'])
+        l1, c1 = self._ubicar(cambio['range']['end'])
+        if (l1, c1) < (l0, c0):
+            l1, c1 = l0, c0
+        nuevas = (self.lineas[l0][:c0] + cambio['text'] + self.lineas[l1][c1:]).split('\n')
+
+        # Símbolos que la edición puede haber definido o quitado
+        cambiados: Optional[Set[str]] = set()
+        for texto in self.lineas[l0:l1 + 1] + nuevas:
+            info = self.info(texto)
+            if info.estructural:
+                cambiados = None
+                break
+            cambiados |= info.nombres
+
+        quitadas = l1 + 1 - l0
+        delta = len(nuevas) - quitadas
+        self.lineas[l0:l1 + 1] = nuevas
+        self.resultados[l0:l1 + 1] = [None] * len(nuevas)
+        antiguos = [p.desplazado(l0, l1 + 1, delta) for p in self.puntos if p.linea > l1]
+        final = self.final.desplazado(l0, l1 + 1, delta) if self.final is not None else None
+        self.puntos = [p for p in self.puntos if p.linea <= l0]
+        self._reanalizar(l0, l0 + len(nuevas), cambiados, antiguos, final)
+
+    def _ubicar(self, posicion: dict) -> Tuple[int, int]:
+        """(línea, índice de str) de una Position del LSP, ajustada al documento como pide la especificación"""
+        linea = max(0, posicion['line'])
+        if linea >= len(self.lineas):
+            return len(self.lineas) - 1, len(self.lineas[-1])
+        return linea, indice_python(self.lineas[linea], max(0, posicion['character']))
+
+    def info(self, texto: str) -> _InfoLinea:
+        info = self._info.get(texto)
+        if info is None:
+            limpia = self.asm.limpiar_comentarios(texto).strip()
+            palabras = frozenset(n.lower() for n in _PATRON_NOMBRE.findall(limpia))
+            estructural = not palabras.isdisjoint(PALABRAS_ESTRUCTURALES) or limpia.startswith('.')
+            info = _InfoLinea(limpia, palabras - PALABRAS_RESERVADAS, estructural)
+            self._info[texto] = info
+        return info
+
+    # === Análisis ===
+
+    def _capturar(self, linea: int, estado: EstadoAnalisis) -> PuntoControl:
+        asm = self.asm
+        tablas = {'': ('', None, _congelar(asm.tabla_simbolos))}
+        for clave, tabla in asm.ambitos.items():
+            padre = tabla.padre.nombre.lower() if tabla.padre is not None else ''
+            tablas[clave] = (tabla.nombre, padre, _congelar(tabla))
+        return PuntoControl(
+            linea, estado.segmento, asm.ambito_actual.nombre.lower(), tablas, dict(asm.publicos),
+            {k: a['numero'] - 1 for k, a in estado.procedimientos_abiertos.items()},
+            {k: a['numero'] - 1 for k, a in estado.lineas_publicas.items()})
+
+    def _restaurar(self, punto: PuntoControl) -> EstadoAnalisis:
+        asm = self.asm
+        # Los símbolos vigentes que coinciden con el punto se reutilizan: recrearlos en
+        # cada tecleo llenaría la generación más vieja del recolector de basura
+        vigentes = {'': asm.tabla_simbolos, **asm.ambitos}
+        asm.tabla_simbolos = {}
+        tablas = {'': asm.tabla_simbolos}
+        for clave, (nombre, padre, simbolos) in punto.tablas.items():
+            tabla = tablas[''] if clave == '' else TablaSimbolos(nombre=nombre, padre=tablas[padre])
+            previos = vigentes.get(clave, {})
+            for nombre_simbolo, datos in simbolos.items():
+                simbolo = previos.get(nombre_simbolo)
+                if simbolo is not None and (simbolo.tipo, simbolo.valor, simbolo.tamanio, simbolo.ambito) == datos:
+                    simbolo.valor_numerico = None
+                else:
+                    tipo, valor, tamanio, ambito = datos
+                    simbolo = Simbolo(nombre_simbolo, tipo, valor, tamanio, ambito=ambito)
+                tabla[nombre_simbolo] = simbolo
+            if clave:
+                asm.ambitos[clave] = tablas[clave] = tabla
+        asm.ambito_actual = tablas[punto.ambito]
+        asm.publicos = dict(punto.publicos)
+        return EstadoAnalisis(punto.segmento,
+                              {k: {'numero': i + 1} for k, i in punto.abiertos.items()},
+                              {k: {'numero': i + 1} for k, i in punto.publicas.items()})
+
+    def _agregar_punto(self, punto: PuntoControl, tramo: Set[str]):
+        self.puntos[-1].nombres_tramo = frozenset(tramo)
+        tramo.clear()
+        self.puntos.append(punto)
+
+    def _reanalizar(self, inicio: int, fin: int, cambiados: Optional[Set[str]],
+                    antiguos: List[PuntoControl], final_antiguo: Optional[PuntoControl]):
+        """
+        Reanaliza tras reemplazar las líneas desde 'inicio' (las nuevas ocupan
+        [inicio, fin)). 'antiguos' son los puntos de control posteriores a la
+        edición (ya desplazados); 'cambiados', los símbolos que pudo alterar (None = cualquiera).
+        """
+        asm = self.asm
+        if self.puntos:
+            estado = self._restaurar(self.puntos[-1])
+            i = self.puntos[-1].linea
+        else:
+            asm.tabla_simbolos = {}
+            asm.publicos = {}
+            estado = EstadoAnalisis()
+            i = 0
+            self.puntos.append(self._capturar(0, estado))
+        ultimo = i
+        siguiente = 0
+        tramo: Set[str] = set()
+        self._definiciones = None
+        self.lineas_validadas = 0
+        resultados = self.resultados
+        total = len(self.lineas)
+
+        while i < total:
+            if i >= fin:
+                while siguiente < len(antiguos) and antiguos[siguiente].linea < i:
+                    siguiente += 1
+                if siguiente < len(antiguos) and antiguos[siguiente].linea == i:
+                    viejo = antiguos[siguiente]
+                    punto = self._capturar(i, estado)
+                    if punto.mismo_estado(viejo):
+                        # Desde aquí todo es igual que antes de la edición
+                        self.puntos[-1].nombres_tramo = frozenset(tramo)
+                        self.puntos.extend(antiguos[siguiente:])
+                        self.final = final_antiguo
+                        self._podar_caches()
+                        return
+                    cambiados = punto.nombres_distintos(viejo)
+                    self._agregar_punto(punto, tramo)
+                    ultimo = i
+                    siguiente += 1
+                    if cambiados is not None and cambiados.isdisjoint(viejo.nombres_tramo):
+                        # Los tramos que no mencionan los símbolos cambiados hacen lo mismo
+                        # que antes: basta corregir sus puntos de control, sin recorrerlos
+                        diferencias = punto.diferencias(viejo)
+                        while cambiados.isdisjoint(viejo.nombres_tramo):
+                            self.puntos[-1].nombres_tramo = viejo.nombres_tramo
+                            if siguiente == len(antiguos):
+                                self.final = final_antiguo.parcheado(diferencias)
+                                self._podar_caches()
+                                return
+                            viejo = antiguos[siguiente]
+                            siguiente += 1
+                            self.puntos.append(viejo.parcheado(diferencias))
+                        i = ultimo = self.puntos[-1].linea
+                        estado = self._restaurar(self.puntos[-1])
+            if i - ultimo >= INTERVALO_PUNTOS and (i < fin or siguiente >= len(antiguos)):
+                self._agregar_punto(self._capturar(i, estado), tramo)
+                ultimo = i
+
+            info = self.info(self.lineas[i])
+            if not info.limpia:
+                resultados[i] = None
+                i += 1
+                continue
+            tramo.update(info.nombres)
+            previo = resultados[i]
+            reutilizar = previo is not None and (
+                i < inicio or (i >= fin and cambiados is not None and info.nombres.isdisjoint(cambiados)))
+            analisis = asm.analizar_linea(i, info.limpia, estado, previo if reutilizar else None)
+            nuevo = (analisis['resultado'], analisis['mensaje']) if analisis is not None else None
+            if not reutilizar:
+                self.lineas_validadas += 1
+                if i >= fin and cambiados is not None and (previo and previo[0]) != (nuevo and nuevo[0]):
+                    # La línea ahora define (o deja de definir) sus símbolos
+                    if info.estructural:
+                        cambiados = None
+                    else:
+                        cambiados |= info.nombres
+            resultados[i] = nuevo
+            i += 1
+
+        self.puntos[-1].nombres_tramo = frozenset(tramo)
+        self.final = self._capturar(total, estado)
+        self._podar_caches()
+
+    def _podar_caches(self):
+        # Los textos intermedios de cada tecleo no se vuelven a ver: se descartan
+        if len(self._info) > 2 * len(self.lineas) + 1024:
+            vigentes = {texto: self.info(texto) for texto in self.lineas}
+            self._info = vigentes
+            limpias = {info.limpia for info in vigentes.values()}
+            tokens = self.asm.tokens_por_texto
+            self.asm.tokens_por_texto = {t: tokens[t] for t in limpias if t in tokens}
+
+    # === Consultas ===
+
+    def diagnosticos(self) -> List[dict]:
+        anteriores, self._publicados = self._publicados, {}
+        salida = []
+        for i, resultado in enumerate(self.resultados):
+            if resultado is not None and resultado[0] == 'Incorrecta':
+                salida.append(self._diagnostico(i, como_diagnostico(*resultado), anteriores))
+        final = self.final
+        if final is not None:
+            for i in final.abiertos.values():
+                if 0 <= i < len(self.lineas):
+                    salida.append(self._diagnostico(i, diagnostico(Codigo.PROC_SIN_ENDP), anteriores))
+            globales = {nombre.lower(): datos for nombre, datos in final.tablas[''][2].items()}
+            for nombre, i in final.publicas.items():
+                datos = globales.get(nombre)
+                if (datos is None or datos[0] == 'Externo') and 0 <= i < len(self.lineas):
+                    salida.append(self._diagnostico(
+                        i, diagnostico(Codigo.PUBLICO_NO_DEFINIDO, final.publicos.get(nombre, nombre)), anteriores))
+        return salida
+
+    def _diagnostico(self, i: int, diag: Diagnostico, anteriores: Dict[tuple, dict]) -> dict:
+        # Cada tecleo vuelve a publicar todos los diagnósticos: se reutiliza el de la
+        # publicación anterior si la línea, su texto y el mensaje no cambiaron
+        clave = (i, self.lineas[i], diag.codigo, diag.argumentos)
+        resultado = anteriores.get(clave)
+        if resultado is None:
+            texto = self.lineas[i].rstrip('\r')
+            inicio = len(texto) - len(texto.lstrip())
+            resultado = {
+                'range': {'start': {'line': i, 'character': indice_utf16(texto, inicio)},
+                          'end': {'line': i, 'character': indice_utf16(texto, len(texto))}},
+                'severity': SEVERIDAD_LSP[diag.severidad],
+                'code': int(diag.codigo),
+                'source': FUENTE,
+                'message': diag.texto,
+            }
+        self._publicados[clave] = resultado
+        return resultado
+
+    def definiciones(self) -> Dict[str, List[int]]:
+        """Nombre (minúsculas) -> líneas que lo definen, en orden"""
+        if self._definiciones is None:
+            indice: Dict[str, List[int]] = {}
+            for i, resultado in enumerate(self.resultados):
+                if resultado is None or resultado[0] != 'Correcta':
+                    continue
+                tokens = self.asm.tokens_de_linea(i, self.info(self.lineas[i]).limpia)
+                nombre = nombre_definido(tokens)
+                if nombre:
+                    indice.setdefault(nombre.lower(), []).append(i)
+            self._definiciones = indice
+        return self._definiciones
+
+    def palabra_en(self, linea: int, caracter: int) -> Optional[Tuple[str, int, int]]:
+        """(palabra, inicio, fin) del identificador en la posición; None si no hay"""
+        if not 0 <= linea < len(self.lineas):
+            return None
+        texto = self.lineas[linea]
+        posicion = indice_python(texto, caracter)
+        for m in _PATRON_NOMBRE.finditer(texto):
+            if m.start() <= posicion <= m.end():
+                return m.group(0), m.start(), m.end()
+        return None
+
+    def definicion(self, linea: int, caracter: int) -> Optional[dict]:
+        palabra = self.palabra_en(linea, caracter)
+        if palabra is None:
+            return None
+        lineas = self.definiciones().get(palabra[0].lower())
+        if not lineas:
+            return None
+        # La definición más cercana antes de la referencia (las etiquetas locales se repiten entre PROC)
+        anteriores = [i for i in lineas if i <= linea]
+        destino = anteriores[-1] if anteriores else lineas[0]
+        texto = self.lineas[destino]
+        inicio = texto.lower().find(palabra[0].lower())
+        inicio = max(inicio, 0)
+        return {'uri': self.uri, 'range': {
+            'start': {'line': destino, 'character': indice_utf16(texto, inicio)},
+            'end': {'line': destino, 'character': indice_utf16(texto, inicio + len(palabra[0]))}}}
+
+    def hover(self, linea: int, caracter: int) -> Optional[dict]:
+        palabra = self.palabra_en(linea, caracter)
+        if palabra is None:
+            return None
+        nombre, inicio, fin = palabra
+        rango = {'start': {'line': linea, 'character': indice_utf16(self.lineas[linea], inicio)},
+                 'end': {'line': linea, 'character': indice_utf16(self.lineas[linea], fin)}}
+        datos = self._simbolo_final(nombre)
+        if datos is not None:
+            tipo, valor, tamanio, ambito = datos
+            texto = f"**{nombre}** — {tipo}"
+            if tamanio:
+                texto += f" {tamanio}"
+            if valor:
+                texto += f" = `{valor}`"
+            if ambito:
+                texto += f" (local de {ambito})"
+            lineas = self.definiciones().get(nombre.lower())
+            if lineas:
+                texto += f"\n\nDefinido en la línea {lineas[0] + 1}: `{self.lineas[lineas[0]].strip()}`"
+            return {'contents': {'kind': 'markdown', 'value': texto}, 'range': rango}
+        tipo = self.asm.identificar_tipo_token(nombre)
+        if tipo in (TipoToken.INSTRUCCION, TipoToken.PSEUDOINSTRUCCION, TipoToken.REGISTRO):
+            return {'contents': {'kind': 'markdown', 'value': f"**{nombre.upper()}** — {tipo.value}"},
+                    'range': rango}
+        return None
+
+    def _simbolo_final(self, nombre: str) -> Optional[tuple]:
+        if self.final is None:
+            return None
+        clave = nombre.lower()
+        for _, _, simbolos in self.final.tablas.values():
+            for otro, datos in simbolos.items():
+                if otro.lower() == clave:
+                    return datos
+        return None
+
+
+def nombre_definido(tokens: List[Token]) -> Optional[str]:
+    """Nombre que define una línea: etiqueta, variable, constante o procedimiento"""
+    if not tokens or tokens[0].tipo != TipoToken.SIMBOLO:
+        return None
+    if tokens[0].valor.endswith(':'):
+        return tokens[0].valor[:-1]
+    if len(tokens) >= 2 and tokens[1].valor.upper() in DIRECTIVAS_DEFINICION:
+        return tokens[0].valor
+    return None
+
+
+def indice_python(texto: str, caracter: int) -> int:
+    """Posición en unidades UTF-16 (LSP) -> índice de str"""
+    if texto.isascii():
+        return min(caracter, len(texto))
+    unidades = 0
+    for i, c in enumerate(texto):
+        if unidades >= caracter:
+            return i
+        unidades += 2 if ord(c) > 0xFFFF else 1
+    return len(texto)
+
+
+def indice_utf16(texto: str, indice: int) -> int:
+    if texto.isascii():
+        return indice
+    return sum(2 if ord(c) > 0xFFFF else 1 for c in texto[:indice])
+
+
+# =========================================================================
+# SERVIDOR JSON-RPC
+# =========================================================================
+
+class ServidorLSP:
+    def __init__(self, entrada: BinaryIO, salida: BinaryIO):
+        self.entrada = entrada
+        self.salida = salida
+        self.documentos: Dict[str, Documento] = {}
+        self.terminar = False
+        self.apagado = False
+        self.metodos: Dict[str, Callable[[dict], object]] = {
+            'initialize': self.inicializar,
+            'shutdown': self.apagar,
+            'textDocument/hover': self.hover,
+            'textDocument/definition': self.definicion,
+        }
+        self.notificaciones: Dict[str, Callable[[dict], None]] = {
+            'exit': self.salir,
+            'textDocument/didOpen': self.abierto,
+            'textDocument/didChange': self.cambiado,
+            'textDocument/didClose': self.cerrado,
+        }
+
+    # === Transporte ===
+
+    def leer(self) -> Optional[dict]:
+        longitud = None
+        while True:
+            linea = self.entrada.readline()
+            if not linea:
+                return None
+            linea = linea.strip()
+            if not linea:
+                break
+            nombre, _, valor = linea.decode('ascii').partition(':')
+            if nombre.lower() == 'content-length':
+                longitud = int(valor)
+        if longitud is None:
+            return None
+        return json.loads(self.entrada.read(longitud))
+
+    def enviar(self, mensaje: dict):
+        cuerpo = json.dumps(mensaje, ensure_ascii=False).encode('utf-8')
+        self.salida.write(f"Content-Length: {len(cuerpo)}\r\n\r\n".encode('ascii') + cuerpo)
+        self.salida.flush()
+
+    def ejecutar(self) -> int:
+        while not self.terminar:
+            mensaje = self.leer()
+            if mensaje is None:
+                break
+            self.manejar(mensaje)
+        return 0 if self.apagado else 1
+
+    def manejar(self, mensaje: dict):
+        metodo = mensaje.get('method')
+        parametros = mensaje.get('params') or {}
+        if 'id' not in mensaje:
+            manejador = self.notificaciones.get(metodo)
+            if manejador is None:
+                return
+            try:
+                manejador(parametros)
+            except Exception as e:
+                # Una notificación no tiene respuesta: se informa al cliente y se sigue atendiendo
+                self.enviar({'jsonrpc': '2.0', 'method': 'window/logMessage',
+                             'params': {'type': MENSAJE_ERROR, 'message': f"{metodo}: {type(e).__name__}: {e}"}})
+            return
+        manejador = self.metodos.get(metodo)
+        if manejador is None:
+            self.enviar({'jsonrpc': '2.0', 'id': mensaje['id'],
+                         'error': {'code': METODO_NO_ENCONTRADO, 'message': f"Método no soportado: {metodo}"}})
+            return
+        try:
+            self.enviar({'jsonrpc': '2.0', 'id': mensaje['id'], 'result': manejador(parametros)})
+        except Exception as e:
+            self.enviar({'jsonrpc': '2.0', 'id': mensaje['id'],
+                         'error': {'code': ERROR_INTERNO, 'message': f"{type(e).__name__}: {e}"}})
+
+    def publicar(self, documento: Documento):
+        self.enviar({'jsonrpc': '2.0', 'method': 'textDocument/publishDiagnostics',
+                     'params': {'uri': documento.uri, 'version': documento.version,
+                                'diagnostics': documento.diagnosticos()}})
+
+    # === Ciclo de vida ===
+
+    def inicializar(self, parametros: dict) -> dict:
+        return {
+            'capabilities': {
+                'textDocumentSync': {'openClose': True, 'change': 2},    # 2 = incremental
+                'hoverProvider': True,
+                'definitionProvider': True,
+            },
+            'serverInfo': {'name': FUENTE},
+        }
+
+    def apagar(self, parametros: dict):
+        self.apagado = True
+        return None
+
+    def salir(self, parametros: dict):
+        self.terminar = True
+
+    # === Documentos ===
+
+    def abierto(self, parametros: dict):
+        datos = parametros['textDocument']
+        documento = Documento(datos['uri'], datos['text'], datos.get('version', 0))
+        self.documentos[documento.uri] = documento
+        self.publicar(documento)
+
+    def cambiado(self, parametros: dict):
+        documento = self.documentos.get(parametros['textDocument']['uri'])
+        if documento is None:
+            return
+        for cambio in parametros['contentChanges']:
+            documento.aplicar_cambio(cambio)
+        documento.version = parametros['textDocument'].get('version', documento.version)
+        self.publicar(documento)
+
+    def cerrado(self, parametros: dict):
+        documento = self.documentos.pop(parametros['textDocument']['uri'], None)
+        if documento is not None:
+            self.enviar({'jsonrpc': '2.0', 'method': 'textDocument/publishDiagnostics',
+                         'params': {'uri': documento.uri, 'diagnostics': []}})
+
+    def _posicion(self, parametros: dict) -> Tuple[Optional[Documento], int, int]:
+        documento = self.documentos.get(parametros['textDocument']['uri'])
+        posicion = parametros['position']
+        return documento, posicion['line'], posicion['character']
+
+    def hover(self, parametros: dict) -> Optional[dict]:
+        documento, linea, caracter = self._posicion(parametros)
+        return documento.hover(linea, caracter) if documento is not None else None
+
+    def definicion(self, parametros: dict) -> Optional[dict]:
+        documento, linea, caracter = self._posicion(parametros)
+        return documento.definicion(linea, caracter) if documento is not None else None
+
+
+def main() -> int:
+    return ServidorLSP(sys.stdin.buffer, sys.stdout.buffer).ejecutar()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,248 @@
+"""
+Formato de archivo objeto (.obj) para ensamblado por módulos.
+
+El archivo es binario, versionado y de registros de tamaño fijo, de modo que
+se puede abrir con mmap y leer sin copiar los bytes de los segmentos:
+
+    cabecera | segmentos | símbolos | reubicaciones | cadenas | (relleno) | datos
+
+    cabecera       magia 'OBJ86\\0', versión, cantidades y offsets de cada sección
+    segmento       código de segmento, origen, tamaño, offset de sus bytes
+    símbolo        nombre (offset y longitud en cadenas), segmento, banderas, valor
+    reubicación    segmento, tipo, offset dentro del segmento, índice de símbolo, sumando
+
+El valor de un símbolo es su dirección con las bases con que se ensambló el
+módulo (o su valor, si es una constante pública). Cada referencia a una
+dirección genera una reubicación:
+    ABS16  palabra = dirección del símbolo + sumando
+    REL8   byte    = dirección del símbolo + sumando - (dirección del byte + 1)
+"""
+
+import mmap
+import struct
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Union
+
+from ensamblador import Ensamblador8086, SEGMENTOS
+
+MAGIA = b'OBJ86\x00'
+VERSION = 1
+
+_CABECERA = struct.Struct('<6sHIIIIIIII')
+_SEGMENTO = struct.Struct('<BxHII')
+_SIMBOLO = struct.Struct('<IHBBi')
+_FIXUP = struct.Struct('<BBxxIIi')
+
+SIN_SEGMENTO = 0xFF
+PUBLICO = 0x01
+EXTERNO = 0x02
+
+TIPOS_FIXUP = ('ABS16', 'REL8')
+ALINEACION_DATOS = 16
+
+
+class ErrorObjeto(ValueError):
+    """Archivo objeto inválido, de otra versión o inconsistente."""
+
+
+@dataclass
+class SegmentoObjeto:
+    nombre: str
+    origen: int
+    datos: Union[bytes, memoryview]
+
+
+@dataclass(frozen=True)
+class SimboloObjeto:
+    nombre: str
+    segmento: Optional[str]     # None: externo o constante
+    valor: int
+    publico: bool = False
+    externo: bool = False
+
+
+@dataclass(frozen=True)
+class Fixup:
+    segmento: str
+    offset: int                 # Relativo al origen del segmento
+    tipo: str                   # 'ABS16' o 'REL8'
+    simbolo: int                # Índice en ModuloObjeto.simbolos
+    sumando: int = 0
+
+
+@dataclass
+class ModuloObjeto:
+    nombre: str = ''
+    segmentos: Dict[str, SegmentoObjeto] = field(default_factory=dict)
+    simbolos: List[SimboloObjeto] = field(default_factory=list)
+    fixups: List[Fixup] = field(default_factory=list)
+    _mapa: Optional[mmap.mmap] = field(default=None, repr=False)
+
+    # =====================================================================
+    # CONSTRUCCIÓN DESDE EL ENSAMBLADOR
+    # =====================================================================
+
+    @classmethod
+    def desde_ensamblador(cls, ensamblador: Ensamblador8086, nombre: str = '') -> 'ModuloObjeto':
+        """Requiere analizar_sintaxis() y generar_codificacion() previos."""
+        modulo = cls(nombre)
+        for segmento in SEGMENTOS:
+            origen, datos = ensamblador.imagen_segmento(segmento)
+            if not datos:
+                origen = ensamblador.disposicion.bases[segmento]
+            modulo.segmentos[segmento] = SegmentoObjeto(segmento, origen, bytes(datos))
+
+        indices: Dict[str, int] = {}
+        for simbolo in ensamblador.simbolos_listado():
+            publico = simbolo.nombre.lower() in ensamblador.publicos and not simbolo.ambito
+            if simbolo.tipo == 'Externo':
+                entrada = SimboloObjeto(simbolo.nombre, None, 0, externo=True)
+            elif simbolo.tipo == 'Constante':
+                if not publico:
+                    continue
+                try:
+                    entrada = SimboloObjeto(simbolo.nombre, None, ensamblador.resolver_simbolo(simbolo.nombre), True)
+                except ValueError:
+                    continue
+            elif simbolo.direccion:
+                segmento = 'DATA' if simbolo.tipo == 'Variable' else 'CODE'
+                entrada = SimboloObjeto(simbolo.nombre_calificado, segmento, int(simbolo.direccion, 16), publico)
+            else:
+                continue
+            indices[entrada.nombre] = len(modulo.simbolos)
+            modulo.simbolos.append(entrada)
+
+        for lc in ensamblador.lineas_codificadas:
+            for posicion, tipo, nombre, sumando in lc.get('fixups') or ():
+                segmento = lc['segmento']
+                if nombre not in indices:
+                    raise ErrorObjeto(f"Reubicación hacia '{nombre}' sin símbolo en la línea {lc['numero']}")
+                offset = int(lc['direccion'], 16) + posicion - modulo.segmentos[segmento].origen
+                modulo.fixups.append(Fixup(segmento, offset, tipo, indices[nombre], sumando))
+        return modulo
+
+    # =====================================================================
+    # SERIALIZACIÓN
+    # =====================================================================
+
+    def a_bytes(self) -> bytes:
+        cadenas = bytearray()
+        posiciones: Dict[str, int] = {}
+
+        def cadena(texto: str):
+            if texto not in posiciones:
+                posiciones[texto] = len(cadenas)
+                cadenas.extend(texto.encode('utf-8'))
+            return posiciones[texto], len(texto.encode('utf-8'))
+
+        segmentos = list(self.segmentos.values())
+        off_segmentos = _CABECERA.size
+        off_simbolos = off_segmentos + _SEGMENTO.size * len(segmentos)
+        off_fixups = off_simbolos + _SIMBOLO.size * len(self.simbolos)
+        off_cadenas = off_fixups + _FIXUP.size * len(self.fixups)
+
+        registros_simbolos = bytearray()
+        for simbolo in self.simbolos:
+            off, longitud = cadena(simbolo.nombre)
+            segmento = SEGMENTOS.index(simbolo.segmento) if simbolo.segmento else SIN_SEGMENTO
+            banderas = (PUBLICO if simbolo.publico else 0) | (EXTERNO if simbolo.externo else 0)
+            registros_simbolos += _SIMBOLO.pack(off, longitud, segmento, banderas, simbolo.valor)
+
+        registros_fixups = bytearray()
+        for fixup in self.fixups:
+            registros_fixups += _FIXUP.pack(SEGMENTOS.index(fixup.segmento), TIPOS_FIXUP.index(fixup.tipo) + 1,
+                                            fixup.offset, fixup.simbolo, fixup.sumando)
+
+        # Los bytes de cada segmento quedan alineados para leerlos directo del mapa
+        posicion = off_cadenas + len(cadenas)
+        registros_segmentos = bytearray()
+        datos = bytearray()
+        for segmento in segmentos:
+            relleno = -(posicion + len(datos)) % ALINEACION_DATOS
+            datos += bytes(relleno)
+            registros_segmentos += _SEGMENTO.pack(SEGMENTOS.index(segmento.nombre), segmento.origen,
+                                                  len(segmento.datos), posicion + len(datos))
+            datos += segmento.datos
+
+        cabecera = _CABECERA.pack(MAGIA, VERSION, len(segmentos), len(self.simbolos), len(self.fixups),
+                                  off_segmentos, off_simbolos, off_fixups, off_cadenas, len(cadenas))
+        return b''.join((cabecera, registros_segmentos, registros_simbolos, registros_fixups,
+                         bytes(cadenas), bytes(datos)))
+
+    def escribir(self, ruta: str):
+        with open(ruta, 'wb') as f:
+            f.write(self.a_bytes())
+
+    @classmethod
+    def desde_bufer(cls, bufer, nombre: str = '') -> 'ModuloObjeto':
+        """Lee un módulo desde bytes o un mmap. Los bytes de los segmentos no se copian."""
+        vista = memoryview(bufer)
+        if len(vista) < _CABECERA.size:
+            raise ErrorObjeto("Archivo objeto truncado")
+        (magia, version, n_segmentos, n_simbolos, n_fixups,
+         off_segmentos, off_simbolos, off_fixups, off_cadenas, tam_cadenas) = _CABECERA.unpack_from(vista)
+        if magia != MAGIA:
+            raise ErrorObjeto("No es un archivo objeto")
+        if version != VERSION:
+            raise ErrorObjeto(f"Versión de archivo objeto no soportada: {version}")
+        if off_cadenas + tam_cadenas > len(vista):
+            raise ErrorObjeto("Archivo objeto truncado")
+
+        cadenas = bytes(vista[off_cadenas:off_cadenas + tam_cadenas])
+        modulo = cls(nombre)
+        try:
+            fin = off_segmentos + _SEGMENTO.size * n_segmentos
+            for codigo, origen, tamano, off_datos in _SEGMENTO.iter_unpack(vista[off_segmentos:fin]):
+                if off_datos + tamano > len(vista):
+                    raise ErrorObjeto("Segmento fuera del archivo objeto")
+                nombre_seg = SEGMENTOS[codigo]
+                modulo.segmentos[nombre_seg] = SegmentoObjeto(nombre_seg, origen, vista[off_datos:off_datos + tamano])
+
+            fin = off_simbolos + _SIMBOLO.size * n_simbolos
+            for off, longitud, codigo, banderas, valor in _SIMBOLO.iter_unpack(vista[off_simbolos:fin]):
+                modulo.simbolos.append(SimboloObjeto(
+                    cadenas[off:off + longitud].decode('utf-8'),
+                    None if codigo == SIN_SEGMENTO else SEGMENTOS[codigo],
+                    valor, bool(banderas & PUBLICO), bool(banderas & EXTERNO)))
+
+            fin = off_fixups + _FIXUP.size * n_fixups
+            for codigo, tipo, offset, simbolo, sumando in _FIXUP.iter_unpack(vista[off_fixups:fin]):
+                if simbolo >= n_simbolos:
+                    raise ErrorObjeto("Reubicación con índice de símbolo inválido")
+                modulo.fixups.append(Fixup(SEGMENTOS[codigo], offset, TIPOS_FIXUP[tipo - 1], simbolo, sumando))
+        except (IndexError, struct.error) as e:
+            raise ErrorObjeto(f"Archivo objeto corrupto: {e}") from None
+        return modulo
+
+    @classmethod
+    def leer(cls, ruta: str) -> 'ModuloObjeto':
+        """Abre un archivo objeto con mmap; usar cerrar() (o 'with') al terminar."""
+        with open(ruta, 'rb') as f:
+            mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            modulo = cls.desde_bufer(mapa, ruta)
+        except Exception:
+            mapa.close()
+            raise
+        modulo._mapa = mapa
+        return modulo
+
+    def cerrar(self):
+        if self._mapa is not None:
+            for segmento in self.segmentos.values():
+                if isinstance(segmento.datos, memoryview):
+                    segmento.datos.release()
+            self._mapa.close()
+            self._mapa = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+def escribir_objeto(ensamblador: Ensamblador8086, ruta: str, nombre: str = '') -> ModuloObjeto:
+    modulo = ModuloObjeto.desde_ensamblador(ensamblador, nombre or ruta)
+    modulo.escribir(ruta)
+    return modulo
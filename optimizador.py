@@ -0,0 +1,214 @@
+"""
+Optimizador peephole para el segmento de código.
+
+Es una etapa opcional entre analizar_sintaxis() y generar_codificacion():
+recorre las instrucciones correctas con una ventana deslizante y elimina las
+que una regla marca como redundantes. Las líneas eliminadas se quitan de
+lineas_codigo (conservando su etiqueta, si la tenían), así que la primera
+pasada de generar_codificacion() vuelve a calcular las direcciones de todas
+las etiquetas y los desplazamientos de los saltos quedan correctos.
+
+Reglas predeterminadas (solo con instrucciones del conjunto permitido):
+- nop_redundante:      elimina NOP de relleno.
+- logica_tras_xor:     tras XOR r, r el registro vale 0; AND r, x / OR r, r /
+                       XOR r, r inmediatamente después no cambian ni el
+                       registro ni las banderas.
+- inc_muerto:          INC r seguido de XOR r, r; el XOR sobrescribe el
+                       registro y todas las banderas que modifica INC.
+
+Una secuencia de INC sobre el mismo registro no tiene una codificación más
+corta dentro del conjunto de instrucciones, por lo que solo se elimina cuando
+su resultado es descartado (inc_muerto).
+"""
+
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+from diagnosticos import Codigo, diagnostico
+from ensamblador import Ensamblador8086, Token, TipoToken
+
+
+@dataclass
+class InstruccionPeephole:
+    numero: int                 # Número de línea (1-based) en lineas_codigo
+    etiqueta: str               # Etiqueta en la misma línea ('' si no hay)
+    mnemonico: str
+    operandos: List[str]
+    tokens: List[Token]
+    barrera: bool = False       # Precedida por una etiqueta o pseudoinstrucción
+
+
+@dataclass
+class Regla:
+    nombre: str
+    ventana: int
+    # Recibe la ventana y retorna el índice (dentro de la ventana) a eliminar, o None
+    funcion: Callable[[List[InstruccionPeephole]], Optional[int]]
+
+
+@dataclass
+class ReporteOptimizacion:
+    eliminadas: List[tuple] = field(default_factory=list)  # (numero, linea, regla)
+    bytes_ahorrados: int = 0
+    ciclos_ahorrados: int = 0
+
+    def resumen(self) -> str:
+        return (f"{len(self.eliminadas)} instrucciones eliminadas, "
+                f"{self.bytes_ahorrados} bytes y ~{self.ciclos_ahorrados} ciclos ahorrados")
+
+
+# =========================================================================
+# CICLOS ESTIMADOS (8086, sin contar cálculo de dirección efectiva)
+# =========================================================================
+
+CICLOS_ESTIMADOS = {
+    'NOP': 3, 'CMC': 2, 'CMPSB': 22, 'POPA': 51, 'AAD': 60, 'AAM': 83,
+    'INT': 51, 'LEA': 2,
+    'JNAE': 16, 'JC': 16, 'JNE': 16, 'JNLE': 16, 'JA': 16, 'LOOPE': 18,
+}
+
+
+def estimar_ciclos(instr: InstruccionPeephole, ensamblador: Ensamblador8086) -> int:
+    mnem = instr.mnemonico
+    if mnem in CICLOS_ESTIMADOS:
+        return CICLOS_ESTIMADOS[mnem]
+    ops = instr.operandos
+    if mnem == 'INC':
+        return 2 if ops and ops[0] in ensamblador.registros_16bit else 3
+    if mnem in ('AND', 'OR', 'XOR') and len(ops) >= 2:
+        if ops[0] in ensamblador.registros and ops[1] in ensamblador.registros:
+            return 3
+        if '[' in ops[0] or '[' in ops[1]:
+            return 16
+        return 4
+    if mnem == 'MUL':
+        return 118 if ops and ops[0] in ensamblador.registros_16bit else 70
+    if mnem == 'IDIV':
+        return 165 if ops and ops[0] in ensamblador.registros_16bit else 101
+    return 0
+
+
+# =========================================================================
+# REGLAS
+# =========================================================================
+
+def _nop_redundante(ventana: List[InstruccionPeephole]) -> Optional[int]:
+    return 0 if ventana[0].mnemonico == 'NOP' else None
+
+
+def _es_xor_cero(instr: InstruccionPeephole) -> bool:
+    return (instr.mnemonico == 'XOR' and len(instr.operandos) == 2
+            and instr.operandos[0] == instr.operandos[1])
+
+
+def _logica_tras_xor(ventana: List[InstruccionPeephole]) -> Optional[int]:
+    primera, segunda = ventana
+    if not _es_xor_cero(primera) or len(segunda.operandos) != 2:
+        return None
+    reg = primera.operandos[0]
+    if segunda.operandos[0] != reg:
+        return None
+    if segunda.mnemonico == 'AND':
+        return 1
+    if segunda.mnemonico in ('OR', 'XOR') and segunda.operandos[1] == reg:
+        return 1
+    return None
+
+
+def _inc_muerto(ventana: List[InstruccionPeephole]) -> Optional[int]:
+    primera, segunda = ventana
+    if primera.mnemonico == 'INC' and primera.operandos and _es_xor_cero(segunda):
+        if primera.operandos[0] == segunda.operandos[0]:
+            return 0
+    return None
+
+
+REGLAS_PREDETERMINADAS: Dict[str, Regla] = {
+    'nop_redundante': Regla('nop_redundante', 1, _nop_redundante),
+    'logica_tras_xor': Regla('logica_tras_xor', 2, _logica_tras_xor),
+    'inc_muerto': Regla('inc_muerto', 2, _inc_muerto),
+}
+
+
+# =========================================================================
+# OPTIMIZADOR
+# =========================================================================
+
+class Optimizador:
+    def __init__(self, reglas: Optional[Iterable[Union[str, Regla]]] = None):
+        if reglas is None:
+            reglas = REGLAS_PREDETERMINADAS.values()
+        self.reglas: List[Regla] = [
+            REGLAS_PREDETERMINADAS[r] if isinstance(r, str) else r for r in reglas
+        ]
+
+    def recolectar(self, ensamblador: Ensamblador8086) -> List[InstruccionPeephole]:
+        """Instrucciones correctas en orden, marcando las que pueden ser destino de salto."""
+        instrucciones = []
+        barrera = True
+        for analisis in ensamblador.lineas_analizadas:
+            if analisis['resultado'] != 'Correcta':
+                continue
+            tokens = ensamblador.tokenizar_linea(analisis['linea'], analisis['numero'])
+            etiqueta = ''
+            resto = tokens
+            if tokens and tokens[0].tipo == TipoToken.SIMBOLO and tokens[0].valor.endswith(':'):
+                etiqueta = tokens[0].valor
+                resto = tokens[1:]
+            if not resto or resto[0].valor.upper() not in ensamblador.instrucciones:
+                barrera = True
+                continue
+            operandos = [t.valor.upper() for t in resto[1:] if t.valor != ',']
+            instrucciones.append(InstruccionPeephole(
+                analisis['numero'], etiqueta, resto[0].valor.upper(), operandos, tokens,
+                barrera or bool(etiqueta)))
+            barrera = False
+        return instrucciones
+
+    def aplicar(self, ensamblador: Ensamblador8086) -> ReporteOptimizacion:
+        """Optimiza ensamblador.lineas_codigo en su lugar. Requiere analizar_sintaxis() previo."""
+        reporte = ReporteOptimizacion()
+        instrucciones = self.recolectar(ensamblador)
+        analisis_por_linea = {a['numero']: a for a in ensamblador.lineas_analizadas}
+
+        i = 0
+        while i < len(instrucciones):
+            eliminada = False
+            for regla in self.reglas:
+                ventana = instrucciones[i:i + regla.ventana]
+                if len(ventana) < regla.ventana:
+                    continue
+                # Una etiqueta dentro de la ventana puede recibir saltos: no se toca
+                if any(instr.barrera for instr in ventana[1:]):
+                    continue
+                indice = regla.funcion(ventana)
+                if indice is None:
+                    continue
+                instr = ventana[indice]
+                self._eliminar(ensamblador, instr, regla, reporte, analisis_por_linea)
+                del instrucciones[i + indice]
+                if indice == 0 and instr.barrera and i < len(instrucciones):
+                    instrucciones[i].barrera = True
+                eliminada = True
+                break
+            if eliminada:
+                i = max(i - 1, 0)
+            else:
+                i += 1
+        return reporte
+
+    def _eliminar(self, ensamblador: Ensamblador8086, instr: InstruccionPeephole, regla: Regla,
+                  reporte: ReporteOptimizacion, analisis_por_linea: Dict[int, dict]):
+        linea_original = ensamblador.lineas_codigo[instr.numero - 1]
+        ensamblador.lineas_codigo[instr.numero - 1] = instr.etiqueta
+        analisis = analisis_por_linea.get(instr.numero)
+        if analisis is not None:
+            analisis['mensaje'] = diagnostico(Codigo.ELIMINADA_POR_OPTIMIZACION, regla.nombre)
+        reporte.eliminadas.append((instr.numero, linea_original.strip(), regla.nombre))
+        reporte.bytes_ahorrados += ensamblador.calcular_tamano_instruccion(instr.tokens)
+        reporte.ciclos_ahorrados += estimar_ciclos(instr, ensamblador)
+
+
+def optimizar(ensamblador: Ensamblador8086,
+              reglas: Optional[Iterable[Union[str, Regla]]] = None) -> ReporteOptimizacion:
+    return Optimizador(reglas).aplicar(ensamblador)
@@ -0,0 +1,492 @@
+"""
+Etapas de preprocesamiento que se ejecutan antes de tokenizar y validar.
+
+Cada etapa recibe y retorna una lista de LineaFuente. Una LineaFuente conserva
+el número de línea original (para diagnósticos) y, si la etapa ya conoce los
+tokens de la línea, los guarda para que el análisis no vuelva a tokenizarla.
+
+Macros (MACRO/ENDM):
+    nombre MACRO p1, p2
+        ...cuerpo...
+    ENDM
+
+El cuerpo se tokeniza una sola vez al definir la macro. Al invocarla, los
+parámetros se sustituyen token por token (sin volver a tokenizar el texto) y
+la expansión queda en caché para cada combinación de argumentos.
+
+Inclusión (INCLUDE archivo):
+    Cada archivo incluido se lee y tokeniza una sola vez por proceso y por
+    contenido (hash SHA-1). Las líneas y tokens en caché se insertan por
+    referencia, de modo que cientos de programas que incluyen la misma
+    cabecera no la vuelven a tokenizar.
+
+Ensamblado condicional (IF expr / IFDEF sím / IFNDEF sím / ELSE / ENDIF):
+    Se evalúa con un recorrido de texto, sin tokenizar. Las líneas de bloques
+    inactivos se marcan como 'Omitida' y nunca llegan a tokenizar_linea ni a
+    validar_linea; las directivas se marcan como 'Correcta' (o 'Incorrecta'
+    si están mal formadas).
+"""
+
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+
+from ensamblador import INTERVALO_PROGRESO, Token, TipoToken
+from expresiones import ErrorExpresion, evaluar
+
+# Profundidad máxima de macros que invocan otras macros (evita recursión infinita)
+MAX_PROFUNDIDAD_MACROS = 32
+
+# Profundidad máxima de archivos incluidos dentro de otros
+MAX_PROFUNDIDAD_INCLUDES = 16
+
+# Contenidos distintos que conserva CacheIncludes (se descarta el menos usado)
+TAMANO_CACHE_INCLUDES = 256
+
+
+@dataclass
+class LineaFuente:
+    texto: str
+    origen: int                             # Número de línea en el archivo fuente
+    tokens: Optional[List[Token]] = None    # Tokens ya conocidos (expansiones)
+    # (resultado, mensaje) ya decidido por el preprocesador; la línea no se analiza
+    resultado: Optional[Tuple[str, str]] = None
+
+
+@dataclass
+class Macro:
+    nombre: str
+    parametros: Tuple[str, ...]
+    cuerpo: List[Tuple[str, List[Token]]]   # (texto, tokens) de cada línea
+    linea: int
+
+
+# Expansión en caché: (texto, ((valor, tipo), ...)) por línea
+Expansion = List[Tuple[str, Tuple[Tuple[str, TipoToken], ...]]]
+
+
+class ProcesadorMacros:
+    def __init__(self, ensamblador):
+        self.ensamblador = ensamblador
+        self.macros: Dict[str, Macro] = {}
+        self._cache: Dict[Tuple[str, Tuple[str, ...]], Expansion] = {}
+        self.expansiones = 0
+        self.aciertos_cache = 0
+
+    def procesar(self, lineas: List[LineaFuente], profundidad: int = 0,
+                 progreso: Optional[Callable[[str, int, int], None]] = None) -> List[LineaFuente]:
+        resultado: List[LineaFuente] = []
+        definicion: Optional[Macro] = None
+        lineas_definicion: List[LineaFuente] = []
+        total = len(lineas)
+
+        for i, linea in enumerate(lineas):
+            if progreso is not None and not i % INTERVALO_PROGRESO:
+                progreso('macros', i, total)
+            if linea.resultado is not None:
+                (lineas_definicion if definicion is not None else resultado).append(linea)
+                continue
+            palabras = self.ensamblador.limpiar_comentarios(linea.texto).split()
+
+            # === Dentro de una definición: acumular hasta ENDM ===
+            if definicion is not None:
+                lineas_definicion.append(linea)
+                if palabras and palabras[0].upper() == 'ENDM':
+                    nombre = definicion.nombre.upper()
+                    if nombre in self.macros:
+                        # Redefinición: las expansiones en caché son de la versión anterior
+                        self._cache = {c: e for c, e in self._cache.items() if c[0] != nombre}
+                    self.macros[nombre] = definicion
+                    definicion = None
+                    lineas_definicion = []
+                else:
+                    texto = self.ensamblador.limpiar_comentarios(linea.texto).strip()
+                    if texto:
+                        definicion.cuerpo.append((texto, self.ensamblador.tokenizar_linea(texto, linea.origen)))
+                continue
+
+            # === Inicio de definición: nombre MACRO [parámetros] ===
+            if len(palabras) >= 2 and palabras[1].upper() == 'MACRO':
+                tokens = self.ensamblador.tokenizar_linea(linea.texto, linea.origen)
+                parametros = tuple(t.valor for t in tokens[2:] if t.valor != ',')
+                definicion = Macro(tokens[0].valor, parametros, [], linea.origen)
+                lineas_definicion = [linea]
+                continue
+
+            # === Invocación: [etiqueta:] nombre [argumentos] ===
+            indice_nombre = 1 if palabras and palabras[0].endswith(':') else 0
+            if len(palabras) > indice_nombre and palabras[indice_nombre].upper() in self.macros:
+                if profundidad >= MAX_PROFUNDIDAD_MACROS:
+                    resultado.append(linea)
+                    continue
+                if indice_nombre:
+                    resultado.append(LineaFuente(palabras[0], linea.origen))
+                tokens = self.ensamblador.tokenizar_linea(linea.texto, linea.origen)
+                argumentos = tuple(t for t in tokens[indice_nombre + 1:] if t.valor != ',')
+                expandidas = self.expandir(palabras[indice_nombre].upper(), argumentos, linea.origen)
+                resultado.extend(self.procesar(expandidas, profundidad + 1))
+                continue
+
+            resultado.append(linea)
+
+        # MACRO sin ENDM: se dejan las líneas para que la validación las reporte
+        if definicion is not None:
+            resultado.extend(lineas_definicion)
+        if progreso is not None:
+            progreso('macros', total, total)
+        return resultado
+
+    def expandir(self, nombre: str, argumentos: Tuple[Token, ...], origen: int) -> List[LineaFuente]:
+        """Expande una invocación. Todas las líneas expandidas apuntan a la línea de la invocación."""
+        clave = (nombre, tuple(a.valor for a in argumentos))
+        expansion = self._cache.get(clave)
+        if expansion is None:
+            expansion = self._sustituir(self.macros[nombre], argumentos)
+            self._cache[clave] = expansion
+        else:
+            self.aciertos_cache += 1
+        self.expansiones += 1
+
+        return [
+            LineaFuente(texto, origen, [Token(valor, tipo, origen, pos) for pos, (valor, tipo) in enumerate(tokens)])
+            for texto, tokens in expansion
+        ]
+
+    def _sustituir(self, macro: Macro, argumentos: Tuple[Token, ...]) -> Expansion:
+        reemplazos: Dict[str, Token] = {}
+        for i, parametro in enumerate(macro.parametros):
+            reemplazos[parametro.upper()] = argumentos[i] if i < len(argumentos) else None
+
+        patron = None
+        if reemplazos:
+            patron = re.compile(r'\b(' + '|'.join(re.escape(p) for p in macro.parametros) + r')\b', re.IGNORECASE)
+
+        def sustituir_texto(texto: str) -> str:
+            if patron is None:
+                return texto
+            return patron.sub(lambda m: reemplazos[m.group(1).upper()].valor
+                              if reemplazos[m.group(1).upper()] else '', texto)
+
+        expansion: Expansion = []
+        for texto, tokens in macro.cuerpo:
+            nuevos = []
+            for tok in tokens:
+                clave = tok.valor.upper()
+                if clave in reemplazos:
+                    arg = reemplazos[clave]
+                    if arg is not None:
+                        nuevos.append((arg.valor, arg.tipo))
+                elif patron is not None and len(tok.valor) > 1 and patron.search(tok.valor):
+                    # Parámetro dentro de un elemento compuesto, ej. [BX+desp]
+                    valor = sustituir_texto(tok.valor)
+                    nuevos.append((valor, self.ensamblador.identificar_tipo_token(valor)))
+                else:
+                    nuevos.append((tok.valor, tok.tipo))
+            expansion.append((sustituir_texto(texto), tuple(nuevos)))
+        return expansion
+
+
+# =========================================================================
+# INCLUDE
+# =========================================================================
+
+@dataclass(frozen=True)
+class ArchivoIncluido:
+    ruta: str
+    hash: str
+    lineas: Tuple[Tuple[str, Tuple[Token, ...]], ...]   # (texto, tokens) por línea
+
+
+class CacheIncludes:
+    """
+    Caché de archivos incluidos compartida por todos los ensambladores del proceso.
+    Se indexa por hash de contenido; (ruta, mtime, tamaño) evita releer archivos sin cambios.
+    Dos archivos con el mismo contenido comparten los tokens, pero cada uno conserva
+    su ruta: de ella dependen sus INCLUDE relativos y la detección de ciclos.
+    Guarda solo los tokens: el análisis de las líneas depende de los símbolos y
+    el segmento de quien incluye. Para procesos largos (vigilancia, servicio)
+    cada ruta recuerda solo su último (mtime, tamaño) y se conservan a lo sumo
+    TAMANO_CACHE_INCLUDES contenidos.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._por_hash: 'OrderedDict[str, ArchivoIncluido]' = OrderedDict()
+        self._stat_por_ruta: Dict[str, Tuple[int, int, str]] = {}    # ruta -> (mtime, tamaño, hash)
+        self.lecturas = 0
+        self.aciertos = 0
+
+    def __len__(self) -> int:
+        return len(self._por_hash)
+
+    def obtener(self, ruta: Path, ensamblador) -> ArchivoIncluido:
+        """Retorna el archivo tokenizado. Lanza OSError si no se puede leer."""
+        ruta_resuelta = str(ruta.resolve())
+        info = os.stat(ruta_resuelta)
+        firma = (info.st_mtime_ns, info.st_size)
+
+        with self._lock:
+            estado = self._stat_por_ruta.get(ruta_resuelta)
+            if estado is not None and estado[:2] == firma and estado[2] in self._por_hash:
+                self.aciertos += 1
+                self._por_hash.move_to_end(estado[2])
+                return self._en_ruta(self._por_hash[estado[2]], ruta_resuelta)
+
+        with open(ruta_resuelta, 'rb') as f:
+            contenido = f.read()
+        hash_contenido = hashlib.sha1(contenido).hexdigest()
+
+        with self._lock:
+            # Reemplaza la firma anterior de la ruta: un archivo editado no deja claves viejas
+            self._stat_por_ruta[ruta_resuelta] = firma + (hash_contenido,)
+            archivo = self._por_hash.get(hash_contenido)
+            if archivo is not None:
+                self.aciertos += 1
+                self._por_hash.move_to_end(hash_contenido)
+                return self._en_ruta(archivo, ruta_resuelta)
+
+        # Tokenizar fuera del lock; si otro hilo gana la carrera se conserva el suyo
+        texto = contenido.decode('utf-8', errors='ignore')
+        lineas = tuple(
+            (linea, tuple(ensamblador.tokenizar_linea(linea, num)))
+            for num, linea in enumerate(texto.splitlines(), 1)
+        )
+        archivo = ArchivoIncluido(ruta_resuelta, hash_contenido, lineas)
+        with self._lock:
+            self.lecturas += 1
+            archivo = self._por_hash.setdefault(hash_contenido, archivo)
+            self._por_hash.move_to_end(hash_contenido)
+            if len(self._por_hash) > TAMANO_CACHE_INCLUDES:
+                self._descartar(self._por_hash.popitem(last=False)[0])
+            return self._en_ruta(archivo, ruta_resuelta)
+
+    def _descartar(self, hash_contenido: str):
+        # Las rutas con ese contenido se volverán a leer; se olvidan sus firmas
+        for ruta in [r for r, estado in self._stat_por_ruta.items() if estado[2] == hash_contenido]:
+            del self._stat_por_ruta[ruta]
+
+    @staticmethod
+    def _en_ruta(archivo: ArchivoIncluido, ruta: str) -> ArchivoIncluido:
+        # Otro archivo con el mismo contenido: comparte los tokens pero no la ruta
+        # (la usan los INCLUDE relativos anidados y la detección de ciclos)
+        return archivo if archivo.ruta == ruta else replace(archivo, ruta=ruta)
+
+    def limpiar(self):
+        with self._lock:
+            self._por_hash.clear()
+            self._stat_por_ruta.clear()
+            self.lecturas = 0
+            self.aciertos = 0
+
+
+CACHE_INCLUDES = CacheIncludes()
+
+
+class ProcesadorIncludes:
+    def __init__(self, ensamblador, directorio: Optional[Path] = None,
+                 cache: Optional[CacheIncludes] = None):
+        self.ensamblador = ensamblador
+        self.directorio = Path(directorio) if directorio is not None else Path.cwd()
+        self.cache = cache if cache is not None else CACHE_INCLUDES
+        self.incluidos: List[str] = []      # Rutas resueltas, en orden de inclusión
+
+    @staticmethod
+    def ruta_include(texto: str) -> Optional[str]:
+        """Ruta de una línea 'INCLUDE archivo', o None si la línea no es un INCLUDE"""
+        texto = texto.split(';', 1)[0].strip()
+        partes = texto.split(None, 1)
+        if len(partes) != 2 or partes[0].upper() != 'INCLUDE':
+            return None
+        return partes[1].strip().strip('"\'<>')
+
+    def procesar(self, lineas: List[LineaFuente],
+                 progreso: Optional[Callable[[str, int, int], None]] = None) -> List[LineaFuente]:
+        """Expande todos los INCLUDE, sin evaluar condicionales (ver ProcesadorCondicionales)"""
+        return self._procesar(lineas, None, (), progreso)
+
+    def _procesar(self, lineas: List[LineaFuente], directorio: Optional[Path], pila: Tuple[str, ...],
+                  progreso: Optional[Callable[[str, int, int], None]] = None) -> List[LineaFuente]:
+        resultado: List[LineaFuente] = []
+        total = len(lineas)
+        for i, linea in enumerate(lineas):
+            if progreso is not None and not i % INTERVALO_PROGRESO:
+                progreso('includes', i, total)
+            incluido = self.expandir(linea, directorio, pila)
+            if incluido is None:
+                resultado.append(linea)
+            else:
+                resultado.extend(self._procesar(*incluido))
+        if progreso is not None:
+            progreso('includes', total, total)
+        return resultado
+
+    def expandir(self, linea: LineaFuente, directorio: Optional[Path],
+                 pila: Tuple[str, ...]) -> Optional[Tuple[List[LineaFuente], Path, Tuple[str, ...]]]:
+        """
+        Si 'linea' es un INCLUDE que se puede leer, retorna (líneas incluidas, su
+        directorio, pila de archivos abiertos con el incluido). None si la línea
+        no es un INCLUDE, si el archivo no existe o si se incluiría a sí mismo:
+        la línea queda para que la validación la reporte.
+        """
+        if linea.resultado is not None or 'INCLUDE' not in linea.texto.upper():
+            return None
+        ruta = self.ruta_include(linea.texto)
+        if ruta is None:
+            return None
+
+        ruta_archivo = Path(ruta)
+        if not ruta_archivo.is_absolute():
+            ruta_archivo = (directorio if directorio is not None else self.directorio) / ruta_archivo
+        try:
+            archivo = self.cache.obtener(ruta_archivo, self.ensamblador)
+        except OSError:
+            return None
+        if archivo.ruta in pila or len(pila) >= MAX_PROFUNDIDAD_INCLUDES:
+            return None
+
+        self.incluidos.append(archivo.ruta)
+        # Todas las líneas incluidas apuntan a la línea del INCLUDE
+        incluidas = [LineaFuente(texto, linea.origen, list(tokens))
+                     for texto, tokens in archivo.lineas]
+        return incluidas, Path(archivo.ruta).parent, pila + (archivo.ruta,)
+
+
+# =========================================================================
+# ENSAMBLADO CONDICIONAL
+# =========================================================================
+
+DIRECTIVAS_CONDICIONALES = frozenset({'IF', 'IFDEF', 'IFNDEF', 'ELSE', 'ENDIF'})
+
+_PATRON_EQU = re.compile(r'^\s*([A-Za-z_@.][A-Za-z0-9_]*)\s+EQU\s+(.+)$', re.IGNORECASE)
+
+OMITIDA = ('Omitida', 'Bloque condicional inactivo')
+
+
+class ProcesadorCondicionales:
+    """
+    Evalúa IF/IFDEF/IFNDEF/ELSE/ENDIF. Los símbolos disponibles son las
+    definiciones pasadas por la API y las constantes EQU que aparecen antes
+    en bloques activos. Con un ProcesadorIncludes, los INCLUDE de bloques
+    activos se expanden en el mismo recorrido y en orden: un IF ve los EQU
+    de las cabeceras incluidas antes que él, y los archivos de bloques
+    inactivos no se leen.
+    """
+
+    def __init__(self, definiciones: Optional[Mapping[str, int]] = None):
+        self.definiciones: Dict[str, int] = {k.upper(): v for k, v in (definiciones or {}).items()}
+        self._constantes: Dict[str, str] = {}
+        self.omitidas = 0
+
+    def definido(self, nombre: str) -> bool:
+        nombre = nombre.upper()
+        return nombre in self.definiciones or nombre in self._constantes
+
+    def _resolver(self, nombre: str, pila: Tuple[str, ...] = ()) -> int:
+        nombre = nombre.upper()
+        if nombre in self.definiciones:
+            return self.definiciones[nombre]
+        if nombre in self._constantes and nombre not in pila:
+            return evaluar(self._constantes[nombre], lambda n: self._resolver(n, pila + (nombre,)),
+                           self._sin_offset)
+        raise ErrorExpresion(f"Símbolo '{nombre}' no definido en condición")
+
+    @staticmethod
+    def _sin_offset(nombre: str) -> int:
+        raise ErrorExpresion("OFFSET no se puede usar en una condición")
+
+    def procesar(self, lineas: List[LineaFuente],
+                 progreso: Optional[Callable[[str, int, int], None]] = None,
+                 includes: Optional['ProcesadorIncludes'] = None) -> List[LineaFuente]:
+        resultado: List[LineaFuente] = []
+        # Pila de (activo, rama ya tomada, se vio ELSE, línea del IF)
+        pila: List[List] = []
+        activo = True
+        total = len(lineas)
+        # Archivos en curso: (líneas restantes, directorio, archivos abiertos). Un
+        # INCLUDE activo apila el suyo; el progreso cuenta las líneas del principal
+        entradas = [(iter(lineas), None, ())]
+        i = 0
+
+        while entradas:
+            linea = next(entradas[-1][0], None)
+            if linea is None:
+                entradas.pop()
+                continue
+            if len(entradas) == 1:
+                if progreso is not None and not i % INTERVALO_PROGRESO:
+                    progreso('condicionales', i, total)
+                i += 1
+            if linea.resultado is not None:
+                resultado.append(linea)
+                continue
+            texto = linea.texto.split(';', 1)[0].strip()
+            palabras = texto.split(None, 1)
+            directiva = palabras[0].upper() if palabras else ''
+
+            if directiva not in DIRECTIVAS_CONDICIONALES:
+                if not activo:
+                    linea.resultado = OMITIDA
+                    self.omitidas += 1
+                elif includes is not None and directiva == 'INCLUDE':
+                    _, directorio, abiertos = entradas[-1]
+                    incluido = includes.expandir(linea, directorio, abiertos)
+                    if incluido is not None:
+                        incluidas, directorio, abiertos = incluido
+                        entradas.append((iter(incluidas), directorio, abiertos))
+                        continue
+                elif 'EQU' in texto.upper():
+                    m = _PATRON_EQU.match(texto)
+                    if m:
+                        self._constantes[m.group(1).upper()] = m.group(2).strip()
+                resultado.append(linea)
+                continue
+
+            argumento = palabras[1].strip() if len(palabras) > 1 else ''
+            linea.resultado = ('Correcta', 'Directiva condicional')
+
+            if directiva in ('IF', 'IFDEF', 'IFNDEF'):
+                condicion = False
+                if activo:
+                    condicion, error = self._evaluar(directiva, argumento)
+                    if error:
+                        linea.resultado = ('Incorrecta', error)
+                pila.append([activo, condicion, False, linea])
+                activo = activo and condicion
+            elif not pila:
+                linea.resultado = ('Incorrecta', f"{directiva} sin IF")
+            elif directiva == 'ELSE':
+                marco = pila[-1]
+                if marco[2]:
+                    linea.resultado = ('Incorrecta', "ELSE repetido")
+                marco[2] = True
+                activo = marco[0] and not marco[1]
+                marco[1] = True
+            else:  # ENDIF
+                activo = pila.pop()[0]
+
+            if linea.resultado[0] == 'Correcta' and argumento and directiva in ('ELSE', 'ENDIF'):
+                linea.resultado = ('Incorrecta', f"{directiva} no lleva operandos")
+            resultado.append(linea)
+
+        for marco in pila:
+            marco[3].resultado = ('Incorrecta', "IF sin ENDIF")
+        if progreso is not None:
+            progreso('condicionales', total, total)
+        return resultado
+
+    def _evaluar(self, directiva: str, argumento: str) -> Tuple[bool, Optional[str]]:
+        if not argumento:
+            return False, f"{directiva} requiere un operando"
+        if directiva == 'IFDEF':
+            return self.definido(argumento), None
+        if directiva == 'IFNDEF':
+            return not self.definido(argumento), None
+        try:
+            return evaluar(argumento, self._resolver, self._sin_offset) != 0, None
+        except ErrorExpresion as e:
+            return False, str(e)
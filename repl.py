@@ -0,0 +1,209 @@
+"""
+Sesión interactiva (REPL) del ensamblador 8086.
+
+Cada línea se tokeniza, valida y codifica en cuanto se escribe, sobre un
+Ensamblador8086 que conserva el estado entre líneas: segmento actual, tabla
+de símbolos (con los ámbitos de PROC) y contador de direcciones. Se usa el
+camino incremental (analizar_linea, ubicar_linea y codificar_linea) sobre la
+línea nueva, así que el costo de cada línea no depende de cuántas se hayan
+escrito antes. Como los saltos solo pueden ir hacia atrás, una sola pasada
+basta para conocer todas las direcciones.
+
+Las líneas no pasan por el preprocesador (INCLUDE, macros, IF).
+
+Comandos (empiezan con ':'):
+    :simbolos            tabla de símbolos
+    :segmento [NOMBRE]   imagen del segmento en hexadecimal (CODE por omisión)
+    :estado              segmento, dirección y ámbito actuales
+    :reiniciar           descarta todo lo ensamblado
+    :ayuda               esta ayuda
+    :salir               termina (también Ctrl+D)
+
+Uso:
+    python repl.py [--base CODE=100h] [--com]
+"""
+
+import io
+import sys
+from dataclasses import dataclass
+from typing import List, Optional, TextIO
+
+from ensamblador import DisposicionSegmentos, Ensamblador8086, EstadoAnalisis, Token
+
+BYTES_POR_FILA = 16
+
+
+@dataclass
+class Paso:
+    """Lo que produjo una línea: tokens, análisis y codificación"""
+    tokens: List[Token]
+    analisis: dict
+    codificada: dict
+
+    @property
+    def correcta(self) -> bool:
+        return self.analisis['resultado'] == 'Correcta'
+
+    @property
+    def bytes(self) -> str:
+        """Código máquina o datos generados (hexadecimal), '' si la línea no genera bytes"""
+        codigo = self.codificada['codigo_maquina']
+        return codigo.split('|', 1)[1].strip() if '|' in codigo else ''
+
+
+class Sesion:
+    def __init__(self, bases: Optional[List[str]] = None):
+        self.bases = list(bases or [])
+        self.reiniciar()
+
+    def reiniciar(self):
+        self.asm = Ensamblador8086()
+        self.asm.disposicion = DisposicionSegmentos.desde_texto(self.bases)
+        self.asm.lineas_codigo = []
+        self.estado = EstadoAnalisis()
+        self.segmento: Optional[str] = None      # Segmento de la codificación
+
+    def procesar(self, texto: str) -> Optional[Paso]:
+        """
+        Ensambla una línea; None si no tiene contenido (vacía o solo comentario).
+        Si el ensamblador lanza una excepción, la línea se descarta y se propaga.
+        """
+        asm = self.asm
+        i = len(asm.lineas_codigo)
+        ambito, analizadas = asm.ambito_actual, len(asm.lineas_analizadas)
+        asm.lineas_codigo.append(texto)
+        try:
+            return self._procesar(i, texto)
+        except Exception:
+            del asm.lineas_codigo[i:], asm.lineas_analizadas[analizadas:], asm.lineas_codificadas[analizadas:]
+            asm.ambito_actual = ambito
+            raise
+
+    def _procesar(self, i: int, texto: str) -> Optional[Paso]:
+        asm = self.asm
+        linea = texto.strip()
+        linea_limpia = asm.limpiar_comentarios(linea).strip()
+        if not linea_limpia or linea.startswith(';'):
+            return None
+        analisis = asm.analizar_linea(i, linea_limpia, self.estado)
+        if analisis is None:
+            return None
+        asm.lineas_analizadas.append(analisis)
+
+        # ubicar_linea y codificar_linea ponen el ámbito de la línea; el análisis
+        # de la siguiente necesita el que dejó analizar_linea (PROC/ENDP)
+        ambito = asm.ambito_actual
+        disposicion = asm.disposicion
+        contadores, abierto, direccion = dict(disposicion.contadores), disposicion.segmento, disposicion.direccion
+        asm.ubicar_linea(i, linea_limpia, analisis, self.segmento)
+        disposicion.contadores, disposicion.segmento, disposicion.direccion = contadores, abierto, direccion
+        codificada, self.segmento = asm.codificar_linea(i, linea_limpia, analisis, self.segmento)
+        asm.lineas_codificadas.append(codificada)
+        asm.ambito_actual = ambito
+        return Paso(asm.tokens_de_linea(i, linea_limpia), analisis, codificada)
+
+    # === Consultas ===
+
+    def simbolos(self) -> List[str]:
+        tablas = [self.asm.tabla_simbolos] + list(self.asm.ambitos.values())
+        filas = []
+        for tabla in tablas:
+            for simbolo in tabla.values():
+                filas.append(f"{simbolo.nombre_calificado:<20} {simbolo.tipo:<14} {simbolo.tamanio:<6} "
+                             f"{simbolo.direccion or '----':<6} {simbolo.valor}".rstrip())
+        return filas
+
+    def imagen(self, segmento: str = 'CODE') -> List[str]:
+        """Volcado hexadecimal del segmento: 'DIRECCIÓN  bytes'"""
+        buffer = io.BytesIO()
+        origen, _ = self.asm.escribir_segmento(buffer, segmento.upper())
+        contenido = buffer.getvalue()
+        return [f"{origen + k:04X}  {contenido[k:k + BYTES_POR_FILA].hex(' ').upper()}"
+                for k in range(0, len(contenido), BYTES_POR_FILA)]
+
+    def resumen_estado(self) -> str:
+        asm = self.asm
+        return (f"segmento {self.segmento or '-'}, dirección {asm.disposicion.direccion:04X}, "
+                f"ámbito {asm.ambito_actual.nombre or 'global'}, {len(asm.lineas_analizadas)} líneas, "
+                f"{sum(a['resultado'] == 'Incorrecta' for a in asm.lineas_analizadas)} incorrectas")
+
+
+def formatear(paso: Paso) -> List[str]:
+    tokens = '  '.join(f"{t.valor} [{t.tipo.value}]" for t in paso.tokens)
+    lineas = [f"  tokens:  {tokens}", f"  {paso.analisis['resultado']}: {paso.analisis['mensaje']}"]
+    if paso.correcta and paso.codificada['segmento']:
+        lineas.append(f"  {paso.codificada['segmento']}:{paso.codificada['direccion']}  {paso.bytes}".rstrip())
+    return lineas
+
+
+def ejecutar(sesion: Sesion, entrada: TextIO = sys.stdin, salida: TextIO = sys.stdout,
+             indicador: str = 'asm> ') -> int:
+    def escribir(lineas):
+        for linea in lineas:
+            print(linea, file=salida)
+
+    while True:
+        if indicador:
+            print(indicador, end='', file=salida, flush=True)
+        texto = entrada.readline()
+        if not texto:
+            break
+        texto = texto.rstrip('\n')
+        if texto.strip().startswith(':'):
+            comando, _, argumento = texto.strip()[1:].partition(' ')
+            comando = comando.lower()
+            if comando in ('salir', 'q'):
+                break
+            elif comando == 'simbolos':
+                escribir(['  ' + fila for fila in sesion.simbolos()] or ["  (tabla vacía)"])
+            elif comando == 'segmento':
+                try:
+                    filas = sesion.imagen(argumento.strip() or 'CODE')
+                    escribir(['  ' + fila for fila in filas] or ["  (segmento vacío)"])
+                except (KeyError, ValueError) as e:
+                    escribir([f"  Segmento inválido: {e}"])
+            elif comando == 'estado':
+                escribir([f"  {sesion.resumen_estado()}"])
+            elif comando == 'reiniciar':
+                sesion.reiniciar()
+            elif comando == 'ayuda':
+                escribir(('Comandos' + __doc__.split('Comandos', 1)[1].split('\nUso:', 1)[0]).rstrip().splitlines())
+            else:
+                escribir([f"  Comando desconocido: :{comando} (:ayuda)"])
+            continue
+        try:
+            paso = sesion.procesar(texto)
+        except Exception as e:
+            # Un fallo interno en una línea no termina la sesión
+            escribir([f"  Error interno: {e!r}"])
+            continue
+        if paso is not None:
+            escribir(formatear(paso))
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sesión interactiva del ensamblador 8086")
+    parser.add_argument('--base', action='append', default=[], metavar='SEG=DIR',
+                        help="Dirección base de un segmento, ej. CODE=100h (repetible)")
+    parser.add_argument('--com', action='store_true', help="Atajo para --base CODE=100h")
+    args = parser.parse_args(argv)
+    try:
+        sesion = Sesion((['CODE=100h'] if args.com else []) + args.base)
+    except ValueError as e:
+        parser.error(str(e))
+
+    interactivo = sys.stdin.isatty()
+    if interactivo:
+        try:
+            import readline  # noqa: F401  (historial y edición de línea)
+        except ImportError:
+            pass
+        print("Ensamblador 8086 — :ayuda para ver los comandos")
+    return ejecutar(sesion, indicador='asm> ' if interactivo else '')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,383 @@
+"""
+Servicio local de ensamblado: HTTP/1.1 sobre TCP o socket Unix con asyncio.
+
+Evita arrancar un proceso de Python por archivo: el servidor mantiene un
+grupo de procesos con el ensamblador ya importado y, en cada uno, una
+instancia caliente para validar líneas (caché LRU de validar_texto).
+
+    POST /ensamblar  {"texto": "...", "bases": {"CODE": 256}, "definiciones": {"DEPURAR": 1}}
+        -> {"errores": n, "lineas_analizadas": [...], "lineas_codificadas": [...],
+            "simbolos": [...], "segmentos": {"CODE": {"origen": 256, "bytes": "hex"}}}
+    POST /validar    {"lineas": ["xor ax, bx", ...], "segmento": "CODE", "contexto": "programa opcional"}
+        -> {"resultados": [{"resultado": ..., "mensaje": ..., "codigo": ...}, ...]}
+    GET  /estado     -> contadores de solicitudes y lotes
+
+Las líneas tienen las mismas claves que Ensamblador8086.lineas_analizadas /
+lineas_codificadas (mensaje como texto; datos como hex). Las solicitudes que
+llegan juntas se agrupan en lotes (hasta --lote, esperando a lo sumo
+--ventana-ms); cada lote se reparte en una tarea por proceso del grupo, así
+el costo de comunicación entre procesos se reparte entre sus solicitudes sin
+que un solo proceso atienda todo el lote.
+
+Uso:
+    python servicio.py [--host 127.0.0.1] [--puerto 8086] [--unix /tmp/ensamblador.sock]
+                       [--procesos N] [--lote 32] [--ventana-ms 2]
+"""
+
+import asyncio
+import json
+import os
+import signal
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, List, Optional, Tuple
+
+from ensamblador import SEGMENTOS, Ensamblador8086, ensamblar
+
+PUERTO_PREDETERMINADO = 8086
+TAMANO_LOTE = 32
+VENTANA_LOTE = 0.002
+MAX_CUERPO = 16 << 20
+RAZONES = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+class ErrorSolicitud(Exception):
+    def __init__(self, estado: int, mensaje: str):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+# =========================================================================
+# TRABAJO (se ejecuta en los procesos del grupo)
+# =========================================================================
+
+_validador: Optional[Ensamblador8086] = None
+
+
+def _iniciar_trabajador():
+    global _validador
+    _validador = Ensamblador8086()
+
+
+def _calentar():
+    """Tarea vacía: obliga al grupo a crear sus procesos (ver Servicio.iniciar)"""
+
+
+def _leer_bases(bases) -> Optional[dict]:
+    if bases is None:
+        return None
+    if not isinstance(bases, dict):
+        raise ErrorSolicitud(400, "'bases' debe ser un objeto {segmento: dirección}")
+    for nombre, direccion in bases.items():
+        if nombre.upper().lstrip('.') not in SEGMENTOS:
+            raise ErrorSolicitud(400, f"Segmento desconocido en 'bases': '{nombre}'")
+        if not isinstance(direccion, int) or isinstance(direccion, bool) or not 0 <= direccion <= 0xFFFFF:
+            raise ErrorSolicitud(400, f"Dirección inválida para '{nombre}' en 'bases': {direccion!r}")
+    return {nombre.upper().lstrip('.'): direccion for nombre, direccion in bases.items()}
+
+
+def _datos_json(registros) -> List[Any]:
+    salida = []
+    for reg in registros or ():
+        if isinstance(reg, (bytes, bytearray)):
+            salida.append(bytes(reg).hex().upper())
+        else:
+            salida.append({'cantidad': reg.cantidad, 'patron': reg.patron.hex().upper()})
+    return salida
+
+
+def trabajo_ensamblar(datos: dict) -> dict:
+    texto = datos.get('texto')
+    if not isinstance(texto, str):
+        raise ErrorSolicitud(400, "Falta 'texto'")
+    resultado = ensamblar(texto, bases=_leer_bases(datos.get('bases')), definiciones=datos.get('definiciones'))
+    codificadas = []
+    for lc in resultado.lineas_codificadas:
+        lc = dict(lc)
+        if 'datos' in lc:
+            lc['datos'] = _datos_json(lc['datos'])
+        codificadas.append(lc)
+    return {
+        'errores': resultado.errores,
+        'lineas_analizadas': [{**a, 'mensaje': str(a['mensaje'])} for a in resultado.lineas_analizadas],
+        'lineas_codificadas': codificadas,
+        'simbolos': [{'nombre': s.nombre_calificado, 'tipo': s.tipo, 'valor': s.valor,
+                      'tamanio': s.tamanio, 'direccion': s.direccion} for s in resultado.simbolos],
+        'segmentos': {nombre: {'origen': origen, 'bytes': imagen.hex().upper()}
+                      for nombre, (origen, imagen) in resultado.segmentos.items()},
+        'advertencias': [{'numero': n, 'mensaje': str(d)} for n, d in resultado.advertencias],
+    }
+
+
+def trabajo_validar(datos: dict) -> dict:
+    lineas = datos.get('lineas')
+    if lineas is None and 'linea' in datos:
+        lineas = [datos['linea']]
+    if not isinstance(lineas, list) or not all(isinstance(linea, str) for linea in lineas):
+        raise ErrorSolicitud(400, "Falta 'lineas' (lista de textos)")
+    contexto = datos.get('contexto')
+    if contexto:
+        # Los símbolos del programa de contexto (etiquetas, variables) quedan visibles
+        asm = Ensamblador8086()
+        asm.cargar_texto(contexto)
+        asm.analizar_sintaxis()
+    else:
+        asm = _validador if _validador is not None else Ensamblador8086()
+    segmento = datos.get('segmento', 'CODE')
+    resultados = []
+    for linea in lineas:
+        resultado, mensaje = asm.validar_texto(linea, segmento)
+        resultados.append({'resultado': resultado, 'mensaje': str(mensaje), 'codigo': int(mensaje.codigo)})
+    return {'resultados': resultados}
+
+
+TRABAJOS = {
+    '/ensamblar': trabajo_ensamblar,
+    '/validar': trabajo_validar,
+}
+
+
+def procesar_lote(lote: List[Tuple[str, dict]]) -> List[Tuple[int, dict]]:
+    """Ejecuta un lote de solicitudes; cada una retorna (estado HTTP, cuerpo)"""
+    respuestas = []
+    for ruta, datos in lote:
+        try:
+            respuestas.append((200, TRABAJOS[ruta](datos)))
+        except ErrorSolicitud as e:
+            respuestas.append((e.estado, {'error': str(e)}))
+        except Exception as e:
+            respuestas.append((500, {'error': f"{type(e).__name__}: {e}"}))
+    return respuestas
+
+
+# =========================================================================
+# AGRUPACIÓN EN LOTES
+# =========================================================================
+
+class Agrupador:
+    """
+    Junta las solicitudes concurrentes en lotes y reparte cada lote en hasta
+    'trabajadores' tareas del ejecutor, una por proceso.
+    """
+
+    def __init__(self, ejecutor: Executor, tamano: int = TAMANO_LOTE, ventana: float = VENTANA_LOTE,
+                 trabajadores: int = 1):
+        self.ejecutor = ejecutor
+        self.trabajadores = max(1, trabajadores)
+        self.tamano = tamano
+        self.ventana = ventana
+        self.cola: 'asyncio.Queue[Tuple[str, dict, asyncio.Future]]' = asyncio.Queue()
+        self.solicitudes = 0
+        self.lotes = 0
+        self._tarea: Optional[asyncio.Task] = None
+        self._pendientes = set()
+
+    def iniciar(self):
+        self._tarea = asyncio.get_running_loop().create_task(self._agrupar())
+
+    async def detener(self):
+        if self._tarea is not None:
+            self._tarea.cancel()
+            try:
+                await self._tarea
+            except asyncio.CancelledError:
+                pass
+        if self._pendientes:
+            await asyncio.gather(*self._pendientes, return_exceptions=True)
+
+    async def enviar(self, ruta: str, datos: dict) -> Tuple[int, dict]:
+        futuro = asyncio.get_running_loop().create_future()
+        await self.cola.put((ruta, datos, futuro))
+        return await futuro
+
+    async def _agrupar(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            lote = [await self.cola.get()]
+            limite = loop.time() + self.ventana
+            while len(lote) < self.tamano:
+                if not self.cola.empty():
+                    lote.append(self.cola.get_nowait())
+                    continue
+                restante = limite - loop.time()
+                if restante <= 0:
+                    break
+                try:
+                    lote.append(await asyncio.wait_for(self.cola.get(), restante))
+                except asyncio.TimeoutError:
+                    break
+            # El lote se despacha sin esperar: mientras, se forma el siguiente
+            tarea = loop.create_task(self._despachar(lote))
+            self._pendientes.add(tarea)
+            tarea.add_done_callback(self._pendientes.discard)
+
+    async def _despachar(self, lote: List[Tuple[str, dict, asyncio.Future]]):
+        self.lotes += 1
+        self.solicitudes += len(lote)
+        por_parte = -(-len(lote) // self.trabajadores)
+        partes = [lote[i:i + por_parte] for i in range(0, len(lote), por_parte)]
+        await asyncio.gather(*(self._despachar_parte(parte) for parte in partes))
+
+    async def _despachar_parte(self, parte: List[Tuple[str, dict, asyncio.Future]]):
+        try:
+            respuestas = await asyncio.get_running_loop().run_in_executor(
+                self.ejecutor, procesar_lote, [(ruta, datos) for ruta, datos, _ in parte])
+        except Exception as e:
+            respuestas = [(500, {'error': f"{type(e).__name__}: {e}"})] * len(parte)
+        for (_, _, futuro), respuesta in zip(parte, respuestas):
+            if not futuro.done():
+                futuro.set_result(respuesta)
+
+
+# =========================================================================
+# HTTP
+# =========================================================================
+
+class Servicio:
+    def __init__(self, procesos: Optional[int] = None, tamano_lote: int = TAMANO_LOTE,
+                 ventana: float = VENTANA_LOTE):
+        """procesos: tamaño del grupo (None = núcleos disponibles; 0 = un hilo, para pruebas)"""
+        self.procesos = procesos
+        self.tamano_lote = tamano_lote
+        self.ventana = ventana
+        self.ejecutor: Optional[Executor] = None
+        self.agrupador: Optional[Agrupador] = None
+        self.servidores: List[asyncio.AbstractServer] = []
+
+    async def iniciar(self, host: Optional[str] = '127.0.0.1', puerto: Optional[int] = PUERTO_PREDETERMINADO,
+                      unix: Optional[str] = None):
+        if self.procesos == 0:
+            trabajadores = 1
+            self.ejecutor = ThreadPoolExecutor(1, initializer=_iniciar_trabajador)
+        else:
+            trabajadores = self.procesos or os.cpu_count() or 1
+            self.ejecutor = ProcessPoolExecutor(trabajadores, initializer=_iniciar_trabajador)
+            # Los procesos se crean antes de abrir los sockets: si se crearan con el
+            # primer lote heredarían las conexiones abiertas y 'Connection: close'
+            # nunca llegaría al fin de archivo del cliente.
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(*(loop.run_in_executor(self.ejecutor, _calentar)
+                                   for _ in range(trabajadores)))
+        self.agrupador = Agrupador(self.ejecutor, self.tamano_lote, self.ventana, trabajadores)
+        self.agrupador.iniciar()
+        if puerto is not None:
+            self.servidores.append(await asyncio.start_server(self.atender, host, puerto))
+        if unix is not None:
+            self.servidores.append(await asyncio.start_unix_server(self.atender, unix))
+
+    @property
+    def direcciones(self) -> List[Any]:
+        return [s.getsockname() for servidor in self.servidores for s in servidor.sockets]
+
+    async def detener(self):
+        for servidor in self.servidores:
+            servidor.close()
+            await servidor.wait_closed()
+        if self.agrupador is not None:
+            await self.agrupador.detener()
+        if self.ejecutor is not None:
+            self.ejecutor.shutdown()
+
+    async def atender(self, lector: asyncio.StreamReader, escritor: asyncio.StreamWriter):
+        try:
+            while True:
+                linea = await lector.readline()
+                if not linea.strip():
+                    break
+                metodo, ruta, version = (linea.decode('latin-1').split() + ['', '', ''])[:3]
+                cabeceras = {}
+                while True:
+                    cabecera = await lector.readline()
+                    if cabecera in (b'\r\n', b'\n', b''):
+                        break
+                    nombre, _, valor = cabecera.decode('latin-1').partition(':')
+                    cabeceras[nombre.strip().lower()] = valor.strip()
+                longitud = int(cabeceras.get('content-length') or 0)
+                if longitud > MAX_CUERPO:
+                    await self.responder(escritor, 413, {'error': "Solicitud demasiado grande"}, False)
+                    break
+                cuerpo = await lector.readexactly(longitud) if longitud else b''
+
+                estado, respuesta = await self.resolver(metodo, ruta, cuerpo)
+                mantener = (cabeceras.get('connection', '').lower() != 'close'
+                            and version.upper() != 'HTTP/1.0')
+                await self.responder(escritor, estado, respuesta, mantener)
+                if not mantener:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            escritor.close()
+
+    async def resolver(self, metodo: str, ruta: str, cuerpo: bytes) -> Tuple[int, dict]:
+        ruta = ruta.split('?', 1)[0]
+        if ruta == '/estado':
+            agrupador = self.agrupador
+            return 200, {'solicitudes': agrupador.solicitudes, 'lotes': agrupador.lotes,
+                         'procesos': self.procesos if self.procesos is not None else os.cpu_count()}
+        if ruta not in TRABAJOS:
+            return 404, {'error': f"Ruta desconocida: {ruta}"}
+        if metodo != 'POST':
+            return 405, {'error': "Use POST"}
+        try:
+            datos = json.loads(cuerpo or b'{}')
+        except ValueError as e:
+            return 400, {'error': f"JSON inválido: {e}"}
+        if not isinstance(datos, dict):
+            return 400, {'error': "Se esperaba un objeto JSON"}
+        return await self.agrupador.enviar(ruta, datos)
+
+    @staticmethod
+    async def responder(escritor: asyncio.StreamWriter, estado: int, cuerpo: dict, mantener: bool):
+        datos = json.dumps(cuerpo, ensure_ascii=False).encode('utf-8')
+        cabecera = (f"HTTP/1.1 {estado} {RAZONES.get(estado, '')}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(datos)}\r\n"
+                    f"Connection: {'keep-alive' if mantener else 'close'}\r\n\r\n")
+        escritor.write(cabecera.encode('latin-1') + datos)
+        await escritor.drain()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Servicio local de ensamblado 8086")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=PUERTO_PREDETERMINADO)
+    parser.add_argument('--unix', metavar='RUTA', help="Atiende también en un socket Unix")
+    parser.add_argument('--solo-unix', action='store_true', help="No abre el puerto TCP")
+    parser.add_argument('--procesos', type=int, help="Procesos de trabajo (por omisión, uno por núcleo)")
+    parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help="Máximo de solicitudes por lote")
+    parser.add_argument('--ventana-ms', type=float, default=VENTANA_LOTE * 1000,
+                        help="Espera máxima para completar un lote")
+    args = parser.parse_args(argv)
+    if args.solo_unix and not args.unix:
+        parser.error("--solo-unix requiere --unix")
+
+    async def servir():
+        servicio = Servicio(args.procesos, args.lote, args.ventana_ms / 1000)
+        await servicio.iniciar(args.host, None if args.solo_unix else args.puerto, args.unix)
+        for direccion in servicio.direcciones:
+            print(f"Atendiendo en {direccion}", file=sys.stderr)
+        # SIGINT/SIGTERM detienen el servicio ordenadamente (y con él los procesos de trabajo)
+        parada = asyncio.Event()
+        for senal in (signal.SIGINT, signal.SIGTERM):
+            try:
+                asyncio.get_running_loop().add_signal_handler(senal, parada.set)
+            except (NotImplementedError, RuntimeError):
+                pass
+        try:
+            await parada.wait()
+        finally:
+            await servicio.detener()
+
+    try:
+        asyncio.run(servir())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,76 @@
+import unittest
+from ensamblador import Ensamblador8086
+
+PROGRAMA = [
+    "VERSION equ 2",
+    ".code segment",
+    "IF VERSION * 2 GT",
+    "ENDIF",
+    "IFDEF DEPURAR",
+    "    nop",
+    "ELSE",
+    "    cmc",
+    "ENDIF",
+    "IF VERSION - 2",
+    "    !!basura!!",
+    "    IF 1",
+    "        aad",
+    "    ENDIF",
+    "ELSE",
+    "    aam",
+    "ENDIF",
+    "ends",
+]
+
+
+class EnsambladorContador(Ensamblador8086):
+    def __init__(self):
+        super().__init__()
+        self.tokenizadas = []
+
+    def tokenizar_linea(self, linea, num_linea):
+        self.tokenizadas.append(linea.strip())
+        return super().tokenizar_linea(linea, num_linea)
+
+
+class TestCondicionales(unittest.TestCase):
+
+    def analizar(self, asm, lineas):
+        asm.cargar_lineas(lineas)
+        asm.analizar_sintaxis()
+        return {a['linea']: a for a in asm.lineas_analizadas}
+
+    def test_bloques_inactivos_omitidos(self):
+        asm = EnsambladorContador()
+        analisis = self.analizar(asm, PROGRAMA)
+        for linea in ('nop', '!!basura!!', 'aad'):
+            self.assertEqual(analisis[linea]['resultado'], 'Omitida')
+            self.assertNotIn(linea, asm.tokenizadas)
+        self.assertEqual(analisis['cmc']['resultado'], 'Correcta')
+        self.assertEqual(analisis['aam']['resultado'], 'Correcta')
+        self.assertEqual(analisis['IF VERSION * 2 GT']['resultado'], 'Incorrecta')
+
+    def test_definiciones_por_api(self):
+        asm = Ensamblador8086()
+        asm.definir('depurar')
+        analisis = self.analizar(asm, PROGRAMA)
+        self.assertEqual(analisis['nop']['resultado'], 'Correcta')
+        self.assertEqual(analisis['cmc']['resultado'], 'Omitida')
+
+    def test_codificacion_ignora_omitidas(self):
+        asm = Ensamblador8086()
+        self.analizar(asm, PROGRAMA)
+        asm.generar_codificacion()
+        codigo = [lc['linea'] for lc in asm.lineas_codificadas if lc['tamano']]
+        self.assertEqual(codigo, ['cmc', 'aam'])
+
+    def test_directivas_desbalanceadas(self):
+        asm = Ensamblador8086()
+        analisis = self.analizar(asm, [".code segment", "ENDIF", "IF 1", "nop", "ends"])
+        self.assertEqual(str(analisis['ENDIF']['mensaje']), 'ENDIF sin IF')
+        self.assertEqual(str(analisis['IF 1']['mensaje']), 'IF sin ENDIF')
+        self.assertEqual(analisis['nop']['resultado'], 'Correcta')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import io
+import unittest
+from ensamblador import Ensamblador8086, BloqueDup, escribir_datos, tamano_datos
+
+
+class TestDatosDup(unittest.TestCase):
+
+    def setUp(self):
+        self.asm = Ensamblador8086()
+
+    def datos(self, linea):
+        return self.asm.generar_datos(self.asm.tokenizar_linea(linea, 1))
+
+    def test_dup_como_registro(self):
+        registros = self.datos("pila dw 65535 dup(?)")
+        self.assertEqual(registros, [BloqueDup(65535, b'\x00\x00')])
+        self.assertEqual(tamano_datos(registros), 131070)
+
+    def test_resumen_para_listado(self):
+        self.assertEqual(self.asm.generar_bytes_dato(self.asm.tokenizar_linea("buf db 300 dup(7)", 1)),
+                         "300 DUP(07)")
+        self.assertEqual(self.asm.generar_bytes_dato(self.asm.tokenizar_linea("v dw 0ABCDh", 1)),
+                         "CD AB")
+
+    def test_escritura_por_bloques(self):
+        archivo = io.BytesIO()
+        escritos = escribir_datos(archivo, [b'AB', BloqueDup(10, b'\x01\x02')], tam_bloque=6)
+        self.assertEqual(escritos, 22)
+        self.assertEqual(archivo.getvalue(), b'AB' + b'\x01\x02' * 10)
+
+    def test_segmento_con_dup_grande(self):
+        self.asm.lineas_codigo = [
+            ".data segment",
+            "    tabla db 1, 2, 3",
+            "    buffer dw 40000 dup(0FFFFh)",
+            "ends",
+        ]
+        self.asm.analizar_sintaxis()
+        self.asm.generar_codificacion()
+        archivo = io.BytesIO()
+        origen, escritos = self.asm.escribir_segmento(archivo, 'DATA')
+        self.assertEqual(origen, 0x0250)
+        self.assertEqual(escritos, 3 + 80000)
+        self.assertEqual(archivo.getvalue()[:5], b'\x01\x02\x03\xFF\xFF')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+from ensamblador import Ensamblador8086
+from desensamblador import desensamblar, a_texto, verificar_ida_vuelta
+
+
+class TestDesensamblador(unittest.TestCase):
+
+    def test_instrucciones_basicas(self):
+        datos = bytes.fromhex('90F54033C9F7E1D40ACD21')
+        textos = [i.texto for i in desensamblar(datos, 0x0250)]
+        self.assertEqual(textos, ['NOP', 'CMC', 'INC AX', 'XOR CX, CX', 'MUL CX', 'AAM', 'INT 021h'])
+
+    def test_salto_genera_etiqueta(self):
+        # 0250: INC AX ; 0251: LOOPE -3 (a 0250)
+        instrucciones = desensamblar(bytes.fromhex('40E1FD'), 0x0250)
+        self.assertEqual(instrucciones[1].destino, 0x0250)
+        self.assertEqual(a_texto(instrucciones), ['L0250:', '    INC AX', '    LOOPE L0250'])
+
+    def test_byte_desconocido_y_truncado(self):
+        instrucciones = desensamblar(bytes.fromhex('F4CD'))
+        self.assertEqual([i.texto for i in instrucciones], ['DB 0F4h', 'DB 0CDh'])
+
+    def test_ida_vuelta_programa(self):
+        asm = Ensamblador8086()
+        asm.cargar_archivo('ejemplo.asm')
+        asm.analizar_sintaxis()
+        asm.generar_codificacion()
+        origen, imagen = asm.imagen_segmento('CODE')
+        self.assertEqual(verificar_ida_vuelta(imagen, origen), [])
+
+    def test_ida_vuelta_reporta_diferencias(self):
+        # LEA con base e índice no se puede recodificar igual (solo se codifica dirección directa)
+        diferencias = verificar_ida_vuelta(bytes.fromhex('8D4005'))
+        self.assertEqual(len(diferencias), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
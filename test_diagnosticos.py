@@ -0,0 +1,44 @@
+import unittest
+
+from apoyo_pruebas import ensamblado
+from diagnosticos import Codigo, Diagnostico, Severidad, diagnostico, filtrar
+
+
+class TestDiagnosticos(unittest.TestCase):
+
+    def test_formato_diferido_y_comparacion(self):
+        diag = diagnostico(Codigo.INSTRUCCION_INVALIDA, 'mov')
+        self.assertEqual(diag.argumentos, ('mov',))
+        self.assertEqual(str(diag), "'mov' no es una instrucción válida")
+        self.assertNotEqual(diag, "'mov' no es una instrucción válida")
+        self.assertEqual(diag, diagnostico(Codigo.INSTRUCCION_INVALIDA, 'mov'))
+        self.assertEqual(len({diag, diagnostico(Codigo.INSTRUCCION_INVALIDA, 'mov')}), 1)
+        self.assertEqual(f"{diag:<10}|", "'mov' no es una instrucción válida|")
+        self.assertIn('mov', diag)
+        self.assertEqual(diag.severidad, Severidad.ERROR)
+        self.assertEqual(str(diagnostico(Codigo.ORG_VALIDO, 0x100)), "Pseudoinstrucción ORG válida (0100h)")
+
+    def test_sin_argumentos_es_compartido(self):
+        self.assertIs(diagnostico(Codigo.FIN_SEGMENTO), diagnostico(Codigo.FIN_SEGMENTO))
+        self.assertEqual(diagnostico(Codigo.FIN_SEGMENTO).severidad, Severidad.NOTA)
+
+    def test_codigos_en_el_analisis(self):
+        asm = ensamblado([".code segment", "inicio: nop", "    xx ax", "ends"], codificar=False)
+        mensajes = [a['mensaje'] for a in asm.lineas_analizadas]
+        self.assertTrue(all(isinstance(m, Diagnostico) for m in mensajes))
+        self.assertEqual(mensajes[1].codigo, Codigo.ETIQUETA_E_INSTRUCCION)
+        self.assertEqual(str(mensajes[1]), "Etiqueta 'inicio' definida + Instrucción NOP válida")
+        self.assertEqual([(n, d.codigo) for n, d in filtrar(asm.lineas_analizadas)],
+                         [(3, Codigo.INSTRUCCION_INVALIDA)])
+
+    def test_maximo_de_errores(self):
+        asm = ensamblado([".code segment", "xx", "yy", "nop", "zz", "nop", "ends"], codificar=False, max_errores=2)
+        self.assertEqual(asm.errores, 2)
+        ultima = asm.lineas_analizadas[-1]
+        self.assertEqual((ultima['numero'], ultima['mensaje'].codigo), (4, Codigo.DEMASIADOS_ERRORES))
+        self.assertEqual(ultima['mensaje'].severidad, Severidad.FATAL)
+        self.assertEqual(len(asm.lineas_analizadas), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+import ensamblador as modulo
+from ensamblador import DisposicionSegmentos, Ensamblador8086
+
+PROGRAMA = [
+    ".data segment",
+    "x db 1, 2",
+    "ends",
+    ".code segment",
+    "inicio: nop",
+    "    jc inicio",
+    "    ORG 0300h",
+    "fin: aad",
+    "ends",
+    "end inicio",
+]
+
+
+def direcciones(asm):
+    return {lc['linea']: lc['direccion'] for lc in asm.lineas_codificadas}
+
+
+class TestDisposicion(unittest.TestCase):
+
+    def ensamblar(self, disposicion=None):
+        asm = Ensamblador8086()
+        if disposicion is not None:
+            asm.disposicion = disposicion
+        asm.cargar_lineas(list(PROGRAMA))
+        asm.analizar_sintaxis()
+        asm.generar_codificacion()
+        return asm
+
+    def test_bases_predeterminadas_y_org(self):
+        asm = self.ensamblar()
+        dirs = direcciones(asm)
+        self.assertEqual(dirs['x db 1, 2'], '0250')
+        self.assertEqual(dirs['inicio: nop'], '0250')
+        self.assertEqual(dirs['fin: aad'], '0300')
+        self.assertEqual(asm.tabla_simbolos['fin'].direccion, '0300')
+
+    def test_bases_configurables(self):
+        asm = self.ensamblar(DisposicionSegmentos.desde_texto(['CODE=100h', '.data=0x400']))
+        dirs = direcciones(asm)
+        self.assertEqual(dirs['inicio: nop'], '0100')
+        self.assertEqual(dirs['x db 1, 2'], '0400')
+        self.assertRaises(ValueError, DisposicionSegmentos.desde_texto, ['EXTRA=0'])
+
+    def test_reubicar_sin_retokenizar(self):
+        asm = self.ensamblar()
+        antes = {lc['linea']: lc['codigo_maquina'] for lc in asm.lineas_codificadas}
+        llamadas = []
+        original = asm.tokenizar_linea
+        asm.tokenizar_linea = lambda *a: llamadas.append(a) or original(*a)
+        asm.reubicar(CODE=0x100)
+        self.assertEqual(llamadas, [])
+        self.assertEqual(direcciones(asm)['jc inicio'], '0101')
+        self.assertEqual(asm.tabla_simbolos['inicio'].direccion, '0100')
+        # El salto es relativo: la codificación no cambia
+        despues = {lc['linea']: lc['codigo_maquina'] for lc in asm.lineas_codificadas}
+        self.assertEqual(antes, despues)
+
+    def test_reubicar_recalcula_equ(self):
+        asm = Ensamblador8086()
+        asm.cargar_lineas([".data segment", "msg db 1", "p equ OFFSET msg", "ends",
+                           ".code segment", "int p", "ends"])
+        asm.analizar_sintaxis()
+        asm.generar_codificacion()
+        self.assertEqual(asm.resolver_simbolo('p'), 0x250)
+        # INT 250h no cabe en un byte; tras reubicar DATA el mismo EQU sí cabe
+        self.assertEqual(asm.lineas_analizadas[5]['resultado'], 'Incorrecta')
+        asm.reubicar(DATA=0x80)
+        self.assertEqual(asm.resolver_simbolo('p'), 0x80)
+        self.assertEqual(asm.lineas_analizadas[5]['resultado'], 'Correcta')
+        self.assertIn('Correcta | CD 80', [lc['codigo_maquina'] for lc in asm.lineas_codificadas])
+
+    def test_org_hacia_atras(self):
+        asm = Ensamblador8086()
+        asm.cargar_lineas([".code segment", "ORG 0300h", "nop", "ORG 0280h", "cmc", "ends"])
+        asm.analizar_sintaxis()
+        asm.generar_codificacion()
+        self.assertEqual(direcciones(asm)['cmc'], '0280')
+        origen, imagen = asm.imagen_segmento('CODE')
+        self.assertEqual(origen, 0x280)
+        self.assertEqual(len(imagen), 0x81)
+        self.assertEqual(imagen[0], 0xF5)
+        self.assertEqual(imagen[0x80], 0x90)
+
+    def test_org_invalido(self):
+        asm = Ensamblador8086()
+        asm.cargar_lineas([".code segment", "ORG", "ORG desconocido", "ORG 0FFFFFh", "ends"])
+        asm.analizar_sintaxis()
+        self.assertEqual([a['resultado'] for a in asm.lineas_analizadas[1:4]], ['Incorrecta'] * 3)
+
+    def test_linea_de_comandos(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            fuente = os.path.join(directorio, 'p.asm')
+            salida = os.path.join(directorio, 'p.bin')
+            with open(fuente, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(PROGRAMA[3:]))
+            with redirect_stdout(io.StringIO()) as listado:
+                codigo = modulo.main([fuente, '--com', '-o', salida])
+            self.assertEqual(codigo, 0)
+            self.assertIn('0100   inicio: nop', listado.getvalue())
+            with open(salida, 'rb') as f:
+                self.assertEqual(f.read(3), bytes([0x90, 0x72, 0xFD]))
+
+
+if __name__ == '__main__':
+    unittest.main()
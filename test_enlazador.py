@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+
+from apoyo_pruebas import ensamblado
+from enlazador import ErrorEnlace, enlazar, enlazar_archivos
+from objeto import ModuloObjeto, escribir_objeto
+
+PRINCIPAL = [
+    "PUBLIC inicio",
+    "EXTRN rutina:NEAR, dato:WORD",
+    ".code segment",
+    "inicio: lea si, dato",
+    "    jc rutina",
+    "ends",
+    "end inicio",
+]
+
+BIBLIOTECA = [
+    "PUBLIC rutina, dato",
+    ".data segment",
+    "dato dw 5",
+    "puntero dw dato",
+    "ends",
+    ".code segment",
+    "rutina: nop",
+    "    jc rutina",
+    "ends",
+]
+
+
+class TestEnlazador(unittest.TestCase):
+
+    def setUp(self):
+        self.principal = ModuloObjeto.desde_ensamblador(ensamblado(PRINCIPAL), 'principal')
+        self.biblioteca = ModuloObjeto.desde_ensamblador(ensamblado(BIBLIOTECA), 'biblioteca')
+
+    def test_com_resuelve_simbolos_entre_modulos(self):
+        resultado = enlazar([self.principal, self.biblioteca])
+        self.assertEqual(resultado.segmentos['CODE'], (0x100, 9))
+        self.assertEqual(resultado.segmentos['DATA'], (0x110, 4))
+        self.assertEqual(resultado.simbolos, {'inicio': 0x100, 'rutina': 0x106, 'dato': 0x110})
+        imagen = resultado.como_com()
+        # lea si, dato (0110h) | jc rutina (+0) | nop | jc -3
+        self.assertEqual(imagen[:9], bytes.fromhex('8D361001 7200 90 72FD'.replace(' ', '')))
+        # puntero dw dato
+        self.assertEqual(imagen[0x10:0x14], bytes.fromhex('05001001'))
+        self.assertEqual(resultado.reubicaciones, 3)
+
+    def test_exe_con_cabecera_mz(self):
+        resultado = enlazar([self.principal, self.biblioteca], 'exe', entrada='inicio')
+        exe = resultado.como_exe()
+        self.assertEqual(exe[:2], b'MZ')
+        self.assertEqual(int.from_bytes(exe[8:10], 'little'), 2)       # párrafos de cabecera
+        self.assertEqual(int.from_bytes(exe[20:22], 'little'), 0)      # IP
+        self.assertEqual(exe[32:36], bytes.fromhex('8D361000'))
+        self.assertRaises(ErrorEnlace, resultado.como_com)
+
+    def test_errores(self):
+        with self.assertRaisesRegex(ErrorEnlace, r"'dato' no definido \(referenciado en principal\)"):
+            enlazar([self.principal])
+        copia = ModuloObjeto.desde_ensamblador(ensamblado(BIBLIOTECA), 'copia')
+        with self.assertRaisesRegex(ErrorEnlace, "definido en biblioteca y en copia"):
+            enlazar([self.principal, self.biblioteca, copia])
+        with self.assertRaisesRegex(ErrorEnlace, "entrada 'otra'"):
+            enlazar([self.principal, self.biblioteca], entrada='otra')
+
+    def test_enlaza_archivos(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            rutas = []
+            for lineas, nombre in ((PRINCIPAL, 'a'), (BIBLIOTECA, 'b')):
+                rutas.append(os.path.join(directorio, nombre + '.obj'))
+                escribir_objeto(ensamblado(lineas), rutas[-1])
+            salida = os.path.join(directorio, 'programa.com')
+            enlazar_archivos(rutas, salida)
+            with open(salida, 'rb') as f:
+                self.assertEqual(f.read(4), bytes.fromhex('8D361001'))
+
+
+if __name__ == '__main__':
+    unittest.main()
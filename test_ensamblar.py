@@ -0,0 +1,65 @@
+import dataclasses
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from ensamblador import INSTRUCCIONES, Ensamblador8086, ensamblar
+
+PROGRAMA = """
+.data segment
+    valor db 25
+    tabla dw 4 dup(0)
+ends
+.code segment
+inicio:
+    lea si, valor
+    inc ax
+    jne inicio
+ends
+end inicio
+"""
+
+
+class TestEnsamblar(unittest.TestCase):
+
+    def test_resultado_inmutable(self):
+        resultado = ensamblar(PROGRAMA)
+        self.assertTrue(resultado.correcto)
+        self.assertIn('CODE', resultado.segmentos)
+        self.assertEqual(resultado.codigo[-2:], bytes.fromhex('75F9'))
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            resultado.errores = 1
+        with self.assertRaises(TypeError):
+            resultado.lineas_analizadas[0]['resultado'] = 'Incorrecta'
+        self.assertEqual({s.nombre for s in resultado.simbolos}, {'valor', 'tabla', 'inicio'})
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            resultado.simbolos[0].direccion = '0000'
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            resultado.tokens[0].valor = 'x'
+        self.assertTrue(all(isinstance(lc.get('fixups', ()), tuple) for lc in resultado.lineas_codificadas))
+
+    def test_igual_que_la_api_con_estado(self):
+        asm = Ensamblador8086()
+        asm.cargar_texto(PROGRAMA)
+        asm.analizar_sintaxis()
+        asm.generar_codificacion()
+        resultado = ensamblar(PROGRAMA)
+        self.assertEqual([dict(a) for a in resultado.lineas_analizadas], asm.lineas_analizadas)
+        self.assertEqual([lc['codigo_maquina'] for lc in resultado.lineas_codificadas],
+                         [lc['codigo_maquina'] for lc in asm.lineas_codificadas])
+
+    def test_bases_y_errores(self):
+        resultado = ensamblar(PROGRAMA, bases={'code': 0x100})
+        self.assertEqual(resultado.segmentos['CODE'][0], 0x100)
+        self.assertEqual(ensamblar(PROGRAMA.replace('inc ax', 'mov ax, bx')).errores, 1)
+
+    def test_hilos(self):
+        textos = [PROGRAMA.replace('inc ax', f'and al, {i}') for i in range(32)]
+        esperados = [ensamblar(t).codigo for t in textos]
+        with ThreadPoolExecutor(max_workers=8) as hilos:
+            obtenidos = [r.codigo for r in hilos.map(ensamblar, textos)]
+        self.assertEqual(obtenidos, esperados)
+        self.assertIs(Ensamblador8086().instrucciones, INSTRUCCIONES)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import io
+import json
+import unittest
+
+from apoyo_pruebas import ensamblado
+from escritores import EscritorLotes, escribir_csv, escribir_hex, escribir_jsonl, escribir_lst, registro_hex
+
+PROGRAMA = [
+    ".data segment",
+    "tabla db 1, 2, 3",
+    "buf db 20 dup(0FFh)",
+    "ends",
+    ".code segment",
+    "inicio: lea si, tabla",
+    "    xx ax",
+    "ends",
+    "end inicio",
+]
+
+
+class TestEscritores(unittest.TestCase):
+
+    def setUp(self):
+        self.asm = ensamblado(PROGRAMA)
+
+    def test_registro_hex(self):
+        self.assertEqual(registro_hex(0, 0x01), ":00000001FF\n")
+        self.assertEqual(registro_hex(0x0250, 0x00, bytes.fromhex('8D365002')), ":040250008D36500295\n")
+
+    def test_intel_hex_por_registros(self):
+        salida = io.StringIO()
+        self.assertEqual(escribir_hex(self.asm, salida, 'DATA'), 23)
+        registros = salida.getvalue().splitlines()
+        self.assertEqual(registros[0], registro_hex(0x0250, 0, bytes([1, 2, 3]) + b'\xff' * 13).strip())
+        self.assertEqual(registros[1], registro_hex(0x0260, 0, b'\xff' * 7).strip())
+        self.assertEqual(registros[-1], ":00000001FF")
+
+    def test_listado(self):
+        salida = io.StringIO()
+        escribir_lst(self.asm, salida)
+        texto = salida.getvalue()
+        self.assertIn("     3  0253  0014[FF]            buf db 20 dup(0FFh)\n", texto)
+        self.assertIn("     6  0250  8D 36 50 02         inicio: lea si, tabla\n", texto)
+        self.assertIn("**Error** 'xx' no es una instrucción válida\n", texto)
+        self.assertTrue(texto.endswith("\n1 error\n"))
+
+    def test_csv_y_jsonl(self):
+        salida = io.StringIO()
+        self.assertEqual(escribir_csv(self.asm, salida), len(self.asm.lineas_analizadas))
+        filas = salida.getvalue().splitlines()
+        self.assertEqual(filas[0], "numero,origen,resultado,codigo,severidad,mensaje,linea,ambito")
+        self.assertTrue(filas[2].endswith(',"tabla db 1, 2, 3",'))
+
+        salida = io.StringIO()
+        escribir_jsonl(self.asm, salida)
+        registros = [json.loads(linea) for linea in salida.getvalue().splitlines()]
+        self.assertEqual(registros[6]['resultado'], 'Incorrecta')
+        self.assertEqual(registros[6]['linea'], 'xx ax')
+        self.assertEqual((registros[6]['codigo'], registros[6]['severidad']), (453, 'error'))
+
+    def test_escritura_por_lotes(self):
+        llamadas = []
+
+        class Archivo:
+            def writelines(self, lineas):
+                llamadas.append(len(lineas))
+
+        with EscritorLotes(Archivo(), lote=4) as escritor:
+            escritor.escribir(str(i) for i in range(10))
+        self.assertEqual(llamadas, [4, 4, 2])
+        self.assertEqual(escritor.lineas, 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import unittest
+from diagnosticos import Codigo
+from apoyo_pruebas import ensamblado
+from ensamblador import Ensamblador8086
+from expresiones import ErrorExpresion, analizar_expresion
+
+
+class TestExpresiones(unittest.TestCase):
+
+    def test_precedencia_y_formatos(self):
+        asm = Ensamblador8086()
+        self.assertEqual(asm.evaluar_expresion("2 + 3 * 4"), 14)
+        self.assertEqual(asm.evaluar_expresion("(2+3)*4"), 20)
+        self.assertEqual(asm.evaluar_expresion("0FFh - 101b + 10d"), 255 - 5 + 10)
+        self.assertEqual(asm.evaluar_expresion("-7 / 2"), -3)
+        self.assertEqual(asm.evaluar_expresion("17 MOD 5"), 2)
+        self.assertEqual(asm.evaluar_expresion("'A' + 1"), 66)
+
+    def test_errores_de_sintaxis(self):
+        for texto in ["2 +", "(1 + 2", "45h", "1 2"]:
+            with self.assertRaises(ErrorExpresion, msg=texto):
+                analizar_expresion(texto)
+
+    def test_equ_con_expresion_y_cache(self):
+        asm = ensamblado([
+            ".data segment",
+            "    base equ 10",
+            "    doble equ base*2+1",
+            "ends",
+        ], codificar=False)
+        self.assertEqual([a['resultado'] for a in asm.lineas_analizadas][1:3], ['Correcta', 'Correcta'])
+        self.assertEqual(asm.resolver_simbolo('doble'), 21)
+        self.assertEqual(asm.tabla_simbolos['doble'].valor_numerico, 21)
+        asm.tabla_simbolos['base'].valor = 'no se vuelve a analizar'
+        self.assertEqual(asm.resolver_simbolo('doble'), 21)
+
+    def test_referencia_circular(self):
+        asm = ensamblado([
+            ".data segment",
+            "    a equ b+1",
+            "    b equ a+1",
+            "ends",
+        ], codificar=False)
+        with self.assertRaises(ErrorExpresion):
+            asm.resolver_simbolo('a')
+
+    def test_equ_como_inmediato_y_offset(self):
+        asm = ensamblado([
+            ".data segment",
+            "    mensaje db 'Hola'",
+            "    servicio equ 020h+1",
+            "    ptr_msj equ OFFSET mensaje + 2",
+            "ends",
+            ".code segment",
+            "    int servicio",
+            "ends",
+        ])
+        codigo = [lc['codigo_maquina'] for lc in asm.lineas_codificadas if lc['linea'] == 'int servicio']
+        self.assertEqual(codigo, ['Correcta | CD 21'])
+        self.assertEqual(asm.resolver_simbolo('ptr_msj'), 0x0252)
+
+    def test_simbolos_terminados_en_sufijo_numerico(self):
+        asm = ensamblado([
+            ".data segment",
+            "    dosh equ 021h",
+            "    fb equ 3",
+            "    nd equ 4",
+            "    c equ 02470h",
+            "ends",
+            ".code segment",
+            "    int dosh",
+            "    int fb",
+            "    int nd",
+            "    int c-02465h",
+            "    int c-2465h",
+            "ends",
+        ])
+        codigo = {lc['linea']: lc['codigo_maquina'] for lc in asm.lineas_codificadas}
+        self.assertEqual(codigo['int dosh'], 'Correcta | CD 21')
+        self.assertEqual(codigo['int fb'], 'Correcta | CD 03')
+        self.assertEqual(codigo['int nd'], 'Correcta | CD 04')
+        self.assertEqual(codigo['int c-02465h'], 'Correcta | CD 0B')
+        # En una expresión el hexadecimal debe empezar con 0: se rechaza, no vale 0
+        self.assertEqual(codigo['int c-2465h'], 'Incorrecta')
+        self.assertEqual(asm.obtener_valor_numerico('dosh'), 0x21)
+        self.assertEqual(asm.obtener_valor_numerico('0101b'), 5)
+        self.assertEqual(asm.obtener_valor_numerico('10d'), 10)
+
+    def test_equ_como_inmediato_de_logicas(self):
+        asm = ensamblado([
+            ".data segment",
+            "    k equ 0200h",
+            "    c equ k*2+1",
+            "ends",
+            ".code segment",
+            "    and ax, c",
+            "    or al, 0Fh",
+            "    xor bx, c",
+            "    inc [bx]",
+            "    nop",
+            "ends",
+        ])
+        codificadas = {lc['linea']: lc for lc in asm.lineas_codificadas}
+        self.assertEqual(codificadas['and ax, c']['codigo_maquina'], 'Correcta | 25 01 04')
+        self.assertEqual(codificadas['or al, 0Fh']['codigo_maquina'], 'Correcta | 0C 0F')
+        self.assertEqual(codificadas['xor bx, c']['codigo_maquina'], 'Correcta | 81 F3 01 04')
+        # Lo que el codificador no produce no queda Correcta sin bytes
+        self.assertEqual(codificadas['inc [bx]']['codigo_maquina'], 'Incorrecta')
+        self.assertEqual(asm.lineas_analizadas[8]['mensaje'].codigo, Codigo.OPERANDOS_NO_CODIFICABLES)
+        self.assertEqual(codificadas['nop']['direccion'], '025B')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+import preprocesador
+from ensamblador import Ensamblador8086
+from preprocesador import CacheIncludes, LineaFuente, ProcesadorIncludes
+
+
+class TestInclude(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.base = Path(self.dir.name)
+        (self.base / 'datos.inc').write_text("uno db 1\ndos dw 2\n", encoding='utf-8')
+        (self.base / 'const.inc').write_text("include datos.inc\nTAM equ 10\n", encoding='utf-8')
+        self.programa = self.base / 'prog.asm'
+        self.programa.write_text(
+            ".data segment\n"
+            "INCLUDE const.inc\n"
+            "ends\n"
+            ".code segment\n"
+            "nop\n"
+            "ends\n", encoding='utf-8')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_inclusion_anidada(self):
+        asm = Ensamblador8086()
+        self.assertTrue(asm.cargar_archivo(str(self.programa)))
+        self.assertEqual(asm.lineas_codigo[1:4], ["uno db 1", "dos dw 2", "TAM equ 10"])
+        self.assertEqual(asm.origen_lineas[1:4], [2, 2, 2])
+        asm.analizar_sintaxis()
+        self.assertIn('uno', asm.tabla_simbolos)
+        self.assertIn('TAM', asm.tabla_simbolos)
+
+    def test_cache_por_contenido(self):
+        cache = CacheIncludes()
+        asm = Ensamblador8086()
+        primero = ProcesadorIncludes(asm, self.base, cache)
+        segundo = ProcesadorIncludes(asm, self.base, cache)
+        a = primero.procesar([LineaFuente("INCLUDE datos.inc", 1)])
+        b = segundo.procesar([LineaFuente("INCLUDE datos.inc", 1)])
+        self.assertEqual(cache.lecturas, 1)
+        self.assertEqual(cache.aciertos, 1)
+        # Los tokens se comparten por referencia
+        self.assertIs(a[0].tokens[0], b[0].tokens[0])
+
+        # Misma cabecera con otro nombre: mismo hash, no se vuelve a tokenizar
+        (self.base / 'copia.inc').write_text("uno db 1\ndos dw 2\n", encoding='utf-8')
+        segundo.procesar([LineaFuente("include 'copia.inc'", 1)])
+        self.assertEqual(cache.lecturas, 1)
+        # ... pero cada uno conserva su ruta
+        self.assertEqual(Path(segundo.incluidos[-1]).name, 'copia.inc')
+
+    def test_cache_acotada(self):
+        cache = CacheIncludes()
+        procesador = ProcesadorIncludes(Ensamblador8086(), self.base, cache)
+        ruta = self.base / 'editado.inc'
+        for version in range(5):
+            ruta.write_text(f"v db {version}\n", encoding='utf-8')
+            os.utime(ruta, ns=(version, version))
+            procesador.procesar([LineaFuente("include editado.inc", 1)])
+        # Cada edición reemplaza la firma anterior de la ruta
+        self.assertEqual(len(cache._stat_por_ruta), 1)
+        self.assertEqual(cache.lecturas, 5)
+
+        tamano, preprocesador.TAMANO_CACHE_INCLUDES = preprocesador.TAMANO_CACHE_INCLUDES, 2
+        try:
+            cache.limpiar()
+            for nombre in ('a', 'b', 'a', 'c'):
+                (self.base / f'{nombre}.inc').write_text(f"{nombre} db 1\n", encoding='utf-8')
+                procesador.procesar([LineaFuente(f"include {nombre}.inc", 1)])
+            self.assertEqual(len(cache), 2)
+            # 'b' fue el menos usado: se descartó junto con su firma
+            self.assertEqual(sorted(Path(r).name for r in cache._stat_por_ruta), ['a.inc', 'c.inc'])
+            self.assertEqual((cache.lecturas, cache.aciertos), (3, 1))
+        finally:
+            preprocesador.TAMANO_CACHE_INCLUDES = tamano
+
+    def test_mismo_contenido_en_otro_directorio(self):
+        # cab.inc es idéntico en ambos directorios, pero su INCLUDE relativo no
+        for nombre, valor in (('a', 1), ('b', 2)):
+            (self.base / nombre).mkdir()
+            (self.base / nombre / 'cab.inc').write_text("include local.inc\n", encoding='utf-8')
+            (self.base / nombre / 'local.inc').write_text(f"v{nombre} db {valor}\n", encoding='utf-8')
+        asm = Ensamblador8086()
+        procesador = ProcesadorIncludes(asm, self.base, CacheIncludes())
+        lineas = procesador.procesar([LineaFuente("include a/cab.inc", 1), LineaFuente("include b/cab.inc", 2)])
+        self.assertEqual([linea.texto for linea in lineas], ["va db 1", "vb db 2"])
+        self.assertEqual(procesador.cache.lecturas, 3)
+
+    def test_include_inexistente_o_ciclico(self):
+        (self.base / 'ciclo.inc').write_text("include ciclo.inc\n", encoding='utf-8')
+        asm = Ensamblador8086()
+        asm.directorio_base = self.base
+        asm.cargar_lineas(["include falta.inc", "include ciclo.inc"])
+        self.assertEqual(asm.lineas_codigo, ["include falta.inc", "include ciclo.inc"])
+
+    def test_condicional_con_equ_de_cabecera(self):
+        (self.base / 'cab.inc').write_text("DEPURAR EQU 1\n", encoding='utf-8')
+        (self.base / 'inactivo.inc').write_text("no_leido db 1\n", encoding='utf-8')
+        asm = Ensamblador8086()
+        asm.directorio_base = self.base
+        asm.cargar_lineas(["INCLUDE cab.inc", ".data segment",
+                           "IF DEPURAR", "modo db 1", "ELSE", "INCLUDE inactivo.inc", "ENDIF", "ends"])
+        self.assertEqual(asm.lineas_codigo[:4], ["DEPURAR EQU 1", ".data segment", "IF DEPURAR", "modo db 1"])
+        self.assertEqual(asm.procesador_includes.incluidos, [str((self.base / 'cab.inc').resolve())])
+        asm.analizar_sintaxis()
+        self.assertIn('modo', asm.tabla_simbolos)
+        self.assertFalse(any('no definido' in str(a['mensaje']) for a in asm.lineas_analizadas))
+
+
+if __name__ == '__main__':
+    unittest.main()
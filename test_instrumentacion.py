@@ -0,0 +1,133 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+import unittest
+from contextlib import redirect_stderr
+
+import ensamblador
+from apoyo_pruebas import ensamblado
+from ensamblador import Ensamblador8086
+from instrumentacion import ESTRUCTURAS, Instrumentacion, PerfilMemoria, tamano_profundo
+
+PROGRAMA = [
+    ".data segment",
+    "    valor db 25",
+    "ends",
+    ".code segment",
+    "inicio:",
+    "    lea si, valor",
+    "    inc ax",
+    "    jne inicio",
+    "ends",
+]
+
+
+class TestInstrumentacion(unittest.TestCase):
+
+    def test_cuenta_fases_y_auxiliares(self):
+        asm = Ensamblador8086()
+        with Instrumentacion(asm) as perfil:
+            ensamblado(PROGRAMA, asm=asm)
+        medidas = perfil.medidas
+        self.assertEqual(medidas['analizar_sintaxis'].llamadas, 1)
+        self.assertEqual(medidas['tokenizar_linea'].llamadas, len(PROGRAMA))
+        self.assertGreaterEqual(medidas['codificar_instruccion'].llamadas, 3)
+        self.assertGreater(medidas['identificar_tipo_token'].llamadas, 0)
+        fase = medidas['analizar_sintaxis']
+        self.assertLessEqual(fase.propio_ns, fase.total_ns)
+        self.assertGreater(sum(perfil.regex_funciones.values()), 0)
+        # Análisis y las dos pasadas de codificación reutilizan los tokens de la carga
+        aciertos, fallos = perfil.caches()['tokens']
+        self.assertEqual(fallos, len(PROGRAMA))
+        self.assertEqual(aciertos, 3 * len(PROGRAMA))
+        self.assertIn('tokenizar_linea', perfil.resumen())
+
+    def test_desactivar_restaura_el_ensamblador(self):
+        asm = Ensamblador8086()
+        with Instrumentacion(asm) as perfil:
+            self.assertIn('tokenizar_linea', vars(asm))
+            self.assertIsNot(ensamblador.re, __import__('re'))
+        self.assertFalse(set(perfil.metodos) & set(vars(asm)))
+        self.assertIs(ensamblador.re, __import__('re'))
+        ensamblado(PROGRAMA, asm=asm)
+        self.assertEqual(perfil.medidas['tokenizar_linea'].llamadas, 0)
+        self.assertTrue(asm.lineas_codificadas)
+
+    def test_anidada_restaura_el_contador_anterior(self):
+        externa, interna = Instrumentacion(Ensamblador8086()), Instrumentacion(Ensamblador8086())
+        with externa:
+            contador = ensamblador.re
+            with interna:
+                ensamblado(PROGRAMA, asm=interna.ensamblador)
+            self.assertIs(ensamblador.re, contador)
+        self.assertIs(ensamblador.re, __import__('re'))
+        # El contador es del módulo: la externa también vio las expresiones de la interna
+        self.assertEqual(externa.regex_funciones, interna.regex_funciones)
+
+    def test_main_restaura_re_si_la_carga_falla(self):
+        with tempfile.TemporaryDirectory() as d, redirect_stderr(io.StringIO()):
+            codigo = ensamblador.main([os.path.join(d, 'no_existe.asm'), '--perfil', '--perfil-memoria'])
+        self.assertEqual(codigo, 1)
+        self.assertIs(ensamblador.re, __import__('re'))
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_traza_chrome(self):
+        asm = Ensamblador8086()
+        with Instrumentacion(asm, traza=True) as perfil:
+            ensamblado(PROGRAMA, asm=asm)
+        with tempfile.TemporaryDirectory() as d:
+            ruta = os.path.join(d, 'traza.json')
+            perfil.escribir_traza(ruta)
+            with open(ruta, encoding='utf-8') as f:
+                traza = json.load(f)
+        nombres = {e['name'] for e in traza['traceEvents']}
+        self.assertTrue({'analizar_sintaxis', 'tokenizar_linea', 'codificar_instruccion'} <= nombres)
+        self.assertTrue(all(e['ph'] == 'X' and e['dur'] >= 0 for e in traza['traceEvents']))
+        self.assertIn('caches', traza['otherData'])
+
+    def test_traza_sin_eventos(self):
+        perfil = Instrumentacion(Ensamblador8086())
+        with self.assertRaises(ValueError):
+            perfil.escribir_traza(os.devnull)
+
+
+class TestPerfilMemoria(unittest.TestCase):
+
+    def test_fases_y_estructuras(self):
+        asm = Ensamblador8086()
+        with PerfilMemoria(asm) as memoria:
+            with memoria.fase('cargar'):
+                asm.cargar_lineas(list(PROGRAMA))
+            with memoria.fase('analizar_sintaxis'):
+                asm.analizar_sintaxis()
+        self.assertEqual([m.fase for m in memoria.fases], ['cargar', 'analizar_sintaxis'])
+        for m in memoria.fases:
+            self.assertGreater(m.pico, 0)
+            self.assertGreaterEqual(m.pico, m.retenido)
+        self.assertEqual(set(memoria.estructuras), set(ESTRUCTURAS))
+        self.assertGreater(memoria.estructuras['lineas_analizadas'], 0)
+        self.assertIn('tabla_simbolos', memoria.resumen())
+
+    def test_importaciones_fuera_de_las_fases(self):
+        # Proceso nuevo: preprocesador todavía no está importado
+        with tempfile.TemporaryDirectory() as d:
+            fuente = os.path.join(d, 'p.asm')
+            with open(fuente, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(PROGRAMA))
+            salida = subprocess.run([sys.executable, ensamblador.__file__, fuente, '--perfil-memoria', '-q'],
+                                    capture_output=True, text=True, timeout=60)
+        self.assertIn('cargar_archivo', salida.stderr)
+        self.assertNotIn('importlib', salida.stderr)
+
+    def test_tamano_profundo_cuenta_compartidos_una_vez(self):
+        texto = 'x' * 1000
+        self.assertLess(tamano_profundo([texto, texto]), tamano_profundo([texto, 'y' * 1000]))
+        self.assertGreater(tamano_profundo({'a': [texto]}), 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
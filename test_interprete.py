@@ -0,0 +1,142 @@
+import unittest
+from apoyo_pruebas import ensamblado
+from interprete8086 import Interprete8086, ErrorEjecucion, CF, ZF
+
+
+class TestInterprete(unittest.TestCase):
+
+    def setUp(self):
+        self.cpu = Interprete8086()
+
+    def test_ciclo_loope(self):
+        asm = ensamblado([
+            ".code segment",
+            "inicio:",
+            "    xor cx, cx",
+            "    inc cx",
+            "    inc cx",
+            "    inc cx",
+            "    xor dx, dx",
+            "ciclo:",
+            "    inc bx",
+            "    xor ax, ax",
+            "    loope ciclo",
+            "ends",
+            "end inicio",
+        ])
+        self.cpu.cargar_ensamblador(asm)
+        self.cpu.ejecutar()
+        self.assertTrue(self.cpu.detenido)
+        self.assertEqual(self.cpu.registro('BX'), 3)
+        self.assertEqual(self.cpu.registro('CX'), 0)
+
+    def test_cache_decodifica_una_vez(self):
+        # 33 D2 = XOR DX, DX ; E1 FC = LOOPE -4 (vuelve al XOR)
+        self.cpu.cargar(bytes([0x33, 0xD2, 0xE1, 0xFC]), 0x100)
+        self.assertEqual(self.cpu.ejecutar(1000), 1000)
+        self.assertEqual(len(self.cpu._cache), 2)
+
+    def test_escritura_de_datos_conserva_cache(self):
+        # 30 07 = XOR [BX], AL ; E1 FC = LOOPE -4 (vuelve al XOR)
+        self.cpu.cargar(bytes([0x30, 0x07, 0xE1, 0xFC]), 0x100)
+        decodificadas = []
+        original = self.cpu._decodificar
+        self.cpu._decodificar = lambda ip: decodificadas.append(ip) or original(ip)
+        self.assertEqual(self.cpu.ejecutar(1000), 1000)
+        self.assertEqual(decodificadas, [0x100, 0x102])
+
+    def test_codigo_automodificable(self):
+        # 43 = INC BX ; 30 07 = XOR [BX], AL ; E1 FB = LOOPE -5
+        # Con DS = CS, el XOR convierte el INC BX (43h) en NOP (43h ^ D3h = 90h)
+        self.cpu.cargar(bytes([0x43, 0x30, 0x07, 0xE1, 0xFB]), 0)
+        for _ in range(2):
+            self.cpu.reiniciar(0)
+            self.cpu.sregs[3] = self.cpu.sregs[1]
+            self.cpu.regs[3] = 0xFFFF
+            self.cpu.regs[0] = 0xD3
+            self.cpu.ejecutar()
+        self.assertEqual(self.cpu.memoria[self.cpu.sregs[1] << 4], 0x90)
+        self.assertEqual(self.cpu.registro('BX'), 0xFFFF)
+
+    def test_aam_aad(self):
+        self.cpu.cargar(bytes([0xD4, 0x0A]), 0)
+        self.cpu.regs[0] = 47
+        self.cpu.ejecutar()
+        self.assertEqual(self.cpu.registro('AH'), 4)
+        self.assertEqual(self.cpu.registro('AL'), 7)
+
+        self.cpu.cargar(bytes([0xD5, 0x0A]), 0)
+        self.cpu.regs[0] = 0x0407
+        self.cpu.ejecutar()
+        self.assertEqual(self.cpu.regs[0], 47)
+
+    def test_mul_idiv(self):
+        # MUL CX ; IDIV BX
+        self.cpu.cargar(bytes([0xF7, 0xE1, 0xF7, 0xFB]), 0)
+        self.cpu.regs[0] = 300
+        self.cpu.regs[1] = 300
+        self.cpu.regs[3] = 7
+        self.cpu.ejecutar(1)
+        self.assertEqual((self.cpu.regs[2] << 16) | self.cpu.regs[0], 90000)
+        self.assertTrue(self.cpu.banderas[CF])
+        self.cpu.ejecutar(1)
+        self.assertEqual(self.cpu.regs[0], 90000 // 7)
+        self.assertEqual(self.cpu.regs[2], 90000 % 7)
+
+    def test_idiv_entre_cero(self):
+        self.cpu.cargar(bytes([0xF6, 0xFB]), 0)
+        with self.assertRaises(ErrorEjecucion):
+            self.cpu.ejecutar()
+
+    def test_cmpsb(self):
+        self.cpu.cargar(bytes([0xA6]), 0, b'AB', 0)
+        self.cpu.regs[6] = 0
+        self.cpu.regs[7] = 0
+        self.cpu.ejecutar()
+        self.assertTrue(self.cpu.banderas[ZF])
+        self.assertEqual(self.cpu.regs[6], 1)
+        self.assertEqual(self.cpu.regs[7], 1)
+
+    def test_int21_imprime_y_termina(self):
+        # INT 21h con AH=09h imprime DS:DX hasta '$'; AH=4Ch termina
+        self.cpu.cargar(bytes([0xCD, 0x21]), 0, b'Hola$', 0)
+        self.cpu.regs[0] = 0x0900
+        self.cpu.ejecutar(1)
+        self.assertEqual(self.cpu.salida, ['Hola'])
+        self.cpu.cargar(bytes([0xCD, 0x21, 0x90]), 0)
+        self.cpu.regs[0] = 0x4C05
+        self.cpu.ejecutar()
+        self.assertEqual(self.cpu.codigo_salida, 5)
+        self.assertEqual(self.cpu.instrucciones_ejecutadas, 1)
+
+    def test_int_fuera_de_rango(self):
+        asm = ensamblado([".code segment", "int 300", "int 21h", "ends"])
+        self.assertEqual(asm.lineas_analizadas[1]['resultado'], 'Incorrecta')
+        self.assertEqual(asm.lineas_codificadas[1]['codigo_maquina'], 'Incorrecta')
+        origen, imagen = asm.imagen_segmento('CODE')
+        self.assertEqual(bytes(imagen), bytes([0xCD, 0x21]))
+
+    def test_logicas_con_inmediato(self):
+        asm = ensamblado([
+            ".code segment",
+            "    xor ax, ax",
+            "    or ax, 0F0Fh",
+            "    and al, 0F3h",
+            "    xor bx, bx",
+            "    or bl, 0C0h",
+            "    xor bx, 0100h",
+            "ends",
+        ])
+        self.cpu.cargar_ensamblador(asm)
+        self.cpu.ejecutar()
+        self.assertEqual(self.cpu.registro('AX'), 0x0F03)
+        self.assertEqual(self.cpu.registro('BX'), 0x01C0)
+
+    def test_opcode_no_soportado(self):
+        self.cpu.cargar(bytes([0xF4]), 0)
+        with self.assertRaises(ErrorEjecucion):
+            self.cpu.ejecutar()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+
+from apoyo_pruebas import ensamblado
+from diagnosticos import Codigo, Severidad
+from ensamblador import TipoToken
+from expresiones import ErrorExpresion, MAX_ELEMENTOS, analizar_expresion
+
+
+class TestLimites(unittest.TestCase):
+
+    def test_linea_larga_no_se_tokeniza(self):
+        larga = "mov ax, " + "[" * 600 + "bx" + "]" * 600
+        asm = ensamblado([".code segment", larga, "nop ; " + "x" * 2000, "ends"], max_longitud_linea=1024)
+        self.assertEqual([t.tipo for t in asm.tokens_de_linea(1, larga)], [TipoToken.NO_IDENTIFICADO])
+        rechazada, comentario = asm.lineas_analizadas[1:3]
+        self.assertEqual(rechazada['mensaje'].codigo, Codigo.LINEA_DEMASIADO_LARGA)
+        self.assertEqual(str(rechazada['mensaje']), "Línea demasiado larga (1210 caracteres; máximo 1024)")
+        self.assertEqual(comentario['resultado'], 'Correcta')
+
+    def test_demasiados_tokens(self):
+        valores = ', '.join(['1'] * 40)
+        asm = ensamblado([".data segment", f"tabla db {valores}", "ends"], max_tokens_linea=32)
+        self.assertEqual(asm.lineas_analizadas[1]['mensaje'].codigo, Codigo.DEMASIADOS_TOKENS)
+        asm = ensamblado([".data segment", f"tabla db {valores}", "ends"])
+        self.assertEqual(asm.lineas_analizadas[1]['resultado'], 'Correcta')
+
+    def test_sin_limites_por_omision(self):
+        valores = ', '.join(['1'] * 150)
+        asm = ensamblado([".data segment", f"tabla db {valores}", "; " + "x" * 2000, "ends"])
+        self.assertEqual([a['resultado'] for a in asm.lineas_analizadas], ['Correcta'] * 3)
+
+    def test_expresion_demasiado_larga(self):
+        with self.assertRaises(ErrorExpresion):
+            analizar_expresion('+'.join(['1'] * MAX_ELEMENTOS))
+        asm = ensamblado([".code segment", "lea si, [" + "bx+" * 2000 + "si]", "ends"],
+                         max_longitud_linea=None, max_tokens_linea=None)
+        self.assertEqual(len(asm.lineas_codificadas), 3)
+
+    def test_guarda_de_tiempo(self):
+        asm = ensamblado([".code segment", "nop", "ends"], umbral_lento=0.0)
+        self.assertEqual([numero for numero, _ in asm.advertencias], [1, 2, 3])
+        _, advertencia = asm.advertencias[0]
+        self.assertEqual(advertencia.codigo, Codigo.LINEA_LENTA)
+        self.assertEqual(advertencia.severidad, Severidad.ADVERTENCIA)
+        self.assertEqual(ensamblado(["nop"]).advertencias, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
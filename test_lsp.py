@@ -0,0 +1,187 @@
+import io
+import json
+import random
+import unittest
+
+import lsp
+from diagnosticos import Codigo
+from lsp import Documento, ServidorLSP
+
+PROGRAMA = "\n".join([
+    ".data segment",
+    "    valor db 25",
+    "    otro dw 300",
+    "ends",
+    ".code segment",
+    "inicio:",
+    "    lea si, valor",
+    "    xor ax, bx",
+    "rutina PROC",
+    "    lea di, otro",
+    "    nop",
+    "rutina ENDP",
+    "    or cl, 1",
+    "ends",
+])
+
+
+def cambio(l0, c0, l1, c1, texto):
+    return {'range': {'start': {'line': l0, 'character': c0}, 'end': {'line': l1, 'character': c1}},
+            'text': texto}
+
+
+def resumen(documento):
+    return sorted((d['range']['start']['line'], d['code']) for d in documento.diagnosticos())
+
+
+class TestDocumento(unittest.TestCase):
+
+    def setUp(self):
+        # Puntos de control cada pocas líneas para ejercitar la reanudación y la convergencia
+        self.intervalo = lsp.INTERVALO_PUNTOS
+        lsp.INTERVALO_PUNTOS = 3
+
+    def tearDown(self):
+        lsp.INTERVALO_PUNTOS = self.intervalo
+
+    def assertIgualAlCompleto(self, documento):
+        self.assertEqual(resumen(documento), resumen(Documento('otro', '\n'.join(documento.lineas))))
+
+    def test_programa_correcto(self):
+        self.assertEqual(Documento('u', PROGRAMA).diagnosticos(), [])
+
+    def test_diagnostico_de_linea(self):
+        documento = Documento('u', PROGRAMA)
+        documento.aplicar_cambio(cambio(7, 8, 7, 10, 'zz'))
+        diagnosticos = documento.diagnosticos()
+        self.assertEqual(len(diagnosticos), 1)
+        self.assertEqual(diagnosticos[0]['range']['start'], {'line': 7, 'character': 4})
+        self.assertEqual(diagnosticos[0]['severity'], 1)
+        self.assertEqual(diagnosticos[0]['source'], lsp.FUENTE)
+
+    def test_solo_revalida_lo_necesario(self):
+        documento = Documento('u', PROGRAMA)
+        documento.aplicar_cambio(cambio(12, 11, 12, 12, '2'))
+        self.assertEqual(documento.lineas_validadas, 1)
+        self.assertEqual(documento.diagnosticos(), [])
+
+    def test_renombrar_variable_afecta_a_sus_usos(self):
+        documento = Documento('u', PROGRAMA)
+        documento.aplicar_cambio(cambio(1, 4, 1, 9, 'dato'))
+        self.assertEqual([linea for linea, _ in resumen(documento)], [6])
+        self.assertIgualAlCompleto(documento)
+        documento.aplicar_cambio(cambio(1, 4, 1, 8, 'valor'))
+        self.assertEqual(documento.diagnosticos(), [])
+
+    def test_insertar_y_borrar_lineas(self):
+        documento = Documento('u', PROGRAMA)
+        documento.aplicar_cambio(cambio(7, 14, 7, 14, '\n    or dl, 2\n    bogus'))
+        self.assertEqual(len(documento.lineas), 16)
+        self.assertEqual([linea for linea, _ in resumen(documento)], [9])
+        documento.aplicar_cambio(cambio(7, 14, 9, 9, ''))
+        self.assertEqual(documento.lineas, PROGRAMA.split('\n'))
+        self.assertEqual(documento.diagnosticos(), [])
+
+    def test_proc_sin_endp(self):
+        documento = Documento('u', PROGRAMA)
+        documento.aplicar_cambio(cambio(11, 0, 12, 0, ''))
+        self.assertIn((8, int(Codigo.PROC_SIN_ENDP)), resumen(documento))
+        self.assertIgualAlCompleto(documento)
+
+    def test_posiciones_fuera_del_documento(self):
+        documento = Documento('u', PROGRAMA)
+        total = len(documento.lineas)
+        documento.aplicar_cambio(cambio(total, 0, total + 3, 5, '\n    nop'))
+        self.assertEqual(documento.lineas[-2:], ['ends', '    nop'])
+        documento.aplicar_cambio(cambio(0, 200, 0, 300, ' ; datos'))
+        self.assertEqual(documento.lineas[0], '.data segment ; datos')
+        self.assertIgualAlCompleto(documento)
+
+    def test_texto_completo(self):
+        documento = Documento('u', PROGRAMA)
+        documento.aplicar_cambio({'text': "mov ax, bx"})
+        self.assertEqual(documento.lineas, ["mov ax, bx"])
+
+    def test_ediciones_aleatorias_igual_que_analisis_completo(self):
+        rng = random.Random(7)
+        documento = Documento('u', PROGRAMA)
+        fragmentos = ['x', '\n', '', ':', 'valor', 'ENDP', 'PROC', 'ends', '\n    lea si, otro', 'v db 1']
+        for _ in range(300):
+            l0 = rng.randrange(len(documento.lineas))
+            l1 = min(len(documento.lineas) - 1, l0 + rng.choice([0, 0, 1, 2]))
+            c0 = rng.randrange(len(documento.lineas[l0]) + 1)
+            c1 = rng.randrange(len(documento.lineas[l1]) + 1) if l1 > l0 else c0
+            documento.aplicar_cambio(cambio(l0, c0, l1, c1, rng.choice(fragmentos)))
+            self.assertIgualAlCompleto(documento)
+
+    def test_hover_y_definicion(self):
+        documento = Documento('u', PROGRAMA)
+        hover = documento.hover(6, 13)
+        self.assertIn('**valor**', hover['contents']['value'])
+        self.assertIn('DB', hover['contents']['value'])
+        self.assertIn('XOR', documento.hover(7, 5)['contents']['value'])
+        self.assertIsNone(documento.hover(7, 0))
+        definicion = documento.definicion(9, 13)
+        self.assertEqual(definicion['range']['start'], {'line': 2, 'character': 4})
+        self.assertEqual(documento.definicion(9, 5), None)
+
+
+class TestServidor(unittest.TestCase):
+
+    def intercambiar(self, mensajes):
+        entrada = b''.join(
+            f"Content-Length: {len(cuerpo)}\r\n\r\n".encode() + cuerpo
+            for cuerpo in (json.dumps(m).encode() for m in mensajes))
+        salida = io.BytesIO()
+        codigo = ServidorLSP(io.BytesIO(entrada), salida).ejecutar()
+        respuestas = []
+        lector = ServidorLSP(io.BytesIO(salida.getvalue()), io.BytesIO())
+        while (mensaje := lector.leer()) is not None:
+            respuestas.append(mensaje)
+        return codigo, respuestas
+
+    def test_sesion(self):
+        uri = 'file:///programa.asm'
+        codigo, respuestas = self.intercambiar([
+            {'jsonrpc': '2.0', 'id': 1, 'method': 'initialize', 'params': {}},
+            {'jsonrpc': '2.0', 'method': 'initialized', 'params': {}},
+            {'jsonrpc': '2.0', 'method': 'textDocument/didOpen',
+             'params': {'textDocument': {'uri': uri, 'text': PROGRAMA, 'version': 1}}},
+            {'jsonrpc': '2.0', 'method': 'textDocument/didChange',
+             'params': {'textDocument': {'uri': uri, 'version': 2},
+                        'contentChanges': [cambio(7, 4, 7, 7, 'mvo')]}},
+            {'jsonrpc': '2.0', 'id': 2, 'method': 'textDocument/hover',
+             'params': {'textDocument': {'uri': uri}, 'position': {'line': 6, 'character': 12}}},
+            {'jsonrpc': '2.0', 'id': 3, 'method': 'textDocument/documentSymbol', 'params': {}},
+            {'jsonrpc': '2.0', 'id': 4, 'method': 'shutdown'},
+            {'jsonrpc': '2.0', 'method': 'exit'},
+        ])
+        self.assertEqual(codigo, 0)
+        inicial, abierto, cambiado, hover, desconocido, apagado = respuestas
+        self.assertEqual(inicial['result']['capabilities']['textDocumentSync']['change'], 2)
+        self.assertEqual(abierto['params']['diagnostics'], [])
+        self.assertEqual(cambiado['params']['version'], 2)
+        self.assertEqual([d['range']['start']['line'] for d in cambiado['params']['diagnostics']], [7])
+        self.assertIn('valor', hover['result']['contents']['value'])
+        self.assertEqual(desconocido['error']['code'], lsp.METODO_NO_ENCONTRADO)
+        self.assertIsNone(apagado['result'])
+
+    def test_error_en_notificacion_no_detiene_el_servidor(self):
+        uri = 'file:///programa.asm'
+        codigo, respuestas = self.intercambiar([
+            {'jsonrpc': '2.0', 'method': 'textDocument/didOpen',
+             'params': {'textDocument': {'uri': uri, 'text': PROGRAMA, 'version': 1}}},
+            {'jsonrpc': '2.0', 'method': 'textDocument/didChange',
+             'params': {'textDocument': {'uri': uri, 'version': 2}, 'contentChanges': [{'range': {}}]}},
+            {'jsonrpc': '2.0', 'id': 1, 'method': 'shutdown'},
+            {'jsonrpc': '2.0', 'method': 'exit'},
+        ])
+        self.assertEqual(codigo, 0)
+        _, registro, apagado = respuestas
+        self.assertEqual(registro['method'], 'window/logMessage')
+        self.assertEqual(registro['params']['type'], lsp.MENSAJE_ERROR)
+        self.assertIsNone(apagado['result'])
+
+
+if __name__ == '__main__':
+    unittest.main()
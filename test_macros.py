@@ -0,0 +1,81 @@
+import unittest
+from ensamblador import Ensamblador8086
+
+PROGRAMA = [
+    "limpiar MACRO reg",
+    "    xor reg, reg",
+    "ENDM",
+    "sumar2 MACRO reg",
+    "    inc reg",
+    "    inc reg",
+    "ENDM",
+    ".code segment",
+    "inicio: limpiar ax",
+    "    sumar2 bx",
+    "    sumar2 bx",
+    "    limpiar cl",
+    "ends",
+    "end inicio",
+]
+
+
+class TestMacros(unittest.TestCase):
+
+    def setUp(self):
+        self.asm = Ensamblador8086()
+        self.asm.cargar_lineas(list(PROGRAMA))
+
+    def test_expansion(self):
+        self.assertEqual(self.asm.lineas_codigo, [
+            ".code segment",
+            "inicio:",
+            "xor ax, ax",
+            "inc bx", "inc bx",
+            "inc bx", "inc bx",
+            "xor cl, cl",
+            "ends",
+            "end inicio",
+        ])
+
+    def test_lineas_apuntan_a_invocacion(self):
+        self.asm.analizar_sintaxis()
+        origenes = {a['linea']: a['origen'] for a in self.asm.lineas_analizadas}
+        self.assertEqual(origenes['xor ax, ax'], 9)
+        self.assertEqual(origenes['xor cl, cl'], 12)
+        self.assertTrue(all(a['resultado'] == 'Correcta' for a in self.asm.lineas_analizadas))
+
+    def test_tokens_sustituidos_sin_retokenizar(self):
+        tokens = self.asm.tokens_de_linea(2, self.asm.lineas_codigo[2])
+        self.assertEqual([t.valor for t in tokens], ['xor', 'ax', 'ax'])
+        self.assertEqual(tokens[0].linea, 9)
+
+    def test_cache_de_expansiones(self):
+        procesador = self.asm.procesador_macros
+        self.assertEqual(procesador.expansiones, 4)
+        self.assertEqual(procesador.aciertos_cache, 1)
+
+    def test_codificacion_de_expansion(self):
+        self.asm.analizar_sintaxis()
+        self.asm.generar_codificacion()
+        codigos = [lc['codigo_maquina'] for lc in self.asm.lineas_codificadas if lc['tamano']]
+        self.assertEqual(codigos, ['Correcta | 33 C0', 'Correcta | 43', 'Correcta | 43',
+                                   'Correcta | 43', 'Correcta | 43', 'Correcta | 32 C9'])
+
+    def test_redefinicion_invalida_cache(self):
+        asm = Ensamblador8086()
+        asm.cargar_lineas([
+            "m MACRO r", "    inc r", "ENDM",
+            ".code segment", "m ax",
+            "m MACRO r", "    xor r, r", "ENDM",
+            "m ax", "ends",
+        ])
+        self.assertEqual(asm.lineas_codigo, [".code segment", "inc ax", "xor ax, ax", "ends"])
+
+    def test_macro_sin_endm(self):
+        asm = Ensamblador8086()
+        asm.cargar_lineas([".code segment", "m MACRO", "    nop", "ends"])
+        self.assertEqual(asm.lineas_codigo, [".code segment", "m MACRO", "    nop", "ends"])
+
+
+if __name__ == '__main__':
+    unittest.main()
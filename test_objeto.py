@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+
+from apoyo_pruebas import ensamblado
+from objeto import ErrorObjeto, ModuloObjeto, SimboloObjeto, escribir_objeto
+
+PROGRAMA = [
+    "PUBLIC tabla, inicio, TAM",
+    "EXTRN rutina:NEAR, externo:WORD",
+    ".data segment",
+    "TAM equ 4",
+    "tabla dw 1, 2",
+    "p1 dw tabla + 2",
+    "p2 dw OFFSET externo",
+    "ends",
+    ".code segment",
+    "inicio: lea si, tabla",
+    "    jc rutina",
+    "ends",
+    "end inicio",
+]
+
+
+class TestObjeto(unittest.TestCase):
+
+    def setUp(self):
+        self.asm = ensamblado(PROGRAMA)
+        self.modulo = ModuloObjeto.desde_ensamblador(self.asm, 'prueba')
+
+    def test_directivas_de_enlace(self):
+        self.assertTrue(all(a['resultado'] == 'Correcta' for a in self.asm.lineas_analizadas))
+        self.assertEqual(self.asm.tabla_simbolos['rutina'].tipo, 'Externo')
+        asm = ensamblado(["PUBLIC falta", "EXTRN sin_tipo", ".code segment", "nop", "ends"])
+        self.assertEqual(str(asm.lineas_analizadas[0]['mensaje']), "Símbolo público 'falta' no definido")
+        self.assertEqual(asm.lineas_analizadas[1]['resultado'], 'Incorrecta')
+
+    def test_direcciones_de_simbolos_con_sufijo_numerico(self):
+        # Nombres que terminan en B, H o D no son literales
+        asm = ensamblado([".data segment", "tab dw 5", "tah dw 6", "tad dw 7",
+                         "x dw tab", "y dw tah", "z dw tad + 2", "ends"])
+        self.assertTrue(all(a['resultado'] == 'Correcta' for a in asm.lineas_analizadas))
+        datos = {lc['linea']: lc for lc in asm.lineas_codificadas}
+        self.assertEqual(datos['x dw tab']['codigo_maquina'], 'Correcta | 50 02')
+        self.assertEqual(datos['y dw tah']['codigo_maquina'], 'Correcta | 52 02')
+        self.assertEqual(datos['z dw tad + 2']['codigo_maquina'], 'Correcta | 56 02')
+        self.assertEqual([f[2:] for lc in datos.values() for f in lc.get('fixups') or ()],
+                         [('tab', 0), ('tah', 0), ('tad', 2)])
+
+    def test_lea_codifica_direccion_real(self):
+        codigos = {lc['linea']: lc['codigo_maquina'] for lc in self.asm.lineas_codificadas}
+        self.assertEqual(codigos['inicio: lea si, tabla'], 'Correcta | 8D 36 50 02')
+        self.assertEqual(codigos['jc rutina'], 'Correcta | 72 00')
+
+    def test_simbolos_y_reubicaciones(self):
+        simbolos = {s.nombre: s for s in self.modulo.simbolos}
+        self.assertEqual(simbolos['tabla'], SimboloObjeto('tabla', 'DATA', 0x250, publico=True))
+        self.assertEqual(simbolos['TAM'], SimboloObjeto('TAM', None, 4, publico=True))
+        self.assertTrue(simbolos['rutina'].externo)
+        nombres = [(f.segmento, f.offset, f.tipo, self.modulo.simbolos[f.simbolo].nombre, f.sumando)
+                   for f in self.modulo.fixups]
+        self.assertEqual(nombres, [
+            ('DATA', 4, 'ABS16', 'tabla', 2),
+            ('DATA', 6, 'ABS16', 'externo', 0),
+            ('CODE', 2, 'ABS16', 'tabla', 0),
+            ('CODE', 5, 'REL8', 'rutina', 0),
+        ])
+
+    def test_ida_y_vuelta_con_mmap(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, 'prueba.obj')
+            escribir_objeto(self.asm, ruta)
+            with ModuloObjeto.leer(ruta) as leido:
+                self.assertEqual(leido.simbolos, self.modulo.simbolos)
+                self.assertEqual(leido.fixups, self.modulo.fixups)
+                codigo = leido.segmentos['CODE']
+                self.assertIsInstance(codigo.datos, memoryview)
+                self.assertEqual((codigo.origen, bytes(codigo.datos)), (0x250, bytes.fromhex('8D3650027200')))
+            self.assertIsNone(leido._mapa)
+
+    def test_archivo_invalido(self):
+        datos = bytearray(self.modulo.a_bytes())
+        self.assertRaises(ErrorObjeto, ModuloObjeto.desde_bufer, b'XYZ')
+        self.assertRaises(ErrorObjeto, ModuloObjeto.desde_bufer, b'NOOBJ!' + bytes(datos[6:]))
+        datos[6] = 99  # versión
+        self.assertRaises(ErrorObjeto, ModuloObjeto.desde_bufer, bytes(datos))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+from apoyo_pruebas import ensamblado
+from optimizador import Optimizador, optimizar
+
+
+PROGRAMA = [
+    ".code segment",
+    "inicio:",
+    "    nop",
+    "    nop",
+    "    inc ax",
+    "    inc ax",
+    "    xor ax, ax",
+    "    and ax, bx",
+    "ciclo:",
+    "    inc cx",
+    "    loope ciclo",
+    "ends",
+    "end inicio",
+]
+
+
+class TestOptimizador(unittest.TestCase):
+
+    def test_reglas_predeterminadas(self):
+        asm = ensamblado(PROGRAMA, codificar=False)
+        reporte = optimizar(asm)
+        eliminadas = [(num, regla) for num, _, regla in reporte.eliminadas]
+        self.assertEqual(eliminadas, [
+            (3, 'nop_redundante'), (4, 'nop_redundante'),
+            (6, 'inc_muerto'), (5, 'inc_muerto'),
+            (8, 'logica_tras_xor'),
+        ])
+        self.assertEqual(reporte.bytes_ahorrados, 1 + 1 + 1 + 1 + 2)
+        self.assertGreater(reporte.ciclos_ahorrados, 0)
+
+    def test_direcciones_de_etiquetas_se_recalculan(self):
+        asm = ensamblado(PROGRAMA, codificar=False)
+        optimizar(asm)
+        asm.generar_codificacion()
+        # Solo queda XOR AX, AX (2 bytes) antes de 'ciclo'
+        self.assertEqual(asm.tabla_simbolos['inicio'].direccion, '0250')
+        self.assertEqual(asm.tabla_simbolos['ciclo'].direccion, '0252')
+        loope = [lc for lc in asm.lineas_codificadas if lc['linea'].startswith('loope')][0]
+        self.assertEqual(loope['codigo_maquina'], 'Correcta | E1 FD')
+
+    def test_etiqueta_bloquea_ventana(self):
+        asm = ensamblado([
+            ".code segment",
+            "    xor ax, ax",
+            "destino:",
+            "    and ax, bx",
+            "ends",
+        ], codificar=False)
+        self.assertEqual(optimizar(asm).eliminadas, [])
+
+    def test_reglas_configurables(self):
+        asm = ensamblado(PROGRAMA, codificar=False)
+        reporte = Optimizador(['nop_redundante']).aplicar(asm)
+        self.assertEqual({regla for _, _, regla in reporte.eliminadas}, {'nop_redundante'})
+        self.assertEqual(asm.lineas_codigo[2], '')
+
+
+if __name__ == '__main__':
+    unittest.main()
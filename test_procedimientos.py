@@ -0,0 +1,71 @@
+import unittest
+from ensamblador import Ensamblador8086, TablaSimbolos, Simbolo
+
+PROGRAMA = [
+    ".code segment",
+    "uno proc",
+    "ciclo: nop",
+    "    jc ciclo",
+    "uno endp",
+    "dos PROC near",
+    "ciclo: cmc",
+    "    aad",
+    "    jc CICLO",
+    "dos endp",
+    "    jc ciclo",
+    "ends",
+    "end uno",
+]
+
+
+class TestProcedimientos(unittest.TestCase):
+
+    def setUp(self):
+        self.asm = Ensamblador8086()
+        self.asm.cargar_lineas(list(PROGRAMA))
+        self.asm.analizar_sintaxis()
+        self.asm.generar_codificacion()
+        self.analisis = {a['numero']: a for a in self.asm.lineas_analizadas}
+
+    def test_etiquetas_locales_no_colisionan(self):
+        self.assertEqual(self.asm.ambito('uno')['ciclo'].direccion, '0250')
+        self.assertEqual(self.asm.ambito('dos')['ciclo'].direccion, '0253')
+        self.assertNotIn('ciclo', self.asm.tabla_simbolos)
+        codigos = {lc['numero']: lc['codigo_maquina'] for lc in self.asm.lineas_codificadas}
+        self.assertEqual(codigos[4], 'Correcta | 72 FD')
+        self.assertEqual(codigos[9], 'Correcta | 72 FB')
+
+    def test_etiqueta_local_fuera_de_su_procedimiento(self):
+        self.assertEqual(self.analisis[11]['resultado'], 'Incorrecta')
+        self.assertEqual(self.analisis[7]['ambito'], 'dos')
+
+    def test_direccion_y_tamano_de_procedimiento(self):
+        uno = self.asm.tabla_simbolos['uno']
+        dos = self.asm.tabla_simbolos['dos']
+        self.assertEqual((uno.tipo, uno.direccion, uno.tamanio), ('Procedimiento', '0250', '3'))
+        self.assertEqual((dos.direccion, dos.tamanio), ('0253', '5'))
+        nombres = [s.nombre_calificado for s in self.asm.simbolos_listado()]
+        self.assertEqual(nombres, ['uno', 'uno::ciclo', 'dos', 'dos::ciclo'])
+
+    def test_endp_y_proc_mal_formados(self):
+        asm = Ensamblador8086()
+        asm.cargar_lineas([".code segment", "p1 proc", "p2 endp", "p1 proc far", "p3 proc lejos", "ends"])
+        asm.analizar_sintaxis()
+        resultados = [(a['linea'], a['resultado']) for a in asm.lineas_analizadas]
+        self.assertIn(("p2 endp", 'Incorrecta'), resultados)
+        self.assertIn(("p1 proc far", 'Incorrecta'), resultados)
+        self.assertIn(("p3 proc lejos", 'Incorrecta'), resultados)
+        self.assertEqual(str(asm.lineas_analizadas[1]['mensaje']), 'PROC sin ENDP')
+
+    def test_tabla_busqueda_en_cadena(self):
+        glob = TablaSimbolos({'Dato': Simbolo('Dato', 'Variable', '1', 'DB')})
+        local = TablaSimbolos(nombre='p', padre=glob)
+        local['x'] = Simbolo('x', 'Etiqueta', '', '')
+        self.assertIs(local.buscar('DATO'), glob['Dato'])
+        self.assertIsNone(glob.buscar('x'))
+        del glob['Dato']
+        self.assertIsNone(local.buscar('dato'))
+
+
+if __name__ == '__main__':
+    unittest.main()
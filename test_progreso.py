@@ -0,0 +1,152 @@
+import unittest
+
+import ensamblador
+import preprocesador
+from ensamblador import AnalisisCancelado, Ensamblador8086, TrabajoSegundoPlano
+
+PROGRAMA = [".data segment", "valor db 5", "ends", ".code segment"] + \
+           ["    nop", "    xor ax, ax", "    bogus"] * 10 + ["ends"]
+
+
+class TestProgreso(unittest.TestCase):
+
+    def setUp(self):
+        self.intervalo = ensamblador.INTERVALO_PROGRESO
+        ensamblador.INTERVALO_PROGRESO = preprocesador.INTERVALO_PROGRESO = 4
+
+    def tearDown(self):
+        ensamblador.INTERVALO_PROGRESO = preprocesador.INTERVALO_PROGRESO = self.intervalo
+
+    def cargado(self):
+        asm = Ensamblador8086()
+        asm.cargar_lineas(PROGRAMA)
+        return asm
+
+    def test_avisos_por_fase(self):
+        asm = Ensamblador8086()
+        avisos = []
+        asm.progreso = lambda fase, hechas, total: avisos.append((fase, hechas, total))
+        asm.cargar_lineas(PROGRAMA)
+        asm.analizar_sintaxis()
+        asm.generar_codificacion()
+        n = len(asm.lineas_codigo)
+        # Los INCLUDE se expanden dentro de la fase de condicionales
+        fases = ['condicionales', 'macros', 'cargar_lineas', 'analizar_sintaxis', 'generar_codificacion']
+        for fase, total in (('condicionales', n), ('macros', n),
+                            ('cargar_lineas', n), ('analizar_sintaxis', n), ('generar_codificacion', 2 * n)):
+            hechas = [h for f, h, t in avisos if f == fase]
+            self.assertEqual(hechas, sorted(hechas))
+            self.assertEqual(hechas[-1], total)
+            self.assertTrue(all(t == total for f, h, t in avisos if f == fase))
+        self.assertEqual([f for f, _, _ in avisos], sorted([f for f, _, _ in avisos], key=fases.index))
+
+    def test_cancelar_interrumpe_la_fase(self):
+        asm = self.cargado()
+
+        def progreso(fase, hechas, total):
+            if hechas >= 8:
+                raise AnalisisCancelado(fase)
+
+        asm.progreso = progreso
+        with self.assertRaises(AnalisisCancelado):
+            asm.analizar_sintaxis()
+        self.assertLess(len(asm.lineas_analizadas), len(asm.lineas_codigo))
+
+    def test_cancelar_durante_el_preprocesado(self):
+        asm = Ensamblador8086()
+        fases = []
+
+        def progreso(fase, hechas, total):
+            fases.append(fase)
+            if fase == 'macros':
+                raise AnalisisCancelado(fase)
+
+        asm.progreso = progreso
+        with self.assertRaises(AnalisisCancelado):
+            asm.cargar_lineas(["m MACRO", "nop", "ENDM"] + PROGRAMA)
+        self.assertEqual(fases[-1], 'macros')
+        self.assertEqual(asm.tokens, [])
+
+    def test_copia_para_analizar(self):
+        asm = self.cargado()
+        asm.analizar_sintaxis()
+        asm.generar_codificacion()
+        analizadas, codificadas = asm.lineas_analizadas, asm.lineas_codificadas
+        copia = asm.copia_para_analizar()
+        copia.reubicar(CODE=0x100)
+        copia.analizar_sintaxis()
+        copia.generar_codificacion()
+        self.assertIs(asm.lineas_analizadas, analizadas)
+        self.assertIs(asm.lineas_codificadas, codificadas)
+        self.assertEqual(asm.disposicion.bases['CODE'], 0x250)
+        self.assertEqual(copia.lineas_codificadas[4]['direccion'], '0100')
+        self.assertEqual(len(copia.lineas_analizadas), len(analizadas))
+
+    def test_sin_progreso_mismo_resultado(self):
+        con = self.cargado()
+        con.progreso = lambda *aviso: None
+        sin = self.cargado()
+        for asm in (con, sin):
+            asm.analizar_sintaxis()
+            asm.generar_codificacion()
+        self.assertEqual(con.lineas_codificadas, sin.lineas_codificadas)
+
+
+class TestTrabajoSegundoPlano(unittest.TestCase):
+
+    def setUp(self):
+        self.intervalo = ensamblador.INTERVALO_PROGRESO
+        ensamblador.INTERVALO_PROGRESO = preprocesador.INTERVALO_PROGRESO = 4
+
+    def tearDown(self):
+        ensamblador.INTERVALO_PROGRESO = preprocesador.INTERVALO_PROGRESO = self.intervalo
+
+    def mensajes(self, trabajo):
+        trabajo.iniciar()
+        trabajo._hilo.join(5)
+        self.assertFalse(trabajo.activo)
+        mensajes = []
+        while not trabajo.cola.empty():
+            mensajes.append(trabajo.cola.get_nowait())
+        return mensajes
+
+    def test_fragmentos_reconstruyen_la_carga(self):
+        asm = Ensamblador8086()
+        mensajes = self.mensajes(TrabajoSegundoPlano(asm, lambda: asm.cargar_lineas(PROGRAMA)))
+        self.assertEqual(mensajes[-1], ('fin', None))
+        fragmentos = [m[4] for m in mensajes[:-1]]
+        lineas, tokens = [], []
+        for fragmento in fragmentos:
+            self.assertEqual(fragmento['desde'], len(lineas))
+            lineas.extend(fragmento['lineas'])
+            tokens.extend(fragmento['tokens'])
+        self.assertEqual(lineas, asm.lineas_codigo)
+        self.assertEqual(tokens, asm.tokens)
+        self.assertIsNone(asm.progreso)
+
+    def test_incorrectas_del_analisis(self):
+        asm = Ensamblador8086()
+        asm.cargar_lineas(PROGRAMA)
+        mensajes = self.mensajes(TrabajoSegundoPlano(asm, asm.analizar_sintaxis))
+        incorrectas = [n for m in mensajes if m[0] == 'progreso' for n in m[4]['incorrectas']]
+        esperadas = [a['numero'] for a in asm.lineas_analizadas if a['resultado'] == 'Incorrecta']
+        self.assertEqual(incorrectas, esperadas)
+        self.assertEqual(len(esperadas), 10)
+
+    def test_cancelado(self):
+        asm = Ensamblador8086()
+        trabajo = TrabajoSegundoPlano(asm, lambda: asm.cargar_lineas(PROGRAMA))
+        trabajo.cancelar()
+        self.assertEqual(self.mensajes(trabajo), [('cancelado', None)])
+
+    def test_error(self):
+        def falla():
+            raise ValueError("roto")
+
+        mensajes = self.mensajes(TrabajoSegundoPlano(Ensamblador8086(), falla))
+        self.assertEqual(mensajes[-1][0], 'error')
+        self.assertIsInstance(mensajes[-1][1], ValueError)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import io
+import unittest
+
+from ensamblador import ensamblar
+from repl import Sesion, ejecutar
+
+PROGRAMA = [
+    ".data segment",
+    "    valor db 25, 3",
+    "ends",
+    ".code segment",
+    "inicio:",
+    "    lea si, valor",
+    "rutina PROC",
+    "vuelta: inc cx",
+    "    loope vuelta",
+    "rutina ENDP",
+    "    jne inicio",
+    "ends",
+]
+
+
+class TestSesion(unittest.TestCase):
+
+    def test_cada_linea_se_codifica_al_escribirla(self):
+        sesion = Sesion(['CODE=100h'])
+        pasos = [sesion.procesar(linea) for linea in PROGRAMA]
+        self.assertEqual(pasos[5].codificada['direccion'], '0100')
+        self.assertEqual(pasos[5].bytes, '8D 36 50 02')
+        self.assertEqual(pasos[8].bytes, 'E1 FD')
+        self.assertEqual([t.valor for t in pasos[7].tokens], ['vuelta:', 'inc', 'cx'])
+
+    def test_igual_que_ensamblar_el_programa(self):
+        sesion = Sesion()
+        for linea in PROGRAMA:
+            sesion.procesar(linea)
+        resultado = ensamblar('\n'.join(PROGRAMA))
+        self.assertEqual([lc['codigo_maquina'] for lc in sesion.asm.lineas_codificadas],
+                         [lc['codigo_maquina'] for lc in resultado.lineas_codificadas])
+        self.assertEqual(''.join(sesion.imagen()).split()[1:], resultado.codigo.hex(' ').upper().split())
+
+    def test_ambito_de_procedimiento(self):
+        sesion = Sesion()
+        for linea in PROGRAMA[:8]:
+            sesion.procesar(linea)
+        self.assertEqual(sesion.asm.ambito_actual.nombre, 'rutina')
+        self.assertIn('rutina::vuelta', '\n'.join(sesion.simbolos()))
+        sesion.procesar("rutina ENDP")
+        self.assertEqual(sesion.asm.ambito_actual.nombre, '')
+
+    def test_lineas_sin_contenido_y_errores(self):
+        sesion = Sesion()
+        self.assertIsNone(sesion.procesar("   ; comentario"))
+        self.assertIsNone(sesion.procesar(""))
+        sesion.procesar(".code segment")
+        paso = sesion.procesar("    bogus")
+        self.assertFalse(paso.correcta)
+        self.assertEqual(paso.bytes, '')
+        # La línea incorrecta no avanza el contador
+        self.assertEqual(sesion.procesar("    nop").codificada['direccion'], paso.codificada['direccion'])
+
+    def test_reiniciar(self):
+        sesion = Sesion()
+        for linea in PROGRAMA:
+            sesion.procesar(linea)
+        sesion.reiniciar()
+        self.assertEqual(sesion.simbolos(), [])
+        self.assertEqual(sesion.imagen(), [])
+
+
+class TestEjecutar(unittest.TestCase):
+
+    def test_comandos(self):
+        entrada = io.StringIO('\n'.join(PROGRAMA + [':simbolos', ':segmento DATA', ':estado', ':otro', ':salir',
+                                                    '    nop']) + '\n')
+        salida = io.StringIO()
+        self.assertEqual(ejecutar(Sesion(), entrada, salida, indicador=''), 0)
+        texto = salida.getvalue()
+        self.assertIn("Correcta: Instrucción LEA válida", texto)
+        self.assertIn("valor", texto)
+        self.assertIn("19 03", texto)
+        self.assertIn("segmento -", texto)
+        self.assertIn("Comando desconocido: :otro", texto)
+        self.assertNotIn("NOP", texto)
+
+    def test_excepcion_en_una_linea_no_termina_la_sesion(self):
+        sesion = Sesion()
+        codificar = sesion.asm.codificar_linea
+
+        def falla_en_aam(i, linea, *args):
+            if linea == 'aam':
+                raise RuntimeError("fallo del codificador")
+            return codificar(i, linea, *args)
+        sesion.asm.codificar_linea = falla_en_aam
+        entrada = io.StringIO(".code segment\naam\nnop\n:estado\n")
+        salida = io.StringIO()
+        self.assertEqual(ejecutar(sesion, entrada, salida, indicador=''), 0)
+        texto = salida.getvalue()
+        self.assertIn("Error interno: RuntimeError('fallo del codificador')", texto)
+        self.assertIn("CODE:0250  90", texto)
+        self.assertIn("2 líneas, 0 incorrectas", texto)
+        self.assertEqual(sesion.asm.lineas_codigo, [".code segment", "nop"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import asyncio
+import json
+import unittest
+
+from servicio import Servicio
+
+PROGRAMA = "\n".join([
+    ".data segment",
+    "    valor db 25",
+    "ends",
+    ".code segment",
+    "inicio:",
+    "    lea si, valor",
+    "    mov ax, bx",
+    "ends",
+])
+
+
+async def solicitar(puerto, metodo, ruta, datos=None):
+    lector, escritor = await asyncio.open_connection('127.0.0.1', puerto)
+    cuerpo = json.dumps(datos).encode() if datos is not None else b''
+    escritor.write(f"{metodo} {ruta} HTTP/1.1\r\nContent-Length: {len(cuerpo)}\r\nConnection: close\r\n\r\n".encode()
+                   + cuerpo)
+    respuesta = await lector.read()
+    escritor.close()
+    cabecera, _, cuerpo = respuesta.partition(b'\r\n\r\n')
+    return int(cabecera.split()[1]), json.loads(cuerpo)
+
+
+class TestServicio(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.servicio = Servicio(procesos=0, ventana=0.02)
+        await self.servicio.iniciar('127.0.0.1', 0)
+        self.puerto = self.servicio.direcciones[0][1]
+
+    async def asyncTearDown(self):
+        await self.servicio.detener()
+
+    async def test_ensamblar(self):
+        estado, respuesta = await solicitar(self.puerto, 'POST', '/ensamblar', {'texto': PROGRAMA})
+        self.assertEqual(estado, 200)
+        self.assertEqual(respuesta['errores'], 1)
+        incorrecta = respuesta['lineas_analizadas'][6]
+        self.assertEqual(incorrecta['resultado'], 'Incorrecta')
+        self.assertIsInstance(incorrecta['mensaje'], str)
+        self.assertLessEqual({'direccion', 'codigo_maquina'}, set(respuesta['lineas_codificadas'][0]))
+        self.assertEqual(respuesta['lineas_codificadas'][1]['datos'], ['19'])
+
+    async def test_validar_en_lotes(self):
+        lineas = [f"and al, {i}" for i in range(8)]
+        respuestas = await asyncio.gather(*(
+            solicitar(self.puerto, 'POST', '/validar', {'linea': linea}) for linea in lineas))
+        self.assertTrue(all(estado == 200 for estado, _ in respuestas))
+        self.assertTrue(all(r['resultados'][0]['resultado'] == 'Correcta' for _, r in respuestas))
+        _, estado = await solicitar(self.puerto, 'GET', '/estado')
+        self.assertEqual(estado['solicitudes'], 8)
+        self.assertLess(estado['lotes'], 8)
+
+    async def test_validar_con_contexto(self):
+        _, respuesta = await solicitar(self.puerto, 'POST', '/validar',
+                                       {'lineas': ['jne inicio', 'jne otra'], 'contexto': PROGRAMA})
+        self.assertEqual([r['resultado'] for r in respuesta['resultados']], ['Correcta', 'Incorrecta'])
+
+    async def test_errores(self):
+        self.assertEqual((await solicitar(self.puerto, 'POST', '/nada', {}))[0], 404)
+        self.assertEqual((await solicitar(self.puerto, 'GET', '/ensamblar'))[0], 405)
+        self.assertEqual((await solicitar(self.puerto, 'POST', '/ensamblar', {}))[0], 400)
+        for bases in ({'CODE': '100h'}, {'CODE': 1.5}, {'EXTRA': 0}, [256]):
+            estado, _ = await solicitar(self.puerto, 'POST', '/ensamblar', {'texto': PROGRAMA, 'bases': bases})
+            self.assertEqual(estado, 400, bases)
+
+
+class TestServicioProcesos(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.servicio = Servicio(procesos=2, ventana=0.02)
+        await self.servicio.iniciar('127.0.0.1', 0)
+        self.puerto = self.servicio.direcciones[0][1]
+
+    async def asyncTearDown(self):
+        await self.servicio.detener()
+
+    async def test_connection_close_con_grupo_de_procesos(self):
+        # Los procesos no deben heredar la conexión: el cliente tiene que ver el fin de archivo
+        estado, respuesta = await asyncio.wait_for(
+            solicitar(self.puerto, 'POST', '/validar', {'linea': 'xor ax, bx'}), 10)
+        self.assertEqual(estado, 200)
+        self.assertEqual(respuesta['resultados'][0]['resultado'], 'Correcta')
+
+    async def test_lote_repartido_entre_procesos(self):
+        respuestas = await asyncio.wait_for(asyncio.gather(*(
+            solicitar(self.puerto, 'POST', '/ensamblar', {'texto': PROGRAMA}) for _ in range(6))), 20)
+        self.assertTrue(all(estado == 200 for estado, _ in respuestas))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+
+import ensamblador
+from diagnosticos import Codigo
+from ensamblador import Ensamblador8086, LimitesAnalisis, Simbolo, TipoToken
+
+
+class TestValidarTexto(unittest.TestCase):
+
+    def setUp(self):
+        self.asm = Ensamblador8086()
+
+    def test_lineas_sueltas(self):
+        self.assertEqual(self.asm.validar_texto("XOR AX, BX")[0], "Correcta")
+        self.assertEqual(self.asm.validar_texto("MOV AX, BX")[0], "Incorrecta")
+        self.assertEqual(self.asm.validar_texto("valor db 25", 'data')[0], "Correcta")
+        self.assertEqual(self.asm.validar_texto("valor db 25", None)[1].codigo, Codigo.FUERA_DE_SEGMENTO)
+        self.assertEqual(self.asm.validar_texto("   ; solo comentario")[1].codigo, Codigo.LINEA_VACIA)
+
+    def test_tokenizar(self):
+        tokens = self.asm.tokenizar("XOR AX, BX")
+        self.assertEqual([t.tipo for t in tokens],
+                         [TipoToken.INSTRUCCION, TipoToken.REGISTRO, TipoToken.REGISTRO])
+
+    def test_cache_y_version_de_simbolos(self):
+        resultado = self.asm.validar_texto("jne ciclo")
+        self.assertEqual(resultado[1].codigo, Codigo.ETIQUETA_NO_DEFINIDA)
+        self.assertIs(self.asm.validar_texto("jne ciclo"), resultado)
+        self.assertEqual(self.asm.aciertos_validacion, 1)
+
+        # Definir la etiqueta cambia la versión: la línea se valida de nuevo
+        self.asm.tabla_simbolos['ciclo'] = Simbolo('ciclo', 'Etiqueta', '', '')
+        self.assertEqual(self.asm.validar_texto("jne ciclo")[0], "Correcta")
+        self.assertEqual(self.asm.aciertos_validacion, 1)
+
+    def test_cache_y_limites(self):
+        linea = "tabla db 1, 2, 3, 4"
+        self.assertEqual(self.asm.validar_texto(linea, 'DATA')[0], "Correcta")
+        self.asm.limites = LimitesAnalisis(max_longitud_linea=10)
+        self.assertEqual(self.asm.validar_texto(linea, 'DATA')[1].codigo, Codigo.LINEA_DEMASIADO_LARGA)
+        self.asm.limites.max_longitud_linea = None
+        self.asm.limites.max_tokens_linea = 4
+        self.assertEqual(self.asm.validar_texto(linea, 'DATA')[1].codigo, Codigo.DEMASIADOS_TOKENS)
+        self.assertEqual(self.asm.aciertos_validacion, 0)
+
+    def test_cache_acotada(self):
+        for i in range(ensamblador.TAMANO_CACHE_VALIDACION + 10):
+            self.asm.validar_texto(f"and al, {i}")
+        self.assertLessEqual(len(self.asm._cache_validacion), ensamblador.TAMANO_CACHE_VALIDACION)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import io
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from ensamblador import Ensamblador8086
+from vigilancia import Inotify, Vigilante, firma
+
+
+def construir(ruta):
+    ensamblador = Ensamblador8086()
+    if not ensamblador.cargar_archivo(ruta):
+        return None
+    ensamblador.analizar_sintaxis()
+    ensamblador.generar_codificacion()
+    return ensamblador
+
+
+class TestVigilante(unittest.TestCase):
+
+    def setUp(self):
+        self.temporal = tempfile.TemporaryDirectory()
+        self.directorio = Path(self.temporal.name)
+        self.escribir('datos.inc', "valor db 5\n")
+        self.escribir('a.asm', ".data segment\n    INCLUDE datos.inc\nends\n"
+                               ".code segment\n    lea si, valor\nends\n")
+        self.escribir('b.asm', ".code segment\n    nop\nends\n")
+        self.salida = io.StringIO()
+        self.vigilante = Vigilante([str(self.directorio)], construir, salida=self.salida, inotify=False)
+        self.vigilante.construir_todo()
+
+    def tearDown(self):
+        self.temporal.cleanup()
+
+    def escribir(self, nombre, texto):
+        ruta = self.directorio / nombre
+        ruta.write_text(texto, encoding='utf-8')
+        # mtime distinto aunque el sistema de archivos tenga poca resolución
+        os.utime(ruta, ns=(time.time_ns(), time.time_ns() + len(texto) * 1000))
+        return str(ruta.resolve())
+
+    def nombres(self, archivos):
+        return sorted(Path(a).name for a in archivos)
+
+    def test_construccion_inicial(self):
+        self.assertEqual(self.nombres(self.vigilante.archivos), ['a.asm', 'b.asm'])
+        self.assertEqual(self.vigilante.reconstrucciones, 2)
+        a = str((self.directorio / 'a.asm').resolve())
+        self.assertIn(str((self.directorio / 'datos.inc').resolve()), self.vigilante.dependencias[a])
+        self.assertIn('a.asm', self.salida.getvalue())
+
+    def test_sin_cambios_no_reconstruye(self):
+        self.assertEqual(self.vigilante.revisar(self.vigilante.leer_firmas()), [])
+        self.assertEqual(self.vigilante.reconstrucciones, 2)
+
+    def test_cambio_de_include_reconstruye_solo_quien_lo_incluye(self):
+        self.escribir('datos.inc', "valor db 7\n")
+        reconstruidos = self.vigilante.revisar(self.vigilante.leer_firmas())
+        self.assertEqual(self.nombres(reconstruidos), ['a.asm'])
+        self.assertIn('1 archivos sin cambios', self.salida.getvalue())
+
+    def test_errores_en_el_informe(self):
+        self.escribir('b.asm', ".code segment\n    bogus\nends\n")
+        self.assertEqual(self.nombres(self.vigilante.revisar(self.vigilante.leer_firmas())), ['b.asm'])
+        self.assertIn("línea 2: 'bogus'", self.salida.getvalue())
+
+    def test_excepcion_al_construir_no_detiene_la_vigilancia(self):
+        def falla_en_b(ruta):
+            if ruta.endswith('b.asm'):
+                raise RuntimeError("fallo del codificador")
+            return construir(ruta)
+        self.vigilante.construir = falla_en_b
+        self.escribir('datos.inc', "valor db 7\n")
+        self.escribir('b.asm', ".code segment\n    aam\nends\n")
+        self.assertEqual(self.nombres(self.vigilante.revisar(self.vigilante.leer_firmas())), ['a.asm', 'b.asm'])
+        self.assertIn("b.asm: error interno: RuntimeError('fallo del codificador')", self.salida.getvalue())
+        b = str((self.directorio / 'b.asm').resolve())
+        self.assertIsNone(self.vigilante.resultados[b])
+        self.vigilante.construir = construir
+        self.escribir('b.asm', ".code segment\n    nop\nends\n")
+        self.assertEqual(self.nombres(self.vigilante.revisar(self.vigilante.leer_firmas())), ['b.asm'])
+        self.assertIsNotNone(self.vigilante.resultados[b])
+
+    def test_archivo_nuevo_en_directorio(self):
+        self.escribir('c.asm', ".code segment\n    cmc\nends\n")
+        directorio = str(self.directorio.resolve())
+        self.vigilante.firmas[directorio] = None      # como si el directorio hubiera cambiado
+        self.assertEqual(self.nombres(self.vigilante.revisar(self.vigilante.leer_firmas())), ['c.asm'])
+        self.assertEqual(len(self.vigilante.archivos), 3)
+
+    def test_rafaga_se_agrupa(self):
+        self.vigilante.intervalo = self.vigilante.espera = 0.01
+        self.escribir('b.asm', ".code segment\n    aam\nends\n")
+        firmas = self.vigilante.esperar_cambios()
+        self.assertNotEqual(firmas, self.vigilante.firmas)
+        self.assertEqual(firmas, self.vigilante.leer_firmas())
+
+    def test_firma_de_archivo_inexistente(self):
+        self.assertIsNone(firma(str(self.directorio / 'no_existe.asm')))
+
+
+class TestInotify(unittest.TestCase):
+
+    def test_avisa_actividad(self):
+        try:
+            inotify = Inotify()
+        except OSError:
+            self.skipTest("inotify no disponible")
+        with tempfile.TemporaryDirectory() as directorio:
+            try:
+                inotify.vigilar(directorio)
+                self.assertFalse(inotify.esperar(0))
+                Path(directorio, 'x.asm').write_text("nop\n")
+                self.assertTrue(inotify.esperar(1))
+                self.assertFalse(inotify.esperar(0))
+            finally:
+                inotify.cerrar()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,258 @@
+"""
+Modo vigilancia (ensamblador.py --watch): reensambla los .asm al guardarlos.
+
+Se vigilan los archivos dados (los directorios aportan todos sus *.asm) y los
+que cada uno incluye con INCLUDE. Un cambio se detecta comparando la firma de
+stat (mtime, tamaño, inodo) de cada ruta; en Linux inotify despierta al
+vigilante en cuanto hay actividad en sus directorios y, donde no está
+disponible, se sondea cada INTERVALO_SONDEO segundos. Los guardados en ráfaga
+(el editor que escribe varias veces, o varios archivos a la vez) se agrupan:
+se reensambla cuando las firmas dejan de cambiar durante ESPERA_RAFAGA.
+
+Solo se reensamblan los archivos que dependen de alguna ruta cambiada; los
+demás conservan su último resultado, y los INCLUDE sin cambios salen de
+CACHE_INCLUDES sin volver a leerse ni tokenizarse.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, TextIO, Tuple
+
+INTERVALO_SONDEO = 0.25     # Segundos entre revisiones sin inotify
+ESPERA_RAFAGA = 0.1         # Segundos sin cambios antes de reensamblar
+ESPERA_INOTIFY = 2.0        # Aun con inotify se revisa cada tanto (directorios nuevos, FS de red)
+ERRORES_MOSTRADOS = 10
+
+Firma = Optional[Tuple[int, int, int]]     # (mtime_ns, tamaño, inodo); None si no existe
+
+
+def firma(ruta: str) -> Firma:
+    try:
+        info = os.stat(ruta)
+    except OSError:
+        return None
+    return info.st_mtime_ns, info.st_size, info.st_ino
+
+
+def expandir(rutas: List[str]) -> List[str]:
+    """Archivos a ensamblar: los dados y los *.asm de los directorios dados"""
+    archivos = []
+    for ruta in rutas:
+        camino = Path(ruta)
+        if camino.is_dir():
+            archivos.extend(str(p.resolve()) for p in sorted(camino.rglob('*.asm')))
+        else:
+            archivos.append(str(camino.resolve()))
+    return list(dict.fromkeys(archivos))
+
+
+class Inotify:
+    """inotify de Linux vía ctypes. Solo avisa que hubo actividad; las firmas dicen qué cambió."""
+
+    IN_MODIFY = 0x002
+    IN_ATTRIB = 0x004
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    MASCARA = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+    def __init__(self):
+        """Lanza OSError si el sistema no tiene inotify"""
+        if not sys.platform.startswith('linux'):
+            raise OSError("inotify solo existe en Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError("libc sin inotify")
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            numero = ctypes.get_errno()
+            raise OSError(numero, os.strerror(numero))
+        self._libc = libc
+        self.fd = fd
+        self.directorios: Dict[str, int] = {}
+
+    def vigilar(self, directorio: str):
+        if directorio in self.directorios:
+            return
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directorio), self.MASCARA)
+        if wd >= 0:
+            self.directorios[directorio] = wd
+
+    def esperar(self, segundos: float) -> bool:
+        """True si hubo actividad antes de 'segundos'. Descarta los eventos pendientes."""
+        listos, _, _ = select.select([self.fd], [], [], segundos)
+        if not listos:
+            return False
+        try:
+            while os.read(self.fd, 65536):
+                pass
+        except BlockingIOError:
+            pass
+        return True
+
+    def cerrar(self):
+        os.close(self.fd)
+
+
+class Vigilante:
+    """
+    Mantiene el último resultado de cada archivo y lo reconstruye cuando cambia
+    él o alguno de sus INCLUDE. 'construir(ruta)' ensambla un archivo y retorna
+    el Ensamblador8086 (o None si no se pudo cargar).
+    """
+
+    def __init__(self, rutas: List[str], construir: Callable[[str], object],
+                 salida: TextIO = sys.stderr, inotify: bool = True,
+                 intervalo: float = INTERVALO_SONDEO, espera: float = ESPERA_RAFAGA):
+        self.rutas = rutas
+        self.directorios = [str(Path(r).resolve()) for r in rutas if Path(r).is_dir()]
+        self.construir = construir
+        self.salida = salida
+        self.intervalo = intervalo
+        self.espera = espera
+        self.archivos: List[str] = []
+        self.resultados: Dict[str, object] = {}
+        self.dependencias: Dict[str, Set[str]] = {}     # archivo -> él mismo y sus INCLUDE
+        self.firmas: Dict[str, Firma] = {}
+        self.reconstrucciones = 0
+        self.inotify: Optional[Inotify] = None
+        if inotify:
+            try:
+                self.inotify = Inotify()
+            except OSError:
+                self.inotify = None
+
+    # === Firmas ===
+
+    def vigiladas(self) -> Set[str]:
+        rutas = set(self.directorios)
+        for archivo in self.archivos:
+            rutas |= self.dependencias.get(archivo, {archivo})
+        return rutas
+
+    def leer_firmas(self) -> Dict[str, Firma]:
+        return {ruta: firma(ruta) for ruta in self.vigiladas()}
+
+    def _actualizar_inotify(self):
+        if self.inotify is not None:
+            for ruta in self.vigiladas():
+                directorio = ruta if ruta in self.directorios else os.path.dirname(ruta)
+                if os.path.isdir(directorio):
+                    self.inotify.vigilar(directorio)
+
+    # === Reconstrucción ===
+
+    def reconstruir(self, archivo: str):
+        inicio = time.perf_counter()
+        try:
+            ensamblador = self.construir(archivo)
+        except Exception as error:
+            # Un fallo del ensamblador en un archivo no detiene la vigilancia de los demás;
+            # se conservan sus dependencias para reconstruirlo cuando cambien
+            transcurrido = (time.perf_counter() - inicio) * 1000
+            self.reconstrucciones += 1
+            self.resultados[archivo] = None
+            self.dependencias.setdefault(archivo, {archivo})
+            self.informar(f"{os.path.relpath(archivo)}: error interno: {error!r} ({transcurrido:.1f} ms)")
+            return
+        transcurrido = (time.perf_counter() - inicio) * 1000
+        self.reconstrucciones += 1
+        self.resultados[archivo] = ensamblador
+        nombre = os.path.relpath(archivo)
+        if ensamblador is None:
+            self.dependencias[archivo] = {archivo}
+            self.informar(f"{nombre}: no se pudo cargar ({transcurrido:.1f} ms)")
+            return
+        incluidos = getattr(ensamblador.procesador_includes, 'incluidos', [])
+        self.dependencias[archivo] = {archivo, *incluidos}
+        errores = [a for a in ensamblador.lineas_analizadas if a['resultado'] == 'Incorrecta']
+        detalle = f", {len(incluidos)} INCLUDE" if incluidos else ''
+        self.informar(f"{nombre}: {transcurrido:.1f} ms, {len(ensamblador.lineas_codigo)} líneas{detalle}, "
+                      f"{len(errores)} errores")
+        for analisis in errores[:ERRORES_MOSTRADOS]:
+            print(f"    línea {analisis['origen']}: {analisis['mensaje']}", file=self.salida)
+        if len(errores) > ERRORES_MOSTRADOS:
+            print(f"    ... y {len(errores) - ERRORES_MOSTRADOS} más", file=self.salida)
+
+    def construir_todo(self):
+        self.archivos = expandir(self.rutas)
+        for archivo in self.archivos:
+            self.reconstruir(archivo)
+        self.firmas = self.leer_firmas()
+        self._actualizar_inotify()
+
+    def revisar(self, firmas: Dict[str, Firma]) -> List[str]:
+        """Reconstruye lo afectado por las rutas cuya firma cambió; retorna los archivos reconstruidos"""
+        cambiadas = {ruta for ruta, actual in firmas.items() if actual != self.firmas.get(ruta)}
+        if not cambiadas:
+            return []
+        if cambiadas & set(self.directorios):
+            # Se agregó, quitó o renombró algún .asm de un directorio vigilado
+            archivos = expandir(self.rutas)
+            for archivo in set(self.archivos) - set(archivos):
+                self.resultados.pop(archivo, None)
+                self.dependencias.pop(archivo, None)
+            cambiadas |= set(archivos) - set(self.archivos)
+            self.archivos = archivos
+        afectados = [a for a in self.archivos
+                     if a in cambiadas or self.dependencias.get(a, {a}) & cambiadas]
+        afectados = [a for a in afectados if firmas.get(a, firma(a)) is not None]
+        for archivo in afectados:
+            self.reconstruir(archivo)
+        sin_cambios = len(self.archivos) - len(afectados)
+        if afectados and sin_cambios:
+            self.informar(f"{sin_cambios} archivos sin cambios (resultado anterior)")
+        self.firmas = self.leer_firmas()
+        self._actualizar_inotify()
+        return afectados
+
+    # === Bucle ===
+
+    def esperar_cambios(self) -> Dict[str, Firma]:
+        """Bloquea hasta que cambie alguna ruta vigilada y sus firmas se estabilicen"""
+        while True:
+            if self.inotify is not None:
+                self.inotify.esperar(ESPERA_INOTIFY)
+            else:
+                time.sleep(self.intervalo)
+            firmas = self.leer_firmas()
+            if firmas != self.firmas:
+                break
+        # Agrupar la ráfaga de guardados
+        while True:
+            if self.inotify is not None:
+                while self.inotify.esperar(self.espera):
+                    pass
+            else:
+                time.sleep(self.espera)
+            nuevas = self.leer_firmas()
+            if nuevas == firmas:
+                return firmas
+            firmas = nuevas
+
+    def informar(self, mensaje: str):
+        print(f"[{time.strftime('%H:%M:%S')}] {mensaje}", file=self.salida, flush=True)
+
+    def ejecutar(self) -> int:
+        modo = 'inotify' if self.inotify is not None else f'sondeo cada {self.intervalo * 1000:.0f} ms'
+        self.construir_todo()
+        self.informar(f"Vigilando {len(self.archivos)} archivos ({modo}); Ctrl+C para salir")
+        try:
+            while True:
+                self.revisar(self.esperar_cambios())
+        except KeyboardInterrupt:
+            return 0
+        finally:
+            if self.inotify is not None:
+                self.inotify.cerrar()
+
+
+def vigilar(rutas: List[str], construir: Callable[[str], object], sondeo: bool = False) -> int:
+    return Vigilante(rutas, construir, inotify=not sondeo).ejecutar()